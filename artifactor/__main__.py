@@ -5,7 +5,8 @@ import bottle
 import click
 
 from artifactor import Artifactor, initialize
-from artifactor.plugins import filedump, logger, merkyl, ostriz, post_result, reporter, video
+from artifactor.plugins import (
+    filedump, incremental_reporter, logger, merkyl, ostriz, post_result, reporter, video)
 from cfme.utils.conf import env
 from cfme.utils.net import random_port
 from cfme.utils.path import log_path
@@ -29,6 +30,7 @@ def run(port, run_id=None):
     art.register_plugin(video.Video, "video")
     art.register_plugin(filedump.Filedump, "filedump")
     art.register_plugin(reporter.Reporter, "reporter")
+    art.register_plugin(incremental_reporter.IncrementalReporter, "incremental-reporter")
     art.register_plugin(post_result.PostResult, "post-result")
     art.register_plugin(ostriz.Ostriz, "ostriz")
 
@@ -39,6 +41,7 @@ def run(port, run_id=None):
     art.configure_plugin("video")
     art.configure_plugin("filedump")
     art.configure_plugin("reporter")
+    art.configure_plugin("incremental-reporter")
     art.configure_plugin("post-result")
     art.configure_plugin("ostriz")
     art.fire_hook("start_session", run_id=run_id)
@@ -9,17 +9,28 @@ artifactor:
         filedump:
             enabled: True
             plugin: filedump
+
+Contents are either sent inline with the hook (``contents``, optionally base64 encoded) or
+written to the blob store of :py:mod:`cfme.utils.blob_store` by the test process, in which case
+the hook only carries ``blob_digest``, ``blob_size`` and ``media_type`` and the blob is linked to
+the artifact file.
 """
 
 import base64
 import os
 import re
+import tempfile
 
 import six
 
 from artifactor import ArtifactorBasePlugin
 from cfme.utils import normalize_text, safe_string
+from cfme.utils.blob_store import blob_store
 
+#: Types of the artifacts the ``sanitize`` hook masks secrets in, they are never blobs
+SANITIZED_FILE_TYPES = frozenset(
+    ["traceback", "short_tb", "rbac", "soft_traceback", "soft_short_tb"]
+)
 
 class Filedump(ArtifactorBasePlugin):
     def plugin_initialize(self):
@@ -48,7 +59,7 @@ class Filedump(ArtifactorBasePlugin):
     def filedump(
         self,
         description,
-        contents,
+        contents=None,
         slaveid=None,
         mode="w",
         contents_base64=False,
@@ -60,6 +71,10 @@ class Filedump(ArtifactorBasePlugin):
         group_id=None,
         test_name=None,
         test_location=None,
+        blob_digest=None,
+        blob_size=None,
+        media_type=None,
+        log_dir=None,
     ):
         if not slaveid:
             slaveid = "Master"
@@ -91,9 +106,13 @@ class Filedump(ArtifactorBasePlugin):
                 "description": description,
                 "os_filename": os_filename,
                 "group_id": group_id,
+                "blob_digest": blob_digest,
+                "media_type": media_type,
             }
         )
-        if not dont_write:
+        if blob_digest is not None:
+            blob_store(log_dir).link(blob_digest, os_filename)
+        elif not dont_write:
             if os.path.isfile(os_filename):
                 os.remove(os_filename)
             with open(os_filename, mode) as f:
@@ -109,13 +128,7 @@ class Filedump(ArtifactorBasePlugin):
         filename = None
         try:
             for f in artifacts[test_ident]["files"]:
-                if f["file_type"] not in {
-                    "traceback",
-                    "short_tb",
-                    "rbac",
-                    "soft_traceback",
-                    "soft_short_tb",
-                }:
+                if f["file_type"] not in SANITIZED_FILE_TYPES:
                     continue
                 filename = f["os_filename"]
                 with open(filename) as f:
@@ -124,7 +137,11 @@ class Filedump(ArtifactorBasePlugin):
                     if not isinstance(word, six.string_types):
                         word = str(word)
                     data = data.replace(word, "*" * len(word))
-                with open(filename, "w") as f:
+                # replace the file rather than rewriting it in place
+                fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(filename))
+                with os.fdopen(fd, "w") as f:
                     f.write(data)
+                os.chmod(tmp_filename, 0o644)
+                os.rename(tmp_filename, filename)
         except KeyError:
             pass
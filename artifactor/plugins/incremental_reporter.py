@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+""" Incremental reporter plugin for Artifactor
+
+Unlike the ``reporter`` plugin, which rebuilds the whole HTML report on every ``build_report``,
+this plugin keeps one compact record per test, updated as the ``report_test`` and ``finish_test``
+events arrive. Records are written as JSON files sharded by test module, plus an ``index.json``
+with the per-module statistics. ``test_report_lazy.html`` is a static page which loads the index
+and only fetches the shard of a module once its branch is expanded. As it loads the data with
+XHR, the page has to be served over HTTP (like jenkins artifacts are).
+
+Add a stanza to the artifactor config like this,
+artifactor:
+    log_dir: /home/username/outdir
+    per_run: test #test, run, None
+    reuse_dir: True
+    plugins:
+        incremental-reporter:
+            enabled: True
+            plugin: incremental-reporter
+            flush_interval: 30 #seconds between writes of changed shards during the run
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+from artifactor import ArtifactorBasePlugin
+from artifactor.plugins.reporter import URL, overall_test_status
+from cfme.utils.path import template_path
+
+#: Directory under the artifact dir holding the index and the shards
+DATA_DIR = "report_data"
+#: Bumped when the layout of the JSON files changes
+DATA_VERSION = 1
+OUTCOMES = ("passed", "failed", "skipped", "error", "xpassed", "xfailed")
+
+
+def shard_name(module):
+    """Returns the file name of the shard holding the tests of ``module``"""
+    safe = re.sub(r"[^a-zA-Z0-9_.\-]", "_", module)[-60:]
+    digest = hashlib.sha1(module.encode("utf-8")).hexdigest()[:8]
+    return "{}-{}.json".format(safe, digest)
+
+
+def write_json(path, data):
+    """Writes ``data`` atomically so the page never loads a partial file"""
+    tmp = "{}.tmp".format(path)
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"), sort_keys=True)
+    os.rename(tmp, path)
+
+
+class TestRecord(object):
+    """Compact, JSON serializable state of a single test"""
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self.outcome = None
+        self.statuses = {}
+        self.duration = 0
+        self.start_time = None
+        self.slaveid = None
+        self.short_tb = None
+        self.qa_contact = []
+        self.files = []
+        self.skip = None
+        self._seen_files = set()
+
+    def update(self, test, log_dir):
+        """Refreshes the record from the artifacts entry of the test
+
+        Only files which were not seen yet are looked at, so ``short_tb`` and ``qa_contact`` are
+        read at most once.
+        """
+        for when, status in test.get("statuses", {}).items():
+            if when != "overall":
+                self.set_status(when, *status)
+        self.slaveid = test.get("slaveid", self.slaveid)
+        self.start_time = test.get("start_time", self.start_time)
+        if self.start_time is not None:
+            self.duration = test.get("finish_time", time.time()) - self.start_time
+        skipped = test.get("skipped")
+        if skipped and skipped.get("type") in ("provider", "blocker"):
+            reason = skipped.get("reason")
+            if skipped["type"] == "blocker":
+                reason = sorted(set(reason or []))
+            self.skip = [skipped["type"], reason]
+        for file_dict in test.get("files", []):
+            os_filename = file_dict["os_filename"]
+            if os_filename in self._seen_files:
+                continue
+            self._seen_files.add(os_filename)
+            if file_dict["file_type"] == "qa_contact":
+                with open(os_filename, "r") as qafile:
+                    self.qa_contact.extend(csv.reader(qafile, delimiter=",", quotechar='"'))
+            elif file_dict["file_type"] == "short_tb":
+                with open(os_filename, "r") as short_tb:
+                    self.short_tb = short_tb.read()
+            else:
+                self.files.append(
+                    [
+                        file_dict["group_id"],
+                        os_filename.replace(log_dir, ""),
+                        file_dict["description"],
+                        file_dict["display_type"],
+                        file_dict["display_glyph"],
+                    ]
+                )
+
+    def set_status(self, when, outcome, xfail):
+        self.statuses[when] = (outcome, xfail)
+        self.outcome = overall_test_status(self.statuses)
+
+    def as_dict(self):
+        data = {"n": self.name, "o": self.outcome or "in_progress", "d": round(self.duration, 1)}
+        if self.slaveid:
+            data["s"] = self.slaveid
+        if self.short_tb:
+            data["tb"] = self.short_tb
+            urls = URL.findall(self.short_tb)
+            if urls:
+                data["u"] = urls
+        if self.qa_contact:
+            data["qa"] = self.qa_contact
+        if self.files:
+            data["f"] = self.files
+        if self.skip:
+            data["sk"] = self.skip
+        return data
+
+
+class ReportData(object):
+    """Test records of a session, grouped by module, and their on-disk JSON representation"""
+
+    def __init__(self):
+        self.modules = {}
+        self.dirty = set()
+        self.session = {}
+        self.last_flush = 0
+
+    def record(self, test_location, test_name):
+        tests = self.modules.setdefault(test_location, {})
+        if test_name not in tests:
+            tests[test_name] = TestRecord(test_location, test_name)
+        self.dirty.add(test_location)
+        return tests[test_name]
+
+    def flush(self, artifact_dir):
+        """Writes the changed shards, the index and the static page"""
+        data_dir = os.path.join(artifact_dir, DATA_DIR)
+        if not os.path.isdir(data_dir):
+            os.makedirs(data_dir)
+        for module in self.dirty:
+            tests = sorted(self.modules[module].values(), key=lambda record: record.name)
+            write_json(
+                os.path.join(data_dir, shard_name(module)),
+                {"module": module, "tests": [record.as_dict() for record in tests]},
+            )
+        self.dirty = set()
+        write_json(os.path.join(data_dir, "index.json"), self.index())
+        page = os.path.join(artifact_dir, "test_report_lazy.html")
+        if not os.path.exists(page):
+            shutil.copy(template_path.join("test_report_lazy.html").strpath, page)
+        dist = os.path.join(artifact_dir, "dist")
+        if not os.path.exists(dist):
+            shutil.copytree(template_path.join("dist").strpath, dist)
+        self.last_flush = time.time()
+
+    def index(self):
+        """Per-module statistics, enough to render the collapsed tree"""
+        counts = dict.fromkeys(OUTCOMES, 0)
+        index_modules = {}
+        for module, tests in self.modules.items():
+            stats = dict.fromkeys(OUTCOMES, 0)
+            duration = 0
+            for record in tests.values():
+                if record.outcome in stats:
+                    stats[record.outcome] += 1
+                    counts[record.outcome] += 1
+                duration += record.duration
+            index_modules[module] = {
+                "shard": shard_name(module),
+                "stats": stats,
+                "duration": round(duration, 1),
+                "tests": len(tests),
+            }
+        return {
+            "version": DATA_VERSION,
+            "session": self.session,
+            "generated": time.time(),
+            "counts": counts,
+            "modules": index_modules,
+        }
+
+
+class IncrementalReporter(ArtifactorBasePlugin):
+    def plugin_initialize(self):
+        self.register_plugin_hook("report_test", self.report_test)
+        self.register_plugin_hook("finish_test", self.finish_test)
+        self.register_plugin_hook("build_report", self.build_report)
+        self.register_plugin_hook("finish_session", self.finish_session)
+        self.register_plugin_hook("session_info", self.session_info)
+
+    def configure(self):
+        self.flush_interval = self.data.get("flush_interval", 30)
+        self.report_data = ReportData()
+        self.configured = True
+
+    def _update(self, artifacts, artifact_dir, test_location, test_name):
+        test_ident = "{}/{}".format(test_location, test_name)
+        record = self.report_data.record(test_location, test_name)
+        record.update(artifacts.get(test_ident, {}), artifact_dir.rstrip("/") + "/")
+        return record
+
+    @ArtifactorBasePlugin.check_configured
+    def session_info(self, version=None, build=None, stream=None, fw_version=None):
+        self.report_data.session = {
+            "version": version,
+            "build": build,
+            "stream": stream,
+            "fw_version": fw_version,
+        }
+
+    @ArtifactorBasePlugin.check_configured
+    def report_test(
+        self, artifacts, artifact_dir, test_location, test_name, test_xfail, test_when, test_outcome
+    ):
+        record = self._update(artifacts, artifact_dir, test_location, test_name)
+        # The reporter plugin may not have merged this phase into the artifacts yet
+        record.set_status(test_when, test_outcome, test_xfail)
+
+    @ArtifactorBasePlugin.check_configured
+    def finish_test(self, artifacts, artifact_dir, test_location, test_name):
+        self._update(artifacts, artifact_dir, test_location, test_name)
+
+    @ArtifactorBasePlugin.check_configured
+    def build_report(self, artifact_dir):
+        if time.time() - self.report_data.last_flush >= self.flush_interval:
+            self.report_data.flush(artifact_dir)
+
+    @ArtifactorBasePlugin.check_configured
+    def finish_session(self, artifact_dir):
+        self.report_data.flush(artifact_dir)
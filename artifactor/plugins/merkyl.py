@@ -14,13 +14,30 @@ artifactor:
                 - /var/www/miq/vmdb/log/evm.log
                 - /var/www/miq/vmdb/log/production.log
                 - /var/www/miq/vmdb/log/automation.log
+            mode: offsets #reset (restart the log tails every test) or offsets
+            fetch_on: #outcomes to fetch logs for, all tests if not set
+                - failed
+                - error
+            gzip: True #compress the logs on the wire
+            workers: 4 #logs fetched concurrently
+            timeout: 15
+
+In ``reset`` mode the tails of all logs are restarted when a test starts and their whole content
+is fetched when it finishes. In ``offsets`` mode the tails keep running for the whole session,
+the sizes of the logs are recorded when a test starts and only the part written since then is
+fetched. Merkyl versions which don't know offsets fall back to ``reset``. ``fetch_on`` is matched
+against the outcome of the test when it finishes, so errors in the teardown are not taken into
+account.
 """
 
 import os.path
+from concurrent import futures
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from artifactor import ArtifactorBasePlugin
+from artifactor.plugins.reporter import overall_test_status
 
 
 class Merkyl(ArtifactorBasePlugin):
@@ -31,6 +48,8 @@ class Merkyl(ArtifactorBasePlugin):
             self.port = port
             self.in_progress = False
             self.extra_files = set()
+            # Log sizes at the start of the test, None when the logs were reset instead
+            self.offsets = None
 
     def plugin_initialize(self):
         self.register_plugin_hook("setup_merkyl", self.start_session)
@@ -43,9 +62,39 @@ class Merkyl(ArtifactorBasePlugin):
     def configure(self):
         self.files = self.data.get("log_files", [])
         self.port = self.data.get("port", "8192")
+        self.mode = self.data.get("mode", "reset")
+        self.fetch_on = self.data.get("fetch_on")
+        self.gzip = self.data.get("gzip", False)
+        self.timeout = self.data.get("timeout", 15)
+        workers = self.data.get("workers", 4)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=workers))
+        self.executor = futures.ThreadPoolExecutor(max_workers=workers)
         self.tests = {}
         self.configured = True
 
+    def _get(self, ip, path):
+        url = "http://{}:{}/{}".format(ip, self.port, path.lstrip("/"))
+        headers = {"Accept-Encoding": "gzip" if self.gzip else "identity"}
+        return self.session.get(url, timeout=self.timeout, headers=headers)
+
+    def _fetch(self, test, tail):
+        """Returns the content of a log since the start of the test"""
+        if test.offsets is not None:
+            path = "slice/{}/{}".format(tail, test.offsets.get(tail, 0))
+        else:
+            path = "get/{}".format(tail)
+        try:
+            return self._get(test.ip, path).content
+        except requests.RequestException as e:
+            return "Merkyl: could not fetch {}: {}".format(tail, e)
+
+    def _wanted(self, artifacts, test_ident):
+        if not self.fetch_on:
+            return True
+        statuses = artifacts.get(test_ident, {}).get("statuses")
+        return bool(statuses) and overall_test_status(statuses) in self.fetch_on
+
     @ArtifactorBasePlugin.check_configured
     def start_test(self, test_name, test_location, ip):
         test_ident = "{}/{}".format(test_location, test_name)
@@ -55,54 +104,52 @@ class Merkyl(ArtifactorBasePlugin):
                 return None
         else:
             self.tests[test_ident] = self.Test(test_ident, ip, self.port)
-        url = "http://{}:{}/resetall".format(ip, self.port)
-        requests.get(url, timeout=15)
-
-        self.tests[test_ident].in_progress = True
+        test = self.tests[test_ident]
+        if self.mode == "offsets":
+            response = self._get(ip, "offsets")
+            if response.status_code == 404:
+                print("Merkyl on {} does not support offsets, resetting the logs".format(ip))
+                self.mode = "reset"
+            else:
+                test.offsets = response.json()
+        if test.offsets is None:
+            self._get(ip, "resetall")
+
+        test.in_progress = True
 
     @ArtifactorBasePlugin.check_configured
     def get_log(self, test_name, test_location, filename):
         test_ident = "{}/{}".format(test_location, test_name)
-        ip = self.tests[test_ident].ip
-
         base, tail = os.path.split(filename)
-        url = "http://{}:{}/get/{}".format(ip, self.port, tail)
-        doc = requests.get(url, timeout=15)
-        content = doc.content
-        return {"merkyl_content": content}, None
+        return {"merkyl_content": self._fetch(self.tests[test_ident], tail)}, None
 
     @ArtifactorBasePlugin.check_configured
     def add_log(self, test_name, test_location, filename):
         test_ident = "{}/{}".format(test_location, test_name)
-        ip = self.tests[test_ident].ip
+        test = self.tests[test_ident]
 
         if filename not in self.files:
-            if filename not in self.tests[test_ident].extra_files:
-                self.tests[test_ident].extra_files.add(filename)
-                url = "http://{}:{}/setup{}".format(ip, self.port, filename)
-                requests.get(url, timeout=15)
+            if filename not in test.extra_files:
+                test.extra_files.add(filename)
+                self._get(test.ip, "setup{}".format(filename))
 
     @ArtifactorBasePlugin.check_configured
-    def finish_test(self, artifact_path, test_name, test_location, ip, slaveid):
+    def finish_test(self, artifacts, artifact_path, test_name, test_location, ip, slaveid):
         test_ident = "{}/{}".format(test_location, test_name)
-        artifacts = []
-        for filename in self.files:
-            _, tail = os.path.split(filename)
-            url = "http://{}:{}/get/{}".format(ip, self.port, tail)
-            doc = requests.get(url, timeout=15)
-            artifacts.append((tail, doc.content))
-
-        for filename in self.tests[test_ident].extra_files:
-            _, tail = os.path.split(filename)
-            url = "http://{}:{}/get/{}".format(ip, self.port, tail)
-            doc = requests.get(url, timeout=15)
-            artifacts.append((tail, doc.content))
-
-            url = "http://{}:{}/delete/{}".format(ip, self.port, tail)
-            requests.get(url, timeout=15)
-
-        del self.tests[test_ident]
-        for filename, contents in artifacts:
+        test = self.tests.pop(test_ident)
+        tails = [os.path.split(filename)[1] for filename in self.files]
+        extra_tails = [os.path.split(filename)[1] for filename in test.extra_files]
+
+        logs = []
+        if self._wanted(artifacts, test_ident):
+            logs = list(zip(
+                tails + extra_tails,
+                self.executor.map(lambda tail: self._fetch(test, tail), tails + extra_tails)))
+        for _ in self.executor.map(lambda tail: self._get(ip, "delete/{}".format(tail)),
+                                   extra_tails):
+            pass
+
+        for filename, contents in logs:
             self.fire_hook(
                 "filedump",
                 test_location=test_location,
@@ -121,13 +168,11 @@ class Merkyl(ArtifactorBasePlugin):
     def start_session(self, ip):
         """Session started"""
         for file_name in self.files:
-            url = "http://{}:{}/setup{}".format(ip, self.port, file_name)
-            requests.get(url, timeout=15)
+            self._get(ip, "setup{}".format(file_name))
 
     @ArtifactorBasePlugin.check_configured
     def finish_session(self, ip):
         """Session finished"""
         for filename in self.files:
             base, tail = os.path.split(filename)
-            url = "http://{}:{}/delete/{}".format(ip, self.port, tail)
-            requests.get(url, timeout=15)
+            self._get(ip, "delete/{}".format(tail))
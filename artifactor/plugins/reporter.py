@@ -14,7 +14,6 @@ artifactor:
 """
 import csv
 import datetime
-import difflib
 import math
 import os
 import re
@@ -30,6 +29,7 @@ from artifactor import ArtifactorBasePlugin
 from cfme.utils import process_pytest_path
 from cfme.utils.conf import cfme_data  # Only for the provider specific reports
 from cfme.utils.path import template_path
+from cfme.utils.tb_cluster import TracebackClusterer
 
 _tests_tpl = {
     "_sub": {},
@@ -204,6 +204,11 @@ class ReporterBase(object):
                 urls = [url for url in URL.findall(test_data["short_tb"])]
                 if urls:
                     test_data["urls"] = urls
+                if overall_status in ("failed", "error"):
+                    exception = test.get("exception") or {}
+                    tb_errors.append(
+                        (test_data["short_tb"], test_name, exception.get("exception"))
+                    )
             template_data["tests"].append(test_data)
         template_data["top10"] = self.top10(tb_errors)
         template_data["counts"] = counts
@@ -235,18 +240,14 @@ class ReporterBase(object):
         return template_data
 
     def top10(self, tb_errors):
-        sets = []
+        """Groups the ``(short_tb, test_name, exception)`` entries by similar tracebacks
+
+        Returns the 10 biggest groups as lists of the entries, biggest first.
+        """
+        clusterer = TracebackClusterer()
         for entry in tb_errors:
-            for tset in sets:
-                if difflib.SequenceMatcher(a=entry[0][:10], b=tset[0][0][:10]).ratio() > .8:
-                    if difflib.SequenceMatcher(a=entry[0][:20], b=tset[0][0][:20]).ratio() > .75:
-                        if difflib.SequenceMatcher(a=entry[0][:30], b=tset[0][0][:30]).ratio() > .7:
-                            tset.append(entry)
-                            break
-            else:
-                sets.append([entry])
-
-        return sorted(sets, key=len, reverse=True)[:10]
+            clusterer.add(entry[0], item=entry, exc_type=entry[2])
+        return [cluster.items for cluster in clusterer.top(10)]
 
     def build_dict(self, path, container, contents):
         """
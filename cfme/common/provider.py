@@ -1,5 +1,5 @@
 import datetime
-from collections import Iterable, defaultdict
+from collections import Iterable
 
 import attr
 from manageiq_client.api import APIException
@@ -17,6 +17,7 @@ from cfme.utils.appliance import Navigatable
 from cfme.utils.appliance.implementations.ui import navigate_to, navigator
 from cfme.utils.log import logger
 from cfme.utils.net import resolve_hostname
+from cfme.utils.providers import provider_categories, provider_types_of
 from cfme.utils.stats import tol_check
 from cfme.utils.update import Updateable
 from cfme.utils.varmeth import variable
@@ -24,30 +25,17 @@ from cfme.utils.version import VersionPicker
 from cfme.utils.wait import wait_for, RefreshTimer
 
 
-_base_types_cache = {}
-_provider_types_cache = defaultdict(dict)
 _all_types_cache = {}
 
 
 # TODO: Move to collection when it happens
 def base_types():
-    from pkg_resources import iter_entry_points
-    if not _base_types_cache:
-        _base_types_cache.update({
-            ep.name: ep.resolve() for ep in iter_entry_points('manageiq.provider_categories')
-        })
-    return _base_types_cache
+    return dict(provider_categories.items())
 
 
 # TODO: Move to collection when it happens
 def provider_types(category):
-    from pkg_resources import iter_entry_points
-    if category not in _provider_types_cache:
-        _provider_types_cache[category] = {
-            ep.name: ep.resolve() for ep in iter_entry_points(
-                'manageiq.provider_types.{}'.format(category))
-        }
-    return _provider_types_cache[category]
+    return dict(provider_types_of(category).items())
 
 
 # TODO: Move to collection when it happens
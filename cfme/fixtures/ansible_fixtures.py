@@ -1,9 +1,6 @@
 import fauxfactory
 import pytest
 
-from cfme.services.catalogs.catalog import Catalog
-from cfme.services.service_catalogs import ServiceCatalogs
-from cfme.services.myservice import MyService
 from cfme.utils.appliance.implementations.ui import navigate_to
 from cfme.utils.wait import wait_for
 
@@ -83,6 +80,7 @@ def ansible_catalog(appliance, ansible_catalog_item):
 
 @pytest.fixture(scope="module")
 def ansible_service_catalog(appliance, ansible_catalog_item, ansible_catalog):
+    from cfme.services.service_catalogs import ServiceCatalogs
     service_catalog_ = ServiceCatalogs(appliance, ansible_catalog, ansible_catalog_item.name)
     return service_catalog_
 
@@ -99,6 +97,7 @@ def order_ansible_service_in_ops_ui(appliance, ansible_catalog_item,
         service_request.wait_for_request()
         service_request.remove_request()
     yield cat_item_name
+    from cfme.services.myservice import MyService
     service = MyService(appliance, cat_item_name)
     if service.exists:
         service.delete()
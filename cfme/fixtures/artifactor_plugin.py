@@ -21,6 +21,7 @@ already been used, it will die
 
 """
 import atexit
+import base64
 import subprocess
 from threading import RLock
 
@@ -29,6 +30,8 @@ import os
 import pytest
 
 from artifactor import ArtifactorClient
+from artifactor.plugins.filedump import SANITIZED_FILE_TYPES
+from cfme.utils.blob_store import blob_store
 from cfme.utils.blockers import BZ, Blocker
 from cfme.utils.conf import env, credentials
 from cfme.utils.log import logger
@@ -162,6 +165,38 @@ def fire_art_test_hook(node, hook, **hook_args):
         **hook_args)
 
 
+def fire_art_blob_dump(node, contents, media_type, contents_base64=False, **hook_args):
+    """Fires ``filedump`` for contents written to the blob store instead of sent with the hook
+
+    Args:
+        node: test item the artifact belongs to
+        contents: bytes or text of the artifact
+        media_type: media type of the contents, like ``image/png``
+        contents_base64: whether ``contents`` are base64 encoded
+        hook_args: other arguments of the ``filedump`` hook (description, file_type, ...)
+    """
+    if (not getattr(node.config, '_art_client', None) or
+            hook_args.get('file_type') in SANITIZED_FILE_TYPES):
+        # nobody to send the hook to, or contents the sanitize hook must mask secrets in
+        # before they are written anywhere
+        return fire_art_test_hook(node, 'filedump', contents=contents,
+                                  contents_base64=contents_base64, **hook_args)
+    if contents_base64:
+        contents = base64.b64decode(contents)
+    try:
+        ref = blob_store().put(contents, media_type)
+    except (IOError, OSError) as e:
+        logger.warning('Could not write the artifact to the blob store, sending it: %s', e)
+        if not isinstance(contents, bytes):
+            contents = contents.encode('utf-8')
+        hook_args['mode'] = 'wb'
+        return fire_art_test_hook(node, 'filedump', contents=base64.b64encode(contents),
+                                  contents_base64=True, **hook_args)
+    hook_args.pop('mode', None)
+    fire_art_test_hook(node, 'filedump', blob_digest=ref.digest, blob_size=ref.size,
+                       media_type=ref.media_type, **hook_args)
+
+
 @pytest.mark.hookwrapper
 def pytest_runtest_protocol(item):
     global session_ver
@@ -10,7 +10,7 @@ from cfme.utils.browser import take_screenshot
 from cfme.utils.datafile import template_env
 from cfme.utils.log import logger
 from cfme.utils.path import log_path, project_path
-from cfme.fixtures.artifactor_plugin import fire_art_test_hook
+from cfme.fixtures.artifactor_plugin import fire_art_blob_dump, fire_art_test_hook
 from cfme.utils.appliance import find_appliance
 browser_fixtures = {'browser'}
 
@@ -101,10 +101,10 @@ def pytest_exception_interact(node, call, report):
     template_data['screenshot'] = screenshot.png
     template_data['screenshot_error'] = screenshot.error
     if screenshot.png:
-        fire_art_test_hook(
-            node, 'filedump',
+        fire_art_blob_dump(
+            node, template_data['screenshot'], 'image/png',
             description="Exception screenshot", file_type="screenshot", mode="wb",
-            contents_base64=True, contents=template_data['screenshot'], display_glyph="camera",
+            contents_base64=True, display_glyph="camera",
             group_id="pytest-exception", slaveid=store.slaveid)
     if screenshot.error:
         fire_art_test_hook(
@@ -0,0 +1,34 @@
+"""Fixtures rolling the appliance database back to a baseline snapshot
+
+``db_baseline`` snapshots the appliance database once per session (see
+:py:mod:`cfme.utils.appliance.db_snapshots`). Test modules requesting ``db_rollback`` get the
+database restored to that baseline after all their tests ran, so they do not have to clean up
+what they created:
+
+.. code-block:: python
+
+    pytestmark = [pytest.mark.usefixtures('db_rollback')]
+"""
+import pytest
+
+from cfme.utils.appliance import DummyAppliance
+
+#: Name of the baseline snapshot
+BASELINE = 'baseline'
+
+
+@pytest.fixture(scope='session')
+def db_baseline(appliance):
+    """Snapshots the database as it is at the first use, deletes the snapshot at session end"""
+    if isinstance(appliance, DummyAppliance) or appliance.is_pod:
+        pytest.skip('Database snapshots need an appliance with an internal database')
+    appliance.db_snapshots.create(BASELINE, replace=True)
+    yield BASELINE
+    appliance.db_snapshots.delete(BASELINE)
+
+
+@pytest.fixture(scope='module')
+def db_rollback(appliance, db_baseline):
+    """Restores the baseline snapshot after the tests of the module"""
+    yield
+    appliance.db_snapshots.restore(db_baseline)
@@ -47,13 +47,14 @@ from _pytest.compat import getimfunc
 from _pytest.fixtures import call_fixture_func
 from _pytest.outcomes import TEST_OUTCOME
 
-from cfme.common.provider import BaseProvider, all_types
+from cfme.common.provider import BaseProvider
 from cfme.fixtures.artifactor_plugin import fire_art_test_hook
 from cfme.fixtures.pytest_store import store
-from cfme.fixtures.templateloader import TEMPLATES
+from cfme.fixtures import templateloader
 from cfme.utils.appliance import ApplianceException
 from cfme.utils.log import logger
-from cfme.utils.providers import ProviderFilter, list_providers
+from cfme.utils.providers import (
+    ProviderFilter, get_class_from_type, list_providers, provider_type_names)
 
 # List of problematic providers that will be ignored
 _problematic_providers = set()
@@ -225,25 +226,27 @@ def _generate_provider_fixtures():
     """ Generate provider setup and clear fixtures based on what classes are available
 
     This will make fixtures like "cloud_provider" and "has_no_cloud_providers" available to tests.
+    Only the names of the provider types are needed here, a provider class is imported when one
+    of its fixtures is used.
     """
-    for prov_type, prov_class in all_types().items():
-        def gen_setup_provider(prov_class):
+    for prov_type in provider_type_names():
+        def gen_setup_provider(prov_type):
             @pytest.fixture(scope='function')
             def _setup_provider(request):
                 """ Sets up one of the matching providers """
-                return setup_one_by_class_or_skip(request, prov_class)
+                return setup_one_by_class_or_skip(request, get_class_from_type(prov_type))
             return _setup_provider
         fn_name = '{}_provider'.format(prov_type)
-        globals()[fn_name] = gen_setup_provider(prov_class)
+        globals()[fn_name] = gen_setup_provider(prov_type)
 
-        def gen_has_no_providers(prov_class):
+        def gen_has_no_providers(prov_type):
             @pytest.fixture(scope='function')
             def _has_no_providers():
                 """ Clears all providers of given class from the appliance """
-                prov_class.clear_providers()
+                get_class_from_type(prov_type).clear_providers()
             return _has_no_providers
         fn_name = 'has_no_{}_providers'.format(prov_type)
-        globals()[fn_name] = gen_has_no_providers(prov_class)
+        globals()[fn_name] = gen_has_no_providers(prov_type)
 
 
 # Let's generate all the provider setup and clear fixtures within the scope of this module
@@ -310,11 +313,11 @@ def template(template_location, provider):
         else:
             if not isinstance(o, six.string_types):
                 raise ValueError("{!r} is not a string! (for template)".format(o))
-            if not TEMPLATES:
+            if not templateloader.TEMPLATES:
                 # There is nothing in TEMPLATES, that means no trackerbot URL and no data pulled.
                 # This should normally not constitute an issue so continue.
                 return o
-            templates = TEMPLATES.get(provider.key)
+            templates = templateloader.TEMPLATES.get(provider.key)
             if templates is not None:
                 if o in templates:
                     return o
@@ -0,0 +1,13 @@
+"""Deletes the REST test data the tests did not delete at the end of the session
+
+Entities created through :py:mod:`cfme.utils.rest_lifecycle` (like the ones of
+:py:mod:`cfme.rest.gen_data`) are deleted by the finalizers of the fixtures which created them.
+Whatever is left in the cleanup ledgers of this process, because a finalizer failed or was not
+run, is deleted in batched actions here. Ledgers of crashed sessions are cleaned up the next time
+test data is created on the same appliance.
+"""
+from cfme.utils import rest_lifecycle
+
+
+def pytest_sessionfinish(session):
+    rest_lifecycle.cleanup_all()
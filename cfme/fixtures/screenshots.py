@@ -16,7 +16,7 @@ import pytest
 
 from cfme.utils.browser import take_screenshot as take_browser_screenshot
 from cfme.utils.log import logger
-from cfme.fixtures.artifactor_plugin import fire_art_test_hook
+from cfme.fixtures.artifactor_plugin import fire_art_blob_dump, fire_art_test_hook
 from cfme.fixtures.pytest_store import store
 
 
@@ -29,10 +29,10 @@ def take_screenshot(request):
         ss, ss_error = take_browser_screenshot()
         g_id = fauxfactory.gen_alpha(length=6)
         if ss:
-            fire_art_test_hook(
-                item, 'filedump',
+            fire_art_blob_dump(
+                item, ss, 'image/png',
                 description="Screenshot {}".format(name), file_type="screenshot", mode="wb",
-                contents_base64=True, contents=ss, display_glyph="camera",
+                contents_base64=True, display_glyph="camera",
                 group_id="fix-screenshot-{}".format(g_id), slaveid=store.slaveid)
         if ss_error:
             fire_art_test_hook(
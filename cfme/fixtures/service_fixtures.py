@@ -4,16 +4,6 @@ import pytest
 from riggerlib import recursive_update
 from widgetastic.utils import partial_match
 
-from cfme.cloud.provider.gce import GCEProvider
-from cfme.cloud.provider.azure import AzureProvider
-from cfme.cloud.provider.ec2 import EC2Provider
-from cfme.cloud.provider.openstack import OpenStackProvider
-from cfme.cloud.provider import CloudProvider
-from cfme.infrastructure.provider import InfraProvider
-from cfme.rest.gen_data import dialog as _dialog
-from cfme.rest.gen_data import service_catalog_obj as _catalog
-from cfme.services.myservice import MyService
-from cfme.services.service_catalogs import ServiceCatalogs
 from cfme.utils.generators import random_vm_name
 from cfme.utils.log import logger
 from cfme.fixtures.provider import console_template
@@ -21,11 +11,13 @@ from cfme.fixtures.provider import console_template
 
 @pytest.fixture(scope="function")
 def dialog(request, appliance):
+    from cfme.rest.gen_data import dialog as _dialog
     return _dialog(request, appliance)
 
 
 @pytest.fixture(scope="function")
 def catalog(request, appliance):
+    from cfme.rest.gen_data import service_catalog_obj as _catalog
     return _catalog(request, appliance)
 
 
@@ -37,6 +29,13 @@ def catalog_item(appliance, provider, provisioning, dialog, catalog):
 
 def create_catalog_item(appliance, provider, provisioning, dialog, catalog,
         console_test=False):
+    # provider modules are imported when a catalog item is created, not with the plugin
+    from cfme.cloud.provider import CloudProvider
+    from cfme.cloud.provider.azure import AzureProvider
+    from cfme.cloud.provider.ec2 import EC2Provider
+    from cfme.cloud.provider.gce import GCEProvider
+    from cfme.cloud.provider.openstack import OpenStackProvider
+    from cfme.infrastructure.provider import InfraProvider
     provision_type, template, host, datastore, iso_file, vlan = map(provisioning.get,
         ('provision_type', 'template', 'host', 'datastore', 'iso_file', 'vlan'))
     if console_test:
@@ -116,6 +115,8 @@ def create_catalog_item(appliance, provider, provisioning, dialog, catalog,
 @pytest.fixture
 def order_service(appliance, provider, provisioning, dialog, catalog, request):
     """ Orders service once the catalog item is created"""
+    from cfme.services.myservice import MyService
+    from cfme.services.service_catalogs import ServiceCatalogs
 
     if hasattr(request, 'param'):
         param = request.param
@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
-"""Preloads all templates on all providers that were selected for testing. Useful for test collect.
+"""Loads templates of the providers selected for testing from trackerbot, on demand.
+
+Templates are kept in a :py:class:`cfme.utils.template_index.TemplateIndex`. The parallelizer
+master (or a non-parallel run) syncs the providers used by the collected tests once collection is
+done, slaves read the shared index and only pull providers that were not synced yet.
 """
 import pytest
 
 from cfme.utils import trackerbot
 from cfme.utils.conf import env
-from cfme.utils.providers import list_provider_keys
+from cfme.utils.template_index import TemplateIndex
 from cfme.fixtures.pytest_store import store
 
+#: Either an empty dict when trackerbot is not used, or a :py:class:`TemplateIndex`
 TEMPLATES = {}
 
 
@@ -21,42 +26,46 @@ def pytest_addoption(parser):
 
 
 def pytest_configure(config):
+    global TEMPLATES
     is_dev = False
     if 'appliances' in env:
         for appliance in env.appliances:
             if appliance.get('is_dev', False):
                 is_dev = True
     tb_url = trackerbot.conf.get('url')
-    if store.parallelizer_role == 'master' or tb_url is None or is_dev:
+    if tb_url is None or is_dev:
         return
 
-    # A further optimization here is to make the calls to trackerbot per provider
-    # and perhaps only pull the providers that are needed, however that will need
-    # to ensure that the tests that just randomly use providers adhere to the filters
-    # which may be too tricky right now.
+    if config.getoption('use_template_cache'):
+        max_age = None
+    else:
+        max_age = trackerbot.conf.get('template_cache_max_age', 3600)
+    TEMPLATES = TemplateIndex(max_age=max_age)
+
 
-    count = 0
+def _collected_provider_keys(items):
+    keys = set()
+    for item in items:
+        callspec = getattr(item, 'callspec', None)
+        if callspec is None:
+            continue
+        provider = callspec.params.get('provider')
+        key = getattr(provider, 'key', None)
+        if key is not None:
+            keys.add(key)
+    return keys
 
-    if not config.getoption('use_template_cache'):
-        store.terminalreporter.line("Loading templates from trackerbot...", green=True)
-        provider_templates = trackerbot.provider_templates(trackerbot.api())
-        for provider in list_provider_keys():
-            TEMPLATES[provider] = provider_templates.get(provider, [])
-            config.cache.set('miq-trackerbot/{}'.format(provider), TEMPLATES[provider])
-            count += len(TEMPLATES[provider])
-    else:
-        store.terminalreporter.line("Using templates from cache...", green=True)
-        provider_templates = None
-        for provider in list_provider_keys():
-            templates = config.cache.get('miq-trackerbot/{}'.format(provider), None)
-            if templates is None:
-                store.terminalreporter.line(
-                    "Loading templates for {} from source as not in cache".format(
-                        provider), green=True)
-                if not provider_templates:
-                    provider_templates = trackerbot.provider_templates(trackerbot.api())
-                templates = provider_templates.get(provider, [])
-                config.cache.set('miq-trackerbot/{}'.format(provider), templates)
-            count += len(templates)
-            TEMPLATES[provider] = templates
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    if not isinstance(TEMPLATES, TemplateIndex) or store.parallelizer_role == 'slave':
+        return
+    provider_keys = sorted(_collected_provider_keys(items))
+    if not provider_keys:
+        return
+    store.terminalreporter.line(
+        "Loading templates of {} providers from trackerbot...".format(len(provider_keys)),
+        green=True)
+    TEMPLATES.sync_providers(provider_keys)
+    count = sum(len(TEMPLATES.get(key, [])) for key in provider_keys)
     store.terminalreporter.line("  Loaded {} templates successfully!".format(count), green=True)
@@ -3,6 +3,7 @@
 from cfme.fixtures.pytest_store import store
 from cfme.utils import diaper
 from cfme.utils.log import logger
+from cfme.utils.tb_cluster import TracebackClusterer
 
 
 def reporter(config=None):
@@ -28,3 +29,33 @@ def enable():
     with diaper:
         store.pluginmanager.register(store.terminalreporter, 'terminalreporter')
         logger.debug('terminalreporter enabled')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cfme')
+    group.addoption('--failure-clusters', type=int, default=10, dest='failure_clusters',
+                    help='Number of the most common failure tracebacks to summarize at the end '
+                         'of the run, 0 to disable')
+
+
+def pytest_terminal_summary(terminalreporter):
+    count = terminalreporter.config.getoption('failure_clusters')
+    reports = [
+        report
+        for outcome in ('failed', 'error')
+        for report in terminalreporter.stats.get(outcome, [])
+        if getattr(report, 'longrepr', None)]
+    if not count or len(reports) < 2:
+        return
+    clusterer = TracebackClusterer()
+    for report in reports:
+        # The last lines hold the innermost frames and the exception, like the short tracebacks
+        short_tb = '\n'.join(report.longreprtext.splitlines()[-20:])
+        clusterer.add(short_tb, item=report.nodeid)
+    terminalreporter.write_sep(
+        '=', 'most common failures ({} failed or errored tests)'.format(len(reports)))
+    for cluster in clusterer.top(count):
+        terminalreporter.write_line('{} x {} (e.g. {})'.format(
+            len(cluster), cluster.exc_type, cluster.items[0]), red=True)
+        for line in cluster.traceback.splitlines()[-3:]:
+            terminalreporter.write_line('    {}'.format(line))
@@ -29,9 +29,9 @@ Note the .resultset.json format is documented in the ruby Coverage libraries doc
 
     http://ruby-doc.org/stdlib-2.1.0/libdoc/coverage/rdoc/Coverage.html
 
-All of the individual process' results are then manually merged (coverage_merger) into one
-big json result, and handed back to simplecov which generates the compiled html
-(for humans) report.
+All of the individual process' results are then merged locally
+(:py:mod:`cfme.utils.coverage_merger`) into one big json result, and handed back to simplecov
+which generates the compiled html (for humans) report.
 
 Workflow Overview
 -----------------
@@ -56,7 +56,6 @@ Post-testing (e.g. ci environment): *** This is changing ***
 1. Use the generated rcov report with the ruby stats plugin to get a coverage graph
 2. Zip up and archive the entire coverage dir for review
 """
-import subprocess
 
 import pytest
 from py.error import ENOENT
@@ -66,6 +65,7 @@ from cfme.fixtures.pytest_store import store
 from cfme.exceptions import ApplianceVersionException
 from cfme.utils import conf
 from cfme.utils.conf import cfme_data
+from cfme.utils.coverage_merger import CoverageMerger
 from cfme.utils.log import create_sublogger
 from cfme.utils.path import conf_path, log_path, scripts_data_path
 from cfme.utils.quote import quote
@@ -85,9 +85,9 @@ gemfile = coverage_data.join('coverage_gem.rb')
 bundler_d = rails_root.join('bundler.d')
 coverage_hook_file_name = 'coverage_hook.rb'
 coverage_hook = coverage_data.join(coverage_hook_file_name)
-coverage_merger = coverage_data.join('coverage_merger.rb')
 coverage_output_dir = log_path.join('coverage')
 coverage_results_archive = coverage_output_dir.join('coverage-results.tgz')
+coverage_merged_resultset = coverage_output_dir.join('merged', '.resultset.json')
 coverage_appliance_conf = conf_path.join('.ui-coverage')
 
 # This is set in sessionfinish, and should be reliably readable
@@ -162,14 +162,10 @@ class CoverageManager(object):
         self.print_message('merging reports')
         try:
             self._retrieve_coverage_reports()
-            # If the appliance runs out of memory, these can take *days* to complete,
-            # so for now we'll just collect the raw coverage data and figure the merging
-            # out later
-            # Edit, 10-Feb-2016:
-            # Currently, the reports are merged using the {stream}-reports job
-            # which utilizes the 'jjb/scripts/stream_reporter.sh' script instead
-            # self._merge_coverage_reports()
-            # self._retrieve_merged_reports()
+            # Merging on the appliance used to run out of memory and take *days*, so the raw
+            # data is merged locally instead. The HTML report is still built by the
+            # {stream}-reports job which utilizes the 'jjb/scripts/stream_reporter.sh' script
+            self._merge_coverage_reports()
         except Exception as exc:
             self.log.error('Error merging coverage reports')
             self.log.exception(exc)
@@ -275,25 +271,14 @@ gpgcheck={gpgcheck}
             'tar czf /tmp/ui-coverage-raw.tgz coverage/')
         ssh_client.get_file('/tmp/ui-coverage-raw.tgz', coverage_results_archive.strpath)
 
-    def _upload_coverage_merger(self):
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.put_file(coverage_merger.strpath, rails_root.strpath)
-
     def _merge_coverage_reports(self):
-        # run the merger on the appliance to generate the simplecov report
-        # This has been failing, presumably due to oom errors :(
-        self._upload_coverage_merger()
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.run_rails_command(coverage_merger.basename)
-
-    def _retrieve_merged_reports(self):
-        # Now bring the report back (tar it, get it, untar it)
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.run_command('cd /var/www/miq/vmdb/coverage;'
-            'tar czf /tmp/ui-coverage-results.tgz merged/')
-        ssh_client.get_file('/tmp/ui-coverage-results.tgz', coverage_results_archive.strpath)
-        subprocess.Popen(['/usr/bin/env', 'tar', '-xaf', coverage_results_archive.strpath,
-            '-C', coverage_output_dir.strpath]).wait()
+        # merge the retrieved raw results on this host, straight out of the archive
+        merger = CoverageMerger()
+        merger.add_tarball(coverage_results_archive.strpath)
+        merger.write(coverage_merged_resultset.strpath)
+        if merger.conflicts:
+            self.print_message('{} source files could not be merged, see the log'.format(
+                len(merger.conflicts)))
 
 
 class UiCoveragePlugin(object):
@@ -4,7 +4,7 @@ import pytest
 from cfme.exceptions import CFMEException
 from cfme.utils import ports
 from cfme.utils.generators import random_vm_name
-from cfme.utils.net import net_check
+from cfme.utils.reachability import prober
 from cfme.utils.wait import wait_for
 
 from wrapanapi import VmState
@@ -20,9 +20,7 @@ def _create_vm(request, template, provider, vm_name):
         lambda: vm_obj.mgmt.ip,
         num_sec=300, delay=5, fail_condition={None}, message="wait for testing VM IP address."
     )
-    wait_for(
-        net_check, func_args=[ports.SSH, vm_ip], func_kwargs={"force": True},
-        num_sec=300, delay=5, message="testing VM's SSH available")
+    prober.wait_until_reachable([(vm_ip, ports.SSH)], num_sec=300, delay=5)
     if not vm_obj.exists:
         provider.refresh_provider_relationships()
         vm_obj.wait_to_appear()
@@ -1,13 +1,13 @@
 # -*- coding: utf-8 -*-
 import pytest
 
-from cfme.dashboard import Widget
-from cfme.intelligence.reports import widgets
 from cfme.utils.appliance.implementations.ui import navigate_to
 
 
 @pytest.fixture(scope="session")
 def widgets_generated(setup_only_one_provider, appliance):
+    from cfme.dashboard import Widget
+    from cfme.intelligence.reports import widgets
     navigate_to(appliance.server, 'Dashboard')
     widget_list = []
     for widget in Widget.all():
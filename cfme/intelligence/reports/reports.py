@@ -16,7 +16,7 @@ from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils import ParamClassName
 from cfme.utils.appliance.implementations.ui import navigator, CFMENavigateStep, navigate_to
 from cfme.utils.blockers import BZ
-from cfme.utils.pretty import Pretty
+from cfme.utils.report_data import SavedReportData
 from cfme.utils.timeutil import parsetime
 from cfme.utils.update import Updateable
 from cfme.utils.wait import wait_for
@@ -366,6 +366,24 @@ class ReportsCollection(BaseCollection):
         return self.instantiate(**values)
 
 
+# Reads the text of all cells of a table at once, skipping rows whose cells don't match the
+# headers (row span greater than 1 column, e.g. "Totals: ddd", or hidden cells).
+READ_TABLE_SCRIPT = """
+var table = arguments[0], columns = arguments[1], rows = [];
+var trs = table.querySelectorAll("tbody > tr");
+for (var i = 0; i < trs.length; i++) {
+    var cells = trs[i].querySelectorAll("td"), row = [];
+    if (cells.length != columns) { continue; }
+    for (var j = 0; j < cells.length; j++) {
+        if (cells[j].offsetParent === null) { row = null; break; }
+        row.push(cells[j].innerText.trim());
+    }
+    if (row !== null) { rows.push(row); }
+}
+return rows;
+"""
+
+
 @attr.s
 class SavedReport(Updateable, BaseEntity):
     """Custom Saved Report. Enables us to retrieve data from the table.
@@ -400,6 +418,8 @@ class SavedReport(Updateable, BaseEntity):
     def data(self):
         """Retrieves data from the saved report.
 
+        Every page of the table is read with a single script call instead of one call per cell.
+
         Returns: :py:class:`SavedReportData`.
         """
         view = navigate_to(self, "Details")
@@ -411,15 +431,9 @@ class SavedReport(Updateable, BaseEntity):
             headers = tuple([hdr.encode("utf-8") for hdr in view.table.headers])
             body = []
             for _ in view.paginator.pages():
-                for row in view.table.rows():
-                    if not all([c[1].is_displayed for c in row]):
-                        # This is a temporary workaround for cases we have row span
-                        # greater that 1 column (e.g. in case of "Totals: ddd" column).
-                        # TODO: Support this functionality in widgetastic. Issue:
-                        # https://github.com/RedHatQE/widgetastic.core/issues/26
-                        continue
-                    row_data = tuple([row[header].text.encode("utf-8") for header in headers])
-                    body.append(row_data)
+                rows = view.browser.execute_script(
+                    READ_TABLE_SCRIPT, view.browser.element(view.table), len(headers))
+                body.extend(tuple([cell.encode("utf-8") for cell in row]) for row in rows)
         except NoSuchElementException:
             # No data found
             return SavedReportData([], [])
@@ -481,38 +495,6 @@ class SavedReportsCollection(BaseCollection):
         return results
 
 
-class SavedReportData(Pretty):
-    """This class stores data retrieved from saved report.
-
-    Args:
-        headers: Tuple with header columns.
-        body: List of tuples with body rows.
-    """
-    pretty_attrs = ["headers", "body"]
-
-    def __init__(self, headers, body):
-        self.headers = headers
-        self.body = body
-
-    @property
-    def rows(self):
-        for row in self.body:
-            yield dict(zip(self.headers, row))
-
-    def find_row(self, column, value):
-        if column not in self.headers:
-            return None
-        for row in self.rows:
-            if row[column] == value:
-                return row
-
-    def find_cell(self, column, value, cell):
-        try:
-            return self.find_row(column, value)[cell]
-        except TypeError:
-            return None
-
-
 @navigator.register(ReportsCollection, "All")
 class ReportsAll(CFMENavigateStep):
     VIEW = AllReportsView
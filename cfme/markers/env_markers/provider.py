@@ -8,7 +8,7 @@ from distutils.version import LooseVersion
 from cfme.markers.env import EnvironmentMarker
 from cfme.utils import conf
 from cfme.utils.log import logger
-from cfme.utils.providers import ProviderFilter, list_providers, all_types
+from cfme.utils.providers import ProviderFilter, get_class_from_type, list_providers
 from cfme.utils.pytest_shortcuts import fixture_filter
 from cfme.utils.version import Version
 
@@ -69,7 +69,7 @@ class DPFilter(ProviderFilter):
         """ Filters by provider (base) classes """
         if self.classes is None:
             return None
-        return any([prov_class in all_types()[provider.type_name].__mro__
+        return any([prov_class in get_class_from_type(provider.type_name).__mro__
                     for prov_class in self.classes])
 
 
@@ -141,7 +141,7 @@ def parametrize(metafunc, argnames, argvalues, *args, **kwargs):
 
 
 def data_provider_types(provider):
-    return all_types()[provider.type_name]
+    return get_class_from_type(provider.type_name)
 
 
 @attr.s
@@ -139,10 +139,12 @@ def pytest_collection_modifyitems(session, config, items):
             if uncollect_marker:
                 uncollect_reason = uncollect_marker.kwargs.get('reason', "No reason given")
                 f.write("{} - {}\n".format(item.name, uncollect_reason))
+                item._uncollect_reason = uncollect_reason
             else:
                 uncollectif_result, uncollectif_reason = uncollectif(item)
                 if uncollectif_result:
                     f.write("{} - {}\n".format(item.name, uncollectif_reason))
+                    item._uncollect_reason = uncollectif_reason or "No reason given"
                 else:
                     new_items.append(item)
 
@@ -5,14 +5,15 @@ from cached_property import cached_property
 from widgetastic.utils import VersionPick
 
 from cfme.utils.appliance import NavigatableMixin
+from cfme.utils.lazy import LazyEntryPoints
 from cfme.utils.log import logger
 
+_appliance_collections = LazyEntryPoints('manageiq.appliance_collections')
+
 
 def load_appliance_collections():
-    from pkg_resources import iter_entry_points
-    return {
-        ep.name: ep.resolve() for ep in iter_entry_points('manageiq.appliance_collections')
-    }
+    """Returns the appliance collections by name, their modules are imported on first use"""
+    return _appliance_collections
 
 
 @attr.s
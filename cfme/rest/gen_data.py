@@ -7,7 +7,7 @@ from widgetastic.utils import partial_match
 from cfme.infrastructure.provider.rhevm import RHEVMProvider
 from cfme.infrastructure.provider.virtualcenter import VMwareProvider
 from cfme.utils.log import logger
-from cfme.utils.rest import create_resource
+from cfme.utils.rest_lifecycle import manager_for
 from cfme.utils.version import VersionPicker, Version
 from cfme.utils.virtual_machines import deploy_template
 from cfme.utils.wait import wait_for
@@ -451,21 +451,16 @@ def users(request, rest_api, num=1):
 
 def _creating_skeleton(request, rest_api, col_name, col_data, col_action='create',
         substr_search=False):
-
-    entities = create_resource(
-        rest_api, col_name, col_data, col_action=col_action, substr_search=substr_search)
+    manager = manager_for(rest_api)
+    entities = manager.create(
+        col_name, col_data, col_action=col_action, substr_search=substr_search)
 
     # make sure the original list of `entities` is preserved for cleanup
     original_entities = list(entities)
 
     @request.addfinalizer
     def _finished():
-        collection = getattr(rest_api.collections, col_name)
-        collection.reload()
-        ids = [e.id for e in original_entities]
-        delete_entities = [e for e in collection if e.id in ids]
-        if delete_entities:
-            collection.action.delete(*delete_entities)
+        manager.delete(col_name, original_entities)
 
     return entities
 
@@ -9,11 +9,18 @@ Options in env.yaml will define what files to collect, will default to the set b
             - /var/www/miq/vmdb/log/evm.log
             - /var/www/miq/vmdb/log/production.log
             - /var/www/miq/vmdb/log/automation.log
+        max_bytes: 104857600  # optional, collect at most the last 100MB of each log
+        tail_lines: 100000  # optional, collect at most the last 100000 lines of each log
+        interval: 900  # optional, also collect every 15 minutes during the session
 
-Log files will be tarred and written to log_path
+Logs of all appliances are collected concurrently and streamed to log_path, see
+:py:mod:`cfme.utils.appliance_logs`. Without limits nor interval they are written as one tarball
+per appliance, otherwise as one gzipped file per log, appended to by every collection.
 """
 import pytest
 
+from cfme.fixtures.pytest_store import store
+from cfme.utils.appliance_logs import ApplianceLogCollector, PeriodicCollector
 from cfme.utils.path import log_path
 from cfme.utils.conf import env
 from cfme.utils.log import logger
@@ -30,6 +37,65 @@ def pytest_addoption(parser):
     parser.addoption('--collect-logs', action='store_true',
                      help=('Collect logs from all appliances and store locally at session '
                            'shutdown.  Configured via log_collector in env.yaml'))
+    parser.addoption('--collect-logs-interval', type=int, default=None,
+                     help=('Also collect the new parts of the logs every this many seconds '
+                           'during the session, overrides log_collector.interval in env.yaml'))
+
+
+def _collector_config(name, default=None):
+    try:
+        return env.log_collector[name]
+    except (AttributeError, KeyError):
+        return default
+
+
+def create_collector(config):
+    """Returns an :py:class:`ApplianceLogCollector` for the appliances of the session or None"""
+    log_files = _collector_config('log_files')
+    if not log_files:
+        log_files = DEFAULT_FILES
+        logger.info('No log_collector.log_files in env, use default files: %s', log_files)
+    local_dir = DEFAULT_LOCAL
+    if _collector_config('local_dir'):
+        local_dir = log_path.join(_collector_config('local_dir'))
+    else:
+        logger.info('No log_collector.local_dir in env, use default local_dir: %s', local_dir)
+
+    # Handle local dir existing
+    local_dir.ensure(dir=True)
+    from cfme.test_framework.appliance import PLUGIN_KEY as APPLIANCE_PLUGIN_KEY
+    holder = config.pluginmanager.get_plugin(APPLIANCE_PLUGIN_KEY)
+    if holder is None or not holder.appliances:
+        # No appliances to fetch logs from
+        logger.warning('No logs collected, appliance holder is empty')
+        return None
+    return ApplianceLogCollector(
+        holder.appliances, log_files, local_dir,
+        max_bytes=_collector_config('max_bytes'),
+        tail_lines=_collector_config('tail_lines'))
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionstart(session):
+    config = session.config
+    if not config.getoption('--collect-logs') or store.parallelizer_role == 'slave':
+        return
+    interval = config.getoption('--collect-logs-interval')
+    if interval is None:
+        interval = _collector_config('interval')
+    if not interval:
+        return
+    collector = create_collector(config)
+    if collector is not None:
+        logger.info('Collecting appliance logs every %s seconds', interval)
+        config._periodic_log_collector = PeriodicCollector(collector, interval)
+        config._periodic_log_collector.start()
+
+
+def pytest_sessionfinish(session):
+    periodic = getattr(session.config, '_periodic_log_collector', None)
+    if periodic is not None:
+        periodic.stop()
 
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -37,45 +103,13 @@ def pytest_unconfigure(config):
     yield  # since hookwrapper, let hookimpl run
     if config.getoption('--collect-logs'):
         logger.info('Starting log collection on appliances')
-        log_files = DEFAULT_FILES
-        local_dir = DEFAULT_LOCAL
-        try:
-            log_files = env.log_collector.log_files
-        except (AttributeError, KeyError):
-            logger.info('No log_collector.log_files in env, use default files: %s', log_files)
-            pass
-        try:
-            local_dir = log_path.join(env.log_collector.local_dir)
-        except (AttributeError, KeyError):
-            logger.info('No log_collector.local_dir in env, use default local_dir: %s', local_dir)
-            pass
-
-        # Handle local dir existing
-        local_dir.ensure(dir=True)
-        from cfme.test_framework.appliance import PLUGIN_KEY
-        holder = config.pluginmanager.get_plugin(PLUGIN_KEY)
-        if holder is None:
-            # No appliances to fetch logs from
-            logger.warning('No logs collected, appliance holder is empty')
-            return
-
-        written_files = []
-        for app in holder.appliances:
-            with app.ssh_client as ssh_client:
-                tar_file = 'log-collector-{}.tar.gz'.format(
-                    app.hostname)
-                logger.debug('Creating tar file on app %s:%s with log files %s',
-                             app, tar_file, ' '.join(log_files))
-                # wrap the files in ls, redirecting stderr, to ignore files that don't exist
-                tar_result = ssh_client.run_command(
-                    'tar -czvf {tar} $(ls {files} 2>/dev/null)'
-                    .format(tar=tar_file, files=' '.join(log_files)))
-                try:
-                    assert tar_result.success
-                except AssertionError:
-                    logger.exception('Tar command non-zero RC when collecting logs on %s: %s',
-                                     app, tar_result.output)
-                    continue
-                ssh_client.get_file(tar_file, local_dir.strpath)
-            written_files.append(tar_file)
+        periodic = getattr(config, '_periodic_log_collector', None)
+        if periodic is not None:
+            # stopped at the end of the session, collects the rest of the logs
+            collector = periodic.collector
+        else:
+            collector = create_collector(config)
+            if collector is None:
+                return
+        written_files = collector.collect()
         logger.info('Wrote the following files to local log path: %s', written_files)
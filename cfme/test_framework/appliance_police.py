@@ -5,7 +5,7 @@ import pytest
 import requests
 
 from cfme.utils import ports
-from cfme.utils.net import net_check
+from cfme.utils.reachability import prober
 from cfme.utils.wait import TimedOutError
 from cfme.utils.conf import rdb
 
@@ -32,7 +32,9 @@ def appliance_police(appliance):
             'ssh': (appliance.hostname, appliance.ssh_port),
             'https': (appliance.hostname, appliance.ui_port),
             'postgres': (appliance.db_host or appliance.hostname, appliance.db_port)}
-        port_results = {pn: net_check(addr=p_addr, port=p_port, force=True)
+        # all the ports are checked at once
+        reachable = prober.probe(available_ports.values(), max_age=0)
+        port_results = {pn: reachable[p_addr, int(p_port)]
                         for pn, (p_addr, p_port) in available_ports.items()}
         for port, result in port_results.items():
             if port == 'ssh' and appliance.is_pod:
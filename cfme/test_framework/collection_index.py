@@ -0,0 +1,181 @@
+"""Plugin keeping an on-disk index of the test collection
+
+With ``--collection-index``, the outcome of collecting every test module is stored in the index of
+:py:mod:`cfme.utils.collection_index` (node ids, markers, parameters, uncollect decisions and
+selection). In a later session with the same collection context, unchanged modules which produced
+no selected test are not imported at all, neither by the master nor by the parallelizer slaves,
+whose collection then matches the master one without them. The slaves use the index of the master,
+whatever their own options (they do not use sprout) and appliance version.
+
+``--collection-index-dump FILE`` writes the selected items with their markers and parameters as
+JSON, for scripts which would otherwise parse ``--collect-only`` output.
+"""
+import json
+
+import pytest
+
+from cfme.fixtures.pytest_store import store
+from cfme.utils.collection_index import CollectionIndex, context_key, file_digest, item_entry
+from cfme.utils.conf import cfme_data
+from cfme.utils.log import logger
+from cfme.utils.path import project_path
+
+#: Options not affecting which tests are collected and selected
+IGNORED_OPTIONS = {
+    'appliances', 'capture', 'collection_index', 'collection_index_dump', 'collectonly',
+    'color', 'durations', 'fulltrace', 'help', 'resultlog', 'showlocals', 'tbstyle',
+    'reportchars', 'verbose', 'quiet', 'debug', 'traceconfig', 'version', 'artifactor_port',
+    'junitxml', 'htmlpath', 'run_id', 'collection_index_key',
+}
+
+#: Options making the selection depend on data outside of the context, the index is not used
+UNSTABLE_OPTIONS = ('composite_uncollect', 'lf', 'failedfirst')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cfme')
+    group.addoption('--collection-index', action='store_true', default=False,
+                    help='Use and update the on-disk collection index to skip importing '
+                         'unchanged test modules without selected tests')
+    group.addoption('--collection-index-dump', default=None, metavar='FILE',
+                    help='Write the selected items, with their markers and parameters, as JSON')
+    group.addoption('--collection-index-key', default=None, metavar='KEY',
+                    help='Key of the collection index to use instead of the one of the context, '
+                         'passed by the parallelizer master to its slaves')
+
+
+def _options(config):
+    options = {}
+    for name, value in sorted(vars(config.option).items()):
+        if name in IGNORED_OPTIONS:
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            value = repr(value)
+        options[name] = value
+    return options
+
+
+def _appliance_version(config):
+    from cfme.utils.appliance import find_appliance
+    try:
+        appliance = find_appliance(config, require=False)
+        return appliance.version if appliance is not None else None
+    except Exception as e:  # noqa
+        logger.warning('Collection index: appliance version unknown: %s', e)
+        return None
+
+
+def index_key(config):
+    """Returns the context key of the collection index of the session"""
+    key = config.getoption('collection_index_key')
+    if key:
+        return key
+    return context_key(
+        _options(config), cfme_data.get('management_systems', {}), _appliance_version(config))
+
+
+def _markers(item):
+    if hasattr(item, 'iter_markers'):
+        return [marker.name for marker in item.iter_markers()]
+    return [name for name, value in item.keywords.items()
+            if type(value).__name__ in ('MarkInfo', 'MarkDecorator')]
+
+
+def _params(item):
+    try:
+        params = item.callspec.params
+    except AttributeError:
+        return {}
+    return {name: getattr(value, '_param_name', None) or getattr(value, 'name', None) or value
+            for name, value in params.items()}
+
+
+class DumpPlugin(object):
+    def __init__(self, config):
+        self.config = config
+
+    def pytest_collection_finish(self, session):
+        dump = self.config.getoption('collection_index_dump')
+        if dump:
+            write_dump(dump, session.items)
+
+
+class CollectionIndexPlugin(DumpPlugin):
+    def __init__(self, config, index):
+        super(CollectionIndexPlugin, self).__init__(config)
+        self.index = index
+        self.stable = not any(config.getoption(name, None) for name in UNSTABLE_OPTIONS)
+        self.skipped = 0
+        # relpath -> digest of the modules collected in this session
+        self.collected = {}
+
+    def _module(self, path):
+        if not path.check(file=True) or not path.basename.startswith('test_'):
+            return None
+        return path.relto(project_path) or path.strpath, file_digest(path)
+
+    def pytest_sessionstart(self, session):
+        # the slaves are started after the collection of the master, with its options
+        parallel_session = self.config.pluginmanager.get_plugin('parallel_session')
+        if parallel_session is not None:
+            parallel_session.worker_config['options']['collection_index_key'] = self.index.key
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_ignore_collect(self, path, config):
+        module = path.ext == '.py' and self._module(path)
+        if not module or not self.stable:
+            return None
+        relpath, digest = module
+        if self.index.has_selected(relpath, digest) is False:
+            self.skipped += 1
+            return True
+        self.collected[relpath] = digest
+        return None
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            # never index a module failing to import as having no tests
+            # (report.fspath is a str on older pytest versions, nodeids are relative to the root)
+            self.collected.pop(report.nodeid.split('::')[0], None)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        collected = list(items)
+        yield
+        selected = set(id(item) for item in items)
+        by_module = dict((relpath, []) for relpath in self.collected)
+        for item in collected:
+            relpath = item.fspath.relto(project_path) or item.fspath.strpath
+            if relpath not in by_module:
+                continue
+            by_module[relpath].append(item_entry(
+                item.nodeid, _markers(item), _params(item),
+                uncollect=getattr(item, '_uncollect_reason', None),
+                selected=id(item) in selected))
+        for relpath, entries in by_module.items():
+            self.index.record(relpath, self.collected[relpath], entries)
+        store.uncollection_stats['collection index (modules not imported)'] = self.skipped
+        if not store.slave_manager:
+            # slaves collect with the index written by the master
+            try:
+                self.index.save()
+            except (IOError, OSError) as e:
+                logger.warning('Could not save the collection index: %s', e)
+
+
+def write_dump(path, items):
+    """Writes the items as a JSON list of :py:func:`cfme.utils.collection_index.item_entry`"""
+    with open(path, 'w') as f:
+        json.dump([item_entry(item.nodeid, _markers(item), _params(item)) for item in items],
+                  f, indent=1, sort_keys=True)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    if config.getoption('collection_index'):
+        config.pluginmanager.register(
+            CollectionIndexPlugin(config, CollectionIndex(index_key(config))), 'collection-index')
+    elif config.getoption('collection_index_dump'):
+        config.pluginmanager.register(DumpPlugin(config), 'collection-index')
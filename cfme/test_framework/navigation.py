@@ -0,0 +1,45 @@
+"""Plugin for UI navigation timings and URL shortcuts
+
+``--nav-url-shortcuts`` makes navigations load the URL a destination was displayed at before
+instead of running the whole prerequisite chain, see :py:mod:`cfme.utils.navigation`. It can also
+be enabled in env.yaml:
+
+.. code-block:: yaml
+
+    ui_navigation:
+        url_shortcuts: True
+
+At the end of the session, the navigation timings are written to
+``log/navigation_stats[-<slaveid>].json`` and the slowest destinations are logged.
+"""
+from cfme.fixtures.pytest_store import store
+from cfme.utils.conf import env
+from cfme.utils.log import logger
+from cfme.utils.navigation import navigation_stats, url_cache
+from cfme.utils.path import log_path
+
+
+def pytest_addoption(parser):
+    parser.getgroup('cfme').addoption(
+        '--nav-url-shortcuts', action='store_true', default=False,
+        help='Navigate to destinations by loading the URL they were displayed at before')
+
+
+def pytest_configure(config):
+    url_cache.enabled = (config.getoption('nav_url_shortcuts') or
+                         env.get('ui_navigation', {}).get('url_shortcuts', False))
+
+
+def pytest_sessionfinish(session):
+    summary = navigation_stats.summary(limit=10)
+    if not summary:
+        return
+    name = 'navigation_stats.json'
+    if store.slaveid:
+        name = 'navigation_stats-{}.json'.format(store.slaveid)
+    navigation_stats.dump(log_path.join(name))
+    logger.info('Slowest navigation destinations (URL shortcuts: %d used, %d invalidated):',
+                url_cache.hits, url_cache.misses)
+    for row in summary:
+        logger.info('  %-40s %-25s %5d x %6.2fs = %8.1fs (max %.1fs)', row['cls'],
+                    row['destination'], row['count'], row['mean'], row['total'], row['max'])
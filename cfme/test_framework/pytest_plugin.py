@@ -2,10 +2,18 @@
 cfme main plugin
 
 this loads all of the elemental cfme plugins and prepares configuration
+
+Set ``CFME_IMPORT_PROFILE=1`` to profile the imports of the plugins and of everything they load,
+see :py:mod:`cfme.utils.import_profiler`.
 """
 
 import pytest
 
+from cfme.utils import import_profiler
+
+# before the plugins below are imported
+import_profiler.install_from_env()
+
 
 @pytest.mark.tryfirst
 def pytest_addoption(parser):
@@ -34,6 +42,20 @@ def pytest_collection_finish(session):
         bold=True)
 
 
+def pytest_sessionfinish(session):
+    if not import_profiler.profiler.installed:
+        return
+    from cfme.fixtures.pytest_store import store
+    from cfme.utils.log import logger
+    from cfme.utils.path import log_path
+    name = 'import_profile.txt'
+    if store.slaveid:
+        name = 'import_profile-{}.txt'.format(store.slaveid)
+    path = log_path.join(name)
+    path.write(import_profiler.profiler.format_report(pytest_plugins, limit=100))
+    logger.info('Import profile written to %s', path.strpath)
+
+
 pytest_plugins = (
     'cfme.markers',
     'cfme.fixtures.pytest_store',
@@ -41,6 +63,10 @@ pytest_plugins = (
     'cfme.test_framework.appliance_police',
     'cfme.test_framework.appliance',
     'cfme.test_framework.appliance_log_collector',
+    'cfme.test_framework.collection_index',
+    'cfme.test_framework.navigation',
+    'cfme.test_framework.wait_stats',
+    'cfme.test_framework.sampling_profiler',
     'cfme.test_framework.browser_isolation',
     'cfme.fixtures.portset',
 
@@ -62,6 +88,7 @@ pytest_plugins = (
     'cfme.fixtures.cfme_data',
     'cfme.fixtures.disable_forgery_protection',
     'cfme.fixtures.datafile',
+    'cfme.fixtures.db_snapshots',
     'cfme.fixtures.fixtureconf',
     'cfme.fixtures.log',
     'cfme.fixtures.maximized',
@@ -75,6 +102,7 @@ pytest_plugins = (
     'cfme.fixtures.qa_contact',
     'cfme.fixtures.randomness',
     'cfme.fixtures.rbac',
+    'cfme.fixtures.rest_lifecycle',
     'cfme.fixtures.sauce',
     'cfme.fixtures.screenshots',
     'cfme.fixtures.skip_not_implemented',
@@ -0,0 +1,122 @@
+"""Plugin running the sampling profiler in the test processes
+
+``--sampling-profiler`` samples the stack of the thread running the tests in every test process
+(every slave when the tests run in parallel), see :py:mod:`cfme.utils.sampling_profiler`. It can
+also be enabled in env.yaml:
+
+.. code-block:: yaml
+
+    sampling_profiler:
+        enabled: True
+        interval: 0.02
+
+The folded stacks of each test are sent to artifactor as a ``profile`` file of the test. At the
+end of the session, the stacks and the time by test, phase and category are written to
+``log/sampling_profile[-<slaveid>].{folded,json}``, the master merges the ones of its slaves into
+``log/sampling_profile.{folded,json}``. ``.folded`` files can be turned into flame graphs with
+``flamegraph.pl`` or speedscope.
+"""
+import pytest
+
+from cfme.fixtures.pytest_store import store
+from cfme.utils.conf import env
+from cfme.utils.log import logger
+from cfme.utils.path import log_path
+from cfme.utils.sampling_profiler import DEFAULT_INTERVAL, SamplingProfiler, merge
+
+#: Profiler of this process, when enabled
+profiler = None
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cfme')
+    group.addoption(
+        '--sampling-profiler', action='store_true', default=False,
+        help='Sample the stacks of the test processes, attributed to tests, fixtures and phases')
+    group.addoption(
+        '--sampling-interval', type=float, default=None,
+        help='Seconds between two stack samples (default {})'.format(DEFAULT_INTERVAL))
+
+
+def _enabled(config):
+    return config.getoption('sampling_profiler') or env.get(
+        'sampling_profiler', {}).get('enabled', False)
+
+
+def pytest_sessionstart(session):
+    global profiler
+    config = session.config
+    if not _enabled(config) or store.parallel_session:
+        # the master of parallel sessions (registered at configure) does not run tests
+        return
+    interval = (config.getoption('sampling_interval') or
+                env.get('sampling_profiler', {}).get('interval', DEFAULT_INTERVAL))
+    profiler = SamplingProfiler(interval=interval)
+    profiler.start()
+
+
+def _profile_phase(item, phase):
+    if profiler is not None:
+        profiler.set_context(item.nodeid, phase)
+
+
+@pytest.mark.hookwrapper
+def pytest_runtest_setup(item):
+    _profile_phase(item, 'setup')
+    yield
+
+
+@pytest.mark.hookwrapper
+def pytest_runtest_call(item):
+    _profile_phase(item, 'call')
+    yield
+
+
+@pytest.mark.hookwrapper
+def pytest_runtest_teardown(item, nextitem):
+    _profile_phase(item, 'teardown')
+    yield
+    if profiler is None:
+        return
+    profiler.set_context()
+    stacks = profiler.pop_test(item.nodeid)
+    if stacks and getattr(item.config, '_art_client', None):
+        from cfme.fixtures.artifactor_plugin import fire_art_blob_dump
+        fire_art_blob_dump(
+            item, stacks, 'text/plain', description='Sampling profile (folded stacks)',
+            file_type='profile', group_id='profile', slaveid=store.slaveid)
+
+
+@pytest.mark.hookwrapper
+def pytest_fixture_setup(fixturedef, request):
+    if profiler is None:
+        yield
+        return
+    profiler.fixtures.append(fixturedef.argname)
+    try:
+        yield
+    finally:
+        profiler.fixtures.pop()
+
+
+def pytest_sessionfinish(session):
+    if store.parallel_session:
+        if _enabled(session.config):
+            profiles = [path.new(ext='') for path in log_path.listdir('sampling_profile-*.json')]
+            if profiles:
+                merge(profiles, log_path.join('sampling_profile'))
+        return
+    if profiler is None:
+        return
+    profiler.stop()
+    name = 'sampling_profile'
+    if store.slaveid:
+        name = 'sampling_profile-{}'.format(store.slaveid)
+    profiler.dump(log_path.join(name))
+    summary = profiler.summary()
+    logger.info('Sampling profile: %d samples every %.3fs, %.1fs spent sampling',
+                summary['samples'], profiler.interval, summary['overhead'])
+    for phase, categories in sorted(summary['totals'].items()):
+        logger.info('  %-10s %s', phase, ', '.join(
+            '{} {:.1f}s'.format(category, seconds)
+            for category, seconds in sorted(categories.items(), key=lambda c: -c[1])))
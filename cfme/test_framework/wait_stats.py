@@ -0,0 +1,52 @@
+"""Plugin for the statistics of waits and adaptive polling
+
+Every :py:func:`cfme.utils.wait.wait_for` call is recorded by call site, see
+:py:mod:`cfme.utils.wait_stats`. ``--wait-adaptive`` makes waits check their condition quickly at
+first and back off up to a delay derived from the durations of the waits of the same call site in
+the previous sessions. It can also be enabled in env.yaml:
+
+.. code-block:: yaml
+
+    wait_for:
+        adaptive: True
+
+At the end of the session, the statistics are written to ``log/wait_stats[-<slaveid>].json``,
+the durations are added to the history in the cache and the longest waits are logged.
+"""
+from cfme.fixtures.pytest_store import store
+from cfme.utils.conf import env
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path, log_path
+from cfme.utils.wait_stats import wait_stats
+
+history_path = cache_path.join('wait_history.json')
+
+
+def pytest_addoption(parser):
+    parser.getgroup('cfme').addoption(
+        '--wait-adaptive', action='store_true', default=False,
+        help='Poll wait_for conditions with backoff schedules adapted to previous durations')
+
+
+def pytest_configure(config):
+    wait_stats.adaptive = (config.getoption('wait_adaptive') or
+                           env.get('wait_for', {}).get('adaptive', False))
+    wait_stats.load_history(history_path)
+
+
+def pytest_sessionfinish(session):
+    summary = wait_stats.summary(limit=10)
+    if not summary:
+        return
+    name = 'wait_stats.json'
+    if store.slaveid:
+        name = 'wait_stats-{}.json'.format(store.slaveid)
+    wait_stats.dump(log_path.join(name))
+    try:
+        wait_stats.save_history(history_path)
+    except (IOError, OSError) as e:
+        logger.warning('Could not save the wait history: %s', e)
+    logger.info('Longest waits (adaptive polling: %s):', wait_stats.adaptive)
+    for row in summary:
+        logger.info('  %-60s %5d x %6.1fs = %8.1fs, %d checks, %d timeouts', row['site'],
+                    row['calls'], row['mean'], row['total'], row['checks'], row['timeouts'])
@@ -20,7 +20,6 @@ The tests for resource allocation are in :
 cfme/tests/intelligence/chargeback/test_resource_allocation.py
 """
 
-import math
 from datetime import date
 
 import fauxfactory
@@ -38,6 +37,7 @@ from cfme.infrastructure.provider import InfraProvider
 from cfme.infrastructure.provider.scvmm import SCVMMProvider
 from cfme.markers.env_markers.provider import providers
 from cfme.utils.blockers import BZ
+from cfme.utils.chargeback import expected_costs, has_rollups, rollup_usage
 from cfme.utils.log import logger
 from cfme.utils.providers import ProviderFilter
 from cfme.utils.wait import wait_for
@@ -170,43 +170,16 @@ def assign_custom_rate(new_compute_rate, provider):
 def verify_records_rollups_table(appliance, provider):
     # Verify that hourly rollups are present in the metric_rollups table.
     vm_name = provider.data['cap_and_util']['chargeback_vm']
-
-    ems = appliance.db.client['ext_management_systems']
-    rollups = appliance.db.client['metric_rollups']
-
-    with appliance.db.client.transaction:
-        result = (
-            appliance.db.client.session.query(rollups.id)
-            .join(ems, rollups.parent_ems_id == ems.id)
-            .filter(rollups.capture_interval_name == 'hourly', rollups.resource_name == vm_name,
-            ems.name == provider.name, rollups.timestamp >= date.today())
-        )
-
-    for record in appliance.db.client.session.query(rollups).filter(
-            rollups.id.in_(result.subquery())):
-        if (record.cpu_usagemhz_rate_average or
-           record.cpu_usage_rate_average or
-           record.derived_memory_used or
-           record.net_usage_rate_average or
-           record.disk_usage_rate_average):
-            return True
-    return False
+    return has_rollups(appliance.db.client, provider.name, vm_name, date.today())
 
 
 @pytest.fixture(scope="module")
 def resource_usage(vm_ownership, appliance, provider):
     # Retrieve resource usage values from metric_rollups table.
-    average_cpu_used_in_mhz = 0
-    average_memory_used_in_mb = 0
-    average_network_io = 0
-    average_disk_io = 0
-    average_storage_used = 0
-    consumed_hours = 0
     vm_name = provider.data['cap_and_util']['chargeback_vm']
 
     metrics = appliance.db.client['metrics']
     rollups = appliance.db.client['metric_rollups']
-    ems = appliance.db.client['ext_management_systems']
     logger.info('Deleting METRICS DATA from metrics and metric_rollups tables')
 
     appliance.db.client.session.query(metrics).delete()
@@ -268,141 +241,19 @@ def resource_usage(vm_ownership, appliance, provider):
 
     # Since we are collecting C&U data for > 1 hour, there will be multiple hourly records per VM
     # in the metric_rollups DB table.The values from these hourly records are summed up.
-
-    with appliance.db.client.transaction:
-        result = (
-            appliance.db.client.session.query(rollups.id)
-            .join(ems, rollups.parent_ems_id == ems.id)
-            .filter(rollups.capture_interval_name == 'hourly', rollups.resource_name == vm_name,
-            ems.name == provider.name, rollups.timestamp >= date.today())
-        )
-
-    for record in appliance.db.client.session.query(rollups).filter(
-            rollups.id.in_(result.subquery())):
-        consumed_hours = consumed_hours + 1
-        if (record.cpu_usagemhz_rate_average or
-           record.cpu_usage_rate_average or
-           record.derived_memory_used or
-           record.net_usage_rate_average or
-           record.disk_usage_rate_average):
-            average_cpu_used_in_mhz = average_cpu_used_in_mhz + record.cpu_usagemhz_rate_average
-            average_memory_used_in_mb = average_memory_used_in_mb + record.derived_memory_used
-            average_network_io = average_network_io + record.net_usage_rate_average
-            average_disk_io = average_disk_io + record.disk_usage_rate_average
-
-    for record in appliance.db.client.session.query(rollups).filter(
-            rollups.id.in_(result.subquery())):
-        if record.derived_vm_used_disk_storage:
-            average_storage_used = average_storage_used + record.derived_vm_used_disk_storage
-
-    # Convert storage used in bytes to GB
-    average_storage_used = average_storage_used * math.pow(2, -30)
-
-    return {"average_cpu_used_in_mhz": average_cpu_used_in_mhz,
-            "average_memory_used_in_mb": average_memory_used_in_mb,
-            "average_network_io": average_network_io,
-            "average_disk_io": average_disk_io,
-            "average_storage_used": average_storage_used,
-            "consumed_hours": consumed_hours}
-
-
-def resource_cost(appliance, provider, metric_description, usage, description, rate_type,
-        consumed_hours):
-    # Query the DB for Chargeback rates
-    tiers = appliance.db.client['chargeback_tiers']
-    details = appliance.db.client['chargeback_rate_details']
-    cb_rates = appliance.db.client['chargeback_rates']
-    list_of_rates = []
-
-    def add_rate(tiered_rate):
-        list_of_rates.append(tiered_rate)
-
-    with appliance.db.client.transaction:
-        result = (
-            appliance.db.client.session.query(tiers).
-            join(details, tiers.chargeback_rate_detail_id == details.id).
-            join(cb_rates, details.chargeback_rate_id == cb_rates.id).
-            filter(details.description == metric_description).
-            filter(cb_rates.rate_type == rate_type).
-            filter(cb_rates.description == description).all()
-        )
-    for row in result:
-        tiered_rate = {var: getattr(row, var) for var in ['variable_rate', 'fixed_rate', 'start',
-            'finish']}
-        add_rate(tiered_rate)
-
-    # Check what tier the usage belongs to and then compute the usage cost based on Fixed and
-    # Variable Chargeback rates.
-    for d in list_of_rates:
-        if usage >= d['start'] and usage < d['finish']:
-            cost = (d['variable_rate'] * usage) + (d['fixed_rate'] * consumed_hours)
-            return cost
+    return rollup_usage(appliance.db.client, provider.name, vm_name, date.today())
 
 
 @pytest.fixture(scope="module")
 def chargeback_costs_default(resource_usage, appliance, provider):
     # Estimate Chargeback costs using default Chargeback rate and resource usage from the DB.
-    average_cpu_used_in_mhz = resource_usage['average_cpu_used_in_mhz']
-    average_memory_used_in_mb = resource_usage['average_memory_used_in_mb']
-    average_network_io = resource_usage['average_network_io']
-    average_disk_io = resource_usage['average_disk_io']
-    average_storage_used = resource_usage['average_storage_used']
-    consumed_hours = resource_usage['consumed_hours']
-
-    cpu_used_cost = resource_cost(appliance, provider, 'Used CPU',
-        average_cpu_used_in_mhz, 'Default', 'Compute', consumed_hours)
-
-    memory_used_cost = resource_cost(appliance, provider, 'Used Memory',
-        average_memory_used_in_mb, 'Default', 'Compute', consumed_hours)
-
-    network_used_cost = resource_cost(appliance, provider, 'Used Network I/O',
-        average_network_io, 'Default', 'Compute', consumed_hours)
-
-    disk_used_cost = resource_cost(appliance, provider, 'Used Disk I/O',
-        average_disk_io, 'Default', 'Compute', consumed_hours)
-
-    storage_used_cost = resource_cost(appliance, provider, 'Used Disk Storage',
-        average_storage_used, 'Default', 'Storage', consumed_hours)
-
-    return {"cpu_used_cost": cpu_used_cost,
-            "memory_used_cost": memory_used_cost,
-            "network_used_cost": network_used_cost,
-            "disk_used_cost": disk_used_cost,
-            "storage_used_cost": storage_used_cost}
+    return expected_costs(appliance.db.client, resource_usage, 'Default')
 
 
 @pytest.fixture(scope="module")
 def chargeback_costs_custom(resource_usage, new_compute_rate, appliance, provider):
     # Estimate Chargeback costs using custom Chargeback rate and resource usage from the DB.
-    description = new_compute_rate
-
-    average_cpu_used_in_mhz = resource_usage['average_cpu_used_in_mhz']
-    average_memory_used_in_mb = resource_usage['average_memory_used_in_mb']
-    average_network_io = resource_usage['average_network_io']
-    average_disk_io = resource_usage['average_disk_io']
-    average_storage_used = resource_usage['average_storage_used']
-    consumed_hours = resource_usage['consumed_hours']
-
-    cpu_used_cost = resource_cost(appliance, provider, 'Used CPU',
-        average_cpu_used_in_mhz, description, 'Compute', consumed_hours)
-
-    memory_used_cost = resource_cost(appliance, provider, 'Used Memory',
-        average_memory_used_in_mb, description, 'Compute', consumed_hours)
-
-    network_used_cost = resource_cost(appliance, provider, 'Used Network I/O',
-        average_network_io, description, 'Compute', consumed_hours)
-
-    disk_used_cost = resource_cost(appliance, provider, 'Used Disk I/O',
-        average_disk_io, description, 'Compute', consumed_hours)
-
-    storage_used_cost = resource_cost(appliance, provider, 'Used Disk Storage',
-        average_storage_used, description, 'Storage', consumed_hours)
-
-    return {"cpu_used_cost": cpu_used_cost,
-            "memory_used_cost": memory_used_cost,
-            "network_used_cost": network_used_cost,
-            "disk_used_cost": disk_used_cost,
-            "storage_used_cost": storage_used_cost}
+    return expected_costs(appliance.db.client, resource_usage, new_compute_rate)
 
 
 @pytest.fixture(scope="module")
@@ -38,6 +38,7 @@ from cfme.utils.ssh import SSHTail
 from cfme.utils.version import Version, get_stream, VersionPicker
 from cfme.utils.wait import wait_for, TimedOutError
 from .db import ApplianceDB
+from .db_snapshots import ApplianceDBSnapshots
 from .implementations.rest import ViaREST
 from .implementations.ssui import ViaSSUI
 from .implementations.ui import ViaUI
@@ -240,6 +241,7 @@ class IPAppliance(object):
     httpd = SystemdService.declare(unit_name='httpd')
     sssd = SystemdService.declare(unit_name='sssd')
     db = ApplianceDB.declare()
+    db_snapshots = ApplianceDBSnapshots.declare()
 
     CONFIG_MAPPING = {
         'hostname': 'hostname',
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Named snapshots of the appliance database
+
+Snapshots are PostgreSQL databases created with the VMDB as their template, which makes
+PostgreSQL copy the database files instead of dumping and loading rows. Restoring one copies the
+snapshot the same way while ``evmserverd`` is still running, then stops ``evmserverd`` only to
+swap the copy in place of the VMDB by renaming the databases. The restored database is a file
+level copy of the same appliance database, so it does not need ``fix_auth`` like a restored dump.
+
+Usage:
+
+.. code-block:: python
+
+    appliance.db_snapshots.create('baseline')
+    # ... change things ...
+    appliance.db_snapshots.restore('baseline')
+    appliance.db_snapshots.delete('baseline')
+"""
+import re
+from contextlib import contextmanager
+
+import attr
+
+from cfme.utils.quote import quote
+from .plugin import AppliancePlugin, AppliancePluginException
+
+
+class ApplianceDBSnapshotException(AppliancePluginException):
+    """Raised when a database snapshot operation fails"""
+    pass
+
+
+@attr.s
+class ApplianceDBSnapshots(AppliancePlugin):
+    """Holder for the database snapshots of an appliance
+
+    Args:
+        database: name of the snapshotted database
+        prefix: prefix of the names of the snapshot databases
+    """
+    database = attr.ib(default='vmdb_production')
+    prefix = attr.ib(default='vmdb_snapshot_')
+
+    @property
+    def ssh_client(self):
+        return self.appliance.db.ssh_client
+
+    def _psql(self, sql, timeout=60):
+        """Runs SQL in the ``postgres`` database, returns the output lines"""
+        result = self.ssh_client.run_command(
+            'psql -d postgres -t -A -c {}'.format(quote(sql)), timeout=timeout)
+        if result.failed:
+            msg = 'Database snapshot query {!r} failed: {}'.format(sql, result.output)
+            self.logger.error(msg)
+            raise ApplianceDBSnapshotException(msg)
+        return [line for line in result.output.splitlines() if line.strip()]
+
+    def db_name(self, name):
+        """Returns the name of the database of a snapshot"""
+        if not re.match(r'^[a-z0-9_]+$', name):
+            raise ValueError(
+                'Snapshot name {!r} may only contain lowercase letters, digits and _'.format(name))
+        return '{}{}'.format(self.prefix, name)
+
+    def list(self):
+        """Returns the names of the snapshots"""
+        rows = self._psql(
+            "SELECT datname FROM pg_database WHERE datname LIKE '{}%' ORDER BY datname".format(
+                self.prefix.replace('_', r'\_')))
+        return [row[len(self.prefix):] for row in rows]
+
+    def exists(self, name):
+        return name in self.list()
+
+    def _disconnect(self, database):
+        """Terminates the connections to a database, a template must not have any"""
+        self._psql(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = '{}' AND pid <> pg_backend_pid()".format(database))
+
+    def _copy(self, source, target):
+        self._psql('CREATE DATABASE "{}" TEMPLATE "{}"'.format(target, source), timeout=1800)
+
+    def _drop(self, database):
+        self._psql('DROP DATABASE IF EXISTS "{}"'.format(database), timeout=600)
+
+    def _rename(self, database, new_name):
+        self._psql('ALTER DATABASE "{}" RENAME TO "{}"'.format(database, new_name))
+
+    @contextmanager
+    def evm_stopped(self, wait_for_web_ui=True):
+        """Stops ``evmserverd`` for the duration of the context if it is running
+
+        Args:
+            wait_for_web_ui: wait for the web UI after starting ``evmserverd`` again
+        """
+        running = self.appliance.evmserverd.running
+        if running:
+            self.logger.info('Stopping evmserverd for a database snapshot operation')
+            self.appliance.evmserverd.stop()
+        try:
+            yield
+        finally:
+            if running:
+                self.appliance.evmserverd.start()
+                if wait_for_web_ui:
+                    self.appliance.wait_for_web_ui()
+
+    def create(self, name, replace=False, wait_for_web_ui=True):
+        """Snapshots the database, stopping ``evmserverd`` during the copy
+
+        Args:
+            name: name of the snapshot
+            replace: replace an existing snapshot of the same name instead of raising
+            wait_for_web_ui: wait for the web UI after starting ``evmserverd`` again
+
+        Raises:
+            ApplianceDBSnapshotException: if the snapshot exists and ``replace`` is not set
+        """
+        snapshot = self.db_name(name)
+        if self.exists(name):
+            if not replace:
+                raise ApplianceDBSnapshotException('Snapshot {} already exists'.format(name))
+            self._drop(snapshot)
+        self.logger.info('Creating database snapshot %s', name)
+        with self.evm_stopped(wait_for_web_ui=wait_for_web_ui):
+            self._disconnect(self.database)
+            self._copy(self.database, snapshot)
+        return snapshot
+
+    def restore(self, name, wait_for_web_ui=True):
+        """Replaces the database with a copy of a snapshot, the snapshot is kept
+
+        ``evmserverd`` is only stopped to swap the databases, the copy is made before.
+
+        Args:
+            name: name of the snapshot
+            wait_for_web_ui: wait for the web UI after starting ``evmserverd`` again
+        """
+        snapshot = self.db_name(name)
+        if not self.exists(name):
+            raise ApplianceDBSnapshotException('Snapshot {} does not exist'.format(name))
+        restoring = '{}_restoring'.format(self.database)
+        replaced = '{}_replaced'.format(self.database)
+        self.logger.info('Restoring database snapshot %s', name)
+        self._drop(restoring)
+        self._drop(replaced)
+        self._copy(snapshot, restoring)
+        with self.evm_stopped(wait_for_web_ui=wait_for_web_ui):
+            self._disconnect(self.database)
+            self._rename(self.database, replaced)
+            self._rename(restoring, self.database)
+        self._drop(replaced)
+
+    def delete(self, name):
+        """Deletes a snapshot, does nothing if it does not exist"""
+        self.logger.info('Deleting database snapshot %s', name)
+        self._drop(self.db_name(name))
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 import json
 import time
-from inspect import isclass
 from time import sleep
 
 import os
@@ -22,6 +21,7 @@ from cfme import exceptions
 from cfme.fixtures.pytest_store import store
 from cfme.utils.browser import manager
 from cfme.utils.log import logger, create_sublogger
+from cfme.utils.navigation import class_name, navigation_stats, url_cache
 from cfme.utils.version import Version
 from cfme.utils.wait import wait_for
 from . import Implementation
@@ -276,6 +276,9 @@ def can_skip_badness_test(fn):
 
 class CFMENavigateStep(NavigateStep):
     VIEW = None
+    #: Whether the destination can be reached by loading the URL it was displayed at before,
+    #: to be disabled for destinations depending on state kept in the session
+    URL_SHORTCUT = True
 
     @cached_property
     def view(self):
@@ -514,12 +517,57 @@ class CFMENavigateStep(NavigateStep):
         pass
 
     def log_message(self, msg, level="debug"):
-        class_name = self.obj.__name__ if isclass(self.obj) else self.obj.__class__.__name__
-        str_msg = "[UI-NAV/{}/{}]: {}".format(class_name, self._name, msg)
+        str_msg = "[UI-NAV/{}/{}]: {}".format(class_name(self.obj), self._name, msg)
         getattr(logger, level)(str_msg)
 
-    def construct_message(self, here, resetter, view, duration, waited):
-        str_here = "Already Here" if here else "Needed Navigation"
+    def timed(self, phase, fn, *args, **kwargs):
+        """Calls ``fn`` recording its duration as ``phase`` in the navigation stats"""
+        start_time = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            navigation_stats.record(
+                class_name(self.obj), self._name, phase, time.time() - start_time)
+
+    @property
+    def url_cache_key(self):
+        return url_cache.key(self.appliance.hostname, self.obj, self._name)
+
+    @property
+    def can_use_url(self):
+        return url_cache.enabled and self.URL_SHORTCUT and self.VIEW is not None
+
+    def go_to_cached_url(self, _tries, nav_args, *args, **kwargs):
+        """Loads the URL the destination was displayed at before, returns whether it worked
+
+        The URL is forgotten if the view is not displayed after loading it.
+        """
+        key = self.url_cache_key
+        url = url_cache.get(key)
+        if url is None:
+            return False
+        self.log_message("Loading cached URL {}".format(url))
+        self.appliance.browser.widgetastic.url = url
+        if self.check_for_badness(self.am_i_here, _tries, nav_args, *args, **kwargs):
+            url_cache.hit()
+            return True
+        self.log_message("View not displayed at cached URL {}, forgetting it".format(url),
+                         level="warning")
+        url_cache.invalidate(key)
+        return False
+
+    def learn_url(self):
+        """Caches the current URL for the destination if its view is displayed"""
+        if self.am_i_here():
+            url_cache.set(self.url_cache_key, self.appliance.browser.widgetastic.url)
+
+    def construct_message(self, here, resetter, view, duration, waited, url_used=False):
+        if here:
+            str_here = "Already Here"
+        elif url_used:
+            str_here = "Cached URL Used"
+        else:
+            str_here = "Needed Navigation"
         str_resetter = "Resetter Used" if resetter else "No Resetter"
         str_view = "View Returned" if view else "No View Available"
         str_waited = "Waited on View" if waited else "No Wait on View"
@@ -545,27 +593,43 @@ class CFMENavigateStep(NavigateStep):
         here = False
         resetter_used = False
         waited = False
+        url_used = False
         try:
-            here = self.check_for_badness(self.am_i_here, _tries, nav_args, *args, **kwargs)
+            here = self.timed(
+                'am_i_here', self.check_for_badness, self.am_i_here, _tries, nav_args,
+                *args, **kwargs)
         except Exception as e:
             self.log_message(
                 "Exception raised [{}] whilst checking if already here".format(e), level="error")
-        if not here:
+        # steps with arguments may lead to different URLs
+        use_url = self.can_use_url and not args and not kwargs
+        if not here and use_url:
+            url_used = self.timed(
+                'url', self.go_to_cached_url, _tries, nav_args, *args, **kwargs)
+        if not here and not url_used:
             self.log_message("Prerequisite Needed")
-            self.prerequisite_view = self.prerequisite()
+            self.prerequisite_view = self.timed('prerequisite', self.prerequisite)
             try:
-                self.check_for_badness(self.step, _tries, nav_args, *args, **kwargs)
+                self.timed(
+                    'step', self.check_for_badness, self.step, _tries, nav_args, *args, **kwargs)
             except (exceptions.CandidateNotFound, exceptions.ItemNotFound) as e:
                 self.log_message(
                     "Item/Tree Exception raised [{}] whilst running step, trying refresh"
                     .format(e), level="error"
                 )
                 self.appliance.browser.widgetastic.refresh()
-                self.check_for_badness(self.step, _tries, nav_args, *args, **kwargs)
+                self.timed(
+                    'step', self.check_for_badness, self.step, _tries, nav_args, *args, **kwargs)
+            if use_url:
+                self.learn_url()
         if nav_args['use_resetter']:
             resetter_used = True
-            self.check_for_badness(self.resetter, _tries, nav_args, *args, **kwargs)
-        self.check_for_badness(self.post_navigate, _tries, nav_args, *args, **kwargs)
+            self.timed(
+                'resetter', self.check_for_badness, self.resetter, _tries, nav_args,
+                *args, **kwargs)
+        self.timed(
+            'post_navigate', self.check_for_badness, self.post_navigate, _tries, nav_args,
+            *args, **kwargs)
         view = self.view if self.VIEW is not None else None
         duration = int((time.time() - start_time) * 1000)
         if view and nav_args['wait_for_view'] and not os.environ.get(
@@ -575,8 +639,10 @@ class CFMENavigateStep(NavigateStep):
                 lambda: view.is_displayed, num_sec=10,
                 message="Waiting for view [{}] to display".format(view.__class__.__name__)
             )
+        navigation_stats.record(class_name(self.obj), self._name, 'total', duration / 1000.)
         self.log_message(
-            self.construct_message(here, resetter_used, view, duration, waited), level="info"
+            self.construct_message(here, resetter_used, view, duration, waited, url_used),
+            level="info"
         )
         return view
 
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Concurrent, streaming collection of log files from appliances
+
+Logs are streamed over SSH channels straight into local files, no archive is created on the
+appliance and all appliances are collected at the same time.
+
+Without limits, a plain collection writes one ``log-collector-<hostname>.tar.gz`` per appliance
+(``tar | gzip`` on the appliance, written locally as it arrives). With ``max_bytes`` or
+``tail_lines``, or when collecting incrementally, every log is written to its own
+``<hostname>/<log path>.gz``. Each :py:meth:`ApplianceLogCollector.collect` call appends only the
+part of a log written since the previous call, as a new gzip member, so the ``.gz`` files are
+always valid and a crashed session keeps what was collected so far.
+
+Usage:
+
+.. code-block:: python
+
+    collector = ApplianceLogCollector(appliances, log_files, log_path.join('appliance'),
+                                      max_bytes=50 * 1024 * 1024)
+    collector.collect()  # during the session, as often as wanted
+    collector.collect()  # at the end, only the new parts are transferred
+"""
+import re
+import threading
+from concurrent import futures
+
+from cfme.utils.log import logger
+from cfme.utils.quote import quote
+
+#: Size of the chunks read from the SSH channels
+CHUNK_SIZE = 256 * 1024
+
+# Prints "<start> <size>" on stderr and the gzipped slice of the file on stdout. The slice starts
+# at the offset collected so far (from the start again if the log was rotated), is shortened to
+# the last tail_lines lines on the first collection and to the last max_bytes bytes.
+_SLICE_COMMAND = (
+    'f={path}; [ -r "$f" ] || exit 3; '
+    'size=$(stat -c %s "$f"); start={offset}; '
+    '[ "$size" -lt "$start" ] && start=0; '
+    'if [ {tail_lines} -gt 0 ] && [ "$start" -eq 0 ]; then '
+    'start=$((size - $(tail -n {tail_lines} "$f" | wc -c))); fi; '
+    'if [ {max_bytes} -gt 0 ] && [ $((size - start)) -gt {max_bytes} ]; then '
+    'start=$((size - {max_bytes})); fi; '
+    '[ "$start" -lt 0 ] && start=0; '
+    'echo "$start $size" >&2; '
+    'tail -c +$((start + 1)) "$f" | head -c $((size - start)) | gzip -c'
+)
+
+_TAR_COMMAND = 'tar -cf - $(ls {files} 2>/dev/null) | gzip -c'
+
+
+def slice_command(path, offset=0, max_bytes=None, tail_lines=None):
+    """Returns the shell command streaming the gzipped new part of a log, see module docs"""
+    return _SLICE_COMMAND.format(path=quote(path), offset=int(offset),
+                                 max_bytes=int(max_bytes or 0), tail_lines=int(tail_lines or 0))
+
+
+def local_name(path):
+    """Returns the local file name of a remote log path"""
+    return '{}.gz'.format(re.sub(r'[^\w.-]', '_', path.strip('/')))
+
+
+class StreamError(Exception):
+    """Raised when a remote command streaming a log fails"""
+    pass
+
+
+def stream_command(ssh_client, command, stream, timeout=600):
+    """Runs ``command`` on the host of ``ssh_client``, writing its stdout to ``stream``
+
+    Returns:
+        The stderr output of the command.
+
+    Raises:
+        StreamError: if the command exits with a non zero status
+    """
+    channel = ssh_client.get_transport().open_session()
+    try:
+        channel.settimeout(float(timeout))
+        channel.exec_command(command)
+        while True:
+            data = channel.recv(CHUNK_SIZE)
+            if not data:
+                break
+            stream.write(data)
+        stderr = []
+        while True:
+            data = channel.recv_stderr(CHUNK_SIZE)
+            if not data:
+                break
+            stderr.append(data)
+        stderr = b''.join(stderr).decode('utf-8', 'replace')
+        status = channel.recv_exit_status()
+    finally:
+        channel.close()
+    if status:
+        raise StreamError('Exit status {}: {}'.format(status, stderr.strip()))
+    return stderr
+
+
+class ApplianceLogCollector(object):
+    """Collects log files of several appliances concurrently
+
+    Args:
+        appliances: appliances to collect the logs of
+        log_files: absolute paths of the logs on the appliances
+        local_dir: ``py.path.local`` of the directory to write the logs to
+        max_bytes: if set, at most this many bytes (the end) of each log are collected per call
+        tail_lines: if set, the first collection of each log starts this many lines from its end
+        max_workers: number of appliances collected at the same time
+        timeout: timeout in seconds of a single transfer
+    """
+    def __init__(self, appliances, log_files, local_dir, max_bytes=None, tail_lines=None,
+                 max_workers=8, timeout=600):
+        self.appliances = list(appliances)
+        self.log_files = list(log_files)
+        self.local_dir = local_dir
+        self.max_bytes = max_bytes
+        self.tail_lines = tail_lines
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # (hostname, path) -> remote offset collected so far
+        self.offsets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def per_file(self):
+        """Whether the logs are collected into separate, appendable files"""
+        return bool(self.max_bytes or self.tail_lines)
+
+    def collect(self, incremental=None):
+        """Collects the logs from all appliances, returns the list of written local paths
+
+        Args:
+            incremental: collect each log into its own file, appending to what the previous
+                calls collected; by default only when limits are set or after an incremental
+                collection
+        """
+        if incremental is None:
+            incremental = self.per_file or bool(self.offsets)
+        # Only one collection at a time, the offsets are shared
+        with self._lock:
+            written = []
+            with futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pending = {
+                    executor.submit(self._collect_appliance, appliance, incremental): appliance
+                    for appliance in self.appliances}
+                for future in futures.as_completed(pending):
+                    try:
+                        written.extend(future.result())
+                    except Exception:  # noqa
+                        logger.exception('Log collection failed on %s', pending[future])
+            return written
+
+    def _collect_appliance(self, appliance, incremental):
+        with appliance.ssh_client as ssh_client:
+            if ssh_client.is_container or ssh_client.is_pod or ssh_client.username != 'root':
+                # exec on containers/pods and sudo need the run_command wrapping
+                return [self._collect_archive_legacy(appliance, ssh_client)]
+            if incremental:
+                return self._collect_files(appliance, ssh_client)
+            return [self._collect_archive(appliance, ssh_client)]
+
+    def _collect_archive(self, appliance, ssh_client):
+        local_file = self.local_dir.join('log-collector-{}.tar.gz'.format(appliance.hostname))
+        command = _TAR_COMMAND.format(files=' '.join(quote(path) for path in self.log_files))
+        logger.debug('Streaming %s from %s', command, appliance)
+        tmp_file = local_file.new(basename=local_file.basename + '.part')
+        with tmp_file.open('wb') as stream:
+            stream_command(ssh_client, command, stream, timeout=self.timeout)
+        tmp_file.rename(local_file)
+        return local_file.strpath
+
+    def _collect_archive_legacy(self, appliance, ssh_client):
+        tar_file = 'log-collector-{}.tar.gz'.format(appliance.hostname)
+        # wrap the files in ls, redirecting stderr, to ignore files that don't exist
+        tar_result = ssh_client.run_command(
+            'tar -czvf {tar} $(ls {files} 2>/dev/null)'
+            .format(tar=tar_file, files=' '.join(self.log_files)))
+        if not tar_result.success:
+            raise StreamError('Tar command non-zero RC when collecting logs on {}: {}'.format(
+                appliance, tar_result.output))
+        ssh_client.get_file(tar_file, self.local_dir.strpath)
+        ssh_client.run_command('rm -f {}'.format(tar_file))
+        return self.local_dir.join(tar_file).strpath
+
+    def _collect_files(self, appliance, ssh_client):
+        app_dir = self.local_dir.join(appliance.hostname).ensure(dir=True)
+        written = []
+        for path in self.log_files:
+            key = (appliance.hostname, path)
+            command = slice_command(path, self.offsets.get(key, 0), self.max_bytes,
+                                    self.tail_lines)
+            local_file = app_dir.join(local_name(path))
+            size_before = local_file.size() if local_file.check() else 0
+            with local_file.open('ab') as stream:
+                try:
+                    stderr = stream_command(ssh_client, command, stream, timeout=self.timeout)
+                except Exception as e:  # noqa
+                    # drop the partial gzip member, the next collection fetches it again
+                    stream.truncate(size_before)
+                    logger.warning('Could not collect %s from %s: %s', path, appliance, e)
+                    continue
+            try:
+                start, size = (int(value) for value in stderr.split()[-2:])
+            except ValueError:
+                logger.warning('Unexpected output collecting %s from %s: %r',
+                               path, appliance, stderr)
+                continue
+            if start > self.offsets.get(key, 0):
+                logger.info('Collected %s from %s without its first %d bytes (limits)',
+                            path, appliance, start - self.offsets.get(key, 0))
+            self.offsets[key] = size
+            written.append(local_file.strpath)
+        return written
+
+
+class PeriodicCollector(threading.Thread):
+    """Runs :py:meth:`ApplianceLogCollector.collect` every ``interval`` seconds until stopped"""
+    def __init__(self, collector, interval):
+        super(PeriodicCollector, self).__init__(name='appliance-log-collector')
+        self.daemon = True
+        self.collector = collector
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.collector.collect(incremental=True)
+            except Exception:  # noqa
+                logger.exception('Periodic appliance log collection failed')
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
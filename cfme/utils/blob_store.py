@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Local content addressed store for test artifacts
+
+Screenshots are written to the store directly by the process producing them, under the SHA256 of
+their content. Only the digest, size and media type travel through the artifactor bus, the
+``filedump`` plugin links the blob to the artifact file of the test. Identical contents (the same
+screenshot of an error page) are stored once. Tracebacks are not stored, the ``sanitize`` hook
+masks the secrets in them before the artifact files are archived.
+
+The store lives in ``blobs`` of the artifactor ``log_dir``, which the test processes and the
+artifactor server share.
+
+Usage:
+
+.. code-block:: python
+
+    ref = blob_store().put(png_bytes, 'image/png')
+    ref.digest, ref.size, ref.media_type
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+import six
+from py.path import local
+
+from cfme.utils.path import log_path
+
+#: Name of the store directory in the artifactor ``log_dir``
+BLOB_DIR = 'blobs'
+
+BlobRef = namedtuple('BlobRef', ['digest', 'size', 'media_type'])
+
+
+class BlobStore(object):
+    """Blobs stored as ``<root>/<first two digest chars>/<digest>``
+
+    Args:
+        root: directory of the store
+    """
+    def __init__(self, root):
+        self.root = str(root)
+
+    def path(self, digest):
+        """Returns the path of the blob with the given digest"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def __contains__(self, digest):
+        return os.path.isfile(self.path(digest))
+
+    def put(self, data, media_type='application/octet-stream'):
+        """Stores ``data`` (text is stored utf-8 encoded), returns its :py:class:`BlobRef`
+
+        Writing a blob that is already stored is a no-op, and concurrent writers of the same
+        blob are safe, the file appears atomically.
+        """
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.isfile(path):
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    # created by another process in the meantime
+                    if not os.path.isdir(directory):
+                        raise
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                # readable like the artifact files linked to it, mkstemp creates it 0600
+                os.chmod(tmp_path, 0o644)
+                os.rename(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return BlobRef(digest, len(data), media_type)
+
+    def read(self, digest):
+        """Returns the content of a blob"""
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+    def link(self, digest, target):
+        """Makes the blob available as ``target``, hard linked if possible, copied otherwise
+
+        Files linked this way must be replaced rather than rewritten in place, not to change the
+        blob.
+        """
+        if os.path.lexists(target):
+            os.remove(target)
+        try:
+            os.link(self.path(digest), target)
+        except OSError:
+            local(self.path(digest)).copy(local(target))
+
+
+def blob_store(log_dir=None):
+    """Returns the store of the artifactor ``log_dir``, the configured one by default"""
+    if log_dir is None:
+        from cfme.utils.conf import env
+        log_dir = env.get('artifactor', {}).get('log_dir', log_path.strpath)
+    return BlobStore(os.path.join(str(log_dir), BLOB_DIR))
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Expected chargeback figures computed from the VMDB
+
+Chargeback tests compare the costs shown in chargeback reports with costs estimated from the
+``metric_rollups`` of the VMs and the chargeback rates. The usage figures are computed by the
+database, with one grouped aggregate query for any number of VMs, instead of iterating over the
+rollup records in Python. :py:func:`usage_from_rows` computes the same figures from rows already
+in memory.
+
+Usage:
+
+.. code-block:: python
+
+    usage = rollup_usage(appliance.db.client, provider.name, vm_name, date.today())
+    costs = expected_costs(appliance.db.client, usage, 'Default')
+"""
+import math
+from collections import OrderedDict
+
+from sqlalchemy import and_, case, func, or_
+
+#: Usage figures summed over the rollups with any activity -> metric_rollups column
+USAGE_COLUMNS = OrderedDict([
+    ('average_cpu_used_in_mhz', 'cpu_usagemhz_rate_average'),
+    ('average_memory_used_in_mb', 'derived_memory_used'),
+    ('average_network_io', 'net_usage_rate_average'),
+    ('average_disk_io', 'disk_usage_rate_average'),
+])
+
+#: A rollup having any of these columns set counts as activity of the VM
+ACTIVITY_COLUMNS = (
+    'cpu_usagemhz_rate_average',
+    'cpu_usage_rate_average',
+    'derived_memory_used',
+    'net_usage_rate_average',
+    'disk_usage_rate_average',
+)
+
+#: Tables of the queries, reflected together
+ROLLUP_TABLES = ('metric_rollups', 'ext_management_systems')
+RATE_TABLES = ('chargeback_tiers', 'chargeback_rate_details', 'chargeback_rates')
+
+#: Column of the used storage, in bytes, summed over all the rollups
+STORAGE_COLUMN = 'derived_vm_used_disk_storage'
+
+#: Cost -> (chargeback rate detail description, rate type, usage figure)
+COST_RATES = OrderedDict([
+    ('cpu_used_cost', ('Used CPU', 'Compute', 'average_cpu_used_in_mhz')),
+    ('memory_used_cost', ('Used Memory', 'Compute', 'average_memory_used_in_mb')),
+    ('network_used_cost', ('Used Network I/O', 'Compute', 'average_network_io')),
+    ('disk_used_cost', ('Used Disk I/O', 'Compute', 'average_disk_io')),
+    ('storage_used_cost', ('Used Disk Storage', 'Storage', 'average_storage_used')),
+])
+
+
+def _value(row, column):
+    value = row[column] if isinstance(row, dict) else getattr(row, column)
+    return value or 0
+
+
+def _usage(consumed_hours, sums, storage_used):
+    usage = {name: sums.get(name) or 0 for name in USAGE_COLUMNS}
+    # Storage is stored in bytes, chargeback rates are per GB
+    usage['average_storage_used'] = (storage_used or 0) * math.pow(2, -30)
+    usage['consumed_hours'] = consumed_hours
+    return usage
+
+
+def usage_from_rows(rows):
+    """Computes the usage figures from ``metric_rollups`` rows (records or dicts) in memory
+
+    Returns:
+        dict with the keys of :py:data:`USAGE_COLUMNS`, ``average_storage_used`` (GB) and
+        ``consumed_hours``
+    """
+    consumed_hours = 0
+    storage_used = 0
+    sums = dict.fromkeys(USAGE_COLUMNS, 0)
+    for row in rows:
+        consumed_hours += 1
+        if any(_value(row, column) for column in ACTIVITY_COLUMNS):
+            for name, column in USAGE_COLUMNS.items():
+                sums[name] += _value(row, column)
+        storage_used += _value(row, STORAGE_COLUMN)
+    return _usage(consumed_hours, sums, storage_used)
+
+
+def _rollups_filter(db, provider_name, since, interval):
+    db.reflect_tables(ROLLUP_TABLES)
+    rollups = db['metric_rollups']
+    ems = db['ext_management_systems']
+    return rollups, ems, and_(
+        rollups.parent_ems_id == ems.id,
+        rollups.capture_interval_name == interval,
+        ems.name == provider_name,
+        rollups.timestamp >= since)
+
+
+def rollups_usage(db, provider_name, vm_names, since, interval='hourly'):
+    """Computes the usage figures of VMs with a single aggregate query
+
+    Args:
+        db: :py:class:`cfme.utils.db.Db` of the appliance
+        provider_name: name of the provider of the VMs
+        vm_names: names of the VMs
+        since: only rollups with a timestamp from this date/time on are included
+        interval: ``capture_interval_name`` of the rollups
+
+    Returns:
+        dict of VM name -> usage, like :py:func:`usage_from_rows`; VMs without rollups are
+        missing
+    """
+    rollups, ems, condition = _rollups_filter(db, provider_name, since, interval)
+    active = or_(*[getattr(rollups, column) != 0 for column in ACTIVITY_COLUMNS])
+    columns = [rollups.resource_name, func.count(rollups.id)]
+    columns.extend(func.sum(case([(active, getattr(rollups, column))], else_=0))
+                   for column in USAGE_COLUMNS.values())
+    columns.append(func.sum(getattr(rollups, STORAGE_COLUMN)))
+    query = (
+        db.session.query(*columns)
+        .filter(condition, rollups.resource_name.in_(list(vm_names)))
+        .group_by(rollups.resource_name))
+    result = {}
+    for row in query:
+        vm_name, consumed_hours, sums, storage_used = row[0], row[1], row[2:-1], row[-1]
+        result[vm_name] = _usage(consumed_hours, dict(zip(USAGE_COLUMNS, sums)), storage_used)
+    return result
+
+
+def rollup_usage(db, provider_name, vm_name, since, interval='hourly'):
+    """Computes the usage figures of one VM, see :py:func:`rollups_usage`
+
+    Returns zero figures if the VM has no rollups.
+    """
+    usage = rollups_usage(db, provider_name, [vm_name], since, interval)
+    return usage.get(vm_name) or _usage(0, {}, 0)
+
+
+def has_rollups(db, provider_name, vm_name, since, interval='hourly'):
+    """Whether the VM has rollups with any activity yet"""
+    rollups, ems, condition = _rollups_filter(db, provider_name, since, interval)
+    active = or_(*[and_(getattr(rollups, column).isnot(None), getattr(rollups, column) != 0)
+                   for column in ACTIVITY_COLUMNS])
+    query = (
+        db.session.query(func.count(rollups.id))
+        .filter(condition, rollups.resource_name == vm_name, active))
+    return bool(query.scalar())
+
+
+def rate_tiers(db, description):
+    """Returns the tiers of the chargeback rates with the given description
+
+    Returns:
+        dict of (rate detail description, rate type) -> list of tier dicts with ``start``,
+        ``finish``, ``variable_rate`` and ``fixed_rate``
+    """
+    db.reflect_tables(RATE_TABLES)
+    tiers = db['chargeback_tiers']
+    details = db['chargeback_rate_details']
+    rates = db['chargeback_rates']
+    query = (
+        db.session.query(details.description, rates.rate_type, tiers.start, tiers.finish,
+                         tiers.variable_rate, tiers.fixed_rate)
+        .join(tiers, tiers.chargeback_rate_detail_id == details.id)
+        .join(rates, details.chargeback_rate_id == rates.id)
+        .filter(rates.description == description))
+    result = {}
+    for detail, rate_type, start, finish, variable_rate, fixed_rate in query:
+        result.setdefault((detail, rate_type), []).append(
+            {'start': start, 'finish': finish, 'variable_rate': variable_rate,
+             'fixed_rate': fixed_rate})
+    return result
+
+
+def tier_cost(tiers, usage, consumed_hours):
+    """Computes the cost of ``usage`` with the tier it belongs to, ``None`` if there is none"""
+    for tier in tiers:
+        if tier['start'] <= usage < tier['finish']:
+            return (tier['variable_rate'] * usage) + (tier['fixed_rate'] * consumed_hours)
+
+
+def costs_from_tiers(tiers, usage):
+    """Computes the costs of :py:data:`COST_RATES` from the tiers of :py:func:`rate_tiers`"""
+    return {
+        cost: tier_cost(tiers.get((detail, rate_type), []), usage[figure],
+                        usage['consumed_hours'])
+        for cost, (detail, rate_type, figure) in COST_RATES.items()}
+
+
+def expected_costs(db, usage, description):
+    """Computes the expected chargeback costs of a usage with the rate of the given description
+
+    Args:
+        db: :py:class:`cfme.utils.db.Db` of the appliance
+        usage: usage figures, as returned by :py:func:`rollup_usage`
+        description: description of the compute and storage chargeback rates
+
+    Returns:
+        dict with the keys of :py:data:`COST_RATES`
+    """
+    return costs_from_tiers(rate_tiers(db, description), usage)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""On-disk index of test collections
+
+For every test module, the index keeps what collecting it produced: the node ids of its items,
+their markers and parameters, whether they were uncollected (and why) and whether they were
+selected. Entries are valid for the content hash of the module and for a collection context:
+provider data, appliance version, collection related options and the framework code taking part
+in parametrization and uncollection (conftests, markers, testgen).
+
+The pytest plugin (:py:mod:`cfme.test_framework.collection_index`) uses it to skip importing
+modules that produce no selected item in an unchanged context, and scripts can read the items
+of the last collection without running one.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import six
+
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path, project_path
+
+#: Directory of the index files, one per collection context
+index_path = cache_path.join('collection_index')
+
+#: Files (globs relative to the project) whose changes invalidate the whole index
+FRAMEWORK_FILES = (
+    'conftest.py',
+    'cfme/conftest.py',
+    'cfme/markers/*.py',
+    'cfme/markers/env_markers/*.py',
+    'cfme/utils/testgen.py',
+    'cfme/utils/providers.py',
+    'cfme/fixtures/prov_filter.py',
+)
+
+# Digests of file contents, keyed by (path, mtime, size)
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """Returns the SHA256 of the content of a file, memoized while it does not change"""
+    path = str(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+    with _digests_lock:
+        if key in _digests:
+            return _digests[key]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with _digests_lock:
+        _digests[key] = digest
+    return digest
+
+
+def framework_digest(root=None):
+    """Returns a digest of :py:data:`FRAMEWORK_FILES` and of all the conftests of the tests"""
+    root = root or project_path
+    paths = set()
+    for pattern in FRAMEWORK_FILES:
+        directory = root.join(os.path.dirname(pattern))
+        if directory.check(dir=True):
+            paths.update(directory.listdir(os.path.basename(pattern)))
+    tests = root.join('cfme', 'tests')
+    if tests.check(dir=True):
+        paths.update(tests.visit('conftest.py'))
+    digest = hashlib.sha256()
+    for path in sorted(paths, key=str):
+        digest.update('{} {}\n'.format(path.relto(root), file_digest(path)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def context_key(options, provider_data, appliance_version, framework=None):
+    """Returns the key of a collection context
+
+    Args:
+        options: dict of the collection related command line options
+        provider_data: the provider data (``cfme_data.management_systems``)
+        appliance_version: version of the appliance the collection is for
+        framework: :py:func:`framework_digest`, computed if not passed
+    """
+    context = {
+        'options': options,
+        'providers': provider_data,
+        'version': str(appliance_version) if appliance_version is not None else None,
+        'framework': framework or framework_digest(),
+    }
+    data = json.dumps(context, sort_keys=True, default=repr)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class _MarkerNames(object):
+    def __init__(self, names):
+        self.names = set(names)
+
+    def __getitem__(self, name):
+        return name in self.names
+
+
+def match_markexpr(markexpr, markers):
+    """Evaluates a ``-m`` marker expression against a list of marker names, like pytest does"""
+    if not markexpr:
+        return True
+    return bool(eval(markexpr, {}, _MarkerNames(markers)))
+
+
+def item_entry(nodeid, markers=(), params=None, uncollect=None, selected=True):
+    """Returns the index data of a test item
+
+    Args:
+        nodeid: node id of the item
+        markers: names of the markers of the item
+        params: dict of parameter name -> parameter id, for parametrized items
+        uncollect: the reason the item was uncollected, ``None`` if it was not
+        selected: whether the item remained in the collection
+    """
+    return {
+        'nodeid': nodeid,
+        'markers': sorted(set(markers)),
+        'params': {name: six.text_type(value) for name, value in (params or {}).items()},
+        'uncollect': uncollect,
+        'selected': bool(selected),
+    }
+
+
+class CollectionIndex(object):
+    """Index entries of one collection context
+
+    Args:
+        key: :py:func:`context_key` of the context
+        root: directory of the index files
+    """
+    def __init__(self, key, root=None):
+        self.key = key
+        self.root = str(root or index_path)
+        self.path = os.path.join(self.root, '{}.json'.format(key))
+        self._lock = threading.Lock()
+        self.modules = self._read(self.path)
+        self.hits = 0
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)['modules']
+        except (IOError, OSError, ValueError, KeyError):
+            return {}
+
+    def entry(self, relpath, digest):
+        """Returns the items of a module if indexed with this content digest, ``None`` otherwise"""
+        entry = self.modules.get(relpath)
+        if entry is None or entry['digest'] != digest:
+            return None
+        self.hits += 1
+        return entry['items']
+
+    def has_selected(self, relpath, digest):
+        """Whether the module produces selected items, ``None`` if it is not indexed"""
+        items = self.entry(relpath, digest)
+        if items is None:
+            return None
+        return any(item['selected'] for item in items)
+
+    def record(self, relpath, digest, items):
+        """Stores the items (from :py:func:`item_entry`) collected from a module"""
+        with self._lock:
+            self.modules[relpath] = {'digest': digest, 'items': list(items)}
+
+    def items(self, selected=True):
+        """Yields the indexed items, only the selected ones by default"""
+        for relpath in sorted(self.modules):
+            for item in self.modules[relpath]['items']:
+                if item['selected'] or not selected:
+                    yield item
+
+    def save(self):
+        """Writes the index, keeping entries written meanwhile by other processes"""
+        with self._lock:
+            modules = self._read(self.path)
+            modules.update(self.modules)
+            self.modules = modules
+            if not os.path.isdir(self.root):
+                try:
+                    os.makedirs(self.root)
+                except OSError:
+                    if not os.path.isdir(self.root):
+                        raise
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'key': self.key, 'modules': modules}, f, sort_keys=True)
+            os.rename(tmp_path, self.path)
+        logger.info('Saved the collection index of %d modules to %s', len(modules), self.path)
+
+    @classmethod
+    def latest(cls, root=None):
+        """Returns the most recently written index, ``None`` if there is none"""
+        root = str(root or index_path)
+        if not os.path.isdir(root):
+            return None
+        paths = [os.path.join(root, name) for name in os.listdir(root) if name.endswith('.json')]
+        if not paths:
+            return None
+        path = max(paths, key=os.path.getmtime)
+        return cls(os.path.basename(path)[:-len('.json')], root)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Local merger of ruby (simplecov) coverage resultsets
+
+Python counterpart of ``scripts/data/coverage/coverage_merger.rb`` that runs on the test host
+instead of the appliance. Resultsets are read one at a time, straight out of coverage tarballs on
+disk or over HTTP, without extracting them, and the per-file line hit arrays are summed with NumPy
+when it is available. The output is a simplecov compatible ``.resultset.json`` with a single
+``merged_data`` entry, which can be fed back to simplecov (or ``coverage_merger.rb``) to add the
+never loaded files and build the HTML report.
+
+Line hits are either ``null`` (line not coverable), ``0`` or a positive hit count. Merging a
+``null`` with a number means the sources differ, such file is reported and left out of the merge
+for the offending resultset, like the ruby merger refuses it.
+
+Usage:
+
+    merger = CoverageMerger()
+    merger.add_tarball('/tmp/coverage-results.tgz')
+    merger.add_tarball('https://jenkins/job/x/1/artifact/coverage-results.tgz', auth=auth)
+    merger.write(log_path.join('coverage', 'merged', '.resultset.json').strpath)
+"""
+import json
+import os
+import tarfile
+
+import requests
+
+from cfme.utils.log import logger
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#: Key of the merged entry in the output resultset, same as coverage_merger.rb uses
+MERGED_KEY = 'merged_data'
+
+#: Stands for ``null`` (not coverable) lines in the NumPy arrays
+NOT_COVERABLE = -1
+
+
+class CoverageMergeError(ValueError):
+    """Raised when coverage data of one source file can't be merged"""
+    pass
+
+
+def _to_hits(lines):
+    if numpy is None:
+        return list(lines)
+    return numpy.array(
+        [NOT_COVERABLE if hit is None else hit for hit in lines], dtype=numpy.int64)
+
+
+def _from_hits(hits):
+    if numpy is None:
+        return list(hits)
+    return [None if hit == NOT_COVERABLE else hit for hit in hits.tolist()]
+
+
+def _add_hits(merged, hits):
+    """Returns the sum of two hit arrays of the same source file"""
+    if len(merged) != len(hits):
+        raise CoverageMergeError('Both files are not the same length!')
+    if numpy is None:
+        result = []
+        for a, b in zip(merged, hits):
+            if (a is None) != (b is None):
+                raise CoverageMergeError('Coverage data should be either Null or a Number!')
+            result.append(None if a is None else a + b)
+        return result
+    merged_null = merged == NOT_COVERABLE
+    if not numpy.array_equal(merged_null, hits == NOT_COVERABLE):
+        raise CoverageMergeError('Coverage data should be either Null or a Number!')
+    return numpy.where(merged_null, NOT_COVERABLE, merged + hits)
+
+
+class CoverageMerger(object):
+    """Accumulates simplecov resultsets into one
+
+    Args:
+        rewrite_path: optional callable to map source file paths (e.g. to strip a prefix)
+    """
+    def __init__(self, rewrite_path=None):
+        self.rewrite_path = rewrite_path
+        self.coverage = {}
+        self.timestamp = 0
+        self.merged_resultsets = 0
+        self.skipped = []
+        self.conflicts = []
+        # simplecov >= 0.18 stores {"lines": [...]} per file instead of the bare array
+        self._lines_dicts = False
+
+    def add_resultset(self, resultset, source='<resultset>'):
+        """Merges an already parsed ``.resultset.json`` document"""
+        for value in resultset.values():
+            self.timestamp = max(self.timestamp, value.get('timestamp', 0))
+            for filename, lines in value.get('coverage', {}).items():
+                if isinstance(lines, dict):
+                    self._lines_dicts = True
+                    lines = lines.get('lines', [])
+                if self.rewrite_path is not None:
+                    filename = self.rewrite_path(filename)
+                hits = _to_hits(lines)
+                if filename not in self.coverage:
+                    self.coverage[filename] = hits
+                    continue
+                try:
+                    self.coverage[filename] = _add_hits(self.coverage[filename], hits)
+                except CoverageMergeError as e:
+                    logger.error('Not merging %s from %s: %s', filename, source, e)
+                    self.conflicts.append((source, filename))
+        self.merged_resultsets += 1
+
+    def add_stream(self, stream, source='<stream>'):
+        """Merges a ``.resultset.json`` from a file-like object"""
+        try:
+            resultset = json.load(stream)
+        except ValueError as e:
+            logger.error('Skipping %s, no valid JSON: %s', source, e)
+            self.skipped.append(source)
+            return
+        self.add_resultset(resultset, source)
+
+    def add_file(self, path):
+        """Merges a ``.resultset.json`` file on the disk"""
+        with open(path, 'rb') as f:
+            self.add_stream(f, path)
+
+    def add_directory(self, path):
+        """Merges all ``.resultset.json`` files found under ``path``"""
+        for dirpath, _, filenames in os.walk(path):
+            if '.resultset.json' in filenames:
+                self.add_file(os.path.join(dirpath, '.resultset.json'))
+
+    def add_tarball(self, path_or_url, **request_kwargs):
+        """Merges every ``.resultset.json`` inside a (compressed) tarball
+
+        The archive is read as a stream, one member at a time, so it is never extracted nor
+        fully loaded into memory. URLs are downloaded with :py:mod:`requests`,
+        ``request_kwargs`` (``auth``, ``verify``, ...) are passed to it.
+        """
+        if path_or_url.startswith(('http://', 'https://')):
+            response = requests.get(path_or_url, stream=True, **request_kwargs)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            try:
+                self._add_tar_stream(tarfile.open(fileobj=response.raw, mode='r|*'), path_or_url)
+            finally:
+                response.close()
+        else:
+            with tarfile.open(path_or_url, mode='r|*') as tar:
+                self._add_tar_stream(tar, path_or_url)
+
+    def _add_tar_stream(self, tar, source):
+        found = 0
+        for member in tar:
+            if not member.isfile() or os.path.basename(member.name) != '.resultset.json':
+                continue
+            found += 1
+            self.add_stream(tar.extractfile(member), '{}:{}'.format(source, member.name))
+        logger.info('Merged %d resultsets from %s', found, source)
+
+    @property
+    def resultset(self):
+        """The merged data as a simplecov resultset document"""
+        coverage = {}
+        for filename, hits in self.coverage.items():
+            lines = _from_hits(hits)
+            coverage[filename] = {'lines': lines} if self._lines_dicts else lines
+        return {MERGED_KEY: {'coverage': coverage, 'timestamp': self.timestamp}}
+
+    def write(self, path):
+        """Writes the merged resultset to ``path``, creating its directory if needed"""
+        dirname = os.path.dirname(path)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with open(path, 'w') as f:
+            json.dump(self.resultset, f)
+        logger.info('Wrote %d merged resultsets (%d source files) to %s',
+                    self.merged_resultsets, len(self.coverage), path)
+
+    def percent_covered(self):
+        """Line coverage of the merged data in percent, ``None`` if there is nothing coverable"""
+        covered = relevant = 0
+        for hits in self.coverage.values():
+            if numpy is None:
+                relevant += sum(1 for hit in hits if hit is not None)
+                covered += sum(1 for hit in hits if hit)
+            else:
+                relevant += int(numpy.count_nonzero(hits != NOT_COVERABLE))
+                covered += int(numpy.count_nonzero(hits > 0))
+        if not relevant:
+            return None
+        return 100.0 * covered / relevant
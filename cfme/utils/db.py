@@ -1,9 +1,14 @@
+import os
+import re
 from collections import Mapping
 from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
 
 from cached_property import cached_property
+from six.moves import cPickle as pickle
 from sqlalchemy import MetaData, create_engine, event, inspect
-from sqlalchemy.exc import ArgumentError, DisconnectionError, InvalidRequestError
+from sqlalchemy.exc import (
+    ArgumentError, DisconnectionError, InvalidRequestError, ProgrammingError)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import Pool
@@ -11,6 +16,10 @@ from sqlalchemy.pool import Pool
 from cfme.fixtures.pytest_store import store
 from cfme.utils import conf
 from cfme.utils.log import logger
+from cfme.utils.path import cache_path
+
+#: Directory holding pickled schema reflections, one file per appliance and schema version
+schema_cache_path = cache_path.join('db_schema')
 
 
 @event.listens_for(Pool, "checkout")
@@ -37,6 +46,11 @@ class Db(Mapping):
         hostname: base url to be used (default is from current_appliance)
         credentials: name of credentials to use from :py:attr:`utils.conf.credentials`
             (default ``database``)
+        appliance_version: version of the appliance owning the database, used to key the
+            reflection cache (default is the current_appliance version if no hostname is passed,
+            resolved when the cache is first used)
+        use_schema_cache: whether reflected tables are persisted to and loaded from
+            :py:data:`schema_cache_path` (default ``True``)
 
     Provides convient attributes to common sqlalchemy objects related to this DB,
     as well as a Mapping interface to access and reflect database tables. Where possible,
@@ -67,11 +81,21 @@ class Db(Mapping):
         a latent connection, this can be extremely slow, which will affect methods that return
         tables, like the mapping interface or :py:meth:`values`.
 
+        To avoid paying that price in every process, reflected tables are pickled to disk keyed
+        by the appliance version and the latest ``schema_migrations`` version, so only the
+        first process to touch a given schema talks to the catalog. Use :py:meth:`reflect_tables`
+        to reflect a known set of tables in one go.
+
     """
-    def __init__(self, hostname=None, credentials=None, port=None):
+    def __init__(self, hostname=None, credentials=None, port=None, appliance_version=None,
+                 use_schema_cache=True):
         self._table_cache = {}
+        # the version of the current appliance is only needed to key the reflection cache
+        self._version_of_current_appliance = appliance_version is None and hostname is None
         self.hostname = hostname or store.current_appliance.db.address
         self.port = port or store.current_appliance.db_port
+        self._appliance_version = appliance_version
+        self.use_schema_cache = use_schema_cache
 
         self.credentials = credentials or conf.credentials['database']
 
@@ -130,9 +154,20 @@ class Db(Mapping):
         except KeyError:
             return default
 
+    @property
+    def appliance_version(self):
+        """Version of the appliance owning the database, ``None`` if unknown"""
+        if self._appliance_version is None and self._version_of_current_appliance:
+            self._appliance_version = store.current_appliance.version
+        return self._appliance_version
+
     def copy(self):
         """Copy this database instance, keeping the same credentials and hostname"""
-        return type(self)(self.hostname, self.credentials)
+        db = type(self)(
+            self.hostname, self.credentials, self.port, self._appliance_version,
+            self.use_schema_cache)
+        db._version_of_current_appliance = self._version_of_current_appliance
+        return db
 
     def __eq__(self, other):
         """Check if this db is equal to another db"""
@@ -177,7 +212,8 @@ class Db(Mapping):
     def metadata(self):
         """:py:class:`MetaData <sqlalchemy:sqlalchemy.schema.MetaData>` for this database
 
-        This can be used for introspection of reflected items.
+        This can be used for introspection of reflected items. If the schema cache is enabled,
+        the tables reflected by previous processes are loaded from it.
 
         Note:
 
@@ -185,7 +221,60 @@ class Db(Mapping):
             use :py:meth:`reflect_table`.
 
         """
-        return MetaData(bind=self.engine)
+        metadata = self._schema_cache.get('metadata')
+        if metadata is None:
+            return MetaData(bind=self.engine)
+        metadata.bind = self.engine
+        return metadata
+
+    @cached_property
+    def schema_version(self):
+        """The latest applied rails migration, ``None`` if it can't be determined"""
+        try:
+            return self.engine.execute(
+                'SELECT max(version) FROM schema_migrations').scalar()
+        except ProgrammingError:
+            return None
+
+    @cached_property
+    def schema_cache_file(self):
+        """:py:class:`py.path.local` of the reflection cache for this database's schema
+
+        ``None`` if the cache is disabled or the schema version is unknown.
+        """
+        if not self.use_schema_cache or self.schema_version is None:
+            return None
+        key = '{}-{}'.format(self.appliance_version or 'unknown', self.schema_version)
+        return schema_cache_path.join('{}.pickle'.format(re.sub(r'[^\w.-]', '_', key)))
+
+    @cached_property
+    def _schema_cache(self):
+        cache_file = self.schema_cache_file
+        if cache_file is None or not cache_file.check(file=True):
+            return {}
+        try:
+            with cache_file.open('rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning('[DB] Ignoring unreadable schema cache %s: %s', cache_file, e)
+            return {}
+
+    def _save_schema_cache(self):
+        """Atomically writes the current metadata and table names to the cache file"""
+        cache_file = self.schema_cache_file
+        if cache_file is None:
+            return
+        data = {'metadata': self.metadata}
+        if 'table_names' in self.__dict__:
+            data['table_names'] = self.table_names
+        elif 'table_names' in self._schema_cache:
+            data['table_names'] = self._schema_cache['table_names']
+        cache_file.dirpath().ensure(dir=True)
+        with NamedTemporaryFile(dir=str(cache_file.dirpath()), delete=False) as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # rename is atomic, so concurrent slaves never read a partially written file
+        os.rename(f.name, str(cache_file))
+        self._schema_cache = data
 
     @cached_property
     def db_url(self):
@@ -199,7 +288,12 @@ class Db(Mapping):
     def table_names(self):
         """A sorted list of table names available in this database."""
         # rails table names follow similar rules as pep8 identifiers; expose them as such
-        return sorted(inspect(self.engine).get_table_names())
+        table_names = self._schema_cache.get('table_names')
+        if table_names is None:
+            table_names = sorted(inspect(self.engine).get_table_names())
+            self.__dict__['table_names'] = table_names
+            self._save_schema_cache()
+        return table_names
 
     @cached_property
     def session(self):
@@ -245,7 +339,23 @@ class Db(Mapping):
             table_name: The name of a table to reflect
 
         """
-        self.metadata.reflect(only=[table_name])
+        self.reflect_tables([table_name])
+
+    def reflect_tables(self, table_names):
+        """Populate :py:attr:`metadata` with information on several tables at once
+
+        Tables already known to the metadata (e.g. loaded from the schema cache) are skipped,
+        the remaining ones are reflected in a single call and written back to the cache.
+
+        Args:
+            table_names: Iterable of names of tables to reflect
+
+        """
+        missing = [name for name in table_names if name not in self.metadata.tables]
+        if not missing:
+            return
+        self.metadata.reflect(only=missing)
+        self._save_schema_cache()
 
     def _table(self, table_name):
         """Retrieves, reflects, and caches table objects
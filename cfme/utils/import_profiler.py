@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Import time profiler
+
+Wraps ``__import__`` to measure how long loading every module takes: the cumulative time (the
+module with everything it imported first) and the self time (without the modules it imported).
+The cumulative time of a pytest plugin is the startup cost of adding it to the plugins loaded
+before it.
+
+The pytest plugin enables it when ``CFME_IMPORT_PROFILE`` is set in the environment, before any
+other cfme plugin is imported, and writes the report to ``log/import_profile[-<slaveid>].txt``
+at the end of the session. Helper scripts can be profiled with::
+
+    python -m cfme.utils.import_profiler cfme.utils.providers [more.modules ...]
+
+Modules imported before the profiler is installed (``cfme``, ``cfme.utils`` and their imports)
+are not reported.
+"""
+import os
+import sys
+import threading
+import timeit
+
+from six.moves import builtins
+
+#: Environment variable enabling the profiler in pytest sessions
+ENV_VAR = 'CFME_IMPORT_PROFILE'
+
+
+class ImportProfiler(object):
+    """Measures the time of imports which load new modules, once installed"""
+    def __init__(self):
+        self._original_import = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # module name -> [cumulative, self, imported by]
+        self.modules = {}
+
+    @property
+    def installed(self):
+        return self._original_import is not None
+
+    def install(self):
+        if not self.installed:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self.installed:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @staticmethod
+    def _module_name(name, args):
+        """Absolute name of the imported module (``args`` as passed to ``__import__``)"""
+        globals_ = args[0] if args else None
+        level = args[3] if len(args) > 3 else 0
+        if level <= 0 or not globals_:
+            return name
+        package = globals_.get('__package__') or globals_.get('__name__', '')
+        if '__path__' not in globals_ and not globals_.get('__package__'):
+            package = package.rpartition('.')[0]
+        if level > 1:
+            package = package.rsplit('.', level - 1)[0]
+        return '{}.{}'.format(package, name) if name else package
+
+    def _import(self, name, *args, **kwargs):
+        if name in sys.modules and not (len(args) > 2 and args[2]):
+            # already imported, nothing to measure
+            return self._original_import(name, *args, **kwargs)
+        stack = self._local.__dict__.setdefault('stack', [])
+        importer = stack[-1][0] if stack else None
+        module = self._module_name(name, args)
+        # "from package import module" loads the module, not the package
+        submodules = [
+            '{}.{}'.format(module, item) for item in (args[2] if len(args) > 2 else None) or ()
+            if '{}.{}'.format(module, item) not in sys.modules]
+        loaded_before = len(sys.modules)
+        stack.append([module, 0.0])
+        start = timeit.default_timer()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            elapsed = timeit.default_timer() - start
+            _, children = stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            if len(sys.modules) > loaded_before:
+                loaded = [submodule for submodule in submodules if submodule in sys.modules]
+                if len(loaded) == 1:
+                    module = loaded[0]
+                self._record(module, elapsed, elapsed - children, importer)
+
+    def _record(self, module, cumulative, self_time, importer):
+        with self._lock:
+            if module not in self.modules:
+                self.modules[module] = [cumulative, self_time, importer]
+
+    def report(self, names=None, sort='cumulative', limit=None):
+        """Returns dicts of module, cumulative and self time (seconds) and the importing module
+
+        Args:
+            names: only report these modules, all of them by default
+            sort: ``cumulative`` or ``self``, the most expensive first
+            limit: number of modules to report
+        """
+        with self._lock:
+            rows = [
+                {'module': module, 'cumulative': cumulative, 'self': self_time,
+                 'imported_by': importer}
+                for module, (cumulative, self_time, importer) in self.modules.items()
+                if names is None or module in names]
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def format_report(self, plugins=(), limit=30):
+        """Returns the report as text: the given top level imports, then the costliest modules"""
+        lines = []
+        if plugins:
+            rows = {row['module']: row for row in self.report(names=set(plugins))}
+            lines.append('Top level imports (cumulative, in load order):')
+            for plugin in plugins:
+                if plugin in rows:
+                    lines.append('  {:8.3f}s  {}'.format(rows[plugin]['cumulative'], plugin))
+            lines.append('')
+        total = sum(row['self'] for row in self.report())
+        lines.append('Modules (total {:.3f}s, top {} by cumulative time):'.format(total, limit))
+        lines.append('  {:>9} {:>9}  {}'.format('cumul.', 'self', 'module (imported by)'))
+        for row in self.report(limit=limit):
+            lines.append('  {:8.3f}s {:8.3f}s  {} ({})'.format(
+                row['cumulative'], row['self'], row['module'], row['imported_by']))
+        return '\n'.join(lines)
+
+
+#: Profiler of this process
+profiler = ImportProfiler()
+
+
+def install_from_env(environ=None):
+    """Installs :py:data:`profiler` if :py:data:`ENV_VAR` is set, returns whether it is"""
+    environ = os.environ if environ is None else environ
+    if environ.get(ENV_VAR, '') not in ('', '0'):
+        profiler.install()
+    return profiler.installed
+
+
+def main(args=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Print the import time of python modules')
+    parser.add_argument('modules', nargs='+', help='modules to import')
+    parser.add_argument('--limit', type=int, default=30, help='number of modules to print')
+    args = parser.parse_args(args)
+    profiler.install()
+    try:
+        for module in args.modules:
+            # through the builtin, importlib.import_module bypasses it on python 3
+            __import__(module)
+    finally:
+        profiler.uninstall()
+    print(profiler.format_report(args.modules, limit=args.limit))
+
+
+if __name__ == '__main__':
+    main()
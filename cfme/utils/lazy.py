@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Deferred loading of entry points (provider categories and types, appliance collections)
+
+:py:class:`LazyEntryPoints` lists the names of the entry points of a group without importing
+anything, an entry point is resolved (its module imported) only when it is looked up, so asking
+for one provider class does not import all the provider modules.
+
+Usage:
+
+.. code-block:: python
+
+    categories = LazyEntryPoints('manageiq.provider_categories')
+    categories.names()      # no import
+    categories['cloud']     # imports cfme.cloud.provider only
+"""
+import threading
+from collections import OrderedDict
+
+
+class LazyEntryPoints(object):
+    """Entry points of a setuptools group, resolved one by one when first looked up
+
+    Args:
+        group: name of the entry point group
+    """
+    def __init__(self, group):
+        self.group = group
+        self._lock = threading.RLock()
+        self._entry_points = None
+        self._resolved = {}
+
+    def _load_entry_points(self):
+        with self._lock:
+            if self._entry_points is None:
+                from pkg_resources import iter_entry_points
+                entry_points = OrderedDict()
+                for ep in iter_entry_points(self.group):
+                    entry_points.setdefault(ep.name, ep)
+                self._entry_points = entry_points
+            return self._entry_points
+
+    def names(self):
+        """Returns the names of the entry points, without resolving them"""
+        return list(self._load_entry_points())
+
+    def __contains__(self, name):
+        return name in self._load_entry_points()
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def keys(self):
+        return self.names()
+
+    def __len__(self):
+        return len(self._load_entry_points())
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._resolved:
+                self._resolved[name] = self._load_entry_points()[name].resolve()
+            return self._resolved[name]
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def is_resolved(self, name):
+        """Whether the entry point was resolved already"""
+        return name in self._resolved
+
+    def items(self):
+        """Returns ``(name, object)`` pairs of all entry points, resolving all of them"""
+        return [(name, self[name]) for name in self.names()]
+
+    def values(self):
+        return [obj for _, obj in self.items()]
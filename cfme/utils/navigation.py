@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Timings of UI navigation steps and learned destination URLs
+
+:py:data:`navigation_stats` records how long every phase of every navigation step takes
+(``am_i_here``, ``prerequisite``, ``step``, ``url``, ``resetter``, ``post_navigate`` and the
+``total``) into an in-memory SQLite table, which can be queried with SQL or summarized.
+
+:py:data:`url_cache` keeps the URL a destination was displayed at after navigating to it. When
+URL shortcuts are enabled, :py:class:`cfme.utils.appliance.implementations.ui.CFMENavigateStep`
+loads that URL directly instead of running the prerequisite chain and the step, and forgets it
+when the destination view is not displayed afterwards.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from inspect import isclass
+
+import six
+
+#: Navigation phases recorded by the navigate steps
+PHASES = ('am_i_here', 'prerequisite', 'step', 'url', 'resetter', 'post_navigate', 'total')
+
+
+class NavigationStats(object):
+    """Per step timings of navigations, stored in an in-memory SQLite database
+
+    The ``timings`` table has the columns ``ts`` (epoch), ``cls`` (class of the navigated
+    object), ``destination``, ``phase`` and ``duration`` (seconds).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE timings (ts REAL, cls TEXT, destination TEXT, phase TEXT, '
+            'duration REAL)')
+
+    def record(self, cls, destination, phase, duration):
+        with self._lock:
+            self.connection.execute(
+                'INSERT INTO timings VALUES (?, ?, ?, ?, ?)',
+                (time.time(), cls, destination, phase, duration))
+
+    def query(self, sql, *params):
+        """Runs a query on the ``timings`` table, returns the list of result rows"""
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def summary(self, phase='total', limit=None):
+        """Returns dicts of count, total, mean and max duration per class and destination
+
+        Sorted by the total duration, the most expensive first.
+        """
+        sql = ('SELECT cls, destination, COUNT(*), SUM(duration), AVG(duration), MAX(duration) '
+               'FROM timings WHERE phase = ? GROUP BY cls, destination '
+               'ORDER BY SUM(duration) DESC')
+        if limit:
+            sql += ' LIMIT {:d}'.format(limit)
+        return [
+            {'cls': cls, 'destination': destination, 'count': count, 'total': total,
+             'mean': mean, 'max': maximum}
+            for cls, destination, count, total, mean, maximum in self.query(sql, phase)]
+
+    def dump(self, path):
+        """Writes the summaries of all phases as JSON"""
+        with open(str(path), 'w') as f:
+            json.dump({phase: self.summary(phase) for phase in PHASES}, f, indent=1)
+
+    def clear(self):
+        with self._lock:
+            self.connection.execute('DELETE FROM timings')
+
+
+def class_name(obj):
+    """Returns the name of the class of a navigated object (or of the object, if a class)"""
+    return obj.__name__ if isclass(obj) else obj.__class__.__name__
+
+
+class UrlCache(object):
+    """URLs of navigation destinations, per appliance, class, object and destination
+
+    Args:
+        enabled: whether navigations use the cached URLs
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._urls = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(appliance_address, obj, destination):
+        """Returns the key of a destination of an object
+
+        Objects are told apart by their repr, so equal entities share their URLs.
+        """
+        identity = obj.__name__ if isclass(obj) else repr(obj)
+        if isinstance(identity, six.text_type):
+            identity = identity.encode('utf-8')
+        digest = hashlib.sha1(identity).hexdigest()
+        return (appliance_address, class_name(obj), digest, destination)
+
+    def get(self, key):
+        with self._lock:
+            return self._urls.get(key)
+
+    def set(self, key, url):
+        with self._lock:
+            self._urls[key] = url
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self.misses += 1
+            self._urls.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+
+
+navigation_stats = NavigationStats()
+url_cache = UrlCache()
@@ -1,10 +1,10 @@
 from collections import defaultdict
 import socket
-import os
 import re
 from cfme.fixtures.pytest_store import store
 
 from cfme.utils.log import logger
+from cfme.utils.reachability import prober
 
 _ports = defaultdict(dict)
 _dns_cache = {}
@@ -58,25 +58,19 @@ def ip_echo_socket(port=32123):
         conn.close()
 
 
-def net_check(port, addr=None, force=False):
-    """Checks the availablility of a port"""
+def net_check(port, addr=None, force=False, max_age=None, retry_failed=False):
+    """Checks the availablility of a port
+
+    Args:
+        force: connect again instead of using a cached result
+        max_age: seconds a cached result is used for, see
+            :py:meth:`cfme.utils.reachability.ReachabilityProber.probe`
+        retry_failed: connect again if the cached result is a failure
+    """
     port = int(port)
     if not addr:
         addr = store.current_appliance.hostname
-    if port not in _ports[addr] or force:
-        # First try DNS resolution
-        try:
-            addr = socket.gethostbyname(addr)
-
-            # Then try to connect to the port
-            try:
-                socket.create_connection((addr, port), timeout=10)
-                _ports[addr][port] = True
-            except socket.error:
-                _ports[addr][port] = False
-        except:
-            _ports[addr][port] = False
-    return _ports[addr][port]
+    return prober.check(addr, port, max_age=0 if force else max_age, retry_failed=retry_failed)
 
 
 def net_check_remote(port, addr=None, machine_addr=None, ssh_creds=None, force=False):
@@ -137,13 +131,15 @@ def resolve_ips(host_iterable, force_dns=False):
 def is_pingable(ip_addr):
     """verifies the specified ip_address is reachable or not.
 
+    Uses ICMP echo, or TCP liveness when ICMP is not permitted, see
+    :py:meth:`cfme.utils.reachability.ReachabilityProber.alive`.
+
     Args:
         ip_addr: ip_address to verify the PING.
     returns: return True is ip_address is pinging else returns False.
     """
     try:
-        status = os.system("ping -c1 -w2 {}".format(ip_addr))
-        if status == 0:
+        if prober.alive([ip_addr], max_age=0)[ip_addr]:
             logger.info('IP: %s is UP !', ip_addr)
             return True
         logger.info('IP: %s is DOWN !', ip_addr)
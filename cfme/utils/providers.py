@@ -14,9 +14,9 @@ from copy import copy
 
 import six
 
-from cfme.common.provider import all_types
 from cfme.exceptions import UnknownProviderType
 from cfme.utils import conf
+from cfme.utils.lazy import LazyEntryPoints
 from cfme.utils.log import logger
 
 providers_data = conf.cfme_data.get("management_systems", {})
@@ -27,6 +27,11 @@ global_filters = {}
 # so that we don't re-generate mgmt classes for the same exact provider
 PROVIDER_MGMT_CACHE = {}
 
+#: Base provider classes by category, their modules are imported on first lookup
+provider_categories = LazyEntryPoints('manageiq.provider_categories')
+# Provider classes by type, per category
+_provider_types = {}
+
 
 def load_setuptools_entrypoints():
     """ Load modules from querying the specified setuptools entrypoint name."""
@@ -302,11 +307,31 @@ def list_provider_keys(provider_type=None):
         return all_keys
 
 
+def provider_types_of(category):
+    """Returns the provider classes of a category as :py:class:`cfme.utils.lazy.LazyEntryPoints`"""
+    if category not in _provider_types:
+        _provider_types[category] = LazyEntryPoints(
+            'manageiq.provider_types.{}'.format(category))
+    return _provider_types[category]
+
+
+def provider_type_names():
+    """Returns the names of all provider categories and types, without importing their classes"""
+    names = provider_categories.names()
+    for category in provider_categories.names():
+        names.extend(provider_types_of(category).names())
+    return names
+
+
 def get_class_from_type(prov_type):
-    try:
-        return all_types()[prov_type]
-    except KeyError:
-        raise UnknownProviderType("Unknown provider type: {}!".format(prov_type))
+    """Returns the provider class of a category or type, importing only the module defining it"""
+    if prov_type in provider_categories:
+        return provider_categories[prov_type]
+    for category in provider_categories:
+        types = provider_types_of(category)
+        if prov_type in types:
+            return types[prov_type]
+    raise UnknownProviderType("Unknown provider type: {}!".format(prov_type))
 
 
 def get_crud(provider_key):
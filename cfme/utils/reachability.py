@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""Concurrent reachability checks of hosts and ports
+
+All the ``(host, port)`` pairs of a check are connected to at once with non-blocking sockets and
+polled together, so checking dozens of them takes at most one connect timeout instead of one per
+pair. Host names are resolved concurrently, every socket is closed as soon as its connection is
+established or failed. Results are cached for a few seconds (``ttl``) and shared by the callers,
+like :py:func:`cfme.utils.net.net_check` and the SSH client.
+
+.. code-block:: python
+
+    from cfme.utils.reachability import prober
+
+    prober.probe([('10.0.0.1', 22), ('10.0.0.2', 443)])  # {('10.0.0.1', 22): True, ...}
+    prober.alive(['10.0.0.1', '10.0.0.2'])  # ICMP echo, or TCP liveness if ICMP is not permitted
+    prober.wait_until_reachable([(vm1_ip, 22), (vm2_ip, 22)], num_sec=300)
+"""
+import errno
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from concurrent import futures
+
+from cfme.utils.log import logger
+from cfme.utils.wait import wait_for
+
+#: Seconds to wait for connections
+CONNECT_TIMEOUT = 10
+#: Seconds cached results are reused for by default
+CACHE_TTL = 10
+#: Ports connected to when liveness cannot be checked with ICMP
+LIVENESS_PORTS = (22, 443, 80)
+#: Number of host names resolved concurrently
+RESOLVER_THREADS = 16
+
+_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+_ICMP_ECHO_REQUEST = 8
+_ICMP_ECHO_REPLY = 0
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack('!{}H'.format(len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def icmp_echo_request(ident, sequence, payload=b'cfme-reachability'):
+    """Returns an ICMP echo request packet"""
+    header = struct.pack('!BBHHH', _ICMP_ECHO_REQUEST, 0, 0, ident, sequence)
+    checksum = _checksum(header + payload)
+    return struct.pack('!BBHHH', _ICMP_ECHO_REQUEST, 0, checksum, ident, sequence) + payload
+
+
+def _ready(socks, timeout, write):
+    """Returns the sockets ready for writing (or reading) in ``timeout`` seconds"""
+    timeout = max(timeout, 0)
+    if hasattr(select, 'poll'):
+        # select() does not work with file descriptors above 1024
+        poller = select.poll()
+        mask = (select.POLLOUT if write else select.POLLIN) | select.POLLERR | select.POLLHUP
+        by_fd = {}
+        for sock in socks:
+            poller.register(sock, mask)
+            by_fd[sock.fileno()] = sock
+        return [by_fd[fd] for fd, _ in poller.poll(timeout * 1000)]
+    if write:
+        _, ready, failed = select.select([], socks, socks, timeout)
+    else:
+        ready, _, failed = select.select(socks, [], socks, timeout)
+    return list(set(ready) | set(failed))
+
+
+def connect_all(addresses, timeout=CONNECT_TIMEOUT):
+    """Connects to all addresses at once, closes the sockets as soon as they are done
+
+    Args:
+        addresses: dict of keys to ``(family, sockaddr)``
+        timeout: seconds to wait for all the connections
+    Returns:
+        dict of the keys to the error code of their connection, 0 if it was established
+    """
+    results = {}
+    pending = {}
+    try:
+        for key, (family, sockaddr) in addresses.items():
+            try:
+                sock = socket.socket(family, socket.SOCK_STREAM)
+            except socket.error as e:
+                results[key] = e.errno or errno.EIO
+                continue
+            sock.setblocking(False)
+            error = sock.connect_ex(sockaddr)
+            if error in _IN_PROGRESS:
+                pending[sock] = key
+            else:
+                results[key] = 0 if error == errno.EISCONN else error
+                sock.close()
+        deadline = time.time() + timeout
+        while pending and time.time() < deadline:
+            for sock in _ready(list(pending), deadline - time.time(), write=True):
+                results[pending.pop(sock)] = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                sock.close()
+    finally:
+        for sock, key in pending.items():
+            sock.close()
+            results.setdefault(key, errno.ETIMEDOUT)
+    return results
+
+
+def ping_all(addresses, timeout=2):
+    """Sends ICMP echo requests to IPv4 addresses at once with an unprivileged ICMP socket
+
+    Returns:
+        dict of the addresses to whether they replied, ``None`` if ICMP sockets are not permitted
+        to this user (see ``net.ipv4.ping_group_range``)
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    except (socket.error, AttributeError):
+        return None
+    replied = set()
+    try:
+        sock.setblocking(False)
+        for sequence, address in enumerate(addresses):
+            try:
+                # the kernel sets the identifier of datagram ICMP sockets
+                sock.sendto(icmp_echo_request(os.getpid() & 0xffff, sequence), (address, 0))
+            except socket.error:
+                pass
+        deadline = time.time() + timeout
+        while len(replied) < len(addresses) and time.time() < deadline:
+            if not _ready([sock], deadline - time.time(), write=False):
+                continue
+            try:
+                data, (address, _) = sock.recvfrom(1024)
+            except socket.error:
+                continue
+            if data and struct.unpack('!B', data[:1])[0] == _ICMP_ECHO_REPLY:
+                replied.add(address)
+    finally:
+        sock.close()
+    return {address: address in replied for address in addresses}
+
+
+class ReachabilityProber(object):
+    """Checks hosts and ports concurrently, caching the results for ``ttl`` seconds
+
+    Args:
+        ttl: seconds the results are reused for by default
+        timeout: seconds to wait for the connections of a check
+    """
+    def __init__(self, ttl=CACHE_TTL, timeout=CONNECT_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # (host, port) -> (time, result), port None for liveness
+        self._results = {}
+        # host -> (time, (family, address) or None)
+        self._addresses = {}
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._addresses.clear()
+
+    def _cached(self, cache, keys, max_age, failures=True):
+        now = time.time()
+        with self._lock:
+            return {key: cache[key][1] for key in keys
+                    if key in cache and now - cache[key][0] <= max_age
+                    and (failures or cache[key][1])}
+
+    def _store(self, cache, results):
+        now = time.time()
+        with self._lock:
+            for key, result in results.items():
+                cache[key] = (now, result)
+
+    @staticmethod
+    def _getaddrinfo(host):
+        try:
+            family, _, _, _, sockaddr = socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)[0]
+        except socket.error:
+            return None
+        return family, sockaddr[0]
+
+    def resolve(self, hosts, max_age=None):
+        """Resolves host names concurrently
+
+        Returns:
+            dict of the hosts to ``(family, address)``, ``None`` for the ones not resolved
+        """
+        max_age = self.ttl if max_age is None else max_age
+        hosts = set(hosts)
+        addresses = self._cached(self._addresses, hosts, max_age)
+        missing = sorted(hosts - set(addresses))
+        if len(missing) > 1:
+            workers = min(RESOLVER_THREADS, len(missing))
+            with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                resolved = dict(zip(missing, executor.map(self._getaddrinfo, missing)))
+        else:
+            resolved = {host: self._getaddrinfo(host) for host in missing}
+        self._store(self._addresses, resolved)
+        addresses.update(resolved)
+        return addresses
+
+    def probe(self, targets, timeout=None, max_age=None, retry_failed=False):
+        """Checks whether ``(host, port)`` pairs accept connections, all at once
+
+        Args:
+            targets: iterable of ``(host, port)``
+            timeout: seconds to wait for the connections, :py:attr:`timeout` by default
+            max_age: reuse results younger than this, :py:attr:`ttl` by default, 0 to check again
+            retry_failed: check again the pairs which did not accept a connection last time
+        Returns:
+            dict of the ``(host, port)`` pairs to whether they accepted a connection
+        """
+        max_age = self.ttl if max_age is None else max_age
+        targets = set((host, int(port)) for host, port in targets)
+        results = self._cached(self._results, targets, max_age, failures=not retry_failed)
+        missing = targets - set(results)
+        if missing:
+            addresses = self.resolve((host for host, _ in missing), max_age=max_age)
+            reachable = {target: False for target in missing if addresses[target[0]] is None}
+            errors = connect_all(
+                {(host, port): (addresses[host][0], (addresses[host][1], port))
+                 for host, port in missing if addresses[host] is not None},
+                self.timeout if timeout is None else timeout)
+            reachable.update((target, error == 0) for target, error in errors.items())
+            self._store(self._results, reachable)
+            results.update(reachable)
+        return results
+
+    def check(self, host, port, timeout=None, max_age=None, retry_failed=False):
+        """Checks one ``(host, port)`` pair, see :py:meth:`probe`"""
+        return self.probe([(host, port)], timeout=timeout, max_age=max_age,
+                          retry_failed=retry_failed)[host, int(port)]
+
+    def alive(self, hosts, timeout=2, ports=LIVENESS_PORTS, max_age=None):
+        """Checks whether hosts are up, all at once
+
+        Hosts replying to an ICMP echo request are up. When ICMP sockets are not permitted (or
+        for IPv6 hosts), hosts accepting or refusing a TCP connection to one of ``ports`` are up.
+
+        Returns:
+            dict of the hosts to whether they are up
+        """
+        max_age = self.ttl if max_age is None else max_age
+        hosts = set(hosts)
+        results = {host: alive for (host, _), alive in self._cached(
+            self._results, [(host, None) for host in hosts], max_age).items()}
+        addresses = self.resolve(hosts - set(results), max_age=max_age)
+        alive = {host: False for host, address in addresses.items() if address is None}
+        ipv4 = {address[1]: host for host, address in addresses.items()
+                if address is not None and address[0] == socket.AF_INET}
+        pinged = ping_all(sorted(ipv4), timeout=timeout) if ipv4 else None
+        if pinged is not None:
+            alive.update((ipv4[address], replied) for address, replied in pinged.items())
+        tcp = [host for host in addresses if host not in alive]
+        if tcp:
+            errors = connect_all(
+                {(host, port): (addresses[host][0], (addresses[host][1], port))
+                 for host in tcp for port in ports}, timeout)
+            for host in tcp:
+                # a refused connection comes from the host too
+                alive[host] = any(errors[host, port] in (0, errno.ECONNREFUSED) for port in ports)
+        self._store(self._results, {(host, None): up for host, up in alive.items()})
+        results.update(alive)
+        return results
+
+    def wait_until_reachable(self, targets, num_sec=300, delay=5, timeout=None):
+        """Waits until all the ``(host, port)`` pairs accept connections
+
+        Every check connects to the pairs which did not accept a connection yet, all at once.
+
+        Raises:
+            TimedOutError: if some pairs are still not reachable after ``num_sec``
+        """
+        targets = set((host, int(port)) for host, port in targets)
+        reached = set()
+
+        def _all_reachable():
+            results = self.probe(targets - reached, timeout=timeout, max_age=0)
+            reached.update(target for target, result in results.items() if result)
+            if reached != targets:
+                logger.debug('Not reachable yet: %s', sorted(targets - reached))
+            return reached == targets
+
+        wait_for(_all_reachable, num_sec=num_sec, delay=delay,
+                 message='{} host ports reachable'.format(len(targets)))
+
+
+#: Prober shared by this process
+prober = ReachabilityProber()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Columnar storage of saved report contents
+
+:py:class:`SavedReportData` keeps the data of a saved report as one tuple per column and builds
+hash indexes on the columns it is searched by, so looking rows up does not scan the whole report.
+"""
+from cfme.utils.pretty import Pretty
+
+
+class SavedReportData(Pretty):
+    """This class stores data retrieved from saved report.
+
+    Args:
+        headers: Tuple with header columns.
+        body: List of tuples with body rows.
+        index_columns: Columns to index right away, others are indexed when first searched.
+    """
+    pretty_attrs = ["headers", "body"]
+
+    def __init__(self, headers, body, index_columns=()):
+        self.headers = tuple(headers)
+        self.body = [tuple(row) for row in body]
+        self._positions = {header: i for i, header in enumerate(self.headers)}
+        self._columns = None
+        self._indexes = {}
+        for column in index_columns:
+            self.index(column)
+
+    def __len__(self):
+        return len(self.body)
+
+    @property
+    def rows(self):
+        for row in self.body:
+            yield dict(zip(self.headers, row))
+
+    @property
+    def columns(self):
+        """Dict of header -> tuple of the values of the column"""
+        if self._columns is None:
+            values = list(zip(*self.body)) if self.body else [()] * len(self.headers)
+            self._columns = dict(zip(self.headers, values))
+        return self._columns
+
+    def column(self, column):
+        return self.columns[column]
+
+    def index(self, column):
+        """Returns the hash index of a column: dict of value -> list of row numbers"""
+        if column not in self._indexes:
+            index = {}
+            for i, value in enumerate(self.column(column)):
+                index.setdefault(value, []).append(i)
+            self._indexes[column] = index
+        return self._indexes[column]
+
+    def find_rows(self, column, value):
+        """Returns all rows (as dicts) having ``value`` in ``column``"""
+        if column not in self._positions:
+            return []
+        return [dict(zip(self.headers, self.body[i])) for i in self.index(column).get(value, [])]
+
+    def find_row(self, column, value):
+        if column not in self._positions:
+            return None
+        positions = self.index(column).get(value)
+        if positions:
+            return dict(zip(self.headers, self.body[positions[0]]))
+
+    def find_cell(self, column, value, cell):
+        try:
+            return self.find_row(column, value)[cell]
+        except TypeError:
+            return None
@@ -4,7 +4,8 @@ import pytest
 from collections import namedtuple
 
 from cfme.exceptions import OptionNotAvailable
-from cfme.utils.wait import wait_for
+from cfme.utils.rest_lifecycle import wait_for_entities
+from cfme.utils.rest_tasks import wait_for_tasks
 
 
 def assert_response(
@@ -43,7 +44,7 @@ def assert_response(
         results_num (int) -- specifies expected number of results
         task_wait (int) -- if any result in results contains a 'task_id', this method will polls
             the API to ensure that task has moved to 'finished' and wait 'task_wait' seconds for
-            that state change to occur
+            that state change to occur, the tasks of all results are polled together
     """
 
     # check if `rest_obj` is an object with attribute referencing rest_api instance
@@ -88,18 +89,9 @@ def assert_response(
         # if the request succeeded and there is a 'task_id' present in the response,
         # check the corresponding resource in /api/task/:task_id
         if task_wait and 'task_id' in result and result.get('success') and last_response:
-            task = rest_api.get_entity('tasks', result['task_id'])
-            task.wait_exists(num_sec=5)
-            wait_for(
-                lambda: task.state.lower() == 'finished',
-                fail_func=task.reload,
-                num_sec=task_wait,
-                message='task state finished',
-            )
-            task_message = getattr(task, 'message', '')
-            assert task.status.lower() == 'ok', (
-                'Task failed with status "{}", message "{}"'.format(task.status, task_message))
+            task_ids.append(result['task_id'])
 
+    task_ids = []
     if 'results' in content:
         results = content['results']
         results_len = len(results)
@@ -112,6 +104,11 @@ def assert_response(
     else:
         _check_result(content)
 
+    # all the tasks are polled together, see cfme.utils.rest_tasks
+    for task in wait_for_tasks(rest_api, task_ids, num_sec=task_wait):
+        assert task.ok, (
+            'Task failed with status "{}", message "{}"'.format(task.status, task.message))
+
     # preserve the original response
     rest_api.response = last_response
 
@@ -125,8 +122,13 @@ def get_vms_in_service(service):
     return [rest_api.get_entity('vms', vm['id']) for vm in service.vms.all]
 
 
-def create_resource(rest_api, col_name, col_data, col_action='create', substr_search=False):
-    """Creates new resource in collection."""
+def create_resource(rest_api, col_name, col_data, col_action='create', substr_search=False,
+                    num_sec=180):
+    """Creates new resources in collection with one action.
+
+    Waits until all of them are found with one filtered query per check, see
+    :py:func:`cfme.utils.rest_lifecycle.wait_for_entities`.
+    """
     collection = getattr(rest_api.collections, col_name)
     try:
         action = getattr(collection.action, col_action)
@@ -136,17 +138,7 @@ def create_resource(rest_api, col_name, col_data, col_action='create', substr_se
 
     entities = action(*col_data)
     action_response = rest_api.response
-    search_str = '%{}%' if substr_search else '{}'
-    for entity in col_data:
-        if entity.get('name'):
-            wait_for(lambda: collection.find_by(
-                name=search_str.format(entity.get('name'))) or False, num_sec=180, delay=10)
-        elif entity.get('description'):
-            wait_for(lambda: collection.find_by(
-                description=search_str.format(entity.get('description'))) or False,
-                num_sec=180, delay=10)
-        else:
-            raise NotImplementedError
+    wait_for_entities(collection, col_data, substr_search=substr_search, num_sec=num_sec)
 
     # make sure action response is preserved
     rest_api.response = action_response
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""Lifecycle of the test data created through the REST API
+
+Entities are created with one bulk action per collection, their existence is confirmed by one
+filtered query for all of them (``filter[]=name=a``, ``filter[]=or name=b``, ...) instead of
+one query per entity, and their ids and names are written to a cleanup ledger in the cache. The
+ledgers of an appliance are named after its identity (the GUID of its server), not its address.
+The ledger is emptied as the entities are deleted, in batched ``delete`` actions, so whatever is
+left in it at the end of the session, or after a crashed session, is deleted later:
+
+* by :py:func:`cleanup_all` at the end of the session (see :py:mod:`cfme.fixtures.rest_lifecycle`)
+* by :py:func:`manager_for` when it is first called for an appliance, for the ledgers of the
+  processes which are not running any more
+
+The entities left in the ledgers are only deleted if they still have the name they were created
+with.
+
+.. code-block:: python
+
+    manager = manager_for(appliance.rest_api)
+    catalogs = manager.create('service_catalogs', data, col_action='add')
+    ...
+    manager.delete('service_catalogs', catalogs)
+"""
+import errno
+import json
+import os
+import re
+import tempfile
+import threading
+import weakref
+
+from manageiq_client.filters import Q
+from six.moves.urllib.parse import urlparse
+
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path
+from cfme.utils.wait import wait_for
+
+#: Number of entities per filtered query and per delete action
+BATCH_SIZE = 50
+#: Directory of the cleanup ledgers, one per appliance and process
+ledger_dir = cache_path.join('rest_ledgers')
+
+
+def batches(items, size=None):
+    items = list(items)
+    size = size or BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existence_filter(field, values):
+    """Returns a :py:class:`manageiq_client.filters.Q` matching any of the values of a field"""
+    values = list(values)
+    if not values:
+        raise ValueError('No values to filter {} by'.format(field))
+    query = Q(field, '=', values[0])
+    for value in values[1:]:
+        query = query | Q(field, '=', value)
+    return query
+
+
+def find_entities(collection, field, values, batch_size=None, attributes=()):
+    """Returns the entities of a collection with any of the values of a field
+
+    One query is sent per ``batch_size`` values. The entities are expanded with their id,
+    ``field`` and ``attributes`` only, so reading these does not send a request per entity.
+    """
+    entities = []
+    for batch in batches(values, batch_size):
+        result = collection.query_string(**{
+            'filter[]': existence_filter(field, batch).as_filters,
+            'expand': 'resources',
+            'attributes': ','.join((field, ) + tuple(attributes))})
+        entities.extend(result.resources)
+    return entities
+
+
+def _search_field(col_data):
+    for field in ('name', 'description'):
+        if all(entity.get(field) for entity in col_data):
+            return field
+    raise NotImplementedError('Created entities need a name or a description to be searched')
+
+
+def wait_for_entities(collection, col_data, substr_search=False, num_sec=180, delay=5):
+    """Waits until all the entities described by ``col_data`` are found in a collection
+
+    The entities are searched by name, or description if some have no name, with one query per
+    :py:data:`BATCH_SIZE` entities and check.
+
+    Args:
+        collection: the collection the entities were created in
+        col_data: the dicts the entities were created from
+        substr_search: match names containing the requested names instead of equal ones
+    Returns:
+        the found entities
+    """
+    field = _search_field(col_data)
+    values = [entity[field] for entity in col_data]
+    pattern = '%{}%' if substr_search else '{}'
+
+    def _matches(value, found):
+        return value in found if substr_search else value == found
+
+    def _all_found():
+        entities = find_entities(collection, field, [pattern.format(v) for v in values])
+        found = [entity._data.get(field) or '' for entity in entities]
+        if all(any(_matches(value, name) for name in found) for value in values):
+            return entities
+        return False
+
+    return wait_for(
+        _all_found, num_sec=num_sec, delay=delay,
+        message='{} entities in {}'.format(len(values), collection.name)).out
+
+
+def entity_name(entity):
+    """Returns ``(field, value)`` of the name (or description) of an entity, ``None`` without"""
+    data = getattr(entity, '_data', {})
+    for field in ('name', 'description'):
+        if data.get(field):
+            return field, data[field]
+    return None
+
+
+def delete_entities(rest_api, col_name, ids, batch_size=None, names=None):
+    """Deletes the entities of a collection by id, in batched actions
+
+    The ids which do not exist anymore are filtered out first with one query per batch, so the
+    actions do not fail on them. A failed action is logged and does not stop the other batches.
+
+    Args:
+        names: dict of ids to the :py:func:`entity_name` the entities were created with,
+            entities which have another name now are not deleted
+    Returns:
+        ids of the entities which could not be deleted
+    """
+    collection = getattr(rest_api.collections, col_name)
+    ids = sorted(set(int(entity_id) for entity_id in ids))
+    if not ids:
+        return []
+    names = {int(entity_id): name for entity_id, name in (names or {}).items() if name}
+    fields = tuple(sorted(set(field for field, _ in names.values())))
+    existing = []
+    for entity in find_entities(collection, 'id', ids, batch_size, attributes=fields):
+        entity_id = int(entity.id)
+        if entity_id in names:
+            field, value = names[entity_id]
+            if entity._data.get(field) != value:
+                logger.warning('Not deleting %s %d: its %s is %r, it was created as %r',
+                               col_name, entity_id, field, entity._data.get(field), value)
+                continue
+        existing.append(entity_id)
+    failed = []
+    for batch in batches(existing, batch_size):
+        try:
+            collection.action.delete(*[rest_api.get_entity(collection, i) for i in batch])
+        except Exception as e:
+            logger.warning('Could not delete %s %s: %s', col_name, batch, e)
+            failed.extend(batch)
+    return failed
+
+
+_appliance_keys = weakref.WeakKeyDictionary()
+
+
+def _appliance_identity(rest_api):
+    server_info = getattr(rest_api, 'server_info', {})
+    try:
+        return rest_api.get_entity_by_href(server_info['server_href']).guid
+    except Exception as e:
+        logger.warning('Could not read the server GUID of %s: %s', rest_api._entry_point, e)
+    try:
+        region = rest_api.get_entity_by_href(server_info['region_href'])
+        return 'region{}-{}'.format(region.region, region.created_on)
+    except Exception as e:
+        logger.warning('Could not read the region of %s: %s', rest_api._entry_point, e)
+    return urlparse(rest_api._entry_point).netloc
+
+
+def appliance_key(rest_api):
+    """Returns the identity of the appliance of an API, as used in the names of the ledgers
+
+    The GUID of its server, or its region and when the region was created if the GUID can't be
+    read, so the ledgers of an appliance are never used for another one reusing its address.
+    The address is only used if neither can be read.
+    """
+    try:
+        return _appliance_keys[rest_api]
+    except KeyError:
+        pass
+    key = re.sub(r'[^\w.-]', '_', str(_appliance_identity(rest_api)))
+    _appliance_keys[rest_api] = key
+    return key
+
+
+def _process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class CleanupLedger(object):
+    """Ids and names of the created entities which are not deleted yet, saved on every change
+
+    Args:
+        path: path of the ledger file
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        # collection name -> id -> entity_name() or None
+        self.entries = {}
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            entries = {}
+        for col_name, names in entries.items():
+            if isinstance(names, list):
+                # ids only, written before the names were recorded
+                names = dict.fromkeys(names)
+            self.entries[col_name] = {
+                int(entity_id): tuple(name) if name else None
+                for entity_id, name in names.items()}
+
+    @classmethod
+    def for_process(cls, key, pid=None, directory=None):
+        directory = str(directory or ledger_dir)
+        return cls(os.path.join(directory, '{}-{}.json'.format(key, pid or os.getpid())))
+
+    @classmethod
+    def stale(cls, key, directory=None):
+        """Returns the ledgers of an appliance left by processes which are not running"""
+        directory = str(directory or ledger_dir)
+        if not os.path.isdir(directory):
+            return []
+        ledgers = []
+        for name in sorted(os.listdir(directory)):
+            match = re.match(r'^{}-(\d+)\.json$'.format(re.escape(key)), name)
+            if match and not _process_running(int(match.group(1))):
+                ledgers.append(cls(os.path.join(directory, name)))
+        return ledgers
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.entries.values())
+
+    def add(self, col_name, names):
+        """Adds entities to the ledger
+
+        Args:
+            names: dict of ids to the :py:func:`entity_name` of the entities
+        """
+        with self._lock:
+            self.entries.setdefault(col_name, {}).update(
+                (int(entity_id), name) for entity_id, name in names.items())
+            self._save()
+
+    def discard(self, col_name, ids):
+        with self._lock:
+            remaining = self.entries.get(col_name, {})
+            for entity_id in ids:
+                remaining.pop(int(entity_id), None)
+            if not remaining:
+                self.entries.pop(col_name, None)
+            self._save()
+
+    def _save(self):
+        """Writes the ledger atomically, removes the file once it is empty"""
+        if not self.entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({col: {str(entity_id): name for entity_id, name in names.items()}
+                       for col, names in self.entries.items()}, f, sort_keys=True)
+        os.rename(tmp_path, self.path)
+
+    def cleanup(self, rest_api):
+        """Deletes all the entities of the ledger, keeps the ones which could not be deleted
+
+        Returns:
+            number of entities left in the ledger
+        """
+        for col_name, names in sorted(self.entries.items()):
+            ids = set(names)
+            try:
+                failed = delete_entities(rest_api, col_name, ids, names=names)
+            except Exception as e:
+                logger.warning('Could not clean up %s: %s', col_name, e)
+                continue
+            self.discard(col_name, ids - set(failed))
+        return len(self)
+
+
+class RestDataManager(object):
+    """Creates entities through the REST API and keeps them in a :py:class:`CleanupLedger`
+
+    Args:
+        rest_api: the API of the appliance
+        ledger: the ledger, the one of this process for the appliance by default
+    """
+    def __init__(self, rest_api, ledger=None):
+        self.rest_api = rest_api
+        if ledger is None:
+            ledger = CleanupLedger.for_process(appliance_key(rest_api))
+        self.ledger = ledger
+
+    def register(self, col_name, entities):
+        """Adds entities created elsewhere to the ledger"""
+        self.ledger.add(col_name, {entity.id: entity_name(entity) for entity in entities
+                                   if getattr(entity, 'id', None) is not None})
+
+    def create(self, col_name, col_data, col_action='create', substr_search=False, num_sec=180):
+        """Creates entities with one action, waits for them with one query per check
+
+        Returns:
+            the entities returned by the action
+        """
+        from cfme.utils.rest import create_resource
+        entities = create_resource(
+            self.rest_api, col_name, col_data, col_action=col_action,
+            substr_search=substr_search, num_sec=num_sec)
+        self.register(col_name, entities)
+        return entities
+
+    def delete(self, col_name, entities):
+        """Deletes entities (or ids) which still exist with batched actions
+
+        The entities are passed by their owner, they are deleted even if they were renamed.
+        """
+        ids = [getattr(entity, 'id', entity) for entity in entities]
+        failed = delete_entities(self.rest_api, col_name, ids)
+        self.ledger.discard(col_name, set(int(i) for i in ids) - set(failed))
+        return failed
+
+    def cleanup(self):
+        """Deletes everything left in the ledger, returns the number of entities left"""
+        return self.ledger.cleanup(self.rest_api)
+
+
+# appliance key -> ledger of this process, shared by the managers of the APIs of the appliance
+_ledgers = {}
+# rest_api -> manager
+_managers = weakref.WeakKeyDictionary()
+_managers_lock = threading.Lock()
+
+
+def manager_for(rest_api):
+    """Returns the :py:class:`RestDataManager` of an API in this process
+
+    The managers of the APIs of the same appliance (e.g. of different users) share the ledger
+    of the appliance, each one creates and deletes with its own API. The first call for an
+    appliance deletes what is left in the ledgers of the processes which are not running
+    anymore, like crashed sessions.
+    """
+    key = appliance_key(rest_api)
+    with _managers_lock:
+        if rest_api in _managers:
+            return _managers[rest_api]
+        if key not in _ledgers:
+            for ledger in CleanupLedger.stale(key):
+                logger.info('Deleting %d entities left by a previous session in %s',
+                            len(ledger), ledger.path)
+                ledger.cleanup(rest_api)
+            _ledgers[key] = CleanupLedger.for_process(key)
+        _managers[rest_api] = manager = RestDataManager(rest_api, _ledgers[key])
+        return manager
+
+
+def cleanup_all():
+    """Deletes the entities left in the ledgers of this process
+
+    A ledger is cleaned up with the API of one of the managers sharing it. A ledger without any
+    manager left is cleaned up by the next session on the appliance.
+    """
+    with _managers_lock:
+        managers = dict((id(manager.ledger), manager) for manager in list(_managers.values()))
+    for manager in managers.values():
+        if len(manager.ledger):
+            logger.info('Deleting %d REST entities left by the tests', len(manager.ledger))
+            left = manager.cleanup()
+            if left:
+                logger.warning('%d REST entities left in %s', left, manager.ledger.path)
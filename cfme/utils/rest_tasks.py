@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Tracker of the tasks started by REST actions
+
+Bulk actions return one ``task_id`` per resource. Instead of waiting for each task in turn, the
+tracker polls all the unfinished ones with one filtered query of the ``tasks`` collection per
+check (see :py:func:`cfme.utils.rest_lifecycle.find_entities`). The waits are adaptive (see
+:py:mod:`cfme.utils.wait_stats`): checked quickly at first, then backing off to an interval
+derived from how long the previous task waits took.
+
+Every tracked task has a :py:class:`concurrent.futures.Future` which gets a :py:class:`TaskResult`
+once the task is finished, so helpers can hand the futures over and add callbacks to them:
+
+.. code-block:: python
+
+    tracker = TaskTracker(appliance.rest_api)
+    task_futures = tracker.track_results(appliance.rest_api.response.json()['results'])
+    tracker.wait(num_sec=600)
+    assert all(future.result().ok for future in task_futures)
+"""
+import time
+from collections import namedtuple
+from concurrent import futures
+
+from cfme.utils.log import logger
+from cfme.utils.rest_lifecycle import find_entities
+from cfme.utils.wait import wait_for
+
+#: Attributes of the tasks read by every poll
+TASK_ATTRIBUTES = ('state', 'status', 'message')
+
+
+class TaskResult(namedtuple('TaskResult', 'id state status message latency')):
+    """State of a finished task, ``latency`` is the time from tracking it to seeing it finished"""
+    @property
+    def ok(self):
+        return (self.status or '').lower() == 'ok'
+
+
+class TaskTracker(object):
+    """Tracks tasks of an appliance until they are finished
+
+    Args:
+        rest_api: the API of the appliance
+    """
+    def __init__(self, rest_api):
+        self.rest_api = rest_api
+        # task id -> Future
+        self.futures = {}
+        # task id -> time it started to be tracked
+        self._tracked_at = {}
+
+    def track(self, task_id):
+        """Returns the future of a task, tracking it if it is not yet"""
+        task_id = int(task_id)
+        if task_id not in self.futures:
+            self.futures[task_id] = futures.Future()
+            self._tracked_at[task_id] = time.time()
+        return self.futures[task_id]
+
+    def track_results(self, results):
+        """Tracks the tasks of successful action results, returns their futures"""
+        return [self.track(result['task_id']) for result in results
+                if result.get('task_id') and result.get('success', True)]
+
+    @property
+    def pending(self):
+        return sorted(task_id for task_id, future in self.futures.items() if not future.done())
+
+    def poll(self, task_ids=None):
+        """Checks the unfinished tasks with one query, resolves the futures of finished ones
+
+        Args:
+            task_ids: only check these tasks, all tracked ones by default
+        Returns:
+            number of the checked tasks which are not finished
+        """
+        pending = [task_id for task_id in self.pending if task_ids is None or task_id in task_ids]
+        if not pending:
+            return 0
+        # tasks not visible yet are just not returned
+        tasks = find_entities(
+            self.rest_api.collections.tasks, 'id', pending, attributes=TASK_ATTRIBUTES)
+        now = time.time()
+        for task in tasks:
+            data = task._data
+            if (data.get('state') or '').lower() != 'finished':
+                continue
+            task_id = int(data['id'])
+            result = TaskResult(task_id, data.get('state'), data.get('status'),
+                                data.get('message', ''), now - self._tracked_at[task_id])
+            self.futures[task_id].set_result(result)
+        return len([task_id for task_id in pending if not self.futures[task_id].done()])
+
+    def wait(self, task_futures=None, num_sec=600, delay=5):
+        """Polls until the tasks are finished
+
+        Args:
+            task_futures: futures returned by :py:meth:`track`, all tracked tasks by default
+            num_sec: timeout of the whole wait
+            delay: longest interval between the polls
+        Returns:
+            the :py:class:`TaskResult` of the tasks, in the order of ``task_futures``
+        Raises:
+            TimedOutError: if some tasks are not finished in time, their futures stay pending
+        """
+        if task_futures is None:
+            task_futures = [self.futures[task_id] for task_id in sorted(self.futures)]
+        ids = {task_id for task_id, future in self.futures.items() if future in task_futures}
+        wait_for(
+            lambda: self.poll(ids) == 0, num_sec=num_sec, delay=delay, adaptive=True,
+            message='{} tasks finished'.format(len(ids)))
+        return [future.result() for future in task_futures]
+
+    def latencies(self):
+        """Returns the latencies of the finished tasks by task id"""
+        return {task_id: future.result().latency for task_id, future in self.futures.items()
+                if future.done()}
+
+    def log_summary(self):
+        latencies = sorted(self.latencies().values())
+        if latencies:
+            logger.info('%d tasks finished in %.1fs (median %.1fs)', len(latencies),
+                        latencies[-1], latencies[len(latencies) // 2])
+
+
+def wait_for_tasks(rest_api, task_ids, num_sec=600, delay=5):
+    """Waits for tasks with a :py:class:`TaskTracker`, returns their :py:class:`TaskResult`"""
+    if not task_ids:
+        return []
+    tracker = TaskTracker(rest_api)
+    task_futures = [tracker.track(task_id) for task_id in task_ids]
+    results = tracker.wait(task_futures, num_sec=num_sec, delay=delay)
+    tracker.log_summary()
+    return results
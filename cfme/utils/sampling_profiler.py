@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Sampling profiler of the thread running the tests
+
+Unlike :py:mod:`cfme.utils.tracer`, nothing runs on every executed line: a background thread
+takes the stack of the profiled thread every ``interval`` seconds. Every sample is weighted by
+the time elapsed since the previous one and attributed to
+
+* the test and its phase (``setup``, ``call``, ``teardown``) and the fixture being set up, as
+  set by the pytest plugin (see :py:mod:`cfme.test_framework.sampling_profiler`)
+* a category: time blocked in Selenium, SSH, REST or ``wait_for`` (the innermost frame of these
+  libraries in the stack), or ``cpu`` for the time spent in other Python code
+
+Stacks are kept in the folded format of flame graphs (``frame;frame;frame <milliseconds>``),
+prefixed by the phase, fixture and category, per test and for the whole session.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+#: Default interval between two samples, in seconds
+DEFAULT_INTERVAL = 0.02
+
+#: Categories of blocked time, by path fragments of the files of their libraries
+CATEGORIES = (
+    ('selenium', ('/selenium/', )),
+    ('ssh', ('/paramiko/', )),
+    ('rest', ('/manageiq_client/', '/requests/')),
+    ('wait_for', ('/wait_for/', '/cfme/utils/wait.py')),
+)
+
+#: Frames of these files are left out of the stacks, they only run the hooks
+SKIPPED_FILES = (
+    '/_pytest/', '/pluggy/', '/py/_vendored_packages/', '/cfme/test_framework/sampling_profiler.py')
+
+
+def categorize(filenames):
+    """Returns the category of a stack given by the file names of its frames, innermost first"""
+    for filename in filenames:
+        filename = filename.replace(os.sep, '/')
+        for category, fragments in CATEGORIES:
+            if any(fragment in filename for fragment in fragments):
+                return category
+    return 'cpu'
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return '{}:{}'.format(frame.f_globals.get('__name__', code.co_filename), code.co_name)
+
+
+def fold(frame, limit=100):
+    """Returns the folded stack (outermost first) and the category of a frame"""
+    labels = []
+    filenames = []
+    while frame is not None and len(filenames) < limit:
+        filename = frame.f_code.co_filename
+        filenames.append(filename)
+        if not any(skipped in filename.replace(os.sep, '/') for skipped in SKIPPED_FILES):
+            labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels)), categorize(filenames)
+
+
+class SamplingProfiler(object):
+    """Samples the stack of a thread in a background thread
+
+    Args:
+        interval: seconds between two samples
+        thread_id: ident of the sampled thread, the thread creating the profiler by default
+    """
+    def __init__(self, interval=DEFAULT_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.current_thread().ident
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # what the profiled thread is doing, set by the plugin
+        self.test = None
+        self.phase = None
+        self.fixtures = []
+        # test -> folded stack -> seconds
+        self.test_stacks = defaultdict(lambda: defaultdict(float))
+        # folded stack -> seconds, for the whole session
+        self.stacks = defaultdict(float)
+        # test -> (phase, category) -> seconds
+        self.times = defaultdict(lambda: defaultdict(float))
+        self.samples = 0
+        self.overhead = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def set_context(self, test=None, phase=None):
+        self.test = test
+        self.phase = phase
+        del self.fixtures[:]
+
+    def _run(self):
+        last = time.time()
+        while not self._stop.wait(self.interval):
+            now = time.time()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.sample(frame, now - last)
+            del frame
+            last = now
+            self.overhead += time.time() - now
+
+    def sample(self, frame, weight):
+        """Records the stack of a frame for ``weight`` seconds"""
+        stack, category = fold(frame)
+        test, phase = self.test or 'session', self.phase or 'other'
+        # a slice, the profiled thread may pop the fixture meanwhile
+        prefix = [phase] + ['fixture:{}'.format(name) for name in self.fixtures[-1:]]
+        prefix.append(category)
+        folded = ';'.join(prefix + ([stack] if stack else []))
+        with self._lock:
+            self.samples += 1
+            self.test_stacks[test][folded] += weight
+            self.stacks[folded] += weight
+            self.times[test][phase, category] += weight
+
+    def pop_test(self, test):
+        """Returns the folded stacks of a test as text, forgetting them"""
+        with self._lock:
+            stacks = self.test_stacks.pop(test, {})
+        return format_folded(stacks)
+
+    def summary(self):
+        """Returns the time by phase and category of every test and of the session"""
+        with self._lock:
+            tests = {test: _nest(times) for test, times in self.times.items()}
+            totals = defaultdict(float)
+            for times in self.times.values():
+                for key, seconds in times.items():
+                    totals[key] += seconds
+        return {'interval': self.interval, 'samples': self.samples, 'overhead': self.overhead,
+                'totals': _nest(totals), 'tests': tests}
+
+    def dump(self, path):
+        """Writes the session stacks to ``<path>.folded`` and the summary to ``<path>.json``"""
+        path = str(path)
+        with open('{}.folded'.format(path), 'w') as f:
+            with self._lock:
+                f.write(format_folded(self.stacks))
+        with open('{}.json'.format(path), 'w') as f:
+            json.dump(self.summary(), f, indent=1, sort_keys=True)
+
+
+def _nest(times):
+    """``{(phase, category): seconds}`` to ``{phase: {category: seconds}}``"""
+    nested = defaultdict(dict)
+    for (phase, category), seconds in times.items():
+        nested[phase][category] = round(seconds, 3)
+    return dict(nested)
+
+
+def format_folded(stacks):
+    """Folded stacks with seconds to the text of flame graph tools, in milliseconds"""
+    lines = ['{} {}'.format(stack, int(round(seconds * 1000)))
+             for stack, seconds in sorted(stacks.items())]
+    return '\n'.join(line for line in lines if not line.endswith(' 0'))
+
+
+def merge(paths, path):
+    """Merges the profiles of several processes written by :py:meth:`SamplingProfiler.dump`"""
+    stacks = defaultdict(int)
+    totals = defaultdict(lambda: defaultdict(float))
+    tests = {}
+    for profile in paths:
+        profile = str(profile)
+        with open('{}.folded'.format(profile)) as f:
+            for line in f:
+                stack, _, millis = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    stacks[stack] += int(millis)
+        with open('{}.json'.format(profile)) as f:
+            summary = json.load(f)
+        tests.update(summary['tests'])
+        for phase, categories in summary['totals'].items():
+            for category, seconds in categories.items():
+                totals[phase][category] += seconds
+    with open('{}.folded'.format(path), 'w') as f:
+        f.write('\n'.join('{} {}'.format(stack, millis)
+                          for stack, millis in sorted(stacks.items())))
+    with open('{}.json'.format(path), 'w') as f:
+        json.dump({'totals': totals, 'tests': tests}, f, indent=1, sort_keys=True)
@@ -1,5 +1,6 @@
 """Monitor Memory on a CFME/Miq appliance and builds report&graphs displaying usage per process."""
 import json
+import tempfile
 import time
 import traceback
 from collections import OrderedDict
@@ -16,6 +17,9 @@ from cfme.utils.log import logger
 from cfme.utils.path import results_path
 from cfme.utils.version import current_version
 from cfme.utils.version import get_version
+from cfme.utils.workload_metrics import (
+    MetricStore, appliance_samples, finish_workload, parse_queue_states, parse_top_cpu,
+    process_samples)
 
 miq_workers = [
     'MiqGenericWorker',
@@ -144,6 +148,7 @@ class SmemMemoryMonitor(Thread):
         self.miq_server_id = ''
         self.use_slab = False
         self.signal = True
+        self.metrics = None
 
     def create_process_result(self, process_results, starttime, process_pid, process_name,
             memory_by_pid):
@@ -234,6 +239,22 @@ class SmemMemoryMonitor(Thread):
     #         memory_by_pid[pid]['cmd'] = ' '.join(values[4:])
     #     return memory_by_pid
 
+    def get_cpu_usage(self):
+        result = self.ssh_client.run_command('top -b -n 1 | head -5')
+        if result.failed:
+            logger.error('Failed to run top: {}'.format(result.output))
+            return {}
+        return parse_top_cpu(result.output)
+
+    def get_queue_stats(self):
+        result = self.ssh_client.run_command(
+            'psql -t -q -A -d vmdb_production -c '
+            '"select state, count(*) from miq_queue group by state"')
+        if result.failed:
+            logger.error('Failed to query the message queue: {}'.format(result.output))
+            return {}
+        return parse_queue_states(result.output)
+
     def get_miq_server_id(self):
         # Obtain the Miq Server GUID:
         result = self.ssh_client.run_command('cat /var/www/miq/vmdb/GUID')
@@ -291,6 +312,7 @@ class SmemMemoryMonitor(Thread):
         """
         appliance_results = OrderedDict()
         process_results = OrderedDict()
+        self.metrics = MetricStore(metrics_path(self.scenario_data))
         install_smem(self.ssh_client)
         self.get_miq_server_id()
         logger.info('Starting Monitoring Thread.')
@@ -341,6 +363,13 @@ class SmemMemoryMonitor(Thread):
                     else:
                         logger.debug('Unaccounted for ruby pid: {}'.format(pid))
 
+            samples = appliance_samples(appliance_results.get(plottime, {}))
+            samples.update(process_samples(process_results, plottime))
+            samples.update(self.get_cpu_usage())
+            samples.update(self.get_queue_stats())
+            samples['workers.count'] = len(workers)
+            self.metrics.append(starttime, samples)
+
             timediff = time.time() - starttime
             logger.debug('Monitoring sampled in {}s'.format(round(timediff, 4)))
 
@@ -350,8 +379,9 @@ class SmemMemoryMonitor(Thread):
             time.sleep(time_to_sleep)
         logger.info('Monitoring CFME Memory Terminating')
 
-        create_report(self.scenario_data, appliance_results, process_results, self.use_slab,
-            self.grafana_urls)
+        scenario_path = create_report(self.scenario_data, appliance_results, process_results,
+            self.use_slab, self.grafana_urls)
+        finish_workload(scenario_path, self.metrics, self.scenario_data, current_version())
 
     def run(self):
         try:
@@ -373,6 +403,22 @@ def install_smem(ssh_client):
     ssh_client.run_command('sed -i s/\.27s/\.200s/g /usr/bin/smem')
 
 
+def metrics_path(scenario_data):
+    """Returns the path of a new metrics file for a scenario, written while the scenario runs
+
+    The file name is unique, scenarios with the same name do not append to the same file.
+    """
+    workload_path = results_path.join(
+        '{}-{}-{}'.format(test_ts, scenario_data['test_dir'], current_version()))
+    if not os.path.exists(str(workload_path)):
+        os.makedirs(str(workload_path))
+    fd, path = tempfile.mkstemp(
+        prefix='{}-'.format(scenario_data['scenario']['name']), suffix='-metrics.jsonl',
+        dir=str(workload_path))
+    os.close(fd)
+    return workload_path.join(os.path.basename(path))
+
+
 def create_report(scenario_data, appliance_results, process_results, use_slab, grafana_urls):
     logger.info('Creating Memory Monitoring Report.')
     ver = current_version()
@@ -418,6 +464,7 @@ def create_report(scenario_data, appliance_results, process_results, use_slab, g
     generate_workload_html(scenario_path, ver, scenario_data, provider_names, grafana_urls)
 
     logger.info('Finished Creating Report')
+    return scenario_path
 
 
 def compile_per_process_results(procs_to_compile, process_results, ts_end):
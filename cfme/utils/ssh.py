@@ -193,7 +193,9 @@ class SSHClient(paramiko.SSHClient):
 
     def _check_port(self):
         hostname = self._connect_kwargs['hostname']
-        if not net_check(ports.SSH, hostname, force=True):
+        # a success of the last seconds is fresh enough, a failure is checked again as the
+        # appliance may have come up since, see cfme.utils.reachability
+        if not net_check(ports.SSH, hostname, retry_failed=True):
             raise Exception("SSH connection to {}:{} failed, port unavailable".format(
                 hostname, ports.SSH))
 
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""Clustering of test failure tracebacks
+
+Groups tracebacks of failed tests so that the most common problems of a run can be listed (the
+"Top 10 Exceptions" of the artifactor report, ``scripts/jenkins_failure_analysis.py`` and the
+terminal summary). Clustering is done in two linear passes:
+
+1. Every traceback is reduced to a signature: the exception type, the innermost frames and the
+   first line of the message, with the literals (strings, numbers, addresses, URLs, ...) masked.
+   Tracebacks with the same signature end up in the same cluster through a dict lookup.
+2. Signatures which differ only slightly (e.g. a frame more or less, different wording in the
+   message) are merged using MinHash of the token shingles of the normalized tracebacks.
+   Locality sensitive hashing over bands of the MinHash only compares a signature against the
+   clusters sharing a band with it, never against all the clusters.
+
+Usage:
+
+.. code-block:: python
+
+    clusterer = TracebackClusterer()
+    for test_name, traceback in failures:
+        clusterer.add(traceback, item=test_name)
+    for cluster in clusterer.top(10):
+        print(len(cluster), cluster.exc_type, cluster.traceback)
+"""
+import re
+import zlib
+
+#: Masks applied, in order, to tracebacks before computing the signatures
+_MASKS = (
+    (re.compile(r'\b[a-z][a-z0-9+.-]*://\S+', re.IGNORECASE), '<url>'),
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b',
+                re.IGNORECASE), '<uuid>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<ip>'),
+    (re.compile(r'\b0x[0-9a-f]+\b', re.IGNORECASE), '<hex>'),
+    (re.compile(r'\b[0-9a-f]{16,}\b', re.IGNORECASE), '<hex>'),
+    (re.compile(r'u?\'[^\'\n]*\'|u?"[^"\n]*"'), '<str>'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '<num>'),
+    (re.compile(r'[ \t]+'), ' '),
+)
+
+#: Python (``File "x.py", line 1``) and pytest (``x.py:1: ...``) frame lines
+_FRAME = re.compile(r'^\s*(?:File "(?P<file>[^"]+)", line (?P<line>\d+)|'
+                    r'(?P<pfile>[^\s:]+\.py):(?P<pline>\d+)(?::|$))')
+#: Exception type, either at the start of a line (``E`` prefixed by pytest) or ending a pytest
+#: frame line (``x.py:1: TimedOutError``)
+_EXC_TYPE = re.compile(
+    r'^(?:E\s+|\S+\.py:\d+: )?(?P<type>[A-Za-z_][\w.]*(?:Error|Exception|Failure|Exit|Interrupt|'
+    r'Timeout|Warning))\b')
+_TOKEN = re.compile(r'<\w+>|\w+')
+
+#: Mixes the CRC32 of the shingles before they are split in MinHash bins
+_MULTIPLIER = 2654435761
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize(traceback):
+    """Returns the traceback with literals masked and whitespace collapsed"""
+    for pattern, replacement in _MASKS:
+        traceback = pattern.sub(replacement, traceback)
+    return traceback.strip()
+
+
+def exception_type(traceback):
+    """Returns the name of the innermost exception type found in the traceback, or ``None``"""
+    for line in reversed(traceback.splitlines()):
+        match = _EXC_TYPE.match(line.strip())
+        if match:
+            return match.group('type').rsplit('.', 1)[-1]
+    return None
+
+
+def innermost_frames(traceback, frames=3):
+    """Returns up to ``frames`` innermost ``file:line`` locations found in the traceback"""
+    locations = []
+    for line in traceback.splitlines():
+        match = _FRAME.match(line)
+        if match:
+            location = '{}:{}'.format(
+                match.group('file') or match.group('pfile'),
+                match.group('line') or match.group('pline'))
+            if not locations or locations[-1] != location:
+                locations.append(location)
+    return tuple(locations[-frames:])
+
+
+def _message(normalized):
+    # first line of the exception message, pytest prefixes them with "E"
+    for line in normalized.splitlines():
+        line = line.strip()
+        if line.startswith('E '):
+            return line[2:].strip()[:200]
+    lines = [line.strip() for line in normalized.splitlines() if line.strip()]
+    return lines[-1][:200] if lines else ''
+
+
+def signature(traceback, frames=3, exc_type=None):
+    """Returns the exact-match signature of a traceback
+
+    Args:
+        traceback: the (short) traceback text
+        frames: number of innermost frames making part of the signature
+        exc_type: exception type name, parsed out of the traceback when not passed
+    """
+    return _signature(traceback, normalize(traceback), frames, exc_type)
+
+
+def _signature(traceback, normalized, frames, exc_type):
+    return (exc_type or exception_type(traceback) or 'Unknown',
+            innermost_frames(traceback, frames),
+            _message(normalized))
+
+
+class MinHasher(object):
+    """MinHash of the token shingles of a text
+
+    Uses one permutation hashing: every shingle is hashed once and the hash space is split in
+    ``num_perm`` bins, each keeping its minimum. Empty bins borrow the value of the next
+    non-empty one (rotation densification), so the MinHashes of short texts stay comparable.
+
+    Args:
+        num_perm: number of bins (length of the MinHash)
+        shingle_size: number of tokens in a shingle
+    """
+    def __init__(self, num_perm=64, shingle_size=3):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def shingles(self, text):
+        tokens = _TOKEN.findall(text)
+        size = self.shingle_size
+        if len(tokens) <= size:
+            return {' '.join(tokens)}
+        return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+    def minhash(self, text):
+        size = self.num_perm
+        bins = [None] * size
+        for shingle in self.shingles(text):
+            value = ((zlib.crc32(shingle.encode('utf-8')) & _MAX_HASH) * _MULTIPLIER) & _MAX_HASH
+            index, value = value % size, value // size
+            if bins[index] is None or value < bins[index]:
+                bins[index] = value
+        offset = _MAX_HASH // size + 1
+        result = list(bins)
+        for index in range(size):
+            distance = 1
+            while result[index] is None:
+                borrowed = bins[(index + distance) % size]
+                if borrowed is not None:
+                    result[index] = borrowed + distance * offset
+                distance += 1
+        return tuple(result)
+
+    @staticmethod
+    def similarity(first, second):
+        """Estimated Jaccard similarity of the texts of two MinHashes"""
+        return sum(1 for x, y in zip(first, second) if x == y) / float(len(first))
+
+
+class TracebackCluster(object):
+    """Failures sharing the same (or a similar) traceback
+
+    Attributes:
+        exc_type: name of the exception type
+        traceback: traceback of the first failure added to the cluster
+        signatures: the exact-match signatures merged in this cluster
+        items: whatever was passed as ``item`` when adding the failures, in the order added
+    """
+    def __init__(self, exc_type, traceback, minhash):
+        self.exc_type = exc_type
+        self.traceback = traceback
+        self.minhash = minhash
+        self.signatures = []
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return '<TracebackCluster {} x{}>'.format(self.exc_type, len(self))
+
+
+class TracebackClusterer(object):
+    """Clusters tracebacks in time linear to the number of tracebacks
+
+    Args:
+        threshold: minimum estimated Jaccard similarity of two normalized tracebacks with a
+            different signature to end up in the same cluster, ``None`` only groups identical
+            signatures
+        frames: number of innermost frames making part of the signature
+        num_perm: length of the MinHashes
+        bands: number of LSH bands, ``num_perm`` must be divisible by it
+    """
+    def __init__(self, threshold=0.6, frames=3, num_perm=64, bands=16):
+        if num_perm % bands:
+            raise ValueError('num_perm ({}) must be divisible by bands ({})'.format(
+                num_perm, bands))
+        self.threshold = threshold
+        self.frames = frames
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.clusters = []
+        self._by_signature = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def add(self, traceback, item=None, exc_type=None):
+        """Adds a traceback to its cluster and returns the cluster
+
+        Args:
+            traceback: the traceback text
+            item: reference to the failure kept in the cluster (test name, report, ...),
+                the traceback itself when not passed
+            exc_type: exception type name, if known by the caller
+        """
+        normalized = normalize(traceback)
+        sig = _signature(traceback, normalized, self.frames, exc_type)
+        cluster = self._by_signature.get(sig)
+        if cluster is None:
+            cluster = self._cluster_for(sig, traceback, normalized)
+            cluster.signatures.append(sig)
+            self._by_signature[sig] = cluster
+        cluster.items.append(traceback if item is None else item)
+        return cluster
+
+    def _band_keys(self, exc_type, minhash):
+        rows = self.rows
+        return [(exc_type, band, minhash[band * rows:(band + 1) * rows])
+                for band in range(self.bands)]
+
+    def _cluster_for(self, sig, traceback, normalized):
+        exc_type = sig[0]
+        if self.threshold is None:
+            cluster = TracebackCluster(exc_type, traceback, None)
+            self.clusters.append(cluster)
+            return cluster
+        minhash = self.hasher.minhash(normalized)
+        keys = self._band_keys(exc_type, minhash)
+        best, best_similarity = None, self.threshold
+        seen = set()
+        for key in keys:
+            for candidate in self._buckets.get(key, ()):
+                if id(candidate) in seen:
+                    continue
+                seen.add(id(candidate))
+                similarity = MinHasher.similarity(minhash, candidate.minhash)
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+        if best is not None:
+            return best
+        cluster = TracebackCluster(exc_type, traceback, minhash)
+        self.clusters.append(cluster)
+        # Only the first traceback of a cluster represents it in the buckets
+        for key in keys:
+            self._buckets.setdefault(key, []).append(cluster)
+        return cluster
+
+    def top(self, count=None):
+        """Returns the ``count`` biggest clusters, biggest first, ties in order of appearance"""
+        clusters = sorted(self.clusters, key=len, reverse=True)
+        return clusters if count is None else clusters[:count]
+
+
+def cluster_tracebacks(entries, count=None, **kwargs):
+    """Clusters ``(traceback, item)`` pairs, returns the ``count`` biggest clusters
+
+    Keyword arguments are passed to :py:class:`TracebackClusterer`.
+    """
+    clusterer = TracebackClusterer(**kwargs)
+    for traceback, item in entries:
+        clusterer.add(traceback, item)
+    return clusterer.top(count)
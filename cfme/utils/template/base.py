@@ -1,5 +1,4 @@
 from contextlib import closing
-from subprocess import check_call, CalledProcessError
 from threading import Lock
 
 from cached_property import cached_property
@@ -15,12 +14,12 @@ from cfme.containers.provider.openshift import OpenshiftProvider
 from cfme.infrastructure.provider.rhevm import RHEVMProvider
 from cfme.infrastructure.provider.virtualcenter import VMwareProvider
 from cfme.infrastructure.provider.scvmm import SCVMMProvider
-from cfme.utils.path import project_path
 from cfme.utils import trackerbot
 from cfme.utils.conf import cfme_data, credentials
 from cfme.utils.log import logger
 from cfme.utils.providers import get_mgmt
 from cfme.utils.ssh import SSHClient
+from cfme.utils.template.image_cache import ImageCacheError, image_cache
 
 NUM_OF_TRIES = 3
 lock = Lock()
@@ -86,6 +85,7 @@ class ProviderTemplateUpload(object):
         self.template_name = template_name
         self.glance_key = kwargs.get('glance_key')  # available for multiple provider type
         self.image_url = image_url  # TODO default
+        self._local_file_path = None
 
     @property
     def stream_url(self):
@@ -139,7 +139,9 @@ class ProviderTemplateUpload(object):
 
     @property
     def local_file_path(self):
-        return project_path.join(self.image_name).strpath
+        """ Returns path of the image in the shared image cache, ``None`` until
+        :py:meth:`download_image` succeeded."""
+        return self._local_file_path
 
     @property
     def mgmt(self):
@@ -233,23 +235,15 @@ class ProviderTemplateUpload(object):
 
     @log_wrap("download image locally")
     def download_image(self):
-        # Check if file exists already:
-        try:
-            check_call(['ls', self.local_file_path])
-        except CalledProcessError:
-            pass
-        else:
-            logger.info('Local image found, skipping download: %s', self.local_file_path)
-            return True
+        """ Makes sure the image is in the local image cache, verified against its checksum.
 
-        # Download file to cli-tool-client
+        The cache is shared by all uploaders of the process, so concurrent uploads of the same
+        image to several providers download it only once.
+        """
         try:
-            check_call(['curl',
-                        '--output',
-                        self.local_file_path,
-                        self.raw_image_url])
-        except CalledProcessError:
-            logger.exception('Failed download of image using curl')
+            self._local_file_path = image_cache.fetch(self.raw_image_url)
+        except ImageCacheError:
+            logger.exception('Failed download of image')
             return False
         else:
             return True
@@ -1,4 +1,3 @@
-import os
 import re
 
 from cfme.utils.log import logger
@@ -17,7 +16,7 @@ class EC2TemplateUpload(ProviderTemplateUpload):
 
     @property
     def file_path(self):
-        return os.path.abspath(self.image_name)
+        return self.local_file_path
 
     @log_wrap("create bucket")
     def create_bucket(self):
@@ -86,7 +85,5 @@ class EC2TemplateUpload(ProviderTemplateUpload):
     def teardown(self):
         self.mgmt.delete_objects_from_s3_bucket(bucket_name=self.bucket_name,
                                                 object_keys=[self.template_name])
-        if os.path.exists(self.file_path):
-            os.remove(self.file_path)
-
+        # the image stays in the shared image cache for the other uploads
         return True
@@ -1,5 +1,4 @@
 import re
-from subprocess import check_call
 
 from cached_property import cached_property
 
@@ -27,18 +26,6 @@ class GoogleCloudTemplateUpload(ProviderTemplateUpload):
         }
         return creds
 
-    @log_wrap("download image locally")
-    def download_image(self):
-        # Check if file exists already:
-        if check_call('ls', self.local_file_path) == 0:
-            logger.info('Local image found, skipping download: %s', self.local_file_path)
-            return True
-
-        # Download file to cli-tool-client
-        return check_call('curl',
-                          '--output {}'.format(self.local_file_path),
-                          self.raw_image_url) == 0
-
     @log_wrap("create bucket on GCE")
     def create_bucket(self):
         if not self.mgmt.bucket_exists(self.bucket_name):
@@ -66,7 +53,8 @@ class GoogleCloudTemplateUpload(ProviderTemplateUpload):
         return True
 
     def run(self):
-        self.download_image()
+        if not self.download_image():
+            return False
         self.create_bucket()
         self.upload_image()
         self.create_template()
@@ -0,0 +1,225 @@
+"""Content addressed cache of the appliance images downloaded for template uploads
+
+Images are stored under their SHA256 checksum, as listed in the ``SHA256SUM`` file of the build
+directory (the same file the template names are derived from), so an image is downloaded once
+and then reused by every provider upload needing it, even by subsequent runs. Downloads are
+verified against the checksum before they become visible in the cache.
+
+Images not listed in a checksum file are stored under a hash of their URL instead. As the content
+behind a URL can change, these are revalidated before being reused: with the ``ETag`` and
+``Last-Modified`` headers of the download when the server sent them, otherwise they are
+downloaded again once older than ``url_ttl``.
+
+Usage:
+
+.. code-block:: python
+
+    path = image_cache.fetch('http://hostname/builds/cfme/5.9/stable/cfme-gce-5.9.x86_64.tar.gz')
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path
+
+#: Name of the checksum file in the build directories
+CHECKSUM_FILE = 'SHA256SUM'
+#: Size of the chunks read from the network and hashed
+CHUNK_SIZE = 4 * 1024 * 1024
+#: Seconds images without checksum nor validators are reused for
+URL_TTL = 24 * 3600
+#: File next to the images without checksum, holding the validators of their download
+VALIDATORS_FILE = '.validators.json'
+
+# "<sha256>  <file>" (sha256sum) or "SHA256 (<file>) = <sha256>" (BSD style)
+_GNU_LINE = re.compile(r'^(?P<checksum>[0-9a-fA-F]{64})\s+\*?(?P<name>\S+)\s*$')
+_BSD_LINE = re.compile(r'^SHA256 \((?P<name>[^)]+)\) = (?P<checksum>[0-9a-fA-F]{64})\s*$')
+
+
+class ImageCacheError(Exception):
+    """Raised when an image can't be downloaded or does not match its checksum"""
+    pass
+
+
+def parse_checksums(text):
+    """Returns a dict of file name -> lowercase SHA256 from the content of a checksum file"""
+    checksums = {}
+    for line in text.splitlines():
+        match = _GNU_LINE.match(line.strip()) or _BSD_LINE.match(line.strip())
+        if match:
+            checksums[os.path.basename(match.group('name'))] = match.group('checksum').lower()
+    return checksums
+
+
+class ImageCache(object):
+    """Images downloaded from build directories, keyed by their checksum
+
+    Args:
+        root: directory of the cache, ``.cache/images`` in the project by default
+        url_ttl: seconds images without checksum are reused for when they can't be revalidated
+    """
+    def __init__(self, root=None, url_ttl=URL_TTL):
+        self.root = root or cache_path.join('images').strpath
+        self.url_ttl = url_ttl
+        self._checksums = {}
+        self._lock = threading.Lock()
+        self._image_locks = {}
+
+    def checksums(self, directory_url):
+        """Returns the checksums of the files of a build directory, fetched once per directory
+
+        Failed fetches are not remembered, the next call tries again.
+        """
+        directory_url = directory_url.rstrip('/') + '/'
+        with self._lock:
+            if directory_url in self._checksums:
+                return self._checksums[directory_url]
+        try:
+            response = requests.get(directory_url + CHECKSUM_FILE, timeout=60)
+            response.raise_for_status()
+            checksums = parse_checksums(response.text)
+        except requests.RequestException as e:
+            logger.warning('No checksum file in %s: %s', directory_url, e)
+            return {}
+        with self._lock:
+            self._checksums[directory_url] = checksums
+        return checksums
+
+    def checksum(self, image_url):
+        """Returns the expected checksum of an image, ``None`` if the build does not list it"""
+        directory_url, image_name = image_url.rsplit('/', 1)
+        return self.checksums(directory_url).get(image_name)
+
+    def key(self, image_url, checksum=None):
+        """Returns the cache key of an image: its checksum, or a hash of the URL without one"""
+        checksum = checksum or self.checksum(image_url)
+        if checksum:
+            return checksum
+        return 'url-{}'.format(hashlib.sha256(image_url.encode('utf-8')).hexdigest())
+
+    def local_path(self, image_url, checksum=None):
+        """Returns the path the image has (or will have) in the cache
+
+        The file keeps the name of the image, as some tools care about the extension.
+        """
+        key = self.key(image_url, checksum)
+        return os.path.join(self.root, key[:2], key, image_url.rsplit('/', 1)[-1])
+
+    def _image_lock(self, path):
+        with self._lock:
+            return self._image_locks.setdefault(path, threading.Lock())
+
+    def fetch(self, image_url):
+        """Returns the local path of the image, downloading and verifying it if not cached
+
+        Concurrent calls for the same image wait for a single download.
+
+        Raises:
+            ImageCacheError: if the download fails or the checksum does not match
+        """
+        checksum = self.checksum(image_url)
+        path = self.local_path(image_url, checksum)
+        with self._image_lock(path):
+            if os.path.exists(path) and (checksum is not None or self._valid(image_url, path)):
+                logger.info('Image %s found in the cache: %s', image_url, path)
+                os.utime(path, None)
+                return path
+            self._download(image_url, path, checksum)
+        return path
+
+    def _valid(self, image_url, path):
+        """Whether the cached image without checksum is still the content of its URL"""
+        validators_file = os.path.join(os.path.dirname(path), VALIDATORS_FILE)
+        try:
+            with open(validators_file) as f:
+                validators = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        # the image is touched whenever it is reused, the download time is kept aside
+        downloaded = validators.pop('downloaded', 0)
+        if not validators.get('etag') and not validators.get('last_modified'):
+            return time.time() - downloaded < self.url_ttl
+        try:
+            response = requests.head(image_url, allow_redirects=True, timeout=60)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning('Could not revalidate %s, using the cached image: %s', image_url, e)
+            return True
+        if _validators(response) != validators:
+            logger.info('Image %s changed since it was downloaded', image_url)
+            return False
+        return True
+
+    def _download(self, image_url, path, checksum):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        logger.info('Downloading %s to %s', image_url, path)
+        started = time.time()
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                response = requests.get(image_url, stream=True, timeout=60)
+                try:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+                finally:
+                    response.close()
+            if checksum is None:
+                logger.warning('No checksum listed for %s, not verified', image_url)
+            elif digest.hexdigest() != checksum:
+                raise ImageCacheError('Checksum mismatch for {}: expected {}, got {}'.format(
+                    image_url, checksum, digest.hexdigest()))
+            os.rename(tmp_path, path)
+            if checksum is None:
+                validators = _validators(response)
+                validators['downloaded'] = time.time()
+                with open(os.path.join(directory, VALIDATORS_FILE), 'w') as f:
+                    json.dump(validators, f)
+        except requests.RequestException as e:
+            raise ImageCacheError('Failed to download {}: {}'.format(image_url, e))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info('Downloaded %s (%d MB) in %.0fs', image_url,
+                    os.path.getsize(path) // (1024 * 1024), time.time() - started)
+
+    def prune(self, keep=3):
+        """Removes all but the ``keep`` most recently used images"""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry = os.path.join(prefix_dir, key)
+                paths = [entry] + [os.path.join(entry, name) for name in os.listdir(entry)]
+                entries.append((max(os.path.getmtime(path) for path in paths), entry))
+        entries.sort(reverse=True)
+        removed = [entry for _, entry in entries[keep:]]
+        for entry in removed:
+            logger.info('Removing %s from the image cache', entry)
+            shutil.rmtree(entry, ignore_errors=True)
+        return removed
+
+
+def _validators(response):
+    return {'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')}
+
+
+#: Cache shared by all the uploaders of a process
+image_cache = ImageCache()
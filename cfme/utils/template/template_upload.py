@@ -2,31 +2,14 @@
 
 import argparse
 import sys
-from threading import Thread
 
 from miq_version import TemplateName
 
 from cfme.utils.conf import cfme_data
 from cfme.utils.log import logger, add_stdout_handler
-from cfme.utils.providers import list_provider_keys
 from cfme.utils.template.base import TemplateUploadException, PROVIDER_TYPES, ALL_STREAMS
-from cfme.utils.template.ec2 import EC2TemplateUpload
-from cfme.utils.template.gce import GoogleCloudTemplateUpload
-from cfme.utils.template.openstack import OpenstackTemplateUpload
-from cfme.utils.template.rhevm import RHEVMTemplateUpload
-from cfme.utils.template.scvmm import SCVMMTemplateUpload
-from cfme.utils.template.virtualcenter import VMWareTemplateUpload
-from cfme.utils.template.rhopenshift import OpenshiftTemplateUpload
-
-CLASS_MAP = {
-    'openstack': OpenstackTemplateUpload,
-    'virtualcenter': VMWareTemplateUpload,
-    'scvmm': SCVMMTemplateUpload,
-    'gce': GoogleCloudTemplateUpload,
-    'ec2': EC2TemplateUpload,
-    'openshift': OpenshiftTemplateUpload,
-    'rhevm': RHEVMTemplateUpload
-}
+from cfme.utils.template.image_cache import image_cache
+from cfme.utils.template.upload_runner import build_uploaders, report, run_uploads
 
 add_stdout_handler(logger)
 
@@ -68,6 +51,13 @@ def parse_cmd_line():
         dest='print_name_only',
         action="store_true",
         help='Only print the template name that will be generated without actually running it.')
+    parser.add_argument(
+        '--max-workers',
+        dest='max_workers',
+        type=int,
+        default=8,
+        help='Number of uploads running at the same time, per provider type limits are read '
+             'from cfme_data.template_upload.concurrency')
 
     return parser.parse_known_args()
 
@@ -126,41 +116,16 @@ if __name__ == '__main__':
         logger.error('Template upload for %r is not implemented yet.', provider_type)
         sys.exit(1)
 
-    thread_queue = []
-
-    # threaded loop
-    for provider_type in provider_types:
-        provider_keys = list_provider_keys(provider_type)
-        if cmd_args.provider:
-            provider_keys = filter(lambda x: x in provider_keys, cmd_args.provider)
-
-        for provider_key in provider_keys:
-            if provider_key not in list_provider_keys(provider_type):
-                continue
-
-            # pulling class by provider type
-            provider_template_upload = (cfme_data.management_systems[provider_key]
-                                        .get('template_upload', {}))
-            uploader = CLASS_MAP[provider_type](
-                provider_key=provider_key,
-                stream=stream,
-                template_name=template_name,
-                image_url=image_url,
-                cmd_line_args=specific_args,
-                glance_key=cmd_args.glance_key or provider_template_upload.get('glance_key'))
-
-            if uploader.template_upload_data.get('block_upload', True):
-                logger.info("%s:%s Skipped due to block upload.", uploader.log_name, provider_key)
-                continue
-
-            thread = Thread(target=uploader.main)
-            thread.daemon = True
-            thread_queue.append(thread)
-            thread.start()
-
-    if not thread_queue:
+    uploaders = build_uploaders(
+        provider_types, stream, template_name, image_url,
+        provider_keys=cmd_args.provider,
+        glance_key=cmd_args.glance_key,
+        cmd_line_args=specific_args)
+
+    if not uploaders:
         logger.error('No providers or types matched, check arguments')
         sys.exit(1)
 
-    for thread in thread_queue:
-        thread.join()
+    results = run_uploads(uploaders, max_workers=cmd_args.max_workers)
+    image_cache.prune(keep=cfme_data.get('template_upload', {}).get('image_cache_keep', 3))
+    sys.exit(0 if report(results) else 1)
@@ -0,0 +1,156 @@
+"""Concurrent execution of template uploads to multiple providers
+
+Every upload runs in its own worker, bounded by a global number of workers and by a limit per
+provider type (uploads of one type often share infrastructure, like a glance server or a tool
+client). Limits default to :py:data:`DEFAULT_TYPE_LIMITS`, overridden by
+``cfme_data.template_upload.concurrency``:
+
+.. code-block:: yaml
+
+    template_upload:
+        concurrency:
+            scvmm: 1
+            rhevm: 3
+"""
+import threading
+import time
+from collections import namedtuple
+from concurrent import futures
+
+from cfme.utils.conf import cfme_data
+from cfme.utils.log import logger
+from cfme.utils.providers import list_provider_keys
+from cfme.utils.template.ec2 import EC2TemplateUpload
+from cfme.utils.template.gce import GoogleCloudTemplateUpload
+from cfme.utils.template.openstack import OpenstackTemplateUpload
+from cfme.utils.template.rhevm import RHEVMTemplateUpload
+from cfme.utils.template.rhopenshift import OpenshiftTemplateUpload
+from cfme.utils.template.scvmm import SCVMMTemplateUpload
+from cfme.utils.template.virtualcenter import VMWareTemplateUpload
+
+CLASS_MAP = {
+    'openstack': OpenstackTemplateUpload,
+    'virtualcenter': VMWareTemplateUpload,
+    'scvmm': SCVMMTemplateUpload,
+    'gce': GoogleCloudTemplateUpload,
+    'ec2': EC2TemplateUpload,
+    'openshift': OpenshiftTemplateUpload,
+    'rhevm': RHEVMTemplateUpload
+}
+
+#: Concurrent uploads per provider type when not configured
+DEFAULT_TYPE_LIMITS = {
+    'ec2': 2,
+    'gce': 2,
+    'openshift': 2,
+    'openstack': 2,
+    'rhevm': 2,
+    'scvmm': 1,
+    'virtualcenter': 2,
+}
+
+UploadResult = namedtuple(
+    'UploadResult', ['provider_key', 'provider_type', 'template_name', 'success', 'duration',
+                     'error'])
+
+
+def type_limits():
+    """Returns the per provider type limits, defaults updated from cfme_data"""
+    limits = dict(DEFAULT_TYPE_LIMITS)
+    limits.update(cfme_data.get('template_upload', {}).get('concurrency', {}))
+    return limits
+
+
+def build_uploaders(provider_types, stream, template_name, image_url, provider_keys=None,
+                    glance_key=None, cmd_line_args=None):
+    """Returns an uploader for every provider of the given types not blocking uploads
+
+    Args:
+        provider_types: provider types (keys of :py:data:`CLASS_MAP`)
+        stream: name of the stream
+        template_name: name of the template, a string or a callable taking the provider type
+        image_url: URL of the image directory of the stream
+        provider_keys: if passed, only providers in this list are included
+        glance_key: key of the glance server in cfme_data.template_upload, defaults to the
+            ``glance_key`` of the provider
+        cmd_line_args: extra command line arguments passed to the uploaders
+    """
+    uploaders = []
+    for provider_type in provider_types:
+        name = template_name(provider_type) if callable(template_name) else template_name
+        for provider_key in list_provider_keys(provider_type):
+            if provider_keys is not None and provider_key not in provider_keys:
+                continue
+            provider_template_upload = (cfme_data.management_systems[provider_key]
+                                        .get('template_upload', {}))
+            uploader = CLASS_MAP[provider_type](
+                provider_key=provider_key,
+                stream=stream,
+                template_name=name,
+                image_url=image_url,
+                cmd_line_args=cmd_line_args,
+                glance_key=glance_key or provider_template_upload.get('glance_key'))
+
+            if uploader.template_upload_data.get('block_upload', True):
+                logger.info("%s:%s Skipped due to block upload.", uploader.log_name, provider_key)
+                continue
+            uploaders.append(uploader)
+    return uploaders
+
+
+def run_uploads(uploaders, max_workers=8, limits=None, default_limit=2):
+    """Runs ``main`` of all the uploaders concurrently, returns a list of :py:class:`UploadResult`
+
+    Args:
+        uploaders: :py:class:`cfme.utils.template.base.ProviderTemplateUpload` instances
+        max_workers: uploads running at the same time, overall
+        limits: dict of provider type -> uploads of that type running at the same time,
+            :py:func:`type_limits` by default
+        default_limit: limit of the types missing in ``limits``
+    """
+    limits = type_limits() if limits is None else limits
+    semaphores = {}
+    for uploader in uploaders:
+        if uploader.provider_type not in semaphores:
+            semaphores[uploader.provider_type] = threading.BoundedSemaphore(
+                limits.get(uploader.provider_type, default_limit))
+
+    def upload(uploader):
+        with semaphores[uploader.provider_type]:
+            started = time.time()
+            error = None
+            try:
+                success = bool(uploader.main())
+            except Exception as e:  # noqa
+                logger.exception('%s:%s Upload failed', uploader.log_name, uploader.provider_key)
+                success, error = False, '{}: {}'.format(type(e).__name__, e)
+            return UploadResult(
+                uploader.provider_key, uploader.provider_type, uploader.template_name, success,
+                time.time() - started, error)
+
+    results = []
+    if not uploaders:
+        return results
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = [executor.submit(upload, uploader) for uploader in uploaders]
+        for future in futures.as_completed(pending):
+            result = future.result()
+            results.append(result)
+            logger.info('[%d/%d] %s:%s %s in %.0fs', len(results), len(uploaders),
+                        result.provider_type, result.provider_key,
+                        'finished' if result.success else 'FAILED', result.duration)
+    return results
+
+
+def report(results):
+    """Logs a summary table of the uploads, returns True if all succeeded"""
+    logger.info('Template upload results:')
+    for result in sorted(results, key=lambda r: (r.success, r.provider_type, r.provider_key)):
+        logger.info('  %-6s %-14s %-30s %-40s %6.0fs %s',
+                    'OK' if result.success else 'FAILED', result.provider_type,
+                    result.provider_key, result.template_name, result.duration,
+                    result.error or '')
+    failed = [result for result in results if not result.success]
+    logger.info('%d uploads, %d succeeded, %d failed',
+                len(results), len(results) - len(failed), len(failed))
+    return not failed
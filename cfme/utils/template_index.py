@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""Local, per-provider index of the templates tracked in trackerbot
+
+Instead of depaginating the whole providertemplate table up front, templates are pulled per
+provider the first time they are needed. The results are kept in a versioned JSON store under
+:py:data:`cfme.utils.path.cache_path`, so the parallelizer master can sync the providers used by
+the collected tests once and the slaves only read the file.
+
+Stale providers are refreshed incrementally: only provider templates whose template datestamp is
+not older than the newest one already known are requested. Trackerbot does not record when a
+provider template was added or removed, so the refresh also asks for the number of templates of
+the provider; when it does not match the refreshed entry (a template was removed, or one with an
+older datestamp was uploaded), the provider is fully resynced. A full resync is also done once the
+entry exceeds ``full_sync_age``.
+"""
+import json
+import os
+import time
+from tempfile import NamedTemporaryFile
+
+from cfme.utils import trackerbot
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path
+
+#: Bump when the layout of the store changes, older stores are then discarded
+INDEX_VERSION = 1
+
+#: Default location of the template index store
+index_file = cache_path.join('trackerbot_templates.json')
+
+
+class TemplateIndex(object):
+    """Lazily populated mapping of provider key to the list of its template names
+
+    Args:
+        api: trackerbot api object, created on first use if not passed
+        path: :py:class:`py.path.local` of the JSON store (default :py:data:`index_file`)
+        max_age: seconds after which an entry is refreshed incrementally, ``None`` means entries
+            never expire (e.g. when ``--use-template-cache`` is passed)
+        full_sync_age: seconds after which an entry is discarded and fully resynced
+    """
+    def __init__(self, api=None, path=None, max_age=3600, full_sync_age=24 * 3600):
+        self._api = api
+        self.path = path or index_file
+        self.max_age = max_age
+        self.full_sync_age = full_sync_age
+        self._providers = None
+
+    @property
+    def api(self):
+        if self._api is None:
+            self._api = trackerbot.api()
+        return self._api
+
+    @property
+    def url(self):
+        return trackerbot.conf.get('url')
+
+    def _load(self):
+        if self._providers is not None:
+            return self._providers
+        self._providers = {}
+        if self.path.check(file=True):
+            try:
+                with self.path.open('r') as f:
+                    data = json.load(f)
+            except (IOError, ValueError) as e:
+                logger.warning('Ignoring unreadable template index %s: %s', self.path, e)
+            else:
+                if data.get('version') == INDEX_VERSION and data.get('url') == self.url:
+                    self._providers = data.get('providers', {})
+        return self._providers
+
+    def reload(self):
+        """Drops the in-memory state so the next access re-reads the store"""
+        self._providers = None
+
+    def save(self):
+        """Atomically writes the index to :py:attr:`path`
+
+        Entries written meanwhile by other processes are kept unless ours are newer.
+        """
+        providers = self._load()
+        self._providers = None
+        on_disk = self._load()
+        for provider_key, entry in providers.items():
+            if entry['synced'] >= on_disk.get(provider_key, {}).get('synced', 0):
+                on_disk[provider_key] = entry
+        data = {'version': INDEX_VERSION, 'url': self.url, 'providers': on_disk}
+        self.path.dirpath().ensure(dir=True)
+        with NamedTemporaryFile('w', dir=str(self.path.dirpath()), delete=False) as f:
+            json.dump(data, f)
+        os.rename(f.name, str(self.path))
+
+    def _fetch(self, provider_key, since=None):
+        params = {'provider': provider_key}
+        if since is not None:
+            params['template__datestamp__gte'] = since
+        result = trackerbot.depaginate(self.api, self.api.providertemplate.get(**params))
+        return result['objects']
+
+    def _count(self, provider_key):
+        result = self.api.providertemplate.get(provider=provider_key, limit=1)
+        return result['meta']['total_count']
+
+    def _refresh(self, provider_key, entry):
+        """Adds the templates uploaded since the entry was synced
+
+        Returns:
+            ``False`` if the entry does not match trackerbot anymore and needs a full resync
+        """
+        refreshed = dict(entry)
+        self._merge(refreshed, self._fetch(provider_key, since=entry.get('latest')))
+        count = self._count(provider_key)
+        if count != len(refreshed['templates']):
+            logger.debug('Templates of %s changed (%d known, %d in trackerbot), resyncing',
+                         provider_key, len(refreshed['templates']), count)
+            return False
+        entry.update(refreshed)
+        return True
+
+    def sync(self, provider_key, force=False):
+        """Brings the entry of one provider up to date and returns its templates
+
+        Args:
+            provider_key: key of the provider in cfme_data
+            force: fully resync even if the entry is fresh
+        """
+        providers = self._load()
+        entry = providers.get(provider_key)
+        now = time.time()
+        if entry is not None and not force:
+            age = now - entry['synced']
+            if self.max_age is None or age < self.max_age:
+                return entry['templates']
+            if age < self.full_sync_age and self._refresh(provider_key, entry):
+                entry['synced'] = now
+                return entry['templates']
+        entry = {'templates': [], 'latest': None, 'synced': now}
+        self._merge(entry, self._fetch(provider_key))
+        providers[provider_key] = entry
+        return entry['templates']
+
+    def sync_providers(self, provider_keys, force=False):
+        """Syncs several providers and persists the store once"""
+        for provider_key in provider_keys:
+            self.sync(provider_key, force=force)
+        self.save()
+
+    @staticmethod
+    def _merge(entry, provider_templates):
+        templates = set(entry['templates'])
+        latest = entry.get('latest')
+        for provider_template in provider_templates:
+            template = provider_template['template']
+            if isinstance(template, dict):
+                datestamp = template.get('datestamp')
+                template = template['name']
+                if datestamp and (latest is None or datestamp > latest):
+                    latest = datestamp
+            templates.add(template)
+        entry['templates'] = sorted(templates)
+        entry['latest'] = latest
+
+    def get(self, provider_key, default=None):
+        """Returns the templates of the provider, syncing it first if needed"""
+        try:
+            return self[provider_key]
+        except Exception as e:
+            logger.warning('Could not load templates for %s from trackerbot: %s', provider_key, e)
+            return default
+
+    def __getitem__(self, provider_key):
+        synced = self._load().get(provider_key, {}).get('synced')
+        templates = self.sync(provider_key)
+        if self._providers[provider_key]['synced'] != synced:
+            self.save()
+        return templates
+
+    def __contains__(self, provider_key):
+        return provider_key in self._load()
+
+    def __bool__(self):
+        # An index always represents trackerbot data, even before any provider was pulled
+        return True
+
+    __nonzero__ = __bool__
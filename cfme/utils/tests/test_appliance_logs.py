@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import subprocess
+
+import pytest
+
+from cfme.utils.appliance_logs import ApplianceLogCollector, local_name, slice_command
+
+
+class LocalChannel(object):
+    """Runs the command locally, like a paramiko channel would on the appliance"""
+    def settimeout(self, timeout):
+        pass
+
+    def exec_command(self, command):
+        proc = subprocess.Popen(['bash', '-c', command], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        self.stdout, self.stderr = proc.communicate()
+        self.status = proc.returncode
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data
+
+    def recv_exit_status(self):
+        return self.status
+
+    def close(self):
+        pass
+
+
+class LocalSSHClient(object):
+    is_container = False
+    is_pod = False
+    username = 'root'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return LocalChannel()
+
+
+class FakeAppliance(object):
+    hostname = '10.0.0.1'
+    ssh_client = LocalSSHClient()
+
+
+def run_slice(path, **kwargs):
+    proc = subprocess.Popen(['bash', '-c', slice_command(path, **kwargs)],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = proc.communicate()
+    assert proc.returncode == 0, stderr
+    return gzip.GzipFile(fileobj=io.BytesIO(stdout)).read(), stderr.split()
+
+
+@pytest.fixture
+def log_file(tmpdir):
+    log = tmpdir.join('evm.log')
+    log.write(''.join('line {}\n'.format(i) for i in range(10)))
+    return log
+
+
+def test_slice_command(log_file):
+    content = log_file.read_binary()
+    assert run_slice(log_file.strpath) == (content, [b'0', str(len(content)).encode()])
+    assert run_slice(log_file.strpath, offset=7)[0] == content[7:]
+    assert run_slice(log_file.strpath, max_bytes=14)[0] == b'line 8\nline 9\n'
+    assert run_slice(log_file.strpath, tail_lines=3)[0] == b'line 7\nline 8\nline 9\n'
+    # tail_lines only applies to the first collection
+    assert run_slice(log_file.strpath, offset=7, tail_lines=3)[0] == content[7:]
+    # rotated log, collected from the start again
+    assert run_slice(log_file.strpath, offset=10 ** 6)[0] == content
+
+
+def test_local_name():
+    assert local_name('/var/www/miq/vmdb/log/evm.log') == 'var_www_miq_vmdb_log_evm.log.gz'
+
+
+def test_incremental_collection(tmpdir, log_file):
+    out_dir = tmpdir.join('out').ensure(dir=True)
+    missing = tmpdir.join('missing.log').strpath
+    collector = ApplianceLogCollector(
+        [FakeAppliance()], [log_file.strpath, missing], out_dir, tail_lines=2)
+    written = collector.collect()
+    local_file = out_dir.join('10.0.0.1', local_name(log_file.strpath))
+    assert written == [local_file.strpath]
+    log_file.write('line 10\n', mode='a')
+    collector.collect()
+    # two gzip members, read back as one stream
+    with gzip.open(local_file.strpath) as f:
+        assert f.read() == b'line 8\nline 9\nline 10\n'
+    assert collector.offsets[('10.0.0.1', log_file.strpath)] == log_file.size()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+
+from cfme.utils.blob_store import BlobRef, BlobStore
+
+
+def test_put_deduplicates(tmpdir):
+    store = BlobStore(tmpdir.join('blobs'))
+    ref = store.put(b'screenshot', 'image/png')
+    assert ref == BlobRef(hashlib.sha256(b'screenshot').hexdigest(), 10, 'image/png')
+    assert ref.digest in store
+    assert store.put(b'screenshot', 'image/png') == ref
+    assert store.read(ref.digest) == b'screenshot'
+    assert os.listdir(os.path.dirname(store.path(ref.digest))) == [ref.digest]
+
+
+def test_put_text(tmpdir):
+    store = BlobStore(tmpdir)
+    ref = store.put(u'Traceback – end', 'text/plain')
+    assert store.read(ref.digest) == u'Traceback – end'.encode('utf-8')
+    assert ref.size == len(u'Traceback – end'.encode('utf-8'))
+
+
+def test_link(tmpdir):
+    store = BlobStore(tmpdir.join('blobs'))
+    ref = store.put(b'traceback')
+    target = tmpdir.join('test-traceback.log')
+    target.write('old')
+    store.link(ref.digest, target.strpath)
+    assert target.read_binary() == b'traceback'
+
+
+def test_put_readable(tmpdir):
+    store = BlobStore(tmpdir.join('blobs'))
+    ref = store.put(b'screenshot', 'image/png')
+    assert os.stat(store.path(ref.digest)).st_mode & 0o777 == 0o644
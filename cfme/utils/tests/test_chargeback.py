@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, Float, Integer, String, create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from cfme.utils.chargeback import (
+    costs_from_tiers, expected_costs, has_rollups, rollup_usage, rollups_usage, tier_cost,
+    usage_from_rows)
+
+Base = declarative_base()
+
+
+class ExtManagementSystem(Base):
+    __tablename__ = 'ext_management_systems'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class MetricRollup(Base):
+    __tablename__ = 'metric_rollups'
+    id = Column(Integer, primary_key=True)
+    parent_ems_id = Column(Integer)
+    resource_name = Column(String)
+    capture_interval_name = Column(String)
+    timestamp = Column(DateTime)
+    cpu_usagemhz_rate_average = Column(Float)
+    cpu_usage_rate_average = Column(Float)
+    derived_memory_used = Column(Float)
+    net_usage_rate_average = Column(Float)
+    disk_usage_rate_average = Column(Float)
+    derived_vm_used_disk_storage = Column(Float)
+
+
+class ChargebackRate(Base):
+    __tablename__ = 'chargeback_rates'
+    id = Column(Integer, primary_key=True)
+    description = Column(String)
+    rate_type = Column(String)
+
+
+class ChargebackRateDetail(Base):
+    __tablename__ = 'chargeback_rate_details'
+    id = Column(Integer, primary_key=True)
+    chargeback_rate_id = Column(Integer)
+    description = Column(String)
+
+
+class ChargebackTier(Base):
+    __tablename__ = 'chargeback_tiers'
+    id = Column(Integer, primary_key=True)
+    chargeback_rate_detail_id = Column(Integer)
+    start = Column(Float)
+    finish = Column(Float)
+    variable_rate = Column(Float)
+    fixed_rate = Column(Float)
+
+
+class SqliteDb(object):
+    """In-memory database with the tables the engine queries, accessed like a Db"""
+    def __init__(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+    def reflect_tables(self, table_names):
+        assert set(table_names) <= set(Base.metadata.tables)
+
+    def __getitem__(self, table_name):
+        for table in Base.__subclasses__():
+            if table.__tablename__ == table_name:
+                return table
+        raise KeyError(table_name)
+
+
+ROLLUPS = [
+    # vm, interval, cpu mhz, cpu %, memory, net, disk, storage
+    ('vm1', 'hourly', 100.0, 10.0, 512.0, 1.0, 2.0, 2.0 ** 30),
+    ('vm1', 'hourly', 200.0, 20.0, 256.0, 3.0, 4.0, 2.0 ** 30),
+    ('vm1', 'hourly', 0.0, 0.0, 0.0, 0.0, 0.0, None),
+    ('vm1', 'daily', 1000.0, 10.0, 512.0, 1.0, 2.0, 2.0 ** 30),
+    ('vm2', 'hourly', None, 5.0, 128.0, None, 1.0, None),
+]
+
+
+@pytest.fixture
+def db():
+    db = SqliteDb()
+    db.session.add(ExtManagementSystem(id=1, name='vsphere'))
+    for i, (vm, interval, cpu, cpu_percent, memory, net, disk, storage) in enumerate(ROLLUPS):
+        db.session.add(MetricRollup(
+            id=i, parent_ems_id=1, resource_name=vm, capture_interval_name=interval,
+            timestamp=datetime(2018, 1, 1, i), cpu_usagemhz_rate_average=cpu,
+            cpu_usage_rate_average=cpu_percent, derived_memory_used=memory,
+            net_usage_rate_average=net, disk_usage_rate_average=disk,
+            derived_vm_used_disk_storage=storage))
+    db.session.add(ChargebackRate(id=1, description='Default', rate_type='Compute'))
+    db.session.add(ChargebackRate(id=2, description='Default', rate_type='Storage'))
+    db.session.add(ChargebackRateDetail(id=1, chargeback_rate_id=1, description='Used CPU'))
+    db.session.add(ChargebackRateDetail(id=2, chargeback_rate_id=2,
+                                        description='Used Disk Storage'))
+    db.session.add(ChargebackTier(id=1, chargeback_rate_detail_id=1, start=0, finish=250,
+                                  variable_rate=0.5, fixed_rate=1))
+    db.session.add(ChargebackTier(id=2, chargeback_rate_detail_id=1, start=250,
+                                  finish=float('inf'), variable_rate=0.1, fixed_rate=2))
+    db.session.add(ChargebackTier(id=3, chargeback_rate_detail_id=2, start=0,
+                                  finish=float('inf'), variable_rate=3, fixed_rate=0))
+    db.session.commit()
+    return db
+
+
+def test_usage_matches_rows(db):
+    since = datetime(2018, 1, 1)
+    usage = rollup_usage(db, 'vsphere', 'vm1', since)
+    rows = [row for row in db.session.query(MetricRollup)
+            if row.resource_name == 'vm1' and row.capture_interval_name == 'hourly']
+    assert usage == usage_from_rows(rows)
+    assert usage == {
+        'average_cpu_used_in_mhz': 300.0,
+        'average_memory_used_in_mb': 768.0,
+        'average_network_io': 4.0,
+        'average_disk_io': 6.0,
+        'average_storage_used': 2.0,
+        'consumed_hours': 3,
+    }
+
+
+def test_usage_grouped(db):
+    usage = rollups_usage(db, 'vsphere', ['vm1', 'vm2', 'vm3'], datetime(2018, 1, 1))
+    assert sorted(usage) == ['vm1', 'vm2']
+    assert usage['vm2']['average_cpu_used_in_mhz'] == 0
+    assert usage['vm2']['average_memory_used_in_mb'] == 128.0
+    # filtered by interval, provider and timestamp
+    assert rollup_usage(db, 'vsphere', 'vm1', datetime(2018, 1, 1), 'daily')[
+        'average_cpu_used_in_mhz'] == 1000.0
+    assert rollup_usage(db, 'other', 'vm1', datetime(2018, 1, 1))['consumed_hours'] == 0
+    assert rollup_usage(db, 'vsphere', 'vm1', datetime(2018, 1, 1, 1))['consumed_hours'] == 2
+
+
+def test_has_rollups(db):
+    assert has_rollups(db, 'vsphere', 'vm1', datetime(2018, 1, 1))
+    assert not has_rollups(db, 'vsphere', 'vm1', datetime(2018, 1, 1, 2))
+    assert not has_rollups(db, 'vsphere', 'vm3', datetime(2018, 1, 1))
+
+
+def test_expected_costs(db):
+    usage = rollup_usage(db, 'vsphere', 'vm1', datetime(2018, 1, 1))
+    costs = expected_costs(db, usage, 'Default')
+    # 300 MHz is in the second tier
+    assert costs['cpu_used_cost'] == 0.1 * 300 + 2 * 3
+    assert costs['storage_used_cost'] == 3 * 2.0
+    # no rate detail for memory
+    assert costs['memory_used_cost'] is None
+    assert expected_costs(db, usage, 'Other') == costs_from_tiers({}, usage)
+
+
+def test_tier_cost():
+    tiers = [{'start': 0, 'finish': 10, 'variable_rate': 2, 'fixed_rate': 1}]
+    assert tier_cost(tiers, 5, 3) == 13
+    assert tier_cost(tiers, 10, 3) is None
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+from argparse import Namespace
+
+import pytest
+
+from cfme.test_framework import collection_index as collection_index_plugin
+from cfme.utils.collection_index import (
+    CollectionIndex, context_key, file_digest, framework_digest, item_entry, match_markexpr)
+
+pytest_plugins = 'pytester'
+
+# registers the plugin with an index in the test directory, like --collection-index does
+plugin_conftest = """
+from cfme.test_framework.collection_index import CollectionIndexPlugin
+from cfme.utils.collection_index import CollectionIndex
+
+pytest_plugins = 'cfme.test_framework.collection_index'
+
+
+def pytest_configure(config):
+    index = CollectionIndex('key', root=str(config.rootdir.join('index')))
+    config.pluginmanager.register(CollectionIndexPlugin(config, index), 'collection-index')
+"""
+
+
+@pytest.fixture
+def project(tmpdir):
+    tmpdir.join('conftest.py').write('')
+    tmpdir.join('cfme', 'markers', 'uncollect.py').write('', ensure=True)
+    tmpdir.join('cfme', 'tests', 'infra', 'conftest.py').write('', ensure=True)
+    tmpdir.join('cfme', 'tests', 'infra', 'test_vm.py').write('def test_vm(): pass\n')
+    return tmpdir
+
+
+def test_match_markexpr():
+    assert match_markexpr('', [])
+    assert match_markexpr('rhv1 or rhv2', ['tier', 'rhv2'])
+    assert not match_markexpr('rhv1 and not tier', ['tier', 'rhv1'])
+
+
+def test_framework_digest(project):
+    digest = framework_digest(project)
+    assert framework_digest(project) == digest
+    project.join('cfme', 'tests', 'infra', 'conftest.py').write('import pytest\n')
+    assert framework_digest(project) != digest
+    # test modules are keyed by their own digest
+    changed = framework_digest(project)
+    project.join('cfme', 'tests', 'infra', 'test_vm.py').write('')
+    assert framework_digest(project) == changed
+
+
+def test_context_key():
+    key = context_key({'markexpr': 'tier'}, {'vsphere': {}}, '5.9.0.1', framework='f')
+    assert key == context_key({'markexpr': 'tier'}, {'vsphere': {}}, '5.9.0.1', framework='f')
+    assert key != context_key({'markexpr': ''}, {'vsphere': {}}, '5.9.0.1', framework='f')
+    assert key != context_key({'markexpr': 'tier'}, {'vsphere': {}}, '5.9.0.2', framework='f')
+    assert key != context_key({'markexpr': 'tier'}, {}, '5.9.0.1', framework='f')
+
+
+def test_index(project):
+    module = project.join('cfme', 'tests', 'infra', 'test_vm.py')
+    digest = file_digest(module)
+    index = CollectionIndex('key', root=project.join('index'))
+    assert index.has_selected('test_vm.py', digest) is None
+    index.record('test_vm.py', digest, [
+        item_entry('test_vm.py::test_vm[a]', ['tier'], {'provider': 'a'}),
+        item_entry('test_vm.py::test_vm[b]', ['tier'], {'provider': 'b'}, uncollect='no b',
+                   selected=False)])
+    index.record('test_other.py', 'other', [item_entry('test_other.py::test', selected=False)])
+    index.save()
+
+    other = CollectionIndex('key', root=project.join('index'))
+    assert other.has_selected('test_vm.py', digest)
+    assert other.has_selected('test_other.py', 'other') is False
+    assert other.has_selected('test_vm.py', 'changed') is None
+    assert [item['nodeid'] for item in other.items()] == ['test_vm.py::test_vm[a]']
+    assert other.entry('test_vm.py', digest)[1]['uncollect'] == 'no b'
+    assert CollectionIndex.latest(project.join('index')).key == 'key'
+    assert CollectionIndex.latest(project.join('missing')) is None
+
+
+class FakeConfig(object):
+    def __init__(self, plugins=None, **options):
+        self.option = Namespace(**options)
+        self.plugins = plugins or {}
+        self.pluginmanager = self
+
+    def getoption(self, name, default=None):
+        return getattr(self.option, name, default)
+
+    def get_plugin(self, name):
+        return self.plugins.get(name)
+
+
+def test_slaves_use_master_key(tmpdir, monkeypatch):
+    parallel_session = Namespace(worker_config={})
+    master = FakeConfig(plugins={'parallel_session': parallel_session},
+                        collection_index_key=None, markexpr='tier', use_sprout=True)
+    # like the parallelizer, which also starts the slaves with another appliance version
+    parallel_session.worker_config['options'] = dict(vars(master.option), use_sprout=False)
+    monkeypatch.setattr(collection_index_plugin, '_appliance_version', lambda config: None)
+    plugin = collection_index_plugin.CollectionIndexPlugin(
+        master, CollectionIndex(collection_index_plugin.index_key(master), root=tmpdir))
+    plugin.pytest_sessionstart(None)
+
+    monkeypatch.setattr(collection_index_plugin, '_appliance_version', lambda config: '5.9.0.1')
+    slave = FakeConfig(**parallel_session.worker_config['options'])
+    assert collection_index_plugin.index_key(slave) == plugin.index.key
+
+
+@pytest.fixture
+def indexed_testdir(testdir, monkeypatch):
+    monkeypatch.setattr(collection_index_plugin, 'project_path', testdir.tmpdir)
+    testdir.makeconftest(plugin_conftest)
+    testdir.makepyfile(
+        test_selected='def test_one(): pass\n',
+        test_deselected='def test_two(): pass\n')
+    return testdir
+
+
+def indexed_modules(testdir):
+    return sorted(CollectionIndex('key', root=testdir.tmpdir.join('index')).modules)
+
+
+def test_modules_without_selected_tests_skipped(indexed_testdir):
+    result = indexed_testdir.inline_run('-k', 'one')
+    result.assertoutcome(passed=1)
+    assert indexed_modules(indexed_testdir) == ['test_deselected.py', 'test_selected.py']
+
+    result = indexed_testdir.inline_run('-k', 'one')
+    result.assertoutcome(passed=1)
+    reports = result.getreports('pytest_collectreport')
+    assert 'test_deselected.py' not in [report.nodeid for report in reports]
+    assert collection_index_plugin.store.uncollection_stats[
+        'collection index (modules not imported)'] == 1
+
+
+def test_import_failure_not_indexed(indexed_testdir):
+    indexed_testdir.makepyfile(test_broken='import missing_module\n')
+    result = indexed_testdir.inline_run('-k', 'one')
+    assert len(result.getfailedcollections()) == 1
+    assert indexed_modules(indexed_testdir) == ['test_deselected.py', 'test_selected.py']
+
+    # the broken module is imported again by the next session
+    result = indexed_testdir.inline_run('-k', 'one')
+    failed, = result.getfailedcollections()
+    assert failed.nodeid == 'test_broken.py'
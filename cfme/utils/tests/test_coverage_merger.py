@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import tarfile
+
+from cfme.utils.coverage_merger import CoverageMerger, MERGED_KEY
+
+
+def resultset(key, coverage, timestamp=1):
+    return {key: {'coverage': coverage, 'timestamp': timestamp}}
+
+
+def test_merge_sums_hits():
+    merger = CoverageMerger()
+    merger.add_resultset(resultset('a-1', {'/x.rb': [None, 0, 1], '/y.rb': [2]}, 5))
+    merger.add_resultset(resultset('a-2', {'/x.rb': [None, 3, 1]}, 3))
+    result = merger.resultset[MERGED_KEY]
+    assert result['coverage'] == {'/x.rb': [None, 3, 2], '/y.rb': [2]}
+    assert result['timestamp'] == 5
+    assert merger.percent_covered() == 100.0
+
+
+def test_conflicting_file_not_merged():
+    merger = CoverageMerger()
+    merger.add_resultset(resultset('a-1', {'/x.rb': [None, 1]}), 'first')
+    merger.add_resultset(resultset('a-2', {'/x.rb': [1, 1]}), 'second')
+    merger.add_resultset(resultset('a-3', {'/x.rb': [1]}), 'third')
+    assert merger.resultset[MERGED_KEY]['coverage'] == {'/x.rb': [None, 1]}
+    assert merger.conflicts == [('second', '/x.rb'), ('third', '/x.rb')]
+
+
+def test_merge_tarball(tmpdir):
+    archive = tmpdir.join('coverage-results.tgz')
+    with tarfile.open(archive.strpath, 'w:gz') as tar:
+        for name, hits in [('coverage/1.2.3.4/10/.resultset.json', [1, 0]),
+                           ('coverage/1.2.3.4/11/.resultset.json', [0, 4])]:
+            data = json.dumps(resultset('p', {'/x.rb': {'lines': hits}})).encode('utf-8')
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    merger = CoverageMerger()
+    merger.add_tarball(archive.strpath)
+    output = tmpdir.join('merged', '.resultset.json')
+    merger.write(output.strpath)
+    assert json.load(output.open())[MERGED_KEY]['coverage'] == {'/x.rb': {'lines': [1, 4]}}
+    assert merger.percent_covered() == 100.0
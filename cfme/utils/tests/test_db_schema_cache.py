@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sqlalchemy import create_engine
+
+from cfme.utils import db as db_module
+from cfme.utils.db import Db
+
+
+@pytest.fixture
+def sqlite_file(tmpdir):
+    path = tmpdir.join('vmdb.sqlite')
+    engine = create_engine('sqlite:///{}'.format(path))
+    engine.execute('CREATE TABLE vms (id INTEGER PRIMARY KEY, name TEXT)')
+    engine.execute('CREATE TABLE hosts (id INTEGER PRIMARY KEY, name TEXT)')
+    engine.execute('CREATE TABLE schema_migrations (version TEXT)')
+    engine.execute("INSERT INTO schema_migrations VALUES ('20180101000000')")
+    return path
+
+
+@pytest.fixture
+def make_db(sqlite_file, tmpdir, monkeypatch):
+    monkeypatch.setattr(db_module, 'schema_cache_path', tmpdir.join('db_schema'))
+
+    def _make_db(version='5.9.0.1', engine=None):
+        db = Db(hostname='appliance', credentials={}, port=5432, appliance_version=version)
+        db.__dict__['engine'] = engine or create_engine('sqlite:///{}'.format(sqlite_file))
+        return db
+    return _make_db
+
+
+class FailingEngine(object):
+    """Engine of a database which must not be queried: the schema comes from the cache"""
+    def execute(self, *args, **kwargs):
+        raise AssertionError('database queried')
+
+    def __getattr__(self, name):
+        raise AssertionError('database queried')
+
+
+def test_cache_key(make_db):
+    db = make_db(version='5.9.0.1')
+    assert db.schema_cache_file.basename == '5.9.0.1-20180101000000.pickle'
+    db = make_db(version=None)
+    db.__dict__['schema_version'] = '2018/01'
+    assert db.schema_cache_file.basename == 'unknown-2018_01.pickle'
+    db.use_schema_cache = False
+    del db.__dict__['schema_cache_file']
+    assert db.schema_cache_file is None
+
+
+class LazyVersionAppliance(object):
+    """Current appliance whose version is only known once it is asked for"""
+    db = type('ApplianceDb', (object,), {'address': 'appliance'})()
+    db_port = 5432
+    version_requests = 0
+
+    @property
+    def version(self):
+        self.version_requests += 1
+        return '5.9.0.1'
+
+
+def test_version_of_current_appliance_resolved_lazily(sqlite_file, tmpdir, monkeypatch):
+    monkeypatch.setattr(db_module, 'schema_cache_path', tmpdir.join('db_schema'))
+    appliance = LazyVersionAppliance()
+    monkeypatch.setattr(db_module, 'store', type('Store', (object,), {
+        'current_appliance': appliance})())
+    db = Db(credentials={})
+    assert appliance.version_requests == 0
+    db.__dict__['engine'] = create_engine('sqlite:///{}'.format(sqlite_file))
+    assert db.schema_cache_file.basename == '5.9.0.1-20180101000000.pickle'
+    assert db.copy().appliance_version == '5.9.0.1'
+    assert appliance.version_requests == 1
+
+
+def test_reflected_tables_loaded_from_cache(make_db):
+    db = make_db()
+    db.reflect_tables(['vms', 'hosts'])
+    assert db.schema_cache_file.check(file=True)
+
+    cached = make_db(engine=FailingEngine())
+    cached.__dict__['schema_version'] = db.schema_version
+    assert sorted(cached._schema_cache['metadata'].tables) == ['hosts', 'vms']
+    # reflecting known tables does not touch the database
+    cached.reflect_tables(['vms', 'hosts'])
+    assert sorted(c.name for c in cached.metadata.tables['vms'].c) == ['id', 'name']
+
+
+def test_cache_invalidated_by_schema_version(make_db, sqlite_file):
+    db = make_db()
+    db.reflect_tables(['vms'])
+    engine = create_engine('sqlite:///{}'.format(sqlite_file))
+    engine.execute("INSERT INTO schema_migrations VALUES ('20190101000000')")
+    engine.execute('ALTER TABLE vms ADD COLUMN guid TEXT')
+
+    migrated = make_db(engine=engine)
+    assert migrated.schema_cache_file != db.schema_cache_file
+    assert 'vms' not in migrated.metadata.tables
+    migrated.reflect_tables(['vms'])
+    assert 'guid' in migrated.metadata.tables['vms'].c
+
+
+def test_unreadable_cache_ignored(make_db):
+    db = make_db()
+    db.schema_cache_file.dirpath().ensure(dir=True)
+    db.schema_cache_file.write('not a pickle')
+    assert db._schema_cache == {}
+    db.reflect_tables(['vms'])
+    assert 'vms' in make_db()._schema_cache['metadata'].tables
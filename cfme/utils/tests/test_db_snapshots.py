@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import re
+import shlex
+
+import attr
+import pytest
+
+from cfme.utils.appliance.db_snapshots import ApplianceDBSnapshotException, ApplianceDBSnapshots
+
+
+@attr.s
+class FakeResult(object):
+    rc = attr.ib()
+    output = attr.ib()
+
+    @property
+    def success(self):
+        return self.rc == 0
+
+    @property
+    def failed(self):
+        return not self.success
+
+
+class FakePostgresSSH(object):
+    """Runs the psql commands of the snapshots against a set of database names"""
+    def __init__(self, log):
+        self.databases = {'postgres': 'postgres', 'vmdb_production': 'original'}
+        self.log = log
+
+    def run_command(self, command, timeout=None):
+        sql = shlex.split(command)[-1]
+        self.log.append(sql.split(' ')[0])
+        match = re.match(r'CREATE DATABASE "(\w+)" TEMPLATE "(\w+)"', sql)
+        if match:
+            self.databases[match.group(1)] = self.databases[match.group(2)]
+            return FakeResult(0, '')
+        match = re.match(r'DROP DATABASE IF EXISTS "(\w+)"', sql)
+        if match:
+            self.databases.pop(match.group(1), None)
+            return FakeResult(0, '')
+        match = re.match(r'ALTER DATABASE "(\w+)" RENAME TO "(\w+)"', sql)
+        if match:
+            self.databases[match.group(2)] = self.databases.pop(match.group(1))
+            return FakeResult(0, '')
+        if 'pg_terminate_backend' in sql:
+            return FakeResult(0, '')
+        if sql.startswith('SELECT datname'):
+            names = [name for name in self.databases if name.startswith('vmdb_snapshot_')]
+            return FakeResult(0, '\n'.join(sorted(names)))
+        return FakeResult(1, 'unknown command')
+
+
+class FakeService(object):
+    def __init__(self, log):
+        self.running = True
+        self.log = log
+
+    def stop(self):
+        self.log.append('stop')
+        self.running = False
+
+    def start(self):
+        self.log.append('start')
+        self.running = True
+
+
+class FakeAppliance(object):
+    def __init__(self):
+        self.log = []
+        self.db = attr.make_class('FakeDB', ['ssh_client'])(FakePostgresSSH(self.log))
+        self.evmserverd = FakeService(self.log)
+
+    def wait_for_web_ui(self):
+        self.log.append('wait_for_web_ui')
+
+
+@pytest.fixture
+def appliance():
+    return FakeAppliance()
+
+
+def test_create_and_restore(appliance):
+    snapshots = ApplianceDBSnapshots(appliance)
+    databases = appliance.db.ssh_client.databases
+    snapshots.create('baseline')
+    assert snapshots.list() == ['baseline']
+    assert appliance.evmserverd.running
+    databases['vmdb_production'] = 'changed'
+    del appliance.log[:]
+    snapshots.restore('baseline')
+    assert databases['vmdb_production'] == 'original'
+    assert databases['vmdb_snapshot_baseline'] == 'original'
+    assert set(databases) == {'postgres', 'vmdb_production', 'vmdb_snapshot_baseline'}
+    # the copy is made before evmserverd is stopped, only the renames happen while it is down
+    stopped = appliance.log[appliance.log.index('stop') + 1:appliance.log.index('start')]
+    assert stopped == ['SELECT', 'ALTER', 'ALTER']
+    assert appliance.log[-2:] == ['wait_for_web_ui', 'DROP']
+
+
+def test_create_existing(appliance):
+    snapshots = ApplianceDBSnapshots(appliance)
+    snapshots.create('baseline', wait_for_web_ui=False)
+    with pytest.raises(ApplianceDBSnapshotException):
+        snapshots.create('baseline')
+    appliance.db.ssh_client.databases['vmdb_production'] = 'changed'
+    snapshots.create('baseline', replace=True)
+    assert appliance.db.ssh_client.databases['vmdb_snapshot_baseline'] == 'changed'
+    snapshots.delete('baseline')
+    assert not snapshots.exists('baseline')
+    with pytest.raises(ApplianceDBSnapshotException):
+        snapshots.restore('baseline')
+
+
+def test_invalid_name(appliance):
+    with pytest.raises(ValueError):
+        ApplianceDBSnapshots(appliance).db_name('base line"; DROP')
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+
+import pytest
+import requests
+
+from cfme.utils.template import image_cache as image_cache_module
+from cfme.utils.template.image_cache import ImageCache, ImageCacheError, parse_checksums
+
+BUILD_URL = 'http://builds.example.com/cfme/5.9/stable'
+IMAGE = b'image content' * 1000
+UNLISTED_URL = 'http://images.example.com/nightly/cfme-rhevm.qcow2'
+CHECKSUM = hashlib.sha256(IMAGE).hexdigest()
+
+
+class FakeResponse(object):
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError('{} error'.format(self.status_code))
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class Requested(list):
+    """URLs requested from the fake server, with the served files and headers to modify"""
+
+
+@pytest.fixture
+def served(monkeypatch):
+    headers = {}
+    files = {
+        BUILD_URL + '/SHA256SUM': '{}  cfme-gce.tar.gz\n{}  other.ova\n'.format(
+            CHECKSUM, 'a' * 64).encode('utf-8'),
+        BUILD_URL + '/cfme-gce.tar.gz': IMAGE,
+        BUILD_URL + '/other.ova': b'corrupted',
+        UNLISTED_URL: b'unlisted',
+    }
+    requested = Requested()
+
+    def get(url, **kwargs):
+        requested.append(url)
+        if url not in files:
+            return FakeResponse(b'', status_code=404)
+        return FakeResponse(files[url], headers=dict(headers.get(url, {})))
+
+    def head(url, **kwargs):
+        requested.append('HEAD {}'.format(url))
+        return FakeResponse(b'', headers=dict(headers.get(url, {})))
+
+    monkeypatch.setattr(image_cache_module.requests, 'get', get)
+    monkeypatch.setattr(image_cache_module.requests, 'head', head)
+    requested.files = files
+    requested.headers = headers
+    return requested
+
+
+def test_parse_checksums():
+    text = '\n'.join([
+        '{}  cfme-rhevm.ova'.format('A' * 64),
+        '{} *images/cfme-gce.tar.gz'.format('b' * 64),
+        'SHA256 (cfme-ec2.vhd) = {}'.format('c' * 64),
+        'garbage'])
+    assert parse_checksums(text) == {
+        'cfme-rhevm.ova': 'a' * 64, 'cfme-gce.tar.gz': 'b' * 64, 'cfme-ec2.vhd': 'c' * 64}
+
+
+def test_fetch_once_and_reuse(tmpdir, served):
+    cache = ImageCache(root=tmpdir.strpath)
+    path = cache.fetch(BUILD_URL + '/cfme-gce.tar.gz')
+    assert path == os.path.join(tmpdir.strpath, CHECKSUM[:2], CHECKSUM, 'cfme-gce.tar.gz')
+    with open(path, 'rb') as f:
+        assert f.read() == IMAGE
+    assert cache.fetch(BUILD_URL + '/cfme-gce.tar.gz') == path
+    # checksum file fetched once, image downloaded once
+    assert served == [BUILD_URL + '/SHA256SUM', BUILD_URL + '/cfme-gce.tar.gz']
+
+
+def test_checksum_mismatch(tmpdir, served):
+    cache = ImageCache(root=tmpdir.strpath)
+    with pytest.raises(ImageCacheError):
+        cache.fetch(BUILD_URL + '/other.ova')
+    assert not os.path.exists(cache.local_path(BUILD_URL + '/other.ova'))
+    assert not [name for _, _, names in os.walk(tmpdir.strpath) for name in names]
+
+
+def test_missing_image(tmpdir, served):
+    cache = ImageCache(root=tmpdir.strpath)
+    assert cache.key(BUILD_URL + '/missing.ova').startswith('url-')
+    with pytest.raises(ImageCacheError):
+        cache.fetch(BUILD_URL + '/missing.ova')
+
+
+def test_prune(tmpdir):
+    cache = ImageCache(root=tmpdir.strpath)
+    for i, key in enumerate(['aa11', 'bb22', 'cc33']):
+        image = tmpdir.join(key[:2], key, 'image.ova')
+        image.ensure()
+        os.utime(image.strpath, (1000 + i, 1000 + i))
+        os.utime(image.dirname, (1000 + i, 1000 + i))
+    removed = cache.prune(keep=2)
+    assert removed == [tmpdir.join('aa', 'aa11').strpath]
+    assert not tmpdir.join('aa', 'aa11').check()
+    assert tmpdir.join('cc', 'cc33', 'image.ova').check()
+
+
+def test_failed_checksum_fetch_not_cached(tmpdir, served):
+    cache = ImageCache(root=tmpdir.strpath)
+    checksums = served.files.pop(BUILD_URL + '/SHA256SUM')
+    assert cache.checksum(BUILD_URL + '/cfme-gce.tar.gz') is None
+    served.files[BUILD_URL + '/SHA256SUM'] = checksums
+    assert cache.checksum(BUILD_URL + '/cfme-gce.tar.gz') == CHECKSUM
+    assert cache.checksum(BUILD_URL + '/cfme-gce.tar.gz') == CHECKSUM
+    assert served.count(BUILD_URL + '/SHA256SUM') == 2
+
+
+def test_unlisted_image_revalidated(tmpdir, served):
+    served.headers[UNLISTED_URL] = {'ETag': '"v1"'}
+    cache = ImageCache(root=tmpdir.strpath)
+    path = cache.fetch(UNLISTED_URL)
+    assert os.path.basename(os.path.dirname(path)).startswith('url-')
+    assert cache.fetch(UNLISTED_URL) == path
+    assert served.count(UNLISTED_URL) == 1
+    assert served.count('HEAD ' + UNLISTED_URL) == 1
+
+    served.files[UNLISTED_URL] = b'rebuilt'
+    served.headers[UNLISTED_URL] = {'ETag': '"v2"'}
+    assert cache.fetch(UNLISTED_URL) == path
+    assert served.count(UNLISTED_URL) == 2
+    with open(path, 'rb') as f:
+        assert f.read() == b'rebuilt'
+
+
+@pytest.mark.parametrize('url_ttl, downloads', [(3600, 1), (0, 2)])
+def test_unlisted_image_without_validators_expires(tmpdir, served, url_ttl, downloads):
+    cache = ImageCache(root=tmpdir.strpath, url_ttl=url_ttl)
+    cache.fetch(UNLISTED_URL)
+    cache.fetch(UNLISTED_URL)
+    assert served.count(UNLISTED_URL) == downloads
+    assert served.count('HEAD ' + UNLISTED_URL) == 0
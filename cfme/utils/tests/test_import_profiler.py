@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import sys
+
+import pytest
+
+from cfme.utils.import_profiler import ImportProfiler, install_from_env
+
+
+@pytest.fixture
+def modules(tmpdir, monkeypatch):
+    package = tmpdir.mkdir('profiled_pkg')
+    package.join('__init__.py').write('')
+    package.join('leaf.py').write('import time\ntime.sleep(0.05)\n')
+    package.join('root.py').write('from . import leaf\nimport profiled_pkg.leaf\n')
+    monkeypatch.syspath_prepend(str(tmpdir))
+    yield
+    for name in list(sys.modules):
+        if name.startswith('profiled_pkg'):
+            del sys.modules[name]
+
+
+def test_cumulative_and_self_time(modules):
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        __import__('profiled_pkg.root')
+    finally:
+        profiler.uninstall()
+    rows = {row['module']: row for row in profiler.report()}
+    assert rows['profiled_pkg.root']['cumulative'] >= 0.05
+    assert rows['profiled_pkg.root']['self'] < 0.05
+    assert rows['profiled_pkg.leaf']['self'] >= 0.05
+    assert rows['profiled_pkg.leaf']['imported_by'] == 'profiled_pkg.root'
+    assert profiler.report(limit=1)[0]['module'] == 'profiled_pkg.root'
+    assert 'profiled_pkg.root' in profiler.format_report(['profiled_pkg.root'])
+
+
+def test_not_installed_without_env():
+    assert not install_from_env({})
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+
+import pytest
+
+from artifactor.plugins.incremental_reporter import DATA_DIR, ReportData, shard_name
+from scripts import reporter_benchmark
+
+
+def passed_test(**extra):
+    test = {
+        'start_time': 100, 'finish_time': 130, 'slaveid': 'gw0',
+        'statuses': {'setup': ('passed', False), 'call': ('passed', False)}}
+    test.update(extra)
+    return test
+
+
+def read_json(path):
+    with path.open() as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def artifact_dir(tmpdir):
+    return tmpdir.mkdir('artifacts')
+
+
+def test_shard_name():
+    module = 'cfme/tests/infrastructure/test_vm_power_control.py'
+    name = shard_name(module)
+    assert name == shard_name(module)
+    assert name.startswith('cfme_tests_infrastructure_test_vm_power_control.py-')
+    assert name.endswith('.json')
+    # modules only differing in characters which are replaced get their own shard
+    assert shard_name('cfme/tests/a-b.py') != shard_name('cfme/tests/a_b.py')
+    assert len(shard_name('cfme/tests/{}/test.py'.format('x' * 200))) == len('-12345678.json') + 60
+
+
+def test_shards_and_lazy_page_data(artifact_dir):
+    tb = artifact_dir.join('tb.log')
+    tb.write('AssertionError: see http://appliance/vm\n')
+    qa = artifact_dir.join('qa.csv')
+    qa.write('Jane Doe,"jdoe@example.com"\n')
+    data = ReportData()
+    data.record('cfme/tests/test_a.py', 'test_one').update(passed_test(), str(artifact_dir))
+    data.record('cfme/tests/test_a.py', 'test_two').update(passed_test(
+        statuses={'call': ('failed', False)},
+        files=[
+            {'file_type': 'short_tb', 'os_filename': tb.strpath},
+            {'file_type': 'qa_contact', 'os_filename': qa.strpath},
+            {'file_type': 'log', 'os_filename': artifact_dir.join('test.log').strpath,
+             'group_id': 'pytest', 'description': 'Log', 'display_type': 'info',
+             'display_glyph': 'align-justify'}]), str(artifact_dir) + '/')
+    data.record('cfme/tests/test_b.py', 'test_skip').update(passed_test(
+        statuses={'setup': ('skipped', False)},
+        skipped={'type': 'blocker', 'reason': ['BZ(2)', 'BZ(1)', 'BZ(2)']}), str(artifact_dir))
+    data.session = {'version': '5.9.0.1'}
+    data.flush(artifact_dir.strpath)
+
+    assert artifact_dir.join('test_report_lazy.html').check(file=True)
+    assert artifact_dir.join('dist').check(dir=True)
+    index = read_json(artifact_dir.join(DATA_DIR, 'index.json'))
+    assert index['session'] == {'version': '5.9.0.1'}
+    assert index['counts']['passed'] == 1
+    assert index['counts']['failed'] == 1
+    assert index['counts']['skipped'] == 1
+    module_a = index['modules']['cfme/tests/test_a.py']
+    assert module_a['shard'] == shard_name('cfme/tests/test_a.py')
+    assert module_a['tests'] == 2
+    assert module_a['duration'] == 60
+    assert module_a['stats']['failed'] == 1
+
+    shard = read_json(artifact_dir.join(DATA_DIR, module_a['shard']))
+    assert shard['module'] == 'cfme/tests/test_a.py'
+    one, two = shard['tests']
+    assert one == {'n': 'test_one', 'o': 'passed', 'd': 30, 's': 'gw0'}
+    assert two['o'] == 'failed'
+    assert two['tb'] == 'AssertionError: see http://appliance/vm\n'
+    assert two['u'] == ['http://appliance/vm']
+    assert two['qa'] == [['Jane Doe', 'jdoe@example.com']]
+    assert two['f'] == [['pytest', 'test.log', 'Log', 'info', 'align-justify']]
+    shard = read_json(artifact_dir.join(DATA_DIR, shard_name('cfme/tests/test_b.py')))
+    assert shard['tests'][0]['sk'] == ['blocker', ['BZ(1)', 'BZ(2)']]
+
+
+def test_incremental_updates(artifact_dir):
+    data = ReportData()
+    record = data.record('cfme/tests/test_a.py', 'test_one')
+    record.set_status('setup', 'passed', False)
+    data.record('cfme/tests/test_b.py', 'test_two').update(passed_test(), str(artifact_dir))
+    data.flush(artifact_dir.strpath)
+    assert not data.dirty
+    shard_b = artifact_dir.join(DATA_DIR, shard_name('cfme/tests/test_b.py'))
+    written = shard_b.mtime()
+    shard_b.setmtime(written - 100)
+    shard_a = artifact_dir.join(DATA_DIR, shard_name('cfme/tests/test_a.py'))
+    assert read_json(shard_a)['tests'][0]['o'] == 'passed'
+
+    # only the shards of the updated modules are written again
+    tb = artifact_dir.join('tb.log')
+    tb.write('first')
+    files = [{'file_type': 'short_tb', 'os_filename': tb.strpath}]
+    data.record('cfme/tests/test_a.py', 'test_one').update(
+        passed_test(statuses={'call': ('failed', False)}, files=files), str(artifact_dir))
+    assert data.dirty == {'cfme/tests/test_a.py'}
+    data.flush(artifact_dir.strpath)
+    assert shard_b.mtime() == written - 100
+    assert read_json(shard_a)['tests'][0]['o'] == 'failed'
+
+    # files already seen are not read again
+    tb.write('second')
+    record.update(passed_test(files=files), str(artifact_dir))
+    assert record.short_tb == 'first'
+    index = read_json(artifact_dir.join(DATA_DIR, 'index.json'))
+    assert index['counts']['failed'] == 1
+    assert index['counts']['passed'] == 1
+
+
+@pytest.mark.parametrize('legacy', [True, False], ids=['legacy', 'skip_legacy'])
+def test_benchmark(tmpdir, monkeypatch, capsys, legacy):
+    argv = ['reporter_benchmark.py', '--tests', '40', '--tests-per-module', '5',
+            '--output', tmpdir.strpath]
+    if not legacy:
+        argv.append('--skip-legacy')
+    monkeypatch.setattr(sys, 'argv', argv)
+    reporter_benchmark.main()
+    out = capsys.readouterr()[0]
+    assert 'Generated 40 tests' in out
+    assert 'incremental: ' in out
+    assert ('legacy: ' in out) == legacy
+    assert tmpdir.join('report.html').check(file=True) == legacy
+    assert len(tmpdir.join(DATA_DIR).listdir()) == 9
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import pkg_resources
+import pytest
+
+from cfme.utils.lazy import LazyEntryPoints
+
+
+class FakeEntryPoint(object):
+    def __init__(self, name, resolved):
+        self.name = name
+        self.resolved = resolved
+
+    def resolve(self):
+        self.resolved.append(self.name)
+        return self.name.upper()
+
+
+def test_resolved_on_lookup(monkeypatch):
+    resolved = []
+    monkeypatch.setattr(
+        pkg_resources, 'iter_entry_points',
+        lambda group: [FakeEntryPoint(name, resolved) for name in ('cloud', 'infra')])
+    entry_points = LazyEntryPoints('manageiq.provider_categories')
+    assert entry_points.names() == ['cloud', 'infra']
+    assert 'infra' in entry_points
+    assert not resolved
+    assert entry_points['infra'] == 'INFRA'
+    assert entry_points['infra'] == 'INFRA'
+    assert resolved == ['infra']
+    with pytest.raises(KeyError):
+        entry_points['physical']
+    assert dict(entry_points.items()) == {'cloud': 'CLOUD', 'infra': 'INFRA'}
+    assert resolved == ['infra', 'cloud']
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import json
+
+from cfme.utils.navigation import NavigationStats, UrlCache
+
+
+class Entity(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return 'Entity({!r})'.format(self.name)
+
+
+def test_stats_summary(tmpdir):
+    stats = NavigationStats()
+    stats.record('Vm', 'Details', 'total', 2.0)
+    stats.record('Vm', 'Details', 'total', 4.0)
+    stats.record('Host', 'All', 'total', 1.0)
+    stats.record('Vm', 'Details', 'step', 0.5)
+    summary = stats.summary()
+    assert [(row['cls'], row['count'], row['total'], row['max']) for row in summary] == [
+        ('Vm', 2, 6.0, 4.0), ('Host', 1, 1.0, 1.0)]
+    assert summary[0]['mean'] == 3.0
+    assert len(stats.summary(limit=1)) == 1
+    assert stats.query('SELECT SUM(duration) FROM timings WHERE phase = ?', 'step') == [(0.5,)]
+    stats.dump(tmpdir.join('stats.json'))
+    assert json.loads(tmpdir.join('stats.json').read())['step'][0]['destination'] == 'Details'
+    stats.clear()
+    assert stats.summary() == []
+
+
+def test_url_cache():
+    cache = UrlCache()
+    key = cache.key('10.0.0.1', Entity('vm1'), 'Details')
+    assert key == cache.key('10.0.0.1', Entity('vm1'), 'Details')
+    assert key != cache.key('10.0.0.1', Entity('vm2'), 'Details')
+    assert key != cache.key('10.0.0.2', Entity('vm1'), 'Details')
+    assert cache.key('10.0.0.1', Entity, 'All')[1] == 'Entity'
+    assert cache.get(key) is None
+    cache.set(key, 'https://10.0.0.1/vm_infra/show/1')
+    assert cache.get(key) == 'https://10.0.0.1/vm_infra/show/1'
+    cache.invalidate(key)
+    assert cache.get(key) is None
+    assert cache.misses == 1
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import socket
+import time
+
+import pytest
+
+from cfme.utils.reachability import ReachabilityProber, _checksum, icmp_echo_request
+from cfme.utils.wait import TimedOutError
+
+
+@pytest.fixture
+def listening():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_icmp_echo_request_checksum():
+    packet = icmp_echo_request(1, 2)
+    assert packet[:1] == b'\x08'
+    # the checksum of a packet with its checksum is 0
+    assert _checksum(packet) == 0
+
+
+def test_probe_many_ports(listening, closed_port):
+    prober = ReachabilityProber(timeout=2)
+    results = prober.probe([('127.0.0.1', listening), ('localhost', listening),
+                            ('127.0.0.1', closed_port), ('no-such-host.invalid', 22)])
+    assert results == {
+        ('127.0.0.1', listening): True, ('localhost', listening): True,
+        ('127.0.0.1', closed_port): False, ('no-such-host.invalid', 22): False}
+
+
+def test_results_cached_for_ttl(listening, monkeypatch):
+    prober = ReachabilityProber(ttl=60, timeout=2)
+    assert prober.check('127.0.0.1', listening)
+    monkeypatch.setattr(
+        'cfme.utils.reachability.connect_all', lambda *args: pytest.fail('not cached'))
+    assert prober.check('127.0.0.1', listening)
+    monkeypatch.undo()
+    assert prober.check('127.0.0.1', listening, max_age=0)
+
+
+def test_failures_checked_again(closed_port):
+    prober = ReachabilityProber(ttl=60, timeout=2)
+    assert not prober.check('127.0.0.1', closed_port)
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', closed_port))
+    server.listen(1)
+    try:
+        assert not prober.check('127.0.0.1', closed_port)
+        assert prober.check('127.0.0.1', closed_port, retry_failed=True)
+    finally:
+        server.close()
+    # the success is reused
+    assert prober.check('127.0.0.1', closed_port, retry_failed=True)
+
+
+def test_alive_by_tcp_liveness(closed_port, monkeypatch):
+    # without ICMP, a refused connection shows that the host is up
+    monkeypatch.setattr('cfme.utils.reachability.ping_all', lambda *args, **kwargs: None)
+    prober = ReachabilityProber()
+    assert prober.alive(['127.0.0.1', 'no-such-host.invalid'], ports=[closed_port]) == {
+        '127.0.0.1': True, 'no-such-host.invalid': False}
+
+
+def test_wait_until_reachable(listening, closed_port):
+    prober = ReachabilityProber(timeout=1)
+    prober.wait_until_reachable([('127.0.0.1', listening)], num_sec=5, delay=0.1)
+    start = time.time()
+    with pytest.raises(TimedOutError):
+        prober.wait_until_reachable(
+            [('127.0.0.1', listening), ('127.0.0.1', closed_port)], num_sec=1, delay=0.1)
+    assert time.time() - start < 5
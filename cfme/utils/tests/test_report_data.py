@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from cfme.utils.report_data import SavedReportData
+
+
+HEADERS = ('Name', 'Provider', 'Cost')
+BODY = [('vm1', 'vsphere', '$1.00'), ('vm2', 'rhv', '$2.00'), ('vm3', 'vsphere', '$3.00')]
+
+
+def test_find_row():
+    data = SavedReportData(HEADERS, BODY, index_columns=['Name'])
+    assert len(data) == 3
+    assert data.find_row('Name', 'vm2') == {'Name': 'vm2', 'Provider': 'rhv', 'Cost': '$2.00'}
+    assert data.find_row('Name', 'vm4') is None
+    assert data.find_row('Missing', 'vm1') is None
+    assert data.find_cell('Name', 'vm3', 'Cost') == '$3.00'
+    assert data.find_cell('Name', 'vm4', 'Cost') is None
+    assert [row['Name'] for row in data.find_rows('Provider', 'vsphere')] == ['vm1', 'vm3']
+    assert data.column('Cost') == ('$1.00', '$2.00', '$3.00')
+    assert list(data.rows)[0] == {'Name': 'vm1', 'Provider': 'vsphere', 'Cost': '$1.00'}
+
+
+def test_empty():
+    data = SavedReportData([], [])
+    assert list(data.rows) == []
+    assert data.find_row('Name', 'vm1') is None
+    assert SavedReportData(HEADERS, []).column('Name') == ()
+
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import os
+import weakref
+
+import pytest
+
+from cfme.utils import rest_lifecycle
+from cfme.utils.rest_lifecycle import CleanupLedger, RestDataManager
+
+
+class FakeEntity(object):
+    def __init__(self, data):
+        self._data = data
+        for key, value in data.items():
+            setattr(self, key, value)
+
+
+class FakeResult(object):
+    def __init__(self, resources):
+        self.resources = resources
+
+
+class FakeCollection(object):
+    def __init__(self, api, name):
+        self.api = api
+        self.name = name
+        self.rows = {}
+        self.action = self
+
+    def query_string(self, **params):
+        # filter[] is "field = value" followed by "or field = value"
+        self.api.queries.append(params['filter[]'])
+        attributes = params['attributes'].split(',')
+        field = attributes[0]
+        wanted = set()
+        for item in params['filter[]']:
+            key, _, value = item.replace('or ', '', 1).partition(' = ')
+            assert key == field
+            wanted.add(value.strip('"'))
+        return FakeResult([
+            FakeEntity(dict({'id': row_id}, **{name: row[name] for name in attributes
+                                               if name in row}))
+            for row_id, row in self.rows.items() if str(row.get(field)) in wanted])
+
+    def create(self, *data):
+        entities = []
+        for item in data:
+            row_id = len(self.api.ids) + 1
+            self.api.ids.append(row_id)
+            self.rows[row_id] = dict(item, id=row_id)
+            entities.append(FakeEntity(self.rows[row_id]))
+        return entities
+
+    def delete(self, *entities):
+        self.api.deletes.append([entity.id for entity in entities])
+        for entity in entities:
+            del self.rows[entity.id]
+
+
+GUID = '9e4d8a5c-2f6b-11e8-b467-0ed5f89f718b'
+
+
+class FakeApi(object):
+    _entry_point = 'https://10.0.0.1/api'
+    server_info = {'server_href': 'https://10.0.0.1/api/servers/1',
+                   'region_href': 'https://10.0.0.1/api/regions/1'}
+
+    def __init__(self):
+        self.ids = []
+        self.queries = []
+        self.deletes = []
+        self.response = None
+        self.collections = self
+        self.tags = FakeCollection(self, 'tags')
+
+    def get_entity(self, collection, entity_id):
+        return FakeEntity({'id': entity_id})
+
+    def get_entity_by_href(self, href):
+        if href.endswith('/servers/1'):
+            return FakeEntity({'id': 1, 'guid': GUID})
+        return FakeEntity({'id': 1, 'region': 0, 'created_on': '2018-03-01T10:00:00Z'})
+
+
+@pytest.fixture
+def api():
+    return FakeApi()
+
+
+def test_create_waits_with_one_query(api, tmpdir):
+    manager = RestDataManager(api, CleanupLedger(tmpdir.join('ledger.json')))
+    data = [{'name': 'tag_{}'.format(i)} for i in range(3)]
+    entities = manager.create('tags', data)
+    assert [entity.name for entity in entities] == ['tag_0', 'tag_1', 'tag_2']
+    assert len(api.queries) == 1
+    assert api.queries[0][1].startswith('or name = ')
+    names = {i + 1: ('name', 'tag_{}'.format(i)) for i in range(3)}
+    assert manager.ledger.entries == {'tags': names}
+    assert CleanupLedger(tmpdir.join('ledger.json')).entries == {'tags': names}
+
+
+def test_delete_in_batches_skips_missing(api, tmpdir, monkeypatch):
+    monkeypatch.setattr(rest_lifecycle, 'BATCH_SIZE', 2)
+    manager = RestDataManager(api, CleanupLedger(tmpdir.join('ledger.json')))
+    entities = manager.create('tags', [{'name': 'tag_{}'.format(i)} for i in range(5)])
+    del api.tags.rows[3]
+    assert manager.delete('tags', entities) == []
+    assert api.deletes == [[1, 2], [4, 5]]
+    assert not api.tags.rows
+    assert len(manager.ledger) == 0
+    assert not tmpdir.join('ledger.json').exists()
+
+
+def test_stale_ledgers_cleaned_up(api, tmpdir, monkeypatch):
+    monkeypatch.setattr(rest_lifecycle, 'ledger_dir', tmpdir)
+    monkeypatch.setattr(rest_lifecycle, '_ledgers', {})
+    monkeypatch.setattr(rest_lifecycle, '_managers', weakref.WeakKeyDictionary())
+    api.tags.create({'name': 'left'}, {'name': 'kept'})
+    # a crashed session on the same appliance, and a running one
+    crashed = CleanupLedger.for_process(GUID, pid=2 ** 22 + 1)
+    crashed.add('tags', {1: ('name', 'left')})
+    running = CleanupLedger.for_process(GUID, pid=os.getppid())
+    running.add('tags', {2: ('name', 'kept')})
+
+    manager = rest_lifecycle.manager_for(api)
+    assert rest_lifecycle.manager_for(api) is manager
+    assert list(api.tags.rows) == [2]
+    assert not os.path.exists(crashed.path)
+    assert os.path.exists(running.path)
+
+
+def test_managers_share_ledger(api, tmpdir, monkeypatch):
+    monkeypatch.setattr(rest_lifecycle, 'ledger_dir', tmpdir)
+    monkeypatch.setattr(rest_lifecycle, '_ledgers', {})
+    monkeypatch.setattr(rest_lifecycle, '_managers', weakref.WeakKeyDictionary())
+    # another user of the same appliance
+    other = FakeApi()
+    other.tags.rows = api.tags.rows
+    manager = rest_lifecycle.manager_for(api)
+    other_manager = rest_lifecycle.manager_for(other)
+    assert other_manager is not manager
+    assert other_manager.ledger is manager.ledger
+    entities = other_manager.create('tags', [{'name': 'tag_0'}])
+    assert len(manager.ledger) == 1
+    # deleted with the API of the fixture which created it
+    other_manager.delete('tags', entities)
+    assert other.deletes == [[1]]
+    assert api.deletes == []
+    assert len(manager.ledger) == 0
+
+
+def test_appliance_key(api, monkeypatch):
+    assert rest_lifecycle.appliance_key(api) == GUID
+
+    def no_guid(href):
+        if href.endswith('/servers/1'):
+            raise KeyError('guid')
+        return FakeApi.get_entity_by_href(api, href)
+    other = FakeApi()
+    monkeypatch.setattr(other, 'get_entity_by_href', no_guid)
+    assert rest_lifecycle.appliance_key(other) == 'region0-2018-03-01T10_00_00Z'
+
+
+def test_renamed_entities_not_cleaned_up(api, tmpdir):
+    api.tags.create({'name': 'tag_0'}, {'name': 'tag_1'}, {'description': 'tag_2'})
+    ledger = CleanupLedger(tmpdir.join('ledger.json'))
+    ledger.add('tags', {1: ('name', 'tag_0'), 2: ('name', 'tag_1'), 3: ('description', 'tag_2')})
+    # the ids were reused by entities created since
+    api.tags.rows[2]['name'] = 'not_ours'
+    assert ledger.cleanup(api) == 0
+    assert api.deletes == [[1, 3]]
+    assert list(api.tags.rows) == [2]
+
+
+def test_ledger_without_names(api, tmpdir):
+    tmpdir.join('ledger.json').write('{"tags": [1, 2]}')
+    assert CleanupLedger(tmpdir.join('ledger.json')).entries == {'tags': {1: None, 2: None}}
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.utils.rest_tasks import TaskTracker, wait_for_tasks
+from cfme.utils.wait import TimedOutError
+
+
+class FakeTask(object):
+    def __init__(self, data):
+        self._data = data
+
+
+class FakeResult(object):
+    def __init__(self, resources):
+        self.resources = resources
+
+
+class FakeTasks(object):
+    """Tasks finishing after a number of polls"""
+    def __init__(self, polls_to_finish):
+        self.polls_to_finish = polls_to_finish
+        self.queries = []
+
+    def query_string(self, **params):
+        ids = [int(item.split(' = ')[1]) for item in params['filter[]']]
+        self.queries.append(ids)
+        tasks = []
+        for task_id in ids:
+            polls = self.polls_to_finish[task_id]
+            self.polls_to_finish[task_id] -= 1
+            tasks.append(FakeTask({
+                'id': str(task_id), 'state': 'Finished' if polls <= 1 else 'Active',
+                'status': 'Error' if task_id == 13 else 'Ok', 'message': 'done'}))
+        return FakeResult(tasks)
+
+
+class FakeApi(object):
+    def __init__(self, polls_to_finish):
+        self.collections = self
+        self.tasks = FakeTasks(polls_to_finish)
+
+
+def test_tasks_polled_together():
+    api = FakeApi({10: 1, 11: 3, 12: 2})
+    tracker = TaskTracker(api)
+    task_futures = tracker.track_results([
+        {'success': True, 'task_id': '10'}, {'success': True, 'task_id': '11'},
+        {'success': False, 'task_id': '99'}, {'success': True, 'task_id': '12'}])
+    finished = []
+    task_futures[0].add_done_callback(finished.append)
+    results = tracker.wait(num_sec=10, delay=0.1)
+    assert [result.id for result in results] == [10, 11, 12]
+    assert all(result.ok for result in results)
+    # one query per poll, finished tasks are not queried again
+    assert api.tasks.queries == [[10, 11, 12], [11, 12], [11]]
+    assert finished == [task_futures[0]]
+    assert sorted(tracker.latencies()) == [10, 11, 12]
+    assert tracker.pending == []
+
+
+def test_failed_and_timed_out_tasks():
+    assert not wait_for_tasks(FakeApi({13: 1}), [13], num_sec=5)[0].ok
+    tracker = TaskTracker(FakeApi({14: 1000}))
+    future = tracker.track(14)
+    with pytest.raises(TimedOutError):
+        tracker.wait(num_sec=0.3, delay=0.1)
+    assert not future.done()
+    assert wait_for_tasks(FakeApi({}), []) == []
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+import time
+
+from cfme.utils.sampling_profiler import SamplingProfiler, categorize, merge
+
+
+def test_categorize_innermost_library():
+    assert categorize([
+        '/usr/lib/python2.7/socket.py', '/site-packages/urllib3/connectionpool.py',
+        '/site-packages/selenium/webdriver/remote/webdriver.py',
+        '/site-packages/wait_for/__init__.py']) == 'selenium'
+    assert categorize(['/site-packages/requests/api.py', '/cfme/utils/wait.py']) == 'rest'
+    assert categorize(['/site-packages/wait_for/__init__.py']) == 'wait_for'
+    assert categorize(['/site-packages/paramiko/channel.py']) == 'ssh'
+    assert categorize(['/cfme/tests/test_foo.py']) == 'cpu'
+
+
+def _busy_test():
+    return sys._getframe()
+
+
+def test_samples_attributed_to_context(tmpdir):
+    profiler = SamplingProfiler()
+    profiler.set_context('test_a', 'setup')
+    profiler.fixtures.append('appliance')
+    profiler.sample(_busy_test(), 0.5)
+    profiler.set_context('test_a', 'call')
+    profiler.sample(_busy_test(), 0.25)
+    profiler.set_context()
+    profiler.sample(_busy_test(), 0.1)
+
+    folded = profiler.pop_test('test_a').splitlines()
+    assert len(folded) == 2
+    assert folded[0].startswith('call;cpu;')
+    assert folded[0].endswith('test_sampling_profiler:_busy_test 250')
+    assert folded[1].startswith('setup;fixture:appliance;cpu;')
+    assert profiler.pop_test('test_a') == ''
+    summary = profiler.summary()
+    assert summary['tests']['test_a'] == {'setup': {'cpu': 0.5}, 'call': {'cpu': 0.25}}
+    assert summary['totals']['other'] == {'cpu': 0.1}
+
+    profiler.dump(tmpdir.join('slave1'))
+    profiler.dump(tmpdir.join('slave2'))
+    merge([tmpdir.join('slave1'), tmpdir.join('slave2')], tmpdir.join('all'))
+    merged = tmpdir.join('all.folded').read().splitlines()
+    assert len(merged) == 3
+    assert all(line.split(' ')[-1] in ('1000', '500', '200') for line in merged)
+    assert json.loads(tmpdir.join('all.json').read())['totals']['setup'] == {'cpu': 1.0}
+
+
+def test_background_sampling():
+    profiler = SamplingProfiler(interval=0.01)
+    profiler.set_context('test_b', 'call')
+    profiler.start()
+    end = time.time() + 0.2
+    while time.time() < end:
+        pass
+    profiler.stop()
+    assert not profiler.running
+    assert profiler.samples > 5
+    assert 0.1 < profiler.summary()['tests']['test_b']['call']['cpu'] < 0.5
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.utils.tb_cluster import (
+    MinHasher, TracebackClusterer, cluster_tracebacks, exception_type, innermost_frames,
+    normalize, signature)
+
+TIMEOUT_TB = """    def wait_for(func, num_sec=120):
+>       raise TimedOutError("Could not do '{}' at {} in time")
+E       TimedOutError: Could not do 'refresh provider {}' at {} in time
+
+cfme/utils/wait.py:131: TimedOutError"""
+
+SSH_TB = """cfme/utils/ssh.py:{}: in connect
+    self._connect()
+E   SSHException: Error reading SSH protocol banner from 10.0.0.{}
+SSHException
+Error reading SSH protocol banner"""
+
+
+def timeout_tb(i):
+    return TIMEOUT_TB.format(i, '10.1.1.{}'.format(i % 250), i, '10.1.1.{}'.format(i % 250))
+
+
+def test_normalize_masks_literals():
+    text = normalize("Could not find 'vm-1234' at 10.0.0.1:443 (0xdeadbeef) http://x/y/12 42")
+    assert text == 'Could not find <str> at <ip> (<hex>) <url> <num>'
+
+
+def test_exception_type_and_frames():
+    tb = timeout_tb(1)
+    assert exception_type(tb) == 'TimedOutError'
+    assert innermost_frames(tb) == ('cfme/utils/wait.py:131', )
+    python_tb = ('Traceback (most recent call last):\n'
+                 '  File "a.py", line 1, in <module>\n'
+                 '  File "b.py", line 2, in f\n'
+                 'requests.exceptions.ConnectionError: boom')
+    assert exception_type(python_tb) == 'ConnectionError'
+    assert innermost_frames(python_tb, frames=1) == ('b.py:2', )
+    assert exception_type('nothing to see here') is None
+
+
+def test_signature_ignores_literals():
+    assert signature(timeout_tb(1)) == signature(timeout_tb(2))
+    assert signature(timeout_tb(1)) != signature(SSH_TB.format(1, 1))
+    assert signature('boom', exc_type='Custom')[0] == 'Custom'
+
+
+def test_minhash_similarity():
+    hasher = MinHasher()
+    text = normalize(timeout_tb(1))
+    assert hasher.minhash(text) == hasher.minhash(text)
+    assert MinHasher.similarity(hasher.minhash(text), hasher.minhash(text)) == 1.0
+    assert MinHasher.similarity(
+        hasher.minhash(text), hasher.minhash(normalize(SSH_TB.format(1, 1)))) < 0.5
+    # empty texts still produce a full MinHash
+    assert len(hasher.minhash('')) == hasher.num_perm
+
+
+def test_clusters_identical_signatures():
+    entries = [(timeout_tb(i), 'test_timeout_{}'.format(i)) for i in range(5)]
+    entries += [(SSH_TB.format(100, i), 'test_ssh_{}'.format(i)) for i in range(3)]
+    clusters = cluster_tracebacks(entries, count=10)
+    assert [len(cluster) for cluster in clusters] == [5, 3]
+    assert clusters[0].exc_type == 'TimedOutError'
+    assert clusters[0].items[0] == 'test_timeout_0'
+    assert clusters[1].exc_type == 'SSHException'
+
+
+def test_merges_near_duplicates():
+    # Different line numbers make different signatures, the MinHash merges them
+    clusterer = TracebackClusterer()
+    for i in range(20):
+        clusterer.add(SSH_TB.format(100 + i, i), item=i)
+    assert len(clusterer) == 1
+    assert len(clusterer.clusters[0].signatures) == 20
+
+    exact = TracebackClusterer(threshold=None)
+    for i in range(20):
+        exact.add(SSH_TB.format(100 + i, i), item=i)
+    assert len(exact) == 20
+
+
+def test_does_not_merge_different_exception_types():
+    clusterer = TracebackClusterer(threshold=0.1)
+    clusterer.add('cfme/a.py:1: in f\nE   ValueError: x', exc_type='ValueError')
+    clusterer.add('cfme/a.py:1: in f\nE   ValueError: x', exc_type='TypeError')
+    assert len(clusterer) == 2
+
+
+def test_top_order_and_count():
+    clusterer = TracebackClusterer(threshold=None)
+    for i, count in enumerate([1, 3, 2, 3]):
+        for _ in range(count):
+            clusterer.add('boom {}'.format('x' * i), exc_type='E{}'.format(i))
+    assert [c.exc_type for c in clusterer.top()] == ['E1', 'E3', 'E2', 'E0']
+    assert len(clusterer.top(2)) == 2
+
+
+def test_invalid_bands():
+    with pytest.raises(ValueError):
+        TracebackClusterer(num_perm=64, bands=10)
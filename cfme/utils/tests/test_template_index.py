@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.utils import template_index
+from cfme.utils.template_index import TemplateIndex
+
+
+class FakeEndpoint(object):
+    def __init__(self, objects):
+        self.objects = objects
+        self.calls = []
+
+    def get(self, **params):
+        self.calls.append(params)
+        since = params.get('template__datestamp__gte')
+        objects = [
+            o for o in self.objects
+            if o['provider'] == params['provider'] and
+            (since is None or o['template']['datestamp'] >= since)]
+        meta = {'next': None, 'total_count': len(objects)}
+        return {'meta': meta, 'objects': objects[:params.get('limit')]}
+
+
+class FakeApi(object):
+    def __init__(self, objects):
+        self.providertemplate = FakeEndpoint(objects)
+
+
+def pt(provider, name, datestamp):
+    return {'provider': provider, 'template': {'name': name, 'datestamp': datestamp}}
+
+
+@pytest.fixture
+def api():
+    return FakeApi([
+        pt('rhv', 'tpl-a', '2018-01-01'),
+        pt('rhv', 'tpl-b', '2018-01-02'),
+        pt('vsphere', 'tpl-c', '2018-01-01')])
+
+
+@pytest.fixture(autouse=True)
+def tb_url(monkeypatch):
+    monkeypatch.setattr(template_index.trackerbot, 'conf', {'url': 'http://tb/api/'})
+
+
+def test_provider_pulled_on_demand(api, tmpdir):
+    index = TemplateIndex(api=api, path=tmpdir.join('index.json'))
+    assert index['rhv'] == ['tpl-a', 'tpl-b']
+    assert api.providertemplate.calls == [{'provider': 'rhv'}]
+    assert 'vsphere' not in index
+
+
+def test_index_shared_through_store(api, tmpdir):
+    path = tmpdir.join('index.json')
+    TemplateIndex(api=api, path=path).sync_providers(['rhv', 'vsphere'])
+    other_api = FakeApi([])
+    index = TemplateIndex(api=other_api, path=path)
+    assert index['vsphere'] == ['tpl-c']
+    assert other_api.providertemplate.calls == []
+
+
+def test_stale_entry_synced_incrementally(api, tmpdir):
+    path = tmpdir.join('index.json')
+    index = TemplateIndex(api=api, path=path, max_age=0)
+    index.sync('rhv')
+    api.providertemplate.objects.append(pt('rhv', 'tpl-d', '2018-01-03'))
+    assert index.sync('rhv') == ['tpl-a', 'tpl-b', 'tpl-d']
+    assert api.providertemplate.calls[-2:] == [
+        {'provider': 'rhv', 'template__datestamp__gte': '2018-01-02'},
+        {'provider': 'rhv', 'limit': 1}]
+
+
+@pytest.mark.parametrize('change', ['removed', 'uploaded_later'])
+def test_changed_provider_resynced(api, tmpdir, change):
+    index = TemplateIndex(api=api, path=tmpdir.join('index.json'), max_age=0)
+    index.sync('rhv')
+    if change == 'removed':
+        del api.providertemplate.objects[0]
+        expected = ['tpl-b']
+    else:
+        # an older datestamp than the newest known template
+        api.providertemplate.objects.append(pt('rhv', 'tpl-old', '2017-12-01'))
+        expected = ['tpl-a', 'tpl-b', 'tpl-old']
+    assert index.sync('rhv') == expected
+    assert api.providertemplate.calls[-1] == {'provider': 'rhv'}
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from six import StringIO
+
+from cfme.utils import vm_inventory
+from cfme.utils.vm_inventory import VmInventory, write_json
+
+
+class FakeVm(object):
+    def __init__(self, name, state='running', creation_time=None):
+        self.name = name
+        self._state = state
+        self._creation_time = creation_time
+
+    @property
+    def state(self):
+        if self._state is None:
+            raise RuntimeError('no state')
+        return self._state
+
+    @property
+    def creation_time(self):
+        if self._creation_time is None:
+            raise RuntimeError('no creation time')
+        return self._creation_time
+
+
+class FakeMgmt(object):
+    def __init__(self, vms):
+        self.vms = vms
+
+    def list_vms(self):
+        if self.vms is None:
+            raise RuntimeError('provider down')
+        return self.vms
+
+
+@pytest.fixture
+def mgmts(monkeypatch):
+    mgmts = {
+        'prov-a': FakeMgmt([FakeVm('test_a1'), FakeVm('keep_me'), FakeVm('test_a2', None)]),
+        'prov-b': FakeMgmt([FakeVm('test_b1', 'stopped')]),
+        'prov-down': FakeMgmt(None),
+    }
+    monkeypatch.setattr(vm_inventory, 'get_mgmt', lambda key: mgmts[key])
+    return mgmts
+
+
+def test_scan_streams_filtered_records(mgmts):
+    inventory = VmInventory(sorted(mgmts), name_filters=['^test_'])
+    records = sorted(inventory.scan(attributes=('state', )), key=lambda r: (r.provider_key, r.name))
+    assert [(r.provider_key, r.name, r.state) for r in records] == [
+        ('prov-a', 'test_a1', 'running'),
+        ('prov-a', 'test_a2', None),
+        ('prov-b', 'test_b1', 'stopped'),
+        ('prov-down', None, None)]
+    assert records[1].error == 'RuntimeError: no state'
+    assert records[3].error == 'RuntimeError: provider down'
+
+
+def test_attributes_read_after_failure(mgmts):
+    mgmts['prov-a'].vms = [FakeVm('test_broken', None, creation_time=42), FakeVm('test_new', None)]
+    records = sorted(VmInventory(['prov-a']).scan(), key=lambda r: r.name)
+    assert [(r.name, r.state, r.creation_time) for r in records] == [
+        ('test_broken', None, 42), ('test_new', None, None)]
+    assert records[0].error == 'RuntimeError: no state'
+    assert records[1].error == 'RuntimeError: no state; RuntimeError: no creation time'
+
+
+def test_map_and_json_output(mgmts):
+    inventory = VmInventory(['prov-a'])
+    records = list(inventory.scan(attributes=()))
+    assert sorted(inventory.map(lambda record: record.name.upper(), records)) == [
+        'KEEP_ME', 'TEST_A1', 'TEST_A2']
+    stream = StringIO()
+    write_json(records, stream)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert sorted(line['name'] for line in lines) == ['keep_me', 'test_a1', 'test_a2']
+    assert 'vm' not in lines[0]
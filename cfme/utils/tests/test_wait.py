@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from cfme.utils import wait
+from cfme.utils.wait import TimedOutError, wait_for, wait_for_decorator
+from cfme.utils.wait_stats import WaitStats
+
+
+class FakeClock(object):
+    """Replaces the clock and sleep of the time module, sleeping only advances the clock"""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, 'time', clock.time)
+    monkeypatch.setattr(time, 'monotonic', clock.time, raising=False)
+    monkeypatch.setattr(time, 'sleep', clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = WaitStats()
+    monkeypatch.setattr(wait, 'wait_stats', stats)
+    return stats
+
+
+def condition(clock, true_at_check):
+    checks = []
+
+    def _condition():
+        checks.append(clock.now)
+        return len(checks) >= true_at_check
+    return _condition, checks
+
+
+def intervals(checks):
+    return [later - earlier for earlier, later in zip(checks, checks[1:])]
+
+
+def test_adaptive_schedule_sleeps(clock, stats):
+    func, checks = condition(clock, 5)
+    wait_for(func, num_sec=60, delay=10, adaptive=True)
+    assert intervals(checks) == [0.5, 1, 2, 4]
+    # wait_for sleeps the first delay, the wrapper the rest of the next one
+    assert clock.sleeps == [0.5, 0.5, 0.5, 0.5, 1.5, 0.5, 3.5]
+    site, = stats.sites
+    assert site.rsplit(':', 1)[0].endswith('test_wait.py')
+    assert stats.sites[site].checks == 5
+    assert stats.sites[site].durations[0] == 7.5
+
+
+def test_fixed_schedule_sleeps(clock, stats):
+    func, checks = condition(clock, 4)
+    wait_for(func, num_sec=60, delay=3, adaptive=False)
+    assert intervals(checks) == [3, 3, 3]
+    assert clock.sleeps == [3, 3, 3]
+
+
+def test_adaptive_sleep_bounded_by_timeout(clock, stats):
+    func, checks = condition(clock, 100)
+    with pytest.raises(TimedOutError):
+        wait_for(func, num_sec=5, delay=10, adaptive=True)
+    # the extra sleeps never go past the timeout
+    assert checks[-1] - checks[0] <= 5 + 0.5
+    summary, = stats.summary()
+    assert summary['timeouts'] == 1
+
+
+def test_silent_failure_recorded_as_timeout(clock, stats):
+    func, checks = condition(clock, 100)
+    result = wait_for(func, num_sec=3, delay=1, silent_failure=True)
+    assert result.out is False
+    summary, = stats.summary()
+    assert summary['calls'] == 1
+    assert summary['timeouts'] == 1
+    assert summary['median'] is None
+
+
+def test_wait_for_decorator(clock, stats):
+    func, checks = condition(clock, 2)
+
+    @wait_for_decorator(num_sec=10, delay=2, adaptive=False)
+    def decorated():
+        return func()
+    assert decorated.out is True
+    assert intervals(checks) == [2]
+
+    @wait_for_decorator
+    def bare():
+        return True
+    assert bare.out is True
+    assert [row['calls'] for row in stats.summary()] == [1, 1]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from itertools import islice
+
+from cfme.utils.wait_stats import WaitStats, adaptive_delays
+
+
+def test_adaptive_delays_without_history():
+    assert list(islice(adaptive_delays(10), 7)) == [0.5, 1, 2, 4, 8, 10, 10]
+    assert list(islice(adaptive_delays(0.2), 2)) == [0.2, 0.2]
+
+
+def test_adaptive_delays_capped_by_durations():
+    # conditions of the site become true after about 5 s, no need to wait 60 s between checks
+    assert list(islice(adaptive_delays(60, [4, 5, 6]), 4)) == [0.5, 1, 1, 1]
+    # and slow ones are not checked every second
+    assert list(islice(adaptive_delays(1, [300, 300, 300]), 2)) == [0.5, 1]
+    assert list(islice(adaptive_delays(1, [300, 300, 300]), 9))[-1] == 60
+
+
+def test_summary_and_history(tmpdir):
+    stats = WaitStats()
+    stats.record('a.py:1', 2.0, 3)
+    stats.record('a.py:1', 4.0, 5)
+    stats.record('b.py:2', 10.0, 10, timed_out=True)
+    summary = stats.summary()
+    assert [row['site'] for row in summary] == ['b.py:2', 'a.py:1']
+    assert summary[1]['calls'] == 2
+    assert summary[1]['checks'] == 8
+    assert summary[1]['median'] == 3.0
+    assert summary[0]['timeouts'] == 1
+    history = tmpdir.join('history.json')
+    stats.save_history(history)
+    # saving again only adds the durations recorded meanwhile
+    stats.save_history(history)
+    loaded = WaitStats()
+    loaded.load_history(history)
+    assert loaded.durations('a.py:1') == [2.0, 4.0]
+    assert loaded.durations('b.py:2') == []
+    stats.record('a.py:1', 6.0, 7)
+    stats.save_history(history)
+    loaded.load_history(history)
+    assert loaded.durations('a.py:1') == [2.0, 4.0, 6.0]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from cfme.utils.workload_metrics import (
+    MetricStore, compare, finish_workload, parse_queue_states, parse_top_cpu, process_samples,
+    statistics)
+
+
+@pytest.fixture
+def store(tmpdir):
+    store = MetricStore(tmpdir.join('metrics.jsonl'))
+    for ts, used, uss in [(0, 1000.0, 100.0), (10, 1200.0, 120.0), (20, 1100.0, 160.0)]:
+        store.append(ts, {'appliance.memory.used': used, 'process.MiqUiWorker.uss': uss})
+    return store
+
+
+def test_store_series(store):
+    series = store.series()
+    assert list(series) == ['appliance.memory.used', 'process.MiqUiWorker.uss']
+    assert series['appliance.memory.used'] == [(0, 1000.0), (10, 1200.0), (20, 1100.0)]
+
+
+def test_statistics():
+    stats = statistics([1.0, 4.0, 2.0, 3.0])
+    assert stats['mean'] == 2.5
+    assert stats['median'] == 2.5
+    assert stats['max'] == 4.0
+    assert stats['growth'] == 2.0
+    assert statistics([]) == {'count': 0}
+
+
+def test_compare():
+    baseline = {'appliance.memory.used': {'mean': 1000.0}, 'other': {'mean': 1.0}}
+    summary = {'appliance.memory.used': {'mean': 1150.0}, 'other': {'mean': 100.0}}
+    result = compare(summary, baseline, [('appliance.memory.*', 'mean', 0.1)])
+    assert len(result) == 1
+    assert result[0]['regression']
+    assert result[0]['change'] == pytest.approx(0.15)
+
+
+def test_parsers():
+    assert parse_top_cpu('Cpu(s): 13.7%us,  1.2%sy,  2.1%ni, 80.0%id,  1.7%wa,  0.0%hi,'
+                         '  0.1%si,  1.3%st')['appliance.cpu.us'] == 13.7
+    assert parse_top_cpu('%Cpu(s):  2.3 us,  0.8 sy,  0.0 ni, 96.7 id,  0.1 wa,  0.0 hi,'
+                         '  0.1 si,  0.0 st')['appliance.cpu.id'] == 96.7
+    assert parse_queue_states('ready|12\ndequeue|3\n') == {'queue.ready': 12, 'queue.dequeue': 3}
+    process_results = {'httpd': {'1': {'t': {'rss': 1, 'pss': 2, 'uss': 3, 'vss': 4, 'swap': 0}},
+                                 '2': {'t': {'rss': 1, 'pss': 2, 'uss': 3, 'vss': 4, 'swap': 0}}}}
+    samples = process_samples(process_results, 't')
+    assert samples['process.httpd.count'] == 2
+    assert samples['process.httpd.uss'] == 6
+
+
+def test_finish_workload(store, tmpdir):
+    scenario_dir = tmpdir.mkdir('scenario')
+    scenario_data = {'test_dir': 'workload-idle', 'test_name': 'Idle',
+                     'scenario': {'name': 'default'}}
+    settings = {'baselines': str(tmpdir.join('baselines.json'))}
+    assert finish_workload(scenario_dir, store, scenario_data, '5.9.0.1', settings) == []
+    assert tmpdir.join('baselines.json').check()
+    store.append(30, {'appliance.memory.used': 3000.0, 'process.MiqUiWorker.uss': 400.0})
+    regressions = finish_workload(scenario_dir, store, scenario_data, '5.9.0.2', settings)
+    assert {row['series'] for row in regressions} == {
+        'appliance.memory.used', 'process.MiqUiWorker.uss'}
+    summary = json.loads(scenario_dir.join('metrics-summary.json').read())
+    assert summary['baseline_version'] == '5.9.0.1'
+    assert '<svg' in scenario_dir.join('metrics.html').read()
+    assert scenario_dir.join('metrics.jsonl').check()
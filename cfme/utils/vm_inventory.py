@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Concurrent VM inventory of multiple providers
+
+Shared engine of ``scripts/list_provider_vms.py``, ``scripts/cleanup_old_vms.py`` and
+``scripts/provider_usage.py``. All providers are listed concurrently and the attributes of their
+VMs are read on the VM objects returned by ``list_vms`` (no ``get_vm`` lookup per VM), with a
+bounded number of concurrent calls per provider so a single provider API is not overloaded.
+
+Records are streamed as soon as they are available:
+
+.. code-block:: python
+
+    inventory = VmInventory(['rhv41', 'vsphere65'], name_filters=['^test_'])
+    for record in inventory.scan(attributes=('state', 'creation_time')):
+        print(record.provider_key, record.name, record.state)
+"""
+import csv
+import json
+import re
+import threading
+from collections import namedtuple
+from concurrent import futures
+
+from six.moves import queue
+
+from cfme.utils.log import logger
+from cfme.utils.providers import get_mgmt
+
+#: Attributes the engine knows how to read from wrapanapi VM objects
+VM_ATTRIBUTES = ('state', 'creation_time', 'type', 'ip')
+
+#: Columns of the serialized records, in order
+RECORD_FIELDS = ('provider_key', 'name') + VM_ATTRIBUTES + ('error', )
+
+
+class VmRecord(namedtuple('VmRecord', RECORD_FIELDS + ('vm', ))):
+    """Result of the scan of one VM, ``vm`` is the wrapanapi object (not serialized)
+
+    If the provider itself could not be listed, a single record with ``name`` set to ``None``
+    and ``error`` set is emitted for it.
+    """
+    __slots__ = ()
+
+    def as_dict(self):
+        result = {}
+        for field in RECORD_FIELDS:
+            value = getattr(self, field)
+            if value is not None and not isinstance(value, (bool, int, float)):
+                value = str(value)
+            result[field] = value
+        return result
+
+
+def _vm_type(vm):
+    # different provider types implement different methods to get instance type info
+    if hasattr(vm, 'type'):
+        return vm.type
+    try:
+        return vm.get_hardware_configuration()
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+_ATTRIBUTE_GETTERS = {
+    'state': lambda vm: vm.state,
+    'creation_time': lambda vm: vm.creation_time,
+    'type': _vm_type,
+    'ip': lambda vm: vm.ip,
+}
+
+
+class VmInventory(object):
+    """Lists VMs of several providers concurrently
+
+    Args:
+        provider_keys: keys of the providers in cfme_data to scan
+        name_filters: regex strings, if passed only VMs whose name matches any of them (case
+            insensitive) are included
+        max_providers: number of providers scanned at the same time
+        per_provider: number of concurrent VM attribute calls against a single provider
+    """
+    def __init__(self, provider_keys, name_filters=None, max_providers=8, per_provider=4):
+        self.provider_keys = list(provider_keys)
+        self.matchers = [re.compile(text, re.IGNORECASE) for text in name_filters or []]
+        self.max_providers = max_providers
+        self.per_provider = per_provider
+
+    def matches(self, vm_name):
+        return not self.matchers or any(matcher.match(vm_name) for matcher in self.matchers)
+
+    def _read_vm(self, provider_key, vm, attributes):
+        """Reads the attributes of a VM, the ones which cannot be read are left ``None``
+
+        Every attribute is read even if a previous one failed (e.g. VMs in a broken state can
+        still be cleaned up by age), ``error`` of the record lists the failures.
+        """
+        values = dict.fromkeys(VM_ATTRIBUTES)
+        errors = []
+        for attribute in attributes:
+            try:
+                values[attribute] = _ATTRIBUTE_GETTERS[attribute](vm)
+            except Exception as e:  # noqa
+                logger.exception('%r: Exception getting %s of %r', provider_key, attribute, vm.name)
+                errors.append('{}: {}'.format(type(e).__name__, e))
+        return VmRecord(provider_key=provider_key, name=vm.name, error='; '.join(errors) or None,
+                        vm=vm, **values)
+
+    def _scan_provider(self, provider_key, attributes, results):
+        try:
+            vms = get_mgmt(provider_key).list_vms()
+        except Exception as e:  # noqa
+            logger.exception('%r: Exception listing vms', provider_key)
+            results.put(VmRecord(
+                provider_key=provider_key, name=None, vm=None,
+                error='{}: {}'.format(type(e).__name__, e), **dict.fromkeys(VM_ATTRIBUTES)))
+            return
+        vms = [vm for vm in vms if self.matches(vm.name)]
+        logger.info('%r: %d VMs matched the name filters', provider_key, len(vms))
+        if not attributes:
+            for vm in vms:
+                results.put(self._read_vm(provider_key, vm, attributes))
+            return
+        with futures.ThreadPoolExecutor(max_workers=self.per_provider) as executor:
+            pending = [
+                executor.submit(self._read_vm, provider_key, vm, attributes) for vm in vms]
+            for future in futures.as_completed(pending):
+                results.put(future.result())
+
+    def scan(self, attributes=('state', 'creation_time')):
+        """Yields :py:class:`VmRecord` objects as providers and VMs are processed
+
+        Args:
+            attributes: names from :py:data:`VM_ATTRIBUTES` to read for every VM
+        """
+        unknown = set(attributes) - set(VM_ATTRIBUTES)
+        if unknown:
+            raise ValueError('Unknown VM attributes: {}'.format(', '.join(sorted(unknown))))
+        results = queue.Queue()
+        done = object()
+
+        def scan_provider(provider_key):
+            try:
+                self._scan_provider(provider_key, attributes, results)
+            finally:
+                results.put(done)
+
+        executor = futures.ThreadPoolExecutor(max_workers=self.max_providers)
+        try:
+            for provider_key in self.provider_keys:
+                executor.submit(scan_provider, provider_key)
+            remaining = len(self.provider_keys)
+            while remaining:
+                record = results.get()
+                if record is done:
+                    remaining -= 1
+                else:
+                    yield record
+        finally:
+            executor.shutdown(wait=False)
+
+    def map(self, func, records, max_workers=None):
+        """Calls ``func(record)`` concurrently, bounded per provider, yielding the results
+
+        Exceptions raised by ``func`` are yielded in place of the result.
+        """
+        by_provider = {}
+        for record in records:
+            by_provider.setdefault(record.provider_key, []).append(record)
+        if not by_provider:
+            return
+        semaphores = {
+            provider_key: threading.BoundedSemaphore(self.per_provider)
+            for provider_key in by_provider}
+
+        def call(record):
+            with semaphores[record.provider_key]:
+                try:
+                    return func(record)
+                except Exception as e:  # noqa
+                    logger.exception('%r: Exception processing %r', record.provider_key,
+                                     record.name)
+                    return e
+
+        workers = max_workers or self.max_providers * self.per_provider
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = [
+                executor.submit(call, record)
+                for provider_records in by_provider.values()
+                for record in provider_records]
+            for future in futures.as_completed(pending):
+                yield future.result()
+
+
+def write_json(records, stream):
+    """Writes the records to ``stream`` as JSON lines, one object per record"""
+    for record in records:
+        stream.write(json.dumps(record.as_dict(), sort_keys=True))
+        stream.write('\n')
+
+
+def write_csv(records, stream):
+    """Writes the records to ``stream`` as CSV with a header row"""
+    writer = csv.DictWriter(stream, fieldnames=RECORD_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record.as_dict())
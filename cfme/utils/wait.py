@@ -1,7 +1,113 @@
-from wait_for import wait_for as wait_for_mod, wait_for_decorator as wait_for_decorator_mod
+"""``wait_for`` with the framework logger, recorded in :py:mod:`cfme.utils.wait_stats`
+
+Every call is recorded under its call site. When adaptive polling is enabled
+(``wait_stats.adaptive``), waits without a ``fail_func`` check their condition quickly at first,
+then back off exponentially, see :py:func:`cfme.utils.wait_stats.adaptive_delays`. Pass
+``adaptive=False`` to keep the fixed ``delay`` of a wait.
+"""
+import os
+import re
+import sys
+import time
+from datetime import timedelta
+from itertools import chain
+
+from py.path import local
+from wait_for import wait_for as wait_for_mod
 from wait_for import RefreshTimer, TimedOutError  # NOQA
 from cfme.utils.log import logger
-from functools import partial
+from cfme.utils.path import project_path
+from cfme.utils.wait_stats import wait_stats
+
+_this_file = os.path.splitext(os.path.abspath(__file__))[0]
+_time_units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _call_site():
+    """Returns ``path:line`` of the first caller outside of this module"""
+    frame = sys._getframe(1)
+    while frame is not None and (
+            os.path.splitext(os.path.abspath(frame.f_code.co_filename))[0] == _this_file):
+        frame = frame.f_back
+    if frame is None:
+        return 'unknown'
+    path = frame.f_code.co_filename
+    return '{}:{}'.format(project_path.bestrelpath(local(path)), frame.f_lineno)
+
+
+def _num_sec(kwargs):
+    """Returns the timeout of a wait in seconds, ``None`` if it is not understood"""
+    timeout = kwargs.get('timeout')
+    if timeout is None:
+        return float(kwargs.get('num_sec', 120))
+    if isinstance(timeout, (int, float)):
+        return float(timeout)
+    if isinstance(timeout, timedelta):
+        return timeout.total_seconds()
+    parts = re.findall(r'(\d+(?:\.\d+)?)\s*([smhd])', str(timeout))
+    if not parts:
+        return None
+    return sum(float(value) * _time_units[unit] for value, unit in parts)
+
+
+def _failed(out, fail_condition):
+    if callable(fail_condition):
+        return fail_condition(out)
+    if isinstance(fail_condition, set):
+        return out in fail_condition
+    return out == fail_condition
+
+
+def wait_for(func, func_args=[], func_kwargs={}, adaptive=None, **kwargs):
+    """:py:func:`wait_for.wait_for` recording its statistics, with adaptive polling
+
+    Args:
+        adaptive: use an adaptive schedule, ``wait_stats.adaptive`` by default
+        others: see :py:func:`wait_for.wait_for`
+    """
+    kwargs.setdefault('logger', logger)
+    site = _call_site()
+    delay = kwargs.get('delay', 1)
+    num_sec = _num_sec(kwargs)
+    if adaptive is None:
+        adaptive = wait_stats.adaptive
+    delays = None
+    if adaptive and num_sec is not None and not kwargs.get('fail_func'):
+        delays = wait_stats.delays(site, delay)
+        # wait_for sleeps the first delay after every check
+        kwargs['delay'] = next(delays)
+        delays = chain([kwargs['delay']], delays)
+    state = {'checks': 0, 'out': None}
+    start = time.time()
+
+    def _check(*args, **kw):
+        if state['checks'] > 0 and delays is not None:
+            # sleep the rest of the next delay of the schedule before checking again
+            extra = next(delays) - kwargs['delay']
+            remaining = start + num_sec - time.time()
+            if extra > 0 and remaining > 0:
+                time.sleep(min(extra, remaining))
+        state['checks'] += 1
+        state['out'] = func(*args, **kw)
+        return state['out']
+    _check.__name__ = str(getattr(func, '__name__', 'condition'))
+    _check.__doc__ = getattr(func, '__doc__', None)
+
+    try:
+        result = wait_for_mod(_check, func_args, func_kwargs, **kwargs)
+    except TimedOutError:
+        wait_stats.record(site, time.time() - start, state['checks'], timed_out=True)
+        raise
+    timed_out = _failed(state['out'], kwargs.get('fail_condition', False))
+    wait_stats.record(site, time.time() - start, state['checks'], timed_out=timed_out)
+    return result
+
+
+def wait_for_decorator(*args, **kwargs):
+    """Runs :py:func:`wait_for` on the decorated function (called with or without arguments)"""
+    if not kwargs and len(args) == 1 and callable(args[0]):
+        return wait_for(args[0])
 
-wait_for = partial(wait_for_mod, logger=logger)
-wait_for_decorator = partial(wait_for_decorator_mod, logger=logger)
+    def _decorator(func):
+        return wait_for(func, *args, **kwargs)
+    return _decorator
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Statistics of ``wait_for`` calls by call site and adaptive polling schedules
+
+:py:func:`cfme.utils.wait.wait_for` records, for every call site (``file:line`` of the caller),
+how long the condition took to become true, how many checks it took and whether it timed out.
+
+With adaptive polling enabled, a wait checks its condition quickly at first and backs off
+exponentially, up to a delay derived from how long the waits of the same call site took before
+(in this session and in the previous ones, see :py:meth:`WaitStats.load_history`). Without such
+history, the backoff is capped by the ``delay`` passed to ``wait_for``.
+"""
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+
+#: Number of the latest durations kept per call site
+HISTORY_SIZE = 50
+#: Number of durations of a call site needed to derive its delay cap from them
+MIN_SAMPLES = 3
+#: Delay of the first check of adaptive waits, unless the requested delay is shorter
+FAST_DELAY = 0.5
+#: Lower bound of the derived delay cap
+MIN_DELAY = 0.2
+#: Factor of the exponential backoff
+BACKOFF = 2
+#: Number of checks a typical wait should take once backed off, divides the typical duration
+CHECKS_PER_WAIT = 5
+
+
+def median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def adaptive_delays(delay, durations=()):
+    """Yields the delays between the checks of a wait
+
+    Args:
+        delay: the delay requested by the caller, caps the backoff without enough durations
+        durations: previous durations of the waits of the call site
+    """
+    cap = delay
+    if len(durations) >= MIN_SAMPLES:
+        cap = max(MIN_DELAY, median(durations) / CHECKS_PER_WAIT)
+    current = min(delay, cap, FAST_DELAY)
+    while True:
+        yield current
+        current = min(current * BACKOFF, cap)
+
+
+class SiteStats(object):
+    """Counters of the waits of one call site"""
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+        self.checks = 0
+        self.total = 0.0
+        self.max = 0.0
+        # durations of the waits which did not time out
+        self.durations = deque(maxlen=HISTORY_SIZE)
+        # number of durations ever added to durations
+        self.completed = 0
+
+    def record(self, duration, checks, timed_out):
+        self.calls += 1
+        self.checks += checks
+        self.total += duration
+        self.max = max(self.max, duration)
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.durations.append(duration)
+            self.completed += 1
+
+    def to_dict(self, site):
+        return {
+            'site': site, 'calls': self.calls, 'timeouts': self.timeouts, 'checks': self.checks,
+            'total': self.total, 'mean': self.total / self.calls if self.calls else 0.0,
+            'median': median(self.durations), 'max': self.max}
+
+
+class WaitStats(object):
+    """Wait statistics of this process, and durations of the previous sessions
+
+    Args:
+        adaptive: whether waits use :py:func:`adaptive_delays`
+    """
+    def __init__(self, adaptive=False):
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self.sites = {}
+        # site -> durations of the previous sessions
+        self.history = {}
+        # site -> SiteStats.completed at the last save_history
+        self._saved = {}
+
+    def record(self, site, duration, checks, timed_out=False):
+        with self._lock:
+            if site not in self.sites:
+                self.sites[site] = SiteStats()
+            self.sites[site].record(duration, checks, timed_out)
+
+    def durations(self, site):
+        """Returns the known durations of the waits of a call site which did not time out"""
+        with self._lock:
+            durations = list(self.history.get(site, ()))
+            if site in self.sites:
+                durations.extend(self.sites[site].durations)
+        return durations[-HISTORY_SIZE:]
+
+    def delays(self, site, delay):
+        """Returns the :py:func:`adaptive_delays` of a call site"""
+        return adaptive_delays(delay, self.durations(site))
+
+    def summary(self, limit=None):
+        """Returns dicts of the counters of the call sites, the longest total wait time first"""
+        with self._lock:
+            rows = [stats.to_dict(site) for site, stats in self.sites.items()]
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def dump(self, path):
+        """Writes the summary as JSON"""
+        with open(str(path), 'w') as f:
+            json.dump(self.summary(), f, indent=1)
+
+    def load_history(self, path):
+        """Loads durations saved by :py:meth:`save_history`, a missing file is no history"""
+        try:
+            with open(str(path)) as f:
+                history = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        with self._lock:
+            self.history = {site: list(durations) for site, durations in history.items()}
+
+    def save_history(self, path):
+        """Adds the durations of this session to the history file, keeping other sites
+
+        Only the durations recorded since the previous save are added, so the history can be
+        saved several times per session.
+        """
+        path = str(path)
+        try:
+            with open(path) as f:
+                history = json.load(f)
+        except (IOError, OSError, ValueError):
+            history = {}
+        with self._lock:
+            for site, stats in self.sites.items():
+                new = min(stats.completed - self._saved.get(site, 0), len(stats.durations))
+                if new > 0:
+                    durations = history.get(site, []) + list(stats.durations)[-new:]
+                    history[site] = durations[-HISTORY_SIZE:]
+                self._saved[site] = stats.completed
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory or None, suffix='.part')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(history, f, sort_keys=True)
+        os.rename(tmp_path, path)
+
+    def clear(self):
+        with self._lock:
+            self.sites.clear()
+            self.history.clear()
+            self._saved.clear()
+
+
+wait_stats = WaitStats()
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""Local metric storage, summaries, baselines and reports of performance workloads
+
+While a workload scenario runs, :py:class:`cfme.utils.smem_memory_monitor.SmemMemoryMonitor`
+appends every sample of the appliance metrics (memory, CPU from ``top``, memory of the processes
+and workers, workers and queued messages) to a :py:class:`MetricStore`, a JSON lines file in the
+results directory of the workload. At the end of the scenario, :py:func:`finish_workload`
+summarizes every series, compares the summary with the baseline of the scenario and writes
+``metrics.jsonl``, ``metrics-summary.json`` and a self-contained ``metrics.html`` (inline SVG
+charts) next to the memory monitor report, so results do not depend on Graphite/Grafana.
+
+Baselines and thresholds are configured in ``cfme_performance.yaml``:
+
+.. code-block:: yaml
+
+    tools:
+        workload_harness:
+            baselines: /path/to/baselines.json  # results/baselines.json by default
+            update_baselines: False  # a scenario without baseline always sets it
+            thresholds:
+                # series (glob), statistic, maximum relative increase
+                - ['appliance.memory.used', 'mean', 0.1]
+"""
+import fnmatch
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import six
+
+from cfme.utils.log import logger
+from cfme.utils.path import results_path
+
+#: (series glob, statistic, maximum relative increase over the baseline)
+DEFAULT_THRESHOLDS = (
+    ('appliance.memory.used', 'mean', 0.1),
+    ('appliance.memory.swap_used', 'max', 0.5),
+    ('appliance.cpu.us', 'mean', 0.25),
+    ('process.*.pss', 'max', 0.15),
+    ('process.*.uss', 'growth', 0.25),
+    ('queue.ready', 'max', 0.5),
+)
+
+_cpu_field = re.compile(r'([0-9\.]+)\s*%?\s*(us|sy|ni|id|wa|hi|si|st)\b')
+_process_measurements = ('rss', 'pss', 'uss', 'vss', 'swap')
+
+
+class MetricStore(object):
+    """Time series appended to a JSON lines file, one line per sample
+
+    Args:
+        path: path of the file
+    """
+    def __init__(self, path):
+        self.path = str(path)
+
+    def append(self, timestamp, values):
+        """Appends a sample
+
+        Args:
+            timestamp: epoch of the sample
+            values: dict of series name -> value
+        """
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'ts': timestamp, 'values': values}, sort_keys=True))
+            f.write('\n')
+
+    def read(self):
+        """Returns the list of ``(timestamp, values)`` samples, skipping a truncated last line"""
+        if not os.path.exists(self.path):
+            return []
+        samples = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    sample = json.loads(line)
+                except ValueError:
+                    logger.warning('Skipping an invalid metric line in %s', self.path)
+                    continue
+                samples.append((sample['ts'], sample['values']))
+        return samples
+
+    def series(self):
+        """Returns an ordered dict of series name -> list of ``(timestamp, value)``"""
+        series = OrderedDict()
+        for timestamp, values in self.read():
+            for name in sorted(values):
+                series.setdefault(name, []).append((timestamp, values[name]))
+        return series
+
+
+def percentile(values, percent):
+    """Returns a percentile of sorted values, linearly interpolated"""
+    if not values:
+        return None
+    position = (len(values) - 1) * percent / 100.0
+    lower, upper = int(math.floor(position)), int(math.ceil(position))
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def statistics(values):
+    """Returns count, min, mean, median, 90th percentile, max, first, last and growth of values
+
+    The growth is the difference of the last and the first value, memory leaks show there.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'min': ordered[0],
+        'mean': sum(values) / float(len(values)),
+        'median': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'max': ordered[-1],
+        'first': values[0],
+        'last': values[-1],
+        'growth': values[-1] - values[0],
+    }
+
+
+def summarize(series):
+    """Returns the :py:func:`statistics` of every series of :py:meth:`MetricStore.series`"""
+    return OrderedDict(
+        (name, statistics([value for _, value in points])) for name, points in series.items())
+
+
+def compare(summary, baseline, thresholds=DEFAULT_THRESHOLDS):
+    """Compares a summary with the baseline one
+
+    Every series matching a threshold and present in both summaries is compared. The change is
+    relative to the absolute baseline value, a change above the threshold is a regression.
+
+    Returns:
+        list of dicts of series, statistic, baseline, value, change, threshold and regression
+    """
+    results = []
+    for name in summary:
+        if name not in baseline:
+            continue
+        for pattern, statistic, threshold in thresholds:
+            if not fnmatch.fnmatchcase(name, pattern):
+                continue
+            value = summary[name].get(statistic)
+            base = baseline[name].get(statistic)
+            if value is None or base is None:
+                continue
+            if base:
+                change = (value - base) / abs(float(base))
+            else:
+                change = 0.0 if value == base else float('inf')
+            results.append({
+                'series': name, 'statistic': statistic, 'baseline': base, 'value': value,
+                'change': change, 'threshold': threshold, 'regression': change > threshold})
+            break
+    return results
+
+
+class Baselines(object):
+    """Summaries of scenarios, from a JSON file, used as the reference of later runs
+
+    Args:
+        path: path of the file
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        try:
+            with open(self.path) as f:
+                self.data = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.data = {}
+
+    def get(self, key):
+        """Returns the baseline of a scenario (dict of version and summary), ``None`` if none"""
+        return self.data.get(key)
+
+    def set(self, key, version, summary):
+        self.data[key] = {'version': str(version), 'summary': summary}
+
+    def save(self):
+        directory = os.path.dirname(self.path) or '.'
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.rename(tmp_path, self.path)
+
+
+def process_samples(process_results, plottime):
+    """Returns the memory (MiB) of the processes at a time, summed by process name
+
+    Args:
+        process_results: ``process_results[name][pid][plottime][measurement]`` of the monitor
+        plottime: time of the sample
+    """
+    samples = {}
+    for name, pids in process_results.items():
+        measurements = [pids[pid][plottime] for pid in pids if plottime in pids[pid]]
+        if not measurements:
+            continue
+        samples['process.{}.count'.format(name)] = len(measurements)
+        for measurement in _process_measurements:
+            samples['process.{}.{}'.format(name, measurement)] = sum(
+                values[measurement] for values in measurements)
+    return samples
+
+
+def appliance_samples(appliance_memory):
+    """Returns the appliance memory (MiB) of one sample of the monitor ``appliance_results``"""
+    samples = {'appliance.memory.{}'.format(key): value
+               for key, value in appliance_memory.items()}
+    if 'swap_total' in appliance_memory and 'swap_free' in appliance_memory:
+        samples['appliance.memory.swap_used'] = (
+            appliance_memory['swap_total'] - appliance_memory['swap_free'])
+    return samples
+
+
+def parse_top_cpu(output):
+    """Returns the CPU usage percentages of the ``Cpu(s)`` line of a ``top -b -n 1`` output
+
+    Both the ``Cpu(s): 13.7%us, 1.2%sy, ...`` and the ``%Cpu(s): 13.7 us, 1.2 sy, ...`` formats
+    are understood.
+    """
+    for line in output.splitlines():
+        if 'Cpu(s)' in line:
+            return {'appliance.cpu.{}'.format(field): float(value)
+                    for value, field in _cpu_field.findall(line)}
+    return {}
+
+
+def parse_queue_states(output):
+    """Returns the number of queued messages by state of a ``state|count`` psql output"""
+    samples = {}
+    for line in output.splitlines():
+        if '|' in line:
+            state, count = [part.strip() for part in line.split('|', 1)]
+            if state and count.isdigit():
+                samples['queue.{}'.format(state)] = int(count)
+    return samples
+
+
+def _svg_chart(points, width=480, height=90):
+    values = [value for _, value in points]
+    times = [timestamp for timestamp, _ in points]
+    low, high = min(values), max(values)
+    start, end = times[0], times[-1]
+    span, value_span = (end - start) or 1, (high - low) or 1
+
+    def xy(timestamp, value):
+        x = (timestamp - start) * (width - 10) / float(span) + 5
+        y = height - 5 - (value - low) * (height - 10) / float(value_span)
+        return '{:.1f},{:.1f}'.format(x, y)
+    polyline = ' '.join(xy(timestamp, value) for timestamp, value in points)
+    return (
+        '<svg width="{w}" height="{h}" xmlns="http://www.w3.org/2000/svg">'
+        '<rect width="{w}" height="{h}" fill="#f8f8f8"/>'
+        '<polyline fill="none" stroke="#0066cc" stroke-width="1.5" points="{p}"/>'
+        '<text x="5" y="12" font-size="10">{hi:.2f}</text>'
+        '<text x="5" y="{ty}" font-size="10">{lo:.2f}</text></svg>').format(
+            w=width, h=height, p=polyline, hi=high, lo=low, ty=height - 2)
+
+
+def _escape(value):
+    return (six.text_type(value).replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;'))
+
+
+def _number(value):
+    if isinstance(value, float):
+        return '{:.2f}'.format(value)
+    return _escape(value)
+
+
+def render_report(title, series, summary, comparison=(), baseline_version=None):
+    """Returns a self-contained HTML report: regressions, then a chart and statistics per series"""
+    columns = ('count', 'min', 'mean', 'median', 'p90', 'max', 'growth')
+    html = [
+        '<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>{}</title>'.format(
+            _escape(title)),
+        '<style>body{font-family:sans-serif;font-size:13px}table{border-collapse:collapse}'
+        'td,th{border:1px solid #ccc;padding:2px 6px;text-align:right}'
+        '.regression{background:#f2dede}</style></head><body>',
+        '<h1>{}</h1>'.format(_escape(title))]
+    if comparison:
+        regressions = [row for row in comparison if row['regression']]
+        html.append('<h2>Comparison with baseline {} ({} regressions)</h2>'.format(
+            _escape(baseline_version), len(regressions)))
+        html.append('<table><tr><th>series</th><th>statistic</th><th>baseline</th>'
+                    '<th>value</th><th>change</th><th>threshold</th></tr>')
+        for row in comparison:
+            html.append(
+                '<tr{}><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{:+.1%}</td>'
+                '<td>{:.0%}</td></tr>'.format(
+                    ' class="regression"' if row['regression'] else '', _escape(row['series']),
+                    row['statistic'], _number(row['baseline']), _number(row['value']),
+                    row['change'], row['threshold']))
+        html.append('</table>')
+    html.append('<h2>Series</h2><table><tr><th>series</th><th>chart</th>{}</tr>'.format(
+        ''.join('<th>{}</th>'.format(column) for column in columns)))
+    for name, points in series.items():
+        html.append('<tr><td>{}</td><td>{}</td>{}</tr>'.format(
+            _escape(name), _svg_chart(points),
+            ''.join('<td>{}</td>'.format(_number(summary[name].get(column, '')))
+                    for column in columns)))
+    html.append('</table></body></html>')
+    return '\n'.join(html)
+
+
+def scenario_key(scenario_data):
+    """Returns the baseline key of a workload scenario"""
+    return '{}/{}'.format(scenario_data['test_dir'], scenario_data['scenario']['name'])
+
+
+def harness_settings():
+    from cfme.utils.conf import cfme_performance
+    return cfme_performance.get('tools', {}).get('workload_harness', {}) or {}
+
+
+def finish_workload(scenario_path, store, scenario_data, version, settings=None):
+    """Summarizes the metrics of a scenario, compares them with its baseline and writes reports
+
+    A scenario without baseline gets the summary as its baseline, the baselines are updated
+    with every run with ``update_baselines``.
+
+    Returns:
+        list of the regressions (see :py:func:`compare`)
+    """
+    settings = harness_settings() if settings is None else settings
+    series = store.series()
+    summary = summarize(series)
+    key = scenario_key(scenario_data)
+    baselines = Baselines(settings.get('baselines') or results_path.join('baselines.json'))
+    baseline = baselines.get(key)
+    comparison = []
+    if baseline:
+        thresholds = [tuple(threshold) for threshold in settings.get('thresholds') or ()]
+        comparison = compare(summary, baseline['summary'], thresholds or DEFAULT_THRESHOLDS)
+    if not baseline or settings.get('update_baselines'):
+        baselines.set(key, version, summary)
+        baselines.save()
+    regressions = [row for row in comparison if row['regression']]
+    shutil.copy(store.path, os.path.join(str(scenario_path), 'metrics.jsonl'))
+    with open(os.path.join(str(scenario_path), 'metrics-summary.json'), 'w') as f:
+        json.dump({'scenario': key, 'version': str(version), 'summary': summary,
+                   'baseline_version': baseline['version'] if baseline else None,
+                   'comparison': comparison}, f, indent=1)
+    with open(os.path.join(str(scenario_path), 'metrics.html'), 'w') as f:
+        f.write(render_report(
+            '{} ({})'.format(scenario_data['test_name'], version), series, summary, comparison,
+            baseline['version'] if baseline else None))
+    for row in regressions:
+        logger.warning('Performance regression in %s: %s %s is %.2f, baseline %.2f (%+.1f%%)',
+                       key, row['series'], row['statistic'], row['value'], row['baseline'],
+                       row['change'] * 100)
+    return regressions
@@ -1,4 +1,7 @@
-from bottle import request, route, run, template
+from bottle import request, response, route, run, template
+from StringIO import StringIO
+import gzip
+import json
 import os
 import subprocess
 import tempfile
@@ -50,6 +53,13 @@ class Log(object):
         if self.running:
             return os.path.getsize(self.f.name)
 
+    def get_slice(self, start, end=None):
+        with open(self.f.name, "rb") as infile:
+            infile.seek(start)
+            if end is None:
+                return infile.read()
+            return infile.read(max(end - start, 0))
+
 
 Loggers = {}
 
@@ -131,6 +141,32 @@ def get(name):
     return Loggers[name].get()
 
 
+def _encoded(data):
+    if 'gzip' not in request.headers.get('Accept-Encoding', ''):
+        return data
+    buf = StringIO()
+    gz = gzip.GzipFile(fileobj=buf, mode='wb')
+    gz.write(data)
+    gz.close()
+    response.set_header('Content-Encoding', 'gzip')
+    return buf.getvalue()
+
+
+@route('/offsets')
+def offsets():
+    """Current sizes of the logs, to be passed to /slice later"""
+    response.content_type = 'application/json'
+    return json.dumps(
+        dict((name, os.path.getsize(logger.f.name)) for name, logger in Loggers.items()))
+
+
+@route('/slice/<name>/<start:int>')
+def get_slice(name, start):
+    """Content of a log from the start offset up to the end (or the end query parameter)"""
+    end = request.query.get('end')
+    return _encoded(Loggers[name].get_slice(start, int(end) if end else None))
+
+
 @route('/reset/<name>')
 def reset(name):
     Loggers[name].reset()
@@ -2,36 +2,29 @@
 import argparse
 import datetime
 from datetime import timedelta
-import re
 import sys
 from collections import namedtuple
 from operator import attrgetter
-from multiprocessing import Manager, Pool
 
 import pytz
 from tabulate import tabulate
-from wrapanapi.exceptions import VMInstanceNotFound
 
 from cfme.utils.appliance import DummyAppliance
 from cfme.utils.log import logger, add_stdout_handler
 from cfme.utils.path import log_path
-from cfme.utils.providers import get_mgmt, list_providers, ProviderFilter
+from cfme.utils.providers import list_providers, ProviderFilter
+from cfme.utils.vm_inventory import VmInventory, write_json
 
 # Constant strings for the report
 PASS = 'PASS'
 FAIL = 'FAIL'
 NULL = '--'
 
-VmProvider = namedtuple('VmProvider', 'provider_key, vm')
-VmData = namedtuple('VmData', 'provider_key, vm, age')
 VmReport = namedtuple('VmReport', 'provider_key, name, age, status, result')
 
 # log to stdout too
 add_stdout_handler(logger)
 
-# manager for queues that can be shared
-manager = Manager()
-
 
 def parse_cmd_line():
     parser = argparse.ArgumentParser(argument_default=None)
@@ -49,6 +42,10 @@ def parse_cmd_line():
     parser.add_argument('--outfile', dest='outfile',
                         default=log_path.join('cleanup_old_vms.log').strpath,
                         help='outfile to list ')
+    parser.add_argument('--json-outfile', dest='json_outfile', default=None,
+                        help='Also write the scanned VMs as JSON lines to this file')
+    parser.add_argument('--per-provider', dest='per_provider', default=4, type=int,
+                        help='Number of concurrent VM queries against a single provider')
     parser.add_argument('text_to_match', nargs='*', default=['^test_', '^jenkins', '^i-'],
                         help='Regex in the name of vm to be affected, can be use multiple times'
                              ' (Defaults to \'^test_\' and \'^jenkins\')')
@@ -57,168 +54,44 @@ def parse_cmd_line():
     return args
 
 
-def match(matchers, vm_name):
-    """Check whether the given vm name matches any of the regex match objects
-
-    Args:
-        matchers (list): A list of regex objects with match() method
-        vm_name (string): The name of the VM to compare
-    Returns:
-        bool: whether or not the vm_name is matched by ANY of the regex in the list
-    """
-    for matcher in matchers:
-        if matcher.match(vm_name):
-            return True
-    else:
-        return False
-
-
-def pool_manager(func, arg_list):
-    """Create a process pool and join the processes via apply_async
-
-    Notes:
-        Use Manager.Queue for any queues in the arg_list tuples.
-        BLOCKS by joining
-
-    # TODO put this into some utility library and handle kwargs, take pool size arg
-    Args:
-        func (method): A function to parallel process
-        arg_list (list): a list of arg tuples
-
-    Returns:
-        list of the return values from apply_async
-    """
-    # TODO increase pool size
-    proc_pool = Pool(8)
-    proc_results = []
-    for arg_tuple in arg_list:
-        proc_results.append(proc_pool.apply_async(func, args=arg_tuple))
-    proc_pool.close()
-    proc_pool.join()
-
-    # Check for exceptions since they're captured
-    # Don't care about non-exception results since all non-exception results are in the queues
-    results = []
-    for proc_result in proc_results:
-        try:
-            result = proc_result.get()
-        except Exception as ex:
-            result = ex
-        finally:
-            if isinstance(result, Exception):
-                logger.exception('Exception during function call %r', func.__name__)
-            results.append(result)
-
-    return results
-
-
-def scan_provider(provider_key, matchers, match_queue, scan_failure_queue):
-    """
-    Process the VMs on a given provider, comparing name and creation time.
-    Append vms meeting criteria to vms_to_delete
+def scan_vm(record, delta, now):
+    """Classify a scanned VM by age
 
     Args:
-        provider_key (string): the provider key from yaml
-        matchers (list): A list of regex objects with match() method
-        match_queue (Queue.Queue): MP queue to hold VMs matching age requirement
-        scan_failure_queue (Queue.Queue): MP queue to hold vms that we could not compare age
-    Returns:
-        None: Uses the Queues to 'return' data
-    """
-    logger.info('%r: Start scan for vm text matches', provider_key)
-    try:
-        vm_list = get_mgmt(provider_key).list_vms()
-    except Exception:  # noqa
-        scan_failure_queue.put(VmReport(provider_key, FAIL, NULL, NULL, NULL))
-        logger.exception('%r: Exception listing vms', provider_key)
-        return
-
-    text_matched_vms = [vm for vm in vm_list if match(matchers, vm.name)]
-    for vm in text_matched_vms:
-        match_queue.put(VmProvider(provider_key, vm.name))
-
-    non_text_matching = set(vm_list) - set(text_matched_vms)
-    logger.info(
-        '%r: NOT matching text filters: %r', provider_key, [vm.name for vm in non_text_matching])
-    logger.info(
-        '%r: MATCHED text filters: %r', provider_key, [vm.name for vm in text_matched_vms])
-
-
-def scan_vm(provider_key, vm_name, delta, match_queue, scan_failure_queue):
-    """Scan an individual VM for age
-
-    Args:
-        vm_name (str) Name of the VM to scan
+        record (VmRecord): the inventory record of the VM
         delta (datetime.timedelta) The timedelta to compare age against for matches
-        match_queue (Queue.Queue): MP queue to hold VMs matching age requirement
-        scan_failure_queue (Queue.Queue): MP queue to hold vms that we could not compare age
+        now (datetime.datetime): the reference time, tz aware
 
     Returns:
-        None: Uses the Queues to 'return' data
+        VmReport if the VM could not be scanned, the VM age if it is older than delta,
+        ``None`` otherwise
     """
-    now = datetime.datetime.now(tz=pytz.UTC)
-    # Nested exceptions to try and be safe about the scanned values and to get complete results
-    failure = False
-    status = NULL
-    logger.info('%r: Scan VM %r...', provider_key, vm_name)
-    try:
-        vm = get_mgmt(provider_key).get_vm(vm_name)
-        # Localize to UTC
-        vm_creation_time = vm.creation_time
-    except VMInstanceNotFound:
-        logger.exception('%r: could not locate VM %s', provider_key, vm_name)
-        failure = True
-    except Exception:  # noqa
-        failure = True
-        logger.exception('%r: Exception getting creation time for %r', provider_key, vm_name)
+    if record.name is None:
+        # listing the provider failed
+        return VmReport(record.provider_key, FAIL, NULL, NULL, NULL)
+    if record.creation_time is None:
         # This VM must have some problem, include in report even though we can't delete
-        try:
-            status = vm.state
-        except Exception:  # noqa
-            failure = True
-            logger.exception('%r: Exception getting status for %r', provider_key, vm_name)
-            status = NULL
-    finally:
-        if failure:
-            scan_failure_queue.put(VmReport(provider_key, vm_name, FAIL, status, NULL))
-            return
-
-    vm_delta = now - vm_creation_time
-    logger.info('%r: VM %r age: %s', provider_key, vm_name, vm_delta)
-    data = VmData(provider_key, vm_name, str(vm_delta))
+        # (a VM whose state could not be read is still deleted by age)
+        return VmReport(record.provider_key, record.name, FAIL, record.state or NULL, NULL)
 
-    # test age to determine which queue it goes in
+    vm_delta = now - record.creation_time
+    logger.info('%r: VM %r age: %s', record.provider_key, record.name, vm_delta)
     if delta < vm_delta:
-        match_queue.put(data)
-    else:
-        logger.info('%r: VM %r did not match age requirement', provider_key, vm.name)
+        return vm_delta
+    logger.info('%r: VM %r did not match age requirement', record.provider_key, record.name)
 
 
-def delete_vm(provider_key, vm_name, age, result_queue):
-    """ Delete the given vm_name from the provider via REST interface
+def delete_vm(record, age):
+    """ Delete the VM of the given inventory record from its provider
 
     Args:
-        provider_key (string): name of the provider from yaml
-        vm_name (string): name of the vm to delete
+        record (VmRecord): the inventory record of the VM to delete
         age (string): age of the VM to delete
-        result_queue (Queue.Queue): MP Queue to store the VmReport tuple on delete result
     Returns:
-        None: Uses the Queues to 'return' data
+        VmReport: the delete result
     """
-    # diaper exceptions here to handle anything and continue.
-    try:
-        vm = get_mgmt(provider_key).get_vm(vm_name)
-        status = vm.state
-    except VMInstanceNotFound:
-        logger.exception('%r: could not locate VM %s', provider_key, vm_name)
-        # no reason to continue after this, nothing to try and delete
-        result_queue.put(VmReport(provider_key, vm_name, None, None, FAIL))
-        return
-    except Exception:  # noqa
-        status = FAIL
-        logger.exception('%r: Exception getting status for %r', provider_key, vm_name)
-        # keep going, try to delete anyway
-
+    provider_key, vm = record.provider_key, record.vm
+    status = record.state or FAIL
     logger.info("%r: Deleting %r, age: %r, status: %r", provider_key, vm.name, age, status)
     try:
         # delete vm returns boolean based on success
@@ -237,19 +110,18 @@ def delete_vm(provider_key, vm_name, age, result_queue):
             result = FAIL  # set this here to cover anywhere the exception could happen
         logger.exception('%r: Exception during delete: %r, double check result: %r',
                          provider_key, vm.name, result)
-    finally:
-        result_queue.put(VmReport(provider_key, vm.name, age, status, result))
+    return VmReport(provider_key, vm.name, age, status, result)
 
 
-def cleanup_vms(texts, max_hours=24, providers=None, tags=None, prompt=True):
+def cleanup_vms(texts, max_hours=24, providers=None, tags=None, prompt=True,
+                outfile=None, json_outfile=None, per_provider=4):
     """
     Main method for the cleanup process
-    Generates regex match objects
     Checks providers for cleanup boolean in yaml
-    Checks provider connectivity (using ping)
-    Threads process_provider_vms to build list of vms to delete
+    Scans all providers concurrently for VMs matching the name regexes, using the
+    :py:class:`cfme.utils.vm_inventory.VmInventory` engine
     Prompts user to continue with delete
-    Threads deleting of the vms
+    Deletes the vms concurrently
 
     Args:
         texts (list): List of regex strings to match with
@@ -257,12 +129,15 @@ def cleanup_vms(texts, max_hours=24, providers=None, tags=None, prompt=True):
         providers (list): List of provider keys to scan and cleanup
         tags (list): List of tags to filter providers by
         prompt (bool): Whether or not to prompt the user before deleting vms
+        outfile (str): Path of the report file to append to
+        json_outfile (str): Path of a file to write the scanned VMs to as JSON lines
+        per_provider (int): Number of concurrent VM queries against a single provider
     Returns:
         int: return code, 0 on success, otherwise raises exception
     """
     logger.info('Matching VM names against the following case-insensitive strings: %r', texts)
-    # Compile regex, strip leading/trailing single quotes from cli arg
-    matchers = [re.compile(text.strip("'"), re.IGNORECASE) for text in texts]
+    # strip leading/trailing single quotes from cli arg
+    texts = [text.strip("'") for text in texts]
 
     # setup provider filter with cleanup (default), tags, and providers (from cli opts)
     filters = [ProviderFilter(required_fields=[('cleanup', True)])]
@@ -279,34 +154,23 @@ def cleanup_vms(texts, max_hours=24, providers=None, tags=None, prompt=True):
     logger.info('Potential providers for cleanup, filtered with given tags and provider keys: \n%s',
                 '\n'.join(providers_to_scan))
 
-    # scan providers for vms with name matches
-    # manager = Manager()
-    text_match_queue = manager.Queue()
-    scan_fail_queue = manager.Queue()
-    provider_scan_args = [
-        (provider_key, matchers, text_match_queue, scan_fail_queue)
-        for provider_key in providers_to_scan]
-    pool_manager(scan_provider, provider_scan_args)
-
-    text_matched = []
-    while not text_match_queue.empty():
-        text_matched.append(text_match_queue.get())
-
-    # scan vms for age matches
-    age_match_queue = manager.Queue()
-    vm_scan_args = [
-        (provider_key, vm_name, timedelta(hours=int(max_hours)), age_match_queue, scan_fail_queue)
-        for provider_key, vm_name in text_matched]
-    pool_manager(scan_vm, vm_scan_args)
+    # scan providers for vms with name matches, reading state and age in the same pass
+    inventory = VmInventory(providers_to_scan, name_filters=texts, per_provider=per_provider)
+    scanned = list(inventory.scan(attributes=('state', 'creation_time')))
+    if json_outfile:
+        with open(json_outfile, 'w') as f:
+            write_json(scanned, f)
 
+    delta = timedelta(hours=int(max_hours))
+    now = datetime.datetime.now(tz=pytz.UTC)
     vms_to_delete = []
-    while not age_match_queue.empty():
-        vms_to_delete.append(age_match_queue.get())
-
     scan_fail_vms = []
-    # add the scan failures into deleted vms for reporting sake
-    while not scan_fail_queue.empty():
-        scan_fail_vms.append(scan_fail_queue.get())
+    for record in scanned:
+        result = scan_vm(record, delta, now)
+        if isinstance(result, VmReport):
+            scan_fail_vms.append(result)
+        elif result is not None:
+            vms_to_delete.append((record, str(result)))
 
     if vms_to_delete and prompt:
         yesno = raw_input('Delete these VMs? [y/N]: ')
@@ -317,18 +181,22 @@ def cleanup_vms(texts, max_hours=24, providers=None, tags=None, prompt=True):
     # initialize this even if we don't have anything to delete, for report consistency
     deleted_vms = []
     if vms_to_delete:
-        delete_queue = manager.Queue()
-        delete_vm_args = [(provider_key, vm_name, age, delete_queue)
-                          for provider_key, vm_name, age in vms_to_delete]
-        pool_manager(delete_vm, delete_vm_args)
-
-        while not delete_queue.empty():
-            deleted_vms.append(delete_queue.get())  # Each item is a VmReport tuple
-
+        ages = {id(record): age for record, age in vms_to_delete}
+
+        def _delete(record):
+            age = ages[id(record)]
+            try:
+                return delete_vm(record, age)
+            except Exception:  # noqa
+                # e.g. the double check of a failed delete, list it as a failed deletion
+                logger.exception('%r: Failed to delete %r', record.provider_key, record.name)
+                return VmReport(record.provider_key, record.name, age, record.state or FAIL, FAIL)
+
+        deleted_vms.extend(inventory.map(_delete, [record for record, _ in vms_to_delete]))
     else:
         logger.info('No VMs to delete.')
 
-    with open(args.outfile, 'a') as report:
+    with open(outfile or log_path.join('cleanup_old_vms.log').strpath, 'a') as report:
         report.write('## VM/Instances deleted via:\n'
                      '##   text matches: {}\n'
                      '##   age matches: {}\n'
@@ -344,4 +212,4 @@ def cleanup_vms(texts, max_hours=24, providers=None, tags=None, prompt=True):
 if __name__ == "__main__":
     args = parse_cmd_line()
     sys.exit(cleanup_vms(args.text_to_match, args.max_hours, args.providers, args.tags,
-                         args.prompt))
+                         args.prompt, args.outfile, args.json_outfile, args.per_provider))
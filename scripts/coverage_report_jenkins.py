@@ -17,8 +17,9 @@ from six.moves.urllib.parse import urlsplit, urlunsplit
 from cfme.test_framework.sprout.client import SproutClient
 from cfme.utils.appliance import IPAppliance
 from cfme.utils.conf import credentials, env
+from cfme.utils.coverage_merger import CoverageMerger
 from cfme.utils.log import logger, add_stdout_handler
-from cfme.utils.path import log_path
+from cfme.utils.path import log_path, scripts_data_path
 from cfme.utils.quote import quote
 from cfme.utils.version import Version
 
@@ -619,7 +620,7 @@ def setup_appliance_for_merger(appliance, ssh):
 
     # Upload the merger
     logger.info('Installing coverage merger')
-    appliance.coverage._upload_coverage_merger()
+    ssh.put_file(scripts_data_path.join('coverage', 'coverage_merger.rb').strpath, CFME_DIR)
 
     ssh_run_cmd(
         ssh=ssh,
@@ -757,8 +758,50 @@ def download_and_merge_coverage_data(ssh, builds, jenkins_data, wave_size):
             )
 
 
+def merge_coverage_data_locally(ssh, builds, jenkins_data, coverage_dir):
+    """Download and merge coverage data on this host.
+
+    Streams the coverage tarballs of the builds from jenkins into a local
+    :py:class:`cfme.utils.coverage_merger.CoverageMerger` one at a time, then uploads
+    the single merged .resultset.json to the appliance, where it looks like the result
+    set of one process.   Running :py:func:`merge_coverage_data` afterwards then only has
+    to add the non-covered files and build the HTML report.
+
+    Args:
+        ssh:  ssh object
+        builds:  jenkins job builds from which to pull coverage data.
+        jenkins_data:  Named tupple with these attributes:  url, user, token, client
+        coverage_dir:  Directory on the appliance to put the merged data in.
+
+    Returns:
+        Nothing
+    """
+    merger = CoverageMerger()
+    for build in builds:
+        logger.info('Merging the coverage data from build %s', build.number)
+        download_url = '{}/job/{}/{}/artifact/{}'.format(
+            jenkins_data.url, build.job, build.number, build.coverage_archive)
+        merger.add_tarball(
+            download_url,
+            verify=False,
+            auth=HTTPBasicAuth(jenkins_data.user, jenkins_data.token))
+    local_resultset = log_path.join('coverage-merged', '.resultset.json')
+    merger.write(local_resultset.strpath)
+    logger.info('Locally merged coverage: %s%%', merger.percent_covered())
+
+    merged_data_dir = py.path.local(coverage_dir).join('/1/1')
+    ssh_run_cmd(
+        ssh=ssh,
+        cmd='mkdir -p {}'.format(merged_data_dir),
+        error_msg='Could not make merged data dir: {}'.format(merged_data_dir))
+    ssh.put_file(local_resultset.strpath, merged_data_dir.join('.resultset.json').strpath)
+    merge_coverage_data(
+        ssh=ssh,
+        coverage_dir=coverage_dir)
+
+
 def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenkins_jobs,
-        wave_size):
+        wave_size, merge_locally=True):
     """ Aggregates code coverage data across the builds of specified jenkins jobs
 
     Given the version of the specified appliance, find all builds for the specified jenkins
@@ -773,6 +816,7 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
         jenkins_token:  Jenkins user authentication token.
         jenkins_jobs:  Jenkins job names from which to aggregate coverage data
         wave_size:  How many coverage tarballs to extract at a time when merging
+        merge_locally:  Merge the coverage data on this host instead of in waves on the appliance
 
     Returns:
         Nothing
@@ -824,11 +868,18 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
     # Merge data and do sonar scan
     with appliance.ssh_client as ssh:
         setup_appliance_for_merger(appliance, ssh)
-        download_and_merge_coverage_data(
-            ssh=ssh,
-            builds=eligible_builds,
-            jenkins_data=jenkins_data,
-            wave_size=wave_size)
+        if merge_locally:
+            merge_coverage_data_locally(
+                ssh=ssh,
+                builds=eligible_builds,
+                jenkins_data=jenkins_data,
+                coverage_dir=COVERAGE_DIR)
+        else:
+            download_and_merge_coverage_data(
+                ssh=ssh,
+                builds=eligible_builds,
+                jenkins_data=jenkins_data,
+                wave_size=wave_size)
         pull_merged_coverage_data(
             ssh=ssh,
             coverage_dir=COVERAGE_DIR)
@@ -856,9 +907,11 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
 @click.option('--jenkins-token', 'jenkins_token', default=None,
     help='Jenkins user authentication token')
 @click.option('--wave-size', 'wave_size', default=10,
-    help='How many coverage tarballs to extract at a time when merging')
+    help='How many coverage tarballs to extract at a time when merging on the appliance')
+@click.option('--merge-locally/--merge-on-appliance', 'merge_locally', default=True,
+    help='Merge the coverage data on this host (default) or in waves on the appliance')
 def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_token, appliance_ip,
-        appliance_version, wave_size):
+        appliance_version, wave_size, merge_locally):
     """Aggregate coverage data from jenkins job(s) and upload to sonarqube"""
     if appliance_ip is None and appliance_version is None:
         ValueError('Must specify either --appliance-ip or --find-appliance')
@@ -890,7 +943,8 @@ def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_tok
                     jenkins_user,
                     jenkins_token,
                     jenkins_jobs,
-                    wave_size))
+                    wave_size,
+                    merge_locally))
 
         finally:
             with diaper:
@@ -904,7 +958,8 @@ def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_tok
                 jenkins_user,
                 jenkins_token,
                 jenkins_jobs,
-                wave_size))
+                wave_size,
+                merge_locally))
 
 
 if __name__ == '__main__':
@@ -1,11 +1,12 @@
 #!/usr/bin/env python2
 import argparse
+import sys
 from tabulate import tabulate
-from multiprocessing import Process, Queue
 
 from cfme.utils.appliance import DummyAppliance
 from cfme.utils.path import log_path
-from cfme.utils.providers import get_mgmt, ProviderFilter, list_providers
+from cfme.utils.providers import ProviderFilter, list_providers
+from cfme.utils.vm_inventory import VmInventory, write_csv, write_json
 
 
 # Constant for report
@@ -32,57 +33,20 @@ def parse_cmd_line():
                         action='append',
                         help='Provider keys, can be user multiple times. If none are given '
                              'the script will use all providers from cfme_data or match tags')
+    parser.add_argument('--format',
+                        default='table',
+                        choices=['table', 'json', 'csv'],
+                        help='Output format, json (one object per line) and csv are streamed '
+                             'to stdout as VMs are processed')
+    parser.add_argument('--per-provider',
+                        default=4,
+                        type=int,
+                        help='Number of concurrent VM queries against a single provider')
 
     args = parser.parse_args()
     return args
 
 
-def list_vms(provider_key, output_queue):
-    """
-    List all the vms/instances on the given provider key
-    Build list of lists with basic vm info: [[provider, vm, status, age, type], [etc]]
-    :param provider_key: string provider key
-    :param output_queue: a multiprocessing.Queue object to add results to
-    :return: list of lists of vms and basic statistics
-    """
-    output_list = []
-
-    print('Listing VMS on provider {}'.format(provider_key))
-    provider = get_mgmt(provider_key)
-    # TODO thread metadata collection for further speed improvements
-    for vm in provider.list_vms():
-        # Init these meta values in case they fail to query
-        status, creation, vm_type = None, None, None
-        try:
-            print('Collecting metadata for VM {} on provider {}'.format(vm.name, provider_key))
-            status = vm.state
-            creation = vm.creation_time
-
-            # different provider types implement different methods to get instance type info
-            if hasattr(vm, 'type'):
-                vm_type = vm.type
-            else:
-                try:
-                    vm_type = vm.get_hardware_configuration()
-                except (AttributeError, NotImplementedError):
-                    vm_type = '--'
-
-        except Exception as ex:
-            print('Exception during provider processing on {}: {}'
-                  .format(provider_key, ex.message))
-            continue
-        finally:
-            # Add the VM to the list anyway, we just might not have all metadata
-            output_list.append([provider_key,
-                                vm.name,
-                                status or NULL,
-                                creation or NULL,
-                                str(vm_type) or NULL])
-
-    output_queue.put(output_list)
-    return
-
-
 if __name__ == "__main__":
     args = parse_cmd_line()
     # providers as a set when processing tags to ensure unique entries
@@ -96,24 +60,25 @@ if __name__ == "__main__":
     with DummyAppliance('5.10.0.0'):
         providers = [prov.key for prov in list_providers(filters, use_global_filters=False)]
 
-    queue = Queue()  # for MP output
-    proc_list = [
-        Process(target=list_vms, args=(provider, queue), name='list_vms:{}'.format(provider))
-        for provider in providers
-    ]
-    for proc in proc_list:
-        proc.start()
-    for proc in proc_list:
-        proc.join()
+    inventory = VmInventory(providers, per_provider=args.per_provider)
+    records = inventory.scan(attributes=('state', 'creation_time', 'type'))
 
-    print('Done processing providers, assembling report...')
+    if args.format == 'json':
+        write_json(records, sys.stdout)
+        sys.exit(0)
+    elif args.format == 'csv':
+        write_csv(records, sys.stdout)
+        sys.exit(0)
+
+    output_data = [
+        [record.provider_key,
+         record.name or NULL,
+         record.state or NULL,
+         record.creation_time or NULL,
+         str(record.type or NULL)]
+        for record in records]
 
-    # Now pull all the results off of the queue
-    # Stacking the generator this way is equivalent to using list.extend instead of list.append
-    # Need to check queue.empty since a call to get will raise an Empty exception
-    output_data = []
-    while not queue.empty():
-        output_data.extend(queue.get())
+    print('Done processing providers, assembling report...')
 
     header = '''## VM/Instances on providers matching:
 ## providers: {}
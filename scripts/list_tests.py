@@ -5,6 +5,10 @@ import os.path
 import sys
 import re
 import six
+from py.path import local
+
+from cfme.utils.collection_index import CollectionIndex, file_digest
+from cfme.utils.path import project_path
 
 if len(sys.argv) == 1:
     print("""
@@ -12,11 +16,34 @@ Invoke either by supplying a path or a file and optionally a string to find in a
 
 e.g. list_test . provision
 e.g. list_test file.py
+
+Tests of files in the last collection index (pytest --collection-index) are listed as collected,
+with their parameters, other files are scanned for test functions.
 """)
     sys.exit(1)
 
 
+index = CollectionIndex.latest()
+
+
+def from_index(filename, exp=None):
+    """Prints the tests of the file from the collection index, False if it is not indexed"""
+    if index is None:
+        return False
+    path = local(filename)
+    items = index.entry(path.relto(project_path) or path.strpath, file_digest(path))
+    if items is None:
+        return False
+    for item in items:
+        name = item['nodeid'].split('::')[-1]
+        if item['selected'] and (not exp or exp in name.split('[')[0]):
+            print("{} :: {}".format(filename, name))
+    return True
+
+
 def parser(filename, exp=None):
+    if from_index(filename, exp):
+        return
     try:
         with open(filename, 'r') as f:
             data = f.read()
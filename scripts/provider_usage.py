@@ -1,11 +1,12 @@
 #! /usr/bin/env python2
 from collections import defaultdict
-from cfme.utils.providers import get_mgmt
 from cfme.utils.conf import cfme_data, jenkins
 from cfme.utils import appliance
+from cfme.utils.vm_inventory import VmInventory, write_json
 from jinja2 import Environment, FileSystemLoader
 from cfme.utils.path import template_path
 import json
+import re
 
 li = cfme_data['management_systems']
 users = jenkins['nicks']
@@ -13,11 +14,12 @@ users = jenkins['nicks']
 data = defaultdict(dict)
 
 
-def process_vm(vm, mgmt, user, prov):
+def process_vm(record, user):
+    vm, prov = record.vm, record.provider_key
     print("Inspecting: {} on {}".format(vm.name, prov))
-    if vm.is_stopped:
+    if record.error is not None or vm.is_stopped:
         return
-    ip = vm.ip
+    ip = record.ip
     if ip:
         with appliance.IPAppliance(hostname=ip) as app:
             try:
@@ -33,37 +35,39 @@ def process_vm(vm, mgmt, user, prov):
 
                 for provider in providers:
                     prov_name = prov_key_db.get(provider, 'Unknown ({})'.format(prov))
-                    if prov_name in data[user]:
-                        data[user][prov_name].append("{} ({})".format(vm, prov))
-                    else:
-                        data[user][prov_name] = ["{} ({})".format(vm, prov)]
+                    # setdefault keeps this safe when VMs are processed concurrently
+                    data[user].setdefault(prov_name, []).append("{} ({})".format(vm, prov))
 
             except Exception:
                 pass
 
 
-def process_provider(mgmt, prov):
-    try:
-        vms = mgmt.list_vms()
-    except Exception:
-        return
-
-    for vm in vms:
-        for user in users:
-            if user in vm.name:
-                process_vm(vm, mgmt, user, prov)
+def process_record(record):
+    for user in users:
+        if user in record.name:
+            process_vm(record, user)
 
 
 prov_key_db = {}
+provider_keys = []
 
 
 for prov in li:
     ip = li[prov].get('ipaddress')
     prov_key_db[ip] = prov
     if li[prov]['type'] not in ['ec2', 'scvmm']:
-        mgmt = get_mgmt(prov)
-        print("DOING {}".format(prov))
-        process_provider(mgmt, prov)
+        provider_keys.append(prov)
+
+# only VMs whose name contains one of the user nicks are of interest
+inventory = VmInventory(provider_keys, name_filters=['.*{}'.format(re.escape(user))
+                                                     for user in users])
+records = [record for record in inventory.scan(attributes=('ip', ))
+           if record.name is not None]
+with open('provider_usage_vms.json', 'w') as f:
+    write_json(records, f)
+# map() runs the appliance inspections concurrently, the results are collected in data
+for _ in inventory.map(process_record, records):
+    pass
 
 with open('provider_usage.json', 'w') as f:
     json.dump(data, f)
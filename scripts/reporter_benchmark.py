@@ -0,0 +1,115 @@
+#!/usr/bin/env python2
+"""Benchmark of the artifactor report generation on a synthetic session
+
+Generates the artifacts of a session with ``--tests`` tests (20000 by default) spread over
+modules, with short tracebacks for the failing ones, then times building the report with the
+incremental reporter and, unless ``--skip-legacy`` is passed, with the legacy reporter.
+
+Example usage:
+
+    ``scripts/reporter_benchmark.py --tests 20000 --output /tmp/report-bench``
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from artifactor.plugins.incremental_reporter import ReportData
+from artifactor.plugins.reporter import ReporterBase
+
+OUTCOMES = [('passed', False)] * 80 + [('failed', False)] * 12 + [('skipped', False)] * 8
+
+
+def generate_artifacts(artifact_dir, tests, tests_per_module, seed):
+    rand = random.Random(seed)
+    artifacts = {}
+    for i in range(tests):
+        location = 'cfme/tests/area{}/test_module{}.py'.format(
+            i // (tests_per_module * 10), i // tests_per_module)
+        name = 'test_case{}[provider{}]'.format(i % tests_per_module, i % 7)
+        outcome, xfail = rand.choice(OUTCOMES)
+        start = 1500000000 + i * 10
+        test = {
+            'test_module': location,
+            'test_name': name,
+            'slaveid': 'gw{}'.format(i % 16),
+            'start_time': start,
+            'finish_time': start + rand.randint(1, 600),
+            'statuses': {
+                'setup': ('passed', False),
+                'call': (outcome, xfail),
+                'teardown': ('passed', False)},
+            'files': [],
+        }
+        if outcome == 'failed':
+            tb_file = os.path.join(artifact_dir, 'tb{}.log'.format(i))
+            with open(tb_file, 'w') as f:
+                f.write('AssertionError: expected {} got {}\n  see http://appliance/{}'.format(
+                    i, i + 1, i))
+            test['files'].append({
+                'file_type': 'short_tb', 'os_filename': tb_file, 'group_id': 'pytest',
+                'description': 'Short traceback', 'display_type': 'danger',
+                'display_glyph': 'fire'})
+        artifacts['{}/{}'.format(location, name)] = test
+    return artifacts
+
+
+def run_incremental(artifacts, artifact_dir):
+    report_data = ReportData()
+    log_dir = artifact_dir.rstrip('/') + '/'
+    started = time.time()
+    for test_ident, test in artifacts.items():
+        report_data.record(test['test_module'], test['test_name']).update(test, log_dir)
+    updated = time.time()
+    report_data.flush(artifact_dir)
+    return updated - started, time.time() - updated
+
+
+def run_legacy(artifacts, artifact_dir):
+    started = time.time()
+    ReporterBase()._run_report(artifacts, artifact_dir)
+    return time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tests', type=int, default=20000, help='Number of tests to generate')
+    parser.add_argument('--tests-per-module', type=int, default=50,
+                        help='Number of tests in every module')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the outcome generator')
+    parser.add_argument('--output', default=None,
+                        help='Directory to write the reports to, a temporary one by default')
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='Do not time the legacy reporter')
+    args = parser.parse_args()
+
+    artifact_dir = args.output or tempfile.mkdtemp(prefix='reporter-benchmark-')
+    if not os.path.isdir(artifact_dir):
+        os.makedirs(artifact_dir)
+    try:
+        artifacts = generate_artifacts(
+            artifact_dir, args.tests, args.tests_per_module, args.seed)
+        print('Generated {} tests in {}'.format(len(artifacts), artifact_dir))
+
+        update_time, flush_time = run_incremental(artifacts, artifact_dir)
+        data_size = sum(
+            os.path.getsize(os.path.join(dirpath, filename))
+            for dirpath, _, filenames in os.walk(os.path.join(artifact_dir, 'report_data'))
+            for filename in filenames)
+        print('incremental: {:.2f}s updating records, {:.2f}s writing {:.1f} MB of data'.format(
+            update_time, flush_time, data_size / 1024.0 / 1024.0))
+
+        if not args.skip_legacy:
+            legacy_time = run_legacy(artifacts, artifact_dir)
+            report_size = os.path.getsize(os.path.join(artifact_dir, 'report.html'))
+            print('legacy: {:.2f}s for one build, {:.1f} MB of HTML'.format(
+                legacy_time, report_size / 1024.0 / 1024.0))
+    finally:
+        if args.output is None:
+            shutil.rmtree(artifact_dir)
+
+
+if __name__ == '__main__':
+    main()
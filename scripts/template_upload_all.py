@@ -30,10 +30,23 @@ from miq_version import TemplateName
 
 from cfme.utils.conf import cfme_data
 from cfme.utils.log import logger, add_stdout_handler
+from cfme.utils.template.image_cache import image_cache
+from cfme.utils.template.upload_runner import build_uploaders, report, run_uploads
 
 CFME_BREW_ID = "cfme"
 NIGHTLY_MIQ_ID = "manageiq"
 
+#: Legacy upload script of every provider type, also the keys of browse_directory
+TYPE_MODULES = {
+    'openstack': 'template_upload_rhos',
+    'rhevm': 'template_upload_rhevm',
+    'virtualcenter': 'template_upload_vsphere',
+    'scvmm': 'template_upload_scvmm',
+    'gce': 'template_upload_gce',
+    'ec2': 'template_upload_ec2',
+    'openshift': 'template_upload_openshift',
+}
+
 add_stdout_handler(logger)
 
 
@@ -50,7 +63,7 @@ def parse_cmd_line():
                         default=None)
     parser.add_argument('--provider-type', dest='provider_type',
                         help='Type of provider to upload to (virtualcenter, rhevm,'
-                             'openstack, gce, scvmm)',
+                             'openstack, gce, scvmm), comma separated list or all',
                         default=None)
     parser.add_argument('--provider-version', dest='provider_version',
                         help='Version of chosen provider',
@@ -59,6 +72,9 @@ def parse_cmd_line():
                         help='local yaml file path, to use local provider_data & not conf/cfme_data'
                              'to be useful for template upload/deploy by non cfmeqe',
                         default=None)
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=8,
+                        help='Number of uploads running at the same time, per provider type '
+                             'limits are read from cfme_data.template_upload.concurrency')
     parser.add_argument('--print-name-only', dest='print_name_only', action="store_true",
                         default=False, help='only print the template name that will be generated')
     args = parser.parse_args()
@@ -318,6 +334,10 @@ def main():
     stream = args.stream or cfme_data['template_upload']['stream']
     upload_url = args.image_url
     provider_type = args.provider_type or cfme_data['template_upload']['provider_type']
+    if provider_type == 'all':
+        provider_types = sorted(TYPE_MODULES)
+    else:
+        provider_types = [p.strip() for p in (provider_type or '').split(',') if p.strip()]
 
     if args.provider_data is not None:
         local_datafile = open(args.provider_data, 'r').read()
@@ -358,76 +378,77 @@ def main():
             logger.exception("No valid checksum file for %r, Skipping", key)
             continue
 
-        kwargs = {}
-        module = None
-        if not provider_type:
+        if not provider_types:
             sys.exit('specify the provider_type')
+        modules = {}
+        for provider_type in provider_types:
+            module = TYPE_MODULES.get(provider_type)
+            if not module:
+                logger.error('Could not match module to given provider type %r', provider_type)
+                return 1
+            if module in dir_files:
+                modules[provider_type] = module
+        if not modules:
+            continue
 
-        if provider_type == 'openstack':
-            module = 'template_upload_rhos'
-            if module not in dir_files:
-                continue
-        elif provider_type == 'rhevm':
-            module = 'template_upload_rhevm'
-            if module not in dir_files:
-                continue
-        elif provider_type == 'virtualcenter':
-            module = 'template_upload_vsphere'
-            if module not in dir_files:
-                continue
-        elif provider_type == 'scvmm':
-            module = 'template_upload_scvmm'
-            if module not in dir_files:
-                continue
-        elif provider_type == 'gce':
-            module = 'template_upload_gce'
-            if module not in dir_files:
-                continue
-        elif provider_type == 'ec2':
-            module = 'template_upload_ec2'
-            if module not in dir_files:
-                continue
-        elif provider_type == 'openshift':
-            module = 'template_upload_openshift'
-            if module not in dir_files:
-                continue
-
-        if not module:
-            logger.error('Could not match module to given provider type')
-            return 1
-        kwargs['stream'] = stream
-        kwargs['image_url'] = dir_files[module]
-        if args.provider_data is not None:
-            kwargs['provider_data'] = provider_data
-        else:
-            kwargs['provider_data'] = None
-
-        if cfme_data['template_upload']['automatic_name_strategy']:
-            kwargs['template_name'] = template_name(
-                dir_files[module],
-                dir_files[module + "_date"],
-                checksum_url,
-                get_version(url)
-            )
-            if not stream:
-                # Stream is none, using automatic naming strategy, parse stream from template name
-                template_parser = TemplateName.parse_template(kwargs['template_name'])
-                if template_parser.stream:
-                    kwargs['stream'] = template_parser.group_name
+        names = {}
+        for provider_type, module in modules.items():
+            if cfme_data['template_upload']['automatic_name_strategy']:
+                names[provider_type] = template_name(
+                    dir_files[module],
+                    dir_files[module + "_date"],
+                    checksum_url,
+                    get_version(url)
+                )
+            else:
+                names[provider_type] = None
 
         if args.print_name_only:
-            print(kwargs['template_name'])
+            for provider_type in sorted(names):
+                print(names[provider_type])
             return 0
 
-        logger.info("TEMPLATE_UPLOAD_ALL:-----Start of %r upload on: %r--------",
-            kwargs['template_name'], provider_type)
-
-        logger.info("Executing %r with the following kwargs: %r", module, kwargs)
-        getattr(__import__(module), "run")(**kwargs)
+        if args.provider_data is not None:
+            # provider_data only works with the legacy per type scripts, run them one by one
+            for provider_type, module in sorted(modules.items()):
+                kwargs = {
+                    'stream': stream_for(stream, names[provider_type]),
+                    'image_url': dir_files[module],
+                    'provider_data': provider_data,
+                    'template_name': names[provider_type],
+                }
+                logger.info("TEMPLATE_UPLOAD_ALL:-----Start of %r upload on: %r--------",
+                    kwargs['template_name'], provider_type)
+                logger.info("Executing %r with the following kwargs: %r", module, kwargs)
+                getattr(__import__(module), "run")(**kwargs)
+                logger.info("TEMPLATE_UPLOAD_ALL:------End of %r upload on: %r--------",
+                    kwargs['template_name'], provider_type)
+            return 0
 
-        logger.info("TEMPLATE_UPLOAD_ALL:------End of %r upload on: %r--------",
-            kwargs['template_name'], provider_type)
-        return 0
+        # All providers of all types at once, the image of each type is downloaded once
+        uploaders = []
+        for provider_type in sorted(modules):
+            uploaders.extend(build_uploaders(
+                [provider_type],
+                stream_for(stream, names[provider_type]),
+                names[provider_type] or TemplateName(url).template_name,
+                url.rstrip('/')))
+        logger.info("TEMPLATE_UPLOAD_ALL:-----Start of %d uploads on: %s--------",
+            len(uploaders), ', '.join(sorted(modules)))
+        results = run_uploads(uploaders, max_workers=args.max_workers)
+        image_cache.prune(keep=cfme_data['template_upload'].get('image_cache_keep', 3))
+        logger.info("TEMPLATE_UPLOAD_ALL:------End of %d uploads on: %s--------",
+            len(uploaders), ', '.join(sorted(modules)))
+        return 0 if report(results) else 1
+
+
+def stream_for(stream, template_name):
+    """Stream is none with the automatic naming strategy, parse it from the template name"""
+    if not stream and template_name:
+        template_parser = TemplateName.parse_template(template_name)
+        if template_parser.stream:
+            return template_parser.group_name
+    return stream
 
 
 if __name__ == "__main__":
@@ -5,9 +5,12 @@ marked with given tier marker(s). In the end it simply compares those two list,
 that are generated for provider but NOT marked with the tier(s)."""
 
 import argparse
-import re
+import json
 import subprocess
 import sys
+import tempfile
+
+from cfme.utils.collection_index import match_markexpr
 
 
 def check_virtualenv():
@@ -16,45 +19,32 @@ def check_virtualenv():
         raise EnvironmentError('You must activate CFME virtualenv in oder to run this script.')
 
 
-def get_pytest_collect_only_output(args, use_tier_marker=False):
+def get_collected_items(args):
     """
-    Get a string that is returned by pytest after invoking it with --collect-only argument.
-    If use_tier_marker is set to False (default), all the tests for given provider are collected.
-    If use_tier_marker is set to True, only the marked tests are collected.
+    Collect all the tests for given provider once, returning the collected items with their
+    markers (see cfme.test_framework.collection_index). Tests generated for the provider and
+    tests marked with the tier marker are both filtered from them, so collection runs only once.
     """
-    print('Getting pytest --collect-only output for provider {} {} tier marker {}.'
-        .format(
+    print('Collecting tests for provider {}.'.format(args.provider))
+    with tempfile.NamedTemporaryFile(suffix='.json') as dump:
+        pytest_args = ['pytest',
+            args.test_path,
+            '--collect-only',
+            '--long-running',
+            '--use-provider',
             args.provider,
-            'with' if use_tier_marker else 'without',
-            args.tier_marker))
-    pytest_args = ['pytest',
-        args.test_path,
-        '--collect-only',
-        '--long-running',
-        '--use-provider',
-        args.provider,
-        '-m']
-    if use_tier_marker:
-        pytest_args.append(args.tier_marker)
-    else:
-        pytest_args.append('uses_testgen')
-
-    return subprocess.check_output(pytest_args)
-
-
-def get_testcases_from_pytest_output(output):
-    """Parse raw pytest --collect-only output to get list of parametrized test cases."""
-    test_cases = []
-    testcase_regex = \
-        re.compile(r"\s*<Function '(?P<test_case_name>test_\w+)(?P<parameters>\[.+\])?'>")
-    for line in output.splitlines():
-        match = re.match(pattern=testcase_regex, string=line)
-        if match:
-            test_cases.append('{}{}'.format(
-                match.group('test_case_name'),
-                match.group('parameters') if match.group('parameters') else ''))
-
-    return test_cases
+            '--collection-index',
+            '--collection-index-dump',
+            dump.name]
+        subprocess.check_output(pytest_args)
+        with open(dump.name) as f:
+            return json.load(f)
+
+
+def get_testcases_from_items(items, marker_expression):
+    """Get list of parametrized test cases of the items matching the marker expression."""
+    return [item['nodeid'].split('::')[-1] for item in items
+            if match_markexpr(marker_expression, item['markers'])]
 
 
 def get_diff_from_lists(all, tiers):
@@ -96,10 +86,9 @@ if __name__ == '__main__':
 
     check_virtualenv()
 
-    output_with_tiers = get_pytest_collect_only_output(args, use_tier_marker=True)
-    output_without_tiers = get_pytest_collect_only_output(args, use_tier_marker=False)
-    tiers_parsed = get_testcases_from_pytest_output(output_with_tiers)
-    all_parsed = get_testcases_from_pytest_output(output_without_tiers)
+    items = get_collected_items(args)
+    tiers_parsed = get_testcases_from_items(items, args.tier_marker)
+    all_parsed = get_testcases_from_items(items, 'uses_testgen')
 
     tiers_count = len(tiers_parsed)
     all_count = len(all_parsed)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+import yaml
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+import appliances.models
+
+METADATA_MODELS = [
+    'appliance', 'appliancepool', 'delayedprovisiontask', 'group', 'groupshepherd', 'provider',
+    'template']
+
+
+def yaml_to_json(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    for model_name in METADATA_MODELS:
+        Model = apps.get_model("appliances", model_name)  # noqa
+        rows = Model.objects.using(db_alias).values_list('pk', 'object_meta_data')
+        for pk, raw in rows.iterator():
+            metadata = yaml.load(raw) or {}
+            # Round trip through the encoder so dates and similar end up as plain JSON values
+            metadata = json.loads(json.dumps(metadata, cls=DjangoJSONEncoder))
+            Model.objects.using(db_alias).filter(pk=pk).update(object_meta_json=metadata)
+
+
+def json_to_yaml(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    for model_name in METADATA_MODELS:
+        Model = apps.get_model("appliances", model_name)  # noqa
+        rows = Model.objects.using(db_alias).values_list('pk', 'object_meta_json')
+        for pk, metadata in rows.iterator():
+            Model.objects.using(db_alias).filter(pk=pk).update(
+                object_meta_data=yaml.dump(metadata or {}))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appliances', '0048_openshift_project_made_bigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name=model_name,
+            name='object_meta_json',
+            field=appliances.models.MetadataField(default=dict),
+        )
+        for model_name in METADATA_MODELS
+    ] + [
+        migrations.RunPython(yaml_to_json, json_to_yaml),
+    ] + [
+        migrations.RemoveField(
+            model_name=model_name,
+            name='object_meta_data',
+        )
+        for model_name in METADATA_MODELS
+    ]
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import base64
+import json
 import re
-import yaml
 import six
 
 try:
@@ -19,7 +19,8 @@ from contextlib import contextmanager
 from datetime import timedelta, date
 from django.contrib.auth.models import User, Group as DjangoGroup
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
 from django.db.models import Q
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
@@ -63,10 +64,26 @@ def apply_if_not_none(o, meth, *args, **kwargs):
     return getattr(o, meth)(*args, **kwargs)
 
 
+def _json_form(value):
+    """Returns ``value`` as it is stored in a metadata column."""
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+class MetadataField(JSONField):
+    """JSON field that uses the native ``jsonb`` column type on PostgreSQL.
+
+    Other backends keep the text column provided by :py:class:`json_field.JSONField`.
+    """
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return 'jsonb'
+        return super(MetadataField, self).db_type(connection)
+
+
 class MetadataMixin(models.Model):
     class Meta:
         abstract = True
-    object_meta_data = models.TextField(default=yaml.dump({}))
+    object_meta_json = MetadataField(default=dict)
     created_on = models.DateTimeField(default=timezone.now, editable=False)
     modified_on = models.DateTimeField(default=timezone.now)
 
@@ -93,26 +110,94 @@ class MetadataMixin(models.Model):
 
     @property
     def metadata(self):
-        return yaml.load(self.object_meta_data)
+        # The field is deserialized once when the row is loaded, no parsing happens here
+        return self.object_meta_json
 
     @metadata.setter
     def metadata(self, value):
         if not isinstance(value, dict):
             raise TypeError("You can store only dict in metadata!")
-        self.object_meta_data = yaml.dump(value)
+        self.object_meta_json = value
 
     @property
     @contextmanager
     def edit_metadata(self):
+        """Yields the metadata of the row for editing, saves it when the block ends.
+
+        On PostgreSQL only the keys changed in the block are written, with the same ``jsonb``
+        update as :py:meth:`update_metadata`, so keys set meanwhile without the lock are kept.
+        """
         with transaction.atomic():
             with self.metadata_lock:
                 o = type(self).objects.get(pk=self.pk)
                 metadata = o.metadata
+                original = _json_form(metadata)
                 yield metadata
-                o.metadata = metadata
-                o.save()
+                if connection.vendor == 'postgresql':
+                    edited = _json_form(metadata)
+                    changed = {key: value for key, value in edited.items()
+                               if key not in original or original[key] != value}
+                    removed = [key for key in original if key not in edited]
+                    if changed or removed:
+                        o._update_metadata_column(changed, removed)
+                else:
+                    o.metadata = metadata
+                    o.save()
         self.reload()
 
+    def _update_metadata_column(self, values=None, keys=()):
+        """Sets ``values`` and removes ``keys`` in the metadata column in one in-place update.
+
+        PostgreSQL only.
+        """
+        column = connection.ops.quote_name('object_meta_json')
+        expression, params = column, []
+        if values:
+            expression = '({} || %s::jsonb)'.format(expression)
+            params.append(json.dumps(values, cls=DjangoJSONEncoder))
+        for key in keys:
+            expression = '({} - %s)'.format(expression)
+            params.append(key)
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE {table} SET {column} = {expression}, {modified} = %s '
+                'WHERE {pk} = %s'.format(
+                    table=connection.ops.quote_name(self._meta.db_table),
+                    column=column,
+                    modified=connection.ops.quote_name('modified_on'),
+                    pk=connection.ops.quote_name(self._meta.pk.column),
+                    expression=expression),
+                params + [now, self.pk])
+        self.modified_on = now
+
+    def update_metadata(self, **values):
+        """Sets the passed keys in the metadata without touching the other keys.
+
+        On PostgreSQL this is a single ``jsonb`` merge, so no lock or re-fetch is needed. Other
+        backends fall back to :py:attr:`edit_metadata`.
+        """
+        if connection.vendor == 'postgresql':
+            self._update_metadata_column(values)
+            # the values as saved, e.g. datetimes as strings
+            self.object_meta_json.update(_json_form(values))
+        else:
+            with self.edit_metadata as metadata:
+                metadata.update(values)
+
+    def delete_metadata_keys(self, *keys):
+        """Removes the passed keys from the metadata, missing keys are ignored."""
+        if not keys:
+            return
+        if connection.vendor == 'postgresql':
+            self._update_metadata_column(keys=keys)
+            for key in keys:
+                self.object_meta_json.pop(key, None)
+        else:
+            with self.edit_metadata as metadata:
+                for key in keys:
+                    metadata.pop(key, None)
+
     @property
     def logger(self):
         return create_logger(self)
@@ -314,8 +399,7 @@ class Provider(MetadataMixin):
 
     @templates.setter
     def templates(self, value):
-        with self.edit_metadata as metadata:
-            metadata["templates"] = value
+        self.update_metadata(templates=value)
 
     @property
     def template_name_length(self):
@@ -323,8 +407,7 @@ class Provider(MetadataMixin):
 
     @template_name_length.setter
     def template_name_length(self, value):
-        with self.edit_metadata as metadata:
-            metadata["template_name_length"] = value
+        self.update_metadata(template_name_length=value)
 
     @property
     def appliances_manage_this_provider(self):
@@ -332,8 +415,7 @@ class Provider(MetadataMixin):
 
     @appliances_manage_this_provider.setter
     def appliances_manage_this_provider(self, value):
-        with self.edit_metadata as metadata:
-            metadata["appliances_manage_this_provider"] = value
+        self.update_metadata(appliances_manage_this_provider=value)
 
     @property
     def g_appliances_manage_this_provider(self):
@@ -685,14 +767,11 @@ class Template(MetadataMixin):
 
     @temporary_name.setter
     def temporary_name(self, name):
-        with self.edit_metadata as metadata:
-            metadata["temporary_name"] = name
+        self.update_metadata(temporary_name=name)
 
     @temporary_name.deleter
     def temporary_name(self):
-        with self.edit_metadata as metadata:
-            if "temporary_name" in metadata:
-                del metadata["temporary_name"]
+        self.delete_metadata_keys("temporary_name")
 
     @classmethod
     def get_versions(cls, *filters, **kwfilters):
@@ -1190,8 +1269,7 @@ class Appliance(MetadataMixin):
 
     @managed_providers.setter
     def managed_providers(self, value):
-        with self.edit_metadata as metadata:
-            metadata["managed_providers"] = value
+        self.update_metadata(managed_providers=value)
 
     @property
     def vnc_link(self):
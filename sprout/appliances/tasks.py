@@ -1272,13 +1272,41 @@ def refresh_appliances_provider(self, provider_id):
         # Ignore this provider
         return
     vms = provider.api.list_vms()
+    summary = reconcile_appliances(provider, vms, logger=self.logger)
+    self.logger.info(
+        "Reconciled {} appliances in {}: {} updated, {} orphaned, {} unchanged".format(
+            summary['total'], provider_id, summary['updated'], summary['orphaned'],
+            summary['unchanged']))
+    return summary
+
+
+RECONCILED_APPLIANCE_FIELDS = (
+    'name', 'uuid', 'ip_address', 'power_state', 'power_state_changed', 'swap', 'ssh_failed')
+
+
+def reconcile_appliances(provider, vms, logger=None):
+    """Matches the provider VMs by UUID or name with the appliances stored in the database.
+
+    The comparison happens in memory and only the appliances whose fields actually changed are
+    written, all of them inside one transaction and restricted to the changed columns.
+
+    Returns:
+        A :py:class:`dict` with ``total``, ``updated``, ``orphaned`` and ``unchanged`` counts.
+    """
     dict_vms = {}
     uuid_vms = {}
     for vm in vms:
         dict_vms[vm.name] = vm
         if vm.uuid:
             uuid_vms[vm.uuid] = vm
-    for appliance in Appliance.objects.filter(template__provider=provider):
+    appliances = Appliance.objects\
+        .filter(template__provider=provider)\
+        .select_related('template', 'template__provider')
+    changes = []
+    summary = {'total': 0, 'updated': 0, 'orphaned': 0, 'unchanged': 0}
+    for appliance in appliances:
+        summary['total'] += 1
+        original = {field: getattr(appliance, field) for field in RECONCILED_APPLIANCE_FIELDS}
         if appliance.uuid is not None and appliance.uuid in uuid_vms:
             vm = uuid_vms[appliance.uuid]
             # Using the UUID and change the name if it changed
@@ -1286,7 +1314,6 @@ def refresh_appliances_provider(self, provider_id):
             appliance.ip_address = vm.ip
             appliance.set_power_state(Appliance.POWER_STATES_MAPPING.get(
                 vm.state, Appliance.Power.UNKNOWN))
-            appliance.save()
         elif appliance.name in dict_vms:
             vm = dict_vms[appliance.name]
             # Using the name, and then retrieve uuid
@@ -1294,13 +1321,29 @@ def refresh_appliances_provider(self, provider_id):
             appliance.ip_address = vm.ip
             appliance.set_power_state(Appliance.POWER_STATES_MAPPING.get(
                 vm.state, Appliance.Power.UNKNOWN))
-            appliance.save()
-            self.logger.info("Retrieved UUID for appliance {}/{}: {}".format(
-                appliance.id, appliance.name, appliance.uuid))
+            if logger is not None and appliance.uuid != original['uuid']:
+                logger.info("Retrieved UUID for appliance {}/{}: {}".format(
+                    appliance.id, appliance.name, appliance.uuid))
         else:
             # Orphaned :(
             appliance.set_power_state(Appliance.Power.ORPHANED)
-            appliance.save()
+            summary['orphaned'] += 1
+        changed = {
+            field: getattr(appliance, field)
+            for field, value in original.items()
+            if getattr(appliance, field) != value}
+        if changed:
+            changes.append((appliance.pk, changed))
+        else:
+            summary['unchanged'] += 1
+    if changes:
+        now = timezone.now()
+        with transaction.atomic():
+            for pk, changed in changes:
+                changed['modified_on'] = now
+                Appliance.objects.filter(pk=pk).update(**changed)
+    summary['updated'] = len(changes)
+    return summary
 
 
 @singleton_task()
@@ -1330,8 +1373,7 @@ def check_templates_in_provider(self, provider_id):
         self.logger.info("Provider %s will be marked as working", provider_id)
         provider.working = True
         provider.save(update_fields=['working'])
-        with provider.edit_metadata as metadata:
-            metadata["templates"] = templates
+        provider.update_metadata(templates=templates)
     if not provider.working:
         return
     # Check Sprout template existence
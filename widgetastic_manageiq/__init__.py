@@ -2729,6 +2729,37 @@ class TimelinesChart(View):
         'and contains(@class, "timeline-pf-drop")]'
     )
 
+    # Reads the drops of the given category positions at once, returns one list per position with
+    # [is group, data-content, element] for every drop. Elements are only returned for groups,
+    # their events are listed in the legend after clicking them.
+    EVENTS_SCRIPT = """
+        var root = arguments[0], positions = arguments[1], result = [], lines = [];
+        var hasClass = function (el, name) {
+            return (" " + (el.getAttribute("class") || "") + " ").indexOf(" " + name) >= 0;
+        };
+        var groups = root.getElementsByTagName("g");
+        for (var i = 0; i < groups.length; i++) {
+            if (groups[i].getAttribute("class") === "timeline-pf-drop-line" &&
+                    hasClass(groups[i].parentNode, "timeline-pf-drops-container")) {
+                lines.push(groups[i]);
+            }
+        }
+        for (var p = 0; p < positions.length; p++) {
+            var drops = [], line = lines[positions[p] - 1];
+            var children = line ? line.children || line.childNodes : [];
+            for (var j = 0; j < children.length; j++) {
+                var drop = children[j];
+                if (drop.nodeName.toLowerCase() !== "text" || !hasClass(drop, "timeline-pf-drop")) {
+                    continue;
+                }
+                var group = hasClass(drop, "timeline-pf-event-group");
+                drops.push([group, drop.getAttribute("data-content"), group ? drop : null]);
+            }
+            result.push(drops);
+        }
+        return result;
+    """
+
     legend = Table(locator='//div[@id="legend"]/table')
     zoom = TimelinesZoomSlider(locator='//input[@id="timeline-pf-slider"]')
 
@@ -2783,17 +2814,30 @@ class TimelinesChart(View):
             group,
         )
 
+    def _raw_events(self, positions):
+        """Returns the drops of the categories at ``positions``, see ``EVENTS_SCRIPT``"""
+        try:
+            return self.browser.execute_script(
+                self.EVENTS_SCRIPT, self.browser.element(self), list(positions))
+        except WebDriverException as e:
+            self.logger.warning("Could not read the timeline events with JS: %s", e)
+        # one round trip per event
+        return [
+            [(self._is_group(raw_event), self.browser.get_attribute("data-content", raw_event),
+              raw_event)
+             for raw_event in self.browser.elements(self.EVENTS.format(pos=position))]
+            for position in positions]
+
     def get_events(self, *categories):
 
         got_categories = self.get_categories(*categories)
+        raw_events = self._raw_events([cat_position for cat_position, _ in got_categories])
         events = []
-        for category in got_categories:
-            cat_position, cat_name = category
+        for (_, cat_name), category_events in zip(got_categories, raw_events):
             # obtaining events for each category
-            for raw_event in self.browser.elements(self.EVENTS.format(pos=cat_position)):
-                if not self._is_group(raw_event):
+            for is_group, event_text, raw_event in category_events:
+                if not is_group:
                     # if ordinary event
-                    event_text = self.browser.get_attribute("data-content", raw_event)
                     self.logger.debug("RAW events in get_events: %r", event_text)
                     events.append(self._prepare_event(event_text, cat_name))
                 else:
@@ -4249,6 +4293,42 @@ class LineChart(Widget, ClickableMixin):
     X_AXIS = ".//*[contains(@class, 'c3-axis c3-axis-x')]/*[contains(@class, 'tick')]"
     tooltip = Table(locator='.//div[contains(@class,"c3-tooltip-container")]/table')
     LEGENDS = ".//*[contains(@class, 'c3-legend-item c3-legend-item-')]"
+    # Renders the tooltip of every x index off-screen, the same way C3 does on hover, and reads
+    # the title and the name/value rows out of it. Returns null if the C3 chart object is not
+    # available, so the data has to be read by hovering over the chart.
+    DATA_SCRIPT = """
+        var root = arguments[0], charts = window.ManageIQ && ManageIQ.charts && ManageIQ.charts.c3;
+        var chart = null;
+        for (var key in charts || {}) {
+            var candidate = charts[key];
+            if (candidate && candidate.element && root.contains(candidate.element)) {
+                chart = candidate;
+                break;
+            }
+        }
+        if (!chart || !chart.internal || !chart.internal.getYFormat) { return null; }
+        var $$ = chart.internal, targets = $$.filterTargetsToShow($$.data.targets);
+        var container = document.createElement("div"), data = {};
+        var count = targets.length ? targets[0].values.length : 0;
+        for (var i = 0; i < count; i++) {
+            var selected = targets.map(function (t) {
+                return $$.addName($$.getValueOnIndex(t.values, i));
+            });
+            container.innerHTML = $$.config.tooltip_contents.call(
+                $$, selected, $$.axis.getXAxisTickFormat(), $$.getYFormat(false), $$.color);
+            var title = container.querySelector("th");
+            if (!title) { continue; }
+            var values = {}, rows = container.querySelectorAll("tr");
+            for (var j = 0; j < rows.length; j++) {
+                var cells = rows[j].querySelectorAll("td");
+                if (cells.length >= 2) {
+                    values[cells[0].textContent.trim()] = cells[1].textContent.trim();
+                }
+            }
+            data[title.textContent.trim()] = values;
+        }
+        return data;
+    """
 
     def __init__(self, parent, id=None, locator=None, logger=None):
         """Create the widget"""
@@ -4300,8 +4380,23 @@ class LineChart(Widget, ClickableMixin):
             leg = self._legends.get(leg)
         return "c3-legend-item-hidden" not in self.browser.classes(leg)
 
+    @property
+    def _js_data(self):
+        """Data of the displayed legends read from the C3 chart object in a single call
+
+        Returns ``None`` if the chart object is not available.
+        """
+        try:
+            return self.browser.execute_script(self.DATA_SCRIPT, self.browser.element(self))
+        except WebDriverException as e:
+            self.logger.warning("Could not read the chart data with JS: %s", e)
+            return None
+
     @property
     def _get_data(self):
+        data = self._js_data
+        if data is not None:
+            return data
         data = {}
         for el in self._elements.values():
             self.tooltip.clear_cache()
@@ -4385,6 +4480,9 @@ class LineChart(Widget, ClickableMixin):
         Returns:
             :py:class:`dict` data for selected timestamp
         """
+        data = self._js_data
+        if data is not None:
+            return data.get(timestamp, {})
         el = self._elements.get(timestamp)
         self.browser.move_to_element(el)
         tooltip_data = {}